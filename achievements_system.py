@@ -111,37 +111,6 @@ class AchievementsSystem:
                 "icon": "✨"
             }
         }
-        
-        # Create achievements table if not exists
-        self.setup_achievements_table()
-    
-    def setup_achievements_table(self):
-        """Create achievements table in database"""
-        try:
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                achievement_id TEXT NOT NULL,
-                unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, achievement_id)
-            )
-            ''')
-            
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS achievement_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                achievement_type TEXT NOT NULL,
-                progress INTEGER DEFAULT 0,
-                UNIQUE(user_id, achievement_type)
-            )
-            ''')
-            
-            self.db.conn.commit()
-            logger.info("Achievements tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating achievements tables: {e}")
     
     def setup_achievement_commands(self, bot):
         """Setup achievement-related commands"""
@@ -198,15 +167,7 @@ class AchievementsSystem:
         async def achievement_leaderboard(ctx):
             """View achievement leaderboard"""
             try:
-                self.db.c.execute('''
-                SELECT user_id, COUNT(*) as achievement_count 
-                FROM achievements 
-                GROUP BY user_id 
-                ORDER BY achievement_count DESC 
-                LIMIT 10
-                ''')
-                
-                leaderboard = self.db.c.fetchall()
+                leaderboard = await bot.leaderboards.get('achievements')
                 
                 embed = create_embed(
                     "🏆 BAŞARI SIRALAMASI",
@@ -214,24 +175,7 @@ class AchievementsSystem:
                     discord.Color.gold()
                 )
                 
-                leaderboard_text = ""
-                for i, (user_id, count) in enumerate(leaderboard, 1):
-                    try:
-                        user = bot.get_user(user_id)
-                        username = user.display_name if user else f"User #{user_id}"
-                        
-                        if i == 1:
-                            leaderboard_text += f"👑 **{username}** - {count} başarı\n"
-                        elif i == 2:
-                            leaderboard_text += f"🥈 **{username}** - {count} başarı\n"
-                        elif i == 3:
-                            leaderboard_text += f"🥉 **{username}** - {count} başarı\n"
-                        else:
-                            leaderboard_text += f"{i}. **{username}** - {count} başarı\n"
-                    except:
-                        continue
-                
-                embed.add_field(name="🏆 En İyiler", value=leaderboard_text or "Henüz başarı yok!", inline=False)
+                embed.add_field(name="🏆 En İyiler", value=leaderboard.text or "Henüz başarı yok!", inline=False)
                 await ctx.send(embed=embed)
                 
             except Exception as e:
@@ -252,23 +196,30 @@ class AchievementsSystem:
             if achievement_id not in self.achievements:
                 return False  # Invalid achievement
             
-            # Award achievement
-            self.db.c.execute('''
-            INSERT INTO achievements (user_id, achievement_id) 
-            VALUES (?, ?)
-            ''', (user_id, achievement_id))
-            
             achievement = self.achievements[achievement_id]
-            
-            # Give rewards
             alliance = self.db.get_user_alliance(user_id)
-            if alliance:
-                alliance_id = alliance[0]
-                self.db.update_alliance_resources(alliance_id, 
-                                                achievement['reward_gold'], 
-                                                achievement['reward_soldiers'])
             
-            self.db.conn.commit()
+            def award(cur):
+                # Award achievement (re-checked on the writer so it is paid once)
+                cur.execute('SELECT id FROM achievements WHERE user_id = ? AND achievement_id = ?', 
+                            (user_id, achievement_id))
+                if cur.fetchone():
+                    return False
+                cur.execute('''
+                INSERT INTO achievements (user_id, achievement_id) 
+                VALUES (?, ?)
+                ''', (user_id, achievement_id))
+                
+                # Give rewards
+                if alliance:
+                    self.db.update_alliance_resources(alliance[0], 
+                                                    achievement['reward_gold'], 
+                                                    achievement['reward_soldiers'],
+                                                    "achievement_reward")
+                return True
+            
+            if not await self.db.aio.run_write(award):
+                return False
             
             # Notify user if context available
             if ctx:
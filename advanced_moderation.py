@@ -9,53 +9,6 @@ logger = logging.getLogger(__name__)
 class AdvancedModerationSystem:
     def __init__(self, database):
         self.db = database
-        self.setup_moderation_tables()
-    
-    def setup_moderation_tables(self):
-        """Create advanced moderation tables"""
-        try:
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS user_infractions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                infraction_type TEXT NOT NULL,
-                reason TEXT,
-                moderator_id INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NULL,
-                active BOOLEAN DEFAULT TRUE
-            )
-            ''')
-            
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS moderation_config (
-                guild_id INTEGER PRIMARY KEY,
-                log_channel_id INTEGER,
-                mute_role_id INTEGER,
-                auto_mod_enabled BOOLEAN DEFAULT TRUE,
-                warn_threshold INTEGER DEFAULT 3,
-                auto_ban_enabled BOOLEAN DEFAULT FALSE
-            )
-            ''')
-            
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS message_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                message_id INTEGER UNIQUE,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                content TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                deleted_at TIMESTAMP NULL
-            )
-            ''')
-            
-            self.db.conn.commit()
-            logger.info("Advanced moderation tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating moderation tables: {e}")
     
     def setup_moderation_commands(self, bot):
         """Setup advanced moderation commands"""
@@ -100,6 +53,7 @@ class AdvancedModerationSystem:
                     INSERT INTO user_infractions (user_id, guild_id, infraction_type, reason, moderator_id, expires_at)
                     VALUES (?, ?, 'mute', 'Otomatik susturma - 3 uyarı', ?, ?)
                     ''', (member.id, ctx.guild.id, bot.user.id, mute_until))
+                    self.db.conn.commit()
                     
                     try:
                         await member.timeout(mute_until, reason="3 uyarı - otomatik susturma")
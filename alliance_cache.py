@@ -0,0 +1,190 @@
+import re
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from performance_monitor import TimedCursor
+
+logger = logging.getLogger(__name__)
+
+AllianceRow = Tuple  # Full ``SELECT * FROM alliances`` row
+Membership = Optional[Tuple[int, str]]  # (alliance_id, role), None when the user has no house
+
+# Sentinel for "not cached" so that a cached ``None`` membership still counts as a hit
+MISS = object()
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+_ALLIANCES_RE = re.compile(r"\balliances\b", re.IGNORECASE)
+_MEMBERS_RE = re.compile(r"\bmembers\b", re.IGNORECASE)
+
+def is_write_statement(sql: str) -> bool:
+    return sql.lstrip()[:7].upper().startswith(_WRITE_PREFIXES)
+
+class AllianceCache:
+    """Write-through in-process cache of alliance rows and user→alliance membership"""
+
+    def __init__(self):
+        self._by_id: Dict[int, AllianceRow] = {}
+        self._id_by_name: Dict[str, int] = {}
+        self._membership: Dict[int, Membership] = {}
+        self._lock = threading.Lock()
+        # Bumped on every write so a slow read can't refill the cache with a stale row
+        self._generation = 0
+        # Written since the writer's last commit/rollback: a read in between may
+        # have refilled them with the old committed row
+        self._alliances_written = False
+        self._members_written = False
+        # Write-through rows of the open writer transaction, published on commit
+        self._staged: Dict[int, AllianceRow] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ===============================
+    # LOOKUPS
+    # ===============================
+
+    def get_by_id(self, alliance_id: int):
+        with self._lock:
+            row = self._by_id.get(alliance_id, MISS)
+            self._count(row)
+            return row
+
+    def get_by_name(self, name: str):
+        with self._lock:
+            alliance_id = self._id_by_name.get(name)
+            row = self._by_id.get(alliance_id, MISS) if alliance_id is not None else MISS
+            self._count(row)
+            return row
+
+    def get_membership(self, user_id: int):
+        with self._lock:
+            membership = self._membership.get(user_id, MISS)
+            self._count(membership)
+            return membership
+
+    def _count(self, value):
+        if value is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    # ===============================
+    # WRITES
+    # ===============================
+
+    def generation(self) -> int:
+        """Take before a read-through query and pass to ``fill``/``fill_membership``"""
+        with self._lock:
+            return self._generation
+
+    def put(self, row: AllianceRow):
+        """Write-through: stage the row a write just produced until its transaction commits"""
+        if not row:
+            return
+        with self._lock:
+            self._generation += 1
+            self._staged[row[0]] = row
+
+    def fill(self, row: AllianceRow, generation: int):
+        """Read-through: store a queried row unless a write happened meanwhile"""
+        if not row:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._store(row)
+
+    def fill_membership(self, user_id: int, membership: Membership, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._membership[user_id] = membership
+
+    def _store(self, row):
+        self._by_id[row[0]] = row
+        self._id_by_name[row[1]] = row[0]
+
+    def invalidate_alliances(self):
+        with self._lock:
+            self._generation += 1
+            self._by_id.clear()
+            self._id_by_name.clear()
+
+    def invalidate_memberships(self):
+        with self._lock:
+            self._generation += 1
+            self._membership.clear()
+
+    def clear(self):
+        """Drop everything (e.g. after a rollback)"""
+        self.invalidate_alliances()
+        self.invalidate_memberships()
+
+    def note_write(self, sql: Optional[str]):
+        """Invalidate whatever a raw write statement may have touched (None: unknown script)"""
+        if sql is None:
+            self._alliances_written = self._members_written = True
+            self._staged.clear()
+            self.clear()
+            return
+        if not is_write_statement(sql):
+            return
+        if _ALLIANCES_RE.search(sql):
+            self._alliances_written = True
+            self._staged.clear()  # A raw write may have changed a staged row
+            self.invalidate_alliances()
+        if _MEMBERS_RE.search(sql):
+            self._members_written = True
+            self.invalidate_memberships()
+
+    def note_transaction_end(self, committed: bool):
+        """Writer commit/rollback: invalidate again what its writes touched.
+
+        The generation is bumped when a statement executes, not when it
+        commits, so a read between the two may have cached the old row. A
+        commit then publishes the staged write-through rows; a rollback drops
+        them along with everything else.
+        """
+        if not committed:
+            self.clear()
+        else:
+            if self._alliances_written:
+                self.invalidate_alliances()
+            if self._members_written:
+                self.invalidate_memberships()
+        with self._lock:
+            if committed and self._staged:
+                self._generation += 1
+                for row in self._staged.values():
+                    self._store(row)
+            self._staged.clear()
+        self._alliances_written = self._members_written = False
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "alliances_cached": len(self._by_id),
+                "memberships_cached": len(self._membership)
+            }
+
+class InvalidatingCursor(TimedCursor):
+    """Writer cursor that reports every statement to ``on_write`` (None for scripts)
+    so caches can invalidate on raw writes"""
+
+    def __init__(self, connection, monitor, on_write):
+        super().__init__(connection, monitor)
+        self._on_write = on_write
+
+    def execute(self, sql, parameters=()):
+        self._on_write(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._on_write(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self._on_write(None)
+        return super().executescript(sql_script)
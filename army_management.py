@@ -7,6 +7,9 @@ import discord
 
 logger = logging.getLogger(__name__)
 
+ARMY_UPKEEP_STATE_KEY = 'army_upkeep_last_day'
+UPKEEP_RESOURCES = ('food', 'iron', 'wood')
+
 class ArmyManagement:
     def __init__(self, database):
         self.db = database
@@ -28,6 +31,13 @@ class ArmyManagement:
             'iron': 0.1,
             'wood': 0.05
         }
+        
+        # Morale lost per day at a total shortage of each resource (scaled by the missing share)
+        self.shortage_morale_penalty = {
+            'food': 20,
+            'iron': 5,
+            'wood': 5
+        }
 
     def get_army_status(self, house_id):
         """Get complete army status for a house"""
@@ -94,6 +104,125 @@ class ArmyManagement:
             'wood': int(soldier_count * self.maintenance_costs['wood'])
         }
 
+    async def apply_daily_upkeep(self):
+        """Charge every house's daily army upkeep in one set-based pass"""
+        try:
+            result = await self.db.aio.run_write(self._apply_upkeep)
+            if result:
+                houses, short_houses = result
+                logger.info(f"Applied army upkeep to {houses} houses ({short_houses} short of supplies)")
+        except Exception as e:
+            logger.error(f"Army upkeep error: {e}")
+
+    def _apply_upkeep(self, cur):
+        """Deduct ``_calculate_daily_maintenance`` for all houses at once (runs on the writer thread).
+
+        Upkeep comes out of house_resources first (oldest row first) and the
+        army's field food_supplies cover any food left over. Whatever is still
+        missing lowers morale by ``shortage_morale_penalty`` scaled by the
+        missing share. Runs at most once per UTC day, so a restart doesn't
+        charge twice. Returns (houses charged, houses short) or None.
+        """
+        cur.execute("SELECT date('now')")
+        today = cur.fetchone()[0]
+        if self.db.get_state(ARMY_UPKEEP_STATE_KEY) == today:
+            return None
+        
+        params = {f"{resource}_rate": self.maintenance_costs[resource] for resource in UPKEEP_RESOURCES}
+        params.update({f"{resource}_penalty": self.shortage_morale_penalty[resource] for resource in UPKEEP_RESOURCES})
+        
+        # Needs and stock per house, computed once for the statements below
+        cur.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS army_upkeep (
+            house_id INTEGER PRIMARY KEY,
+            food_need INTEGER, iron_need INTEGER, wood_need INTEGER,
+            food_stock INTEGER, iron_stock INTEGER, wood_stock INTEGER,
+            supplies INTEGER
+        )
+        ''')
+        cur.execute('DELETE FROM army_upkeep')
+        cur.execute('''
+        INSERT INTO army_upkeep
+        SELECT a.id,
+               CAST(a.soldiers * :food_rate AS INTEGER),
+               CAST(a.soldiers * :iron_rate AS INTEGER),
+               CAST(a.soldiers * :wood_rate AS INTEGER),
+               COALESCE(hr.food, 0), COALESCE(hr.iron, 0), COALESCE(hr.wood, 0),
+               COALESCE(ar.food_supplies, 0)
+        FROM alliances a
+        LEFT JOIN (
+            SELECT house_id,
+                   SUM(CASE WHEN resource_type = 'food' THEN quantity ELSE 0 END) AS food,
+                   SUM(CASE WHEN resource_type = 'iron' THEN quantity ELSE 0 END) AS iron,
+                   SUM(CASE WHEN resource_type = 'wood' THEN quantity ELSE 0 END) AS wood
+            FROM house_resources
+            WHERE quantity > 0
+            GROUP BY house_id
+        ) hr ON hr.house_id = a.id
+        LEFT JOIN (
+            -- A house may have more than one army_resources row; one upkeep row each
+            SELECT house_id, SUM(food_supplies) AS food_supplies
+            FROM army_resources
+            GROUP BY house_id
+        ) ar ON ar.house_id = a.id
+        WHERE a.soldiers > 0
+        ''', params)
+        cur.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(food_stock + supplies < food_need OR iron_stock < iron_need OR wood_stock < wood_need), 0)
+        FROM army_upkeep
+        ''')
+        houses, short_houses = cur.fetchone()
+        
+        # Drain stock rows in id order until each house's need is met
+        cur.execute('''
+        UPDATE house_resources
+        SET quantity = quantity - drain.amount, last_updated = CURRENT_TIMESTAMP
+        FROM (
+            SELECT stock.id,
+                   MIN(stock.quantity, MAX(0, CASE stock.resource_type
+                       WHEN 'food' THEN u.food_need
+                       WHEN 'iron' THEN u.iron_need
+                       ELSE u.wood_need END - stock.before)) AS amount
+            FROM (
+                SELECT id, house_id, resource_type, quantity,
+                       COALESCE(SUM(quantity) OVER (PARTITION BY house_id, resource_type ORDER BY id
+                                                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS before
+                FROM house_resources
+                WHERE resource_type IN ('food', 'iron', 'wood') AND quantity > 0
+            ) stock
+            JOIN army_upkeep u ON u.house_id = stock.house_id
+        ) AS drain
+        WHERE house_resources.id = drain.id AND drain.amount > 0
+        ''')
+        
+        # Field supplies cover leftover food (rows drained in id order); shortages cost morale
+        cur.execute('''
+        UPDATE army_resources
+        SET food_supplies = food_supplies - MIN(food_supplies, MAX(0, u.food_need - u.food_stock - supply.before)),
+            morale = MAX(0, morale - CAST(ROUND(
+                  CASE WHEN u.food_need > 0
+                       THEN :food_penalty * MAX(0, u.food_need - u.food_stock - u.supplies) * 1.0 / u.food_need ELSE 0 END
+                + CASE WHEN u.iron_need > 0
+                       THEN :iron_penalty * MAX(0, u.iron_need - u.iron_stock) * 1.0 / u.iron_need ELSE 0 END
+                + CASE WHEN u.wood_need > 0
+                       THEN :wood_penalty * MAX(0, u.wood_need - u.wood_stock) * 1.0 / u.wood_need ELSE 0 END
+            ) AS INTEGER)),
+            last_updated = CURRENT_TIMESTAMP
+        FROM army_upkeep u
+        JOIN (
+            SELECT id, house_id,
+                   COALESCE(SUM(food_supplies) OVER (PARTITION BY house_id ORDER BY id
+                                                     ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS before
+            FROM army_resources
+        ) supply ON supply.house_id = u.house_id
+        WHERE army_resources.id = supply.id
+        ''', params)
+        
+        cur.execute('DELETE FROM army_upkeep')
+        self.db.set_state(ARMY_UPKEEP_STATE_KEY, today)
+        return houses, short_houses
+
     def upgrade_army_component(self, house_id, component, levels=1):
         """Upgrade a specific army component"""
         try:
@@ -137,7 +266,7 @@ class ArmyManagement:
             # Perform upgrade
             self.db.c.execute(f'UPDATE army_resources SET {db_field} = ? WHERE house_id = ?', 
                             (new_value, house_id))
-            self.db.update_alliance_resources(house_id, -total_cost, 0)
+            self.db.update_alliance_resources(house_id, -total_cost, 0, "army_purchase")
             self.db.conn.commit()
             
             component_names = {
@@ -187,7 +316,7 @@ class ArmyManagement:
             VALUES (?, ?, COALESCE((SELECT quantity FROM house_resources WHERE house_id = ? AND resource_type = ?), 0) + ?, 60)
             ''', (house_id, resource_type, house_id, resource_type, quantity))
             
-            self.db.update_alliance_resources(house_id, -total_cost, 0)
+            self.db.update_alliance_resources(house_id, -total_cost, 0, "army_purchase")
             self.db.conn.commit()
             
             return True, f"{format_number(quantity)} {resource_type} satın alındı! Maliyet: {format_number(total_cost)} altın"
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import DB_READ_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """Awaitable facade over Database that keeps sqlite work off the event loop.
+
+    Writes are serialized on a single dedicated writer thread, reads are spread
+    over worker threads that borrow read-only connections from the Database's
+    connection pool (WAL lets them run alongside the writer).
+    """
+
+    def __init__(self, database, read_pool_size=DB_READ_POOL_SIZE):
+        self.db = database
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=max(1, read_pool_size), thread_name_prefix="db-reader")
+
+    def _run_read(self, func, args):
+        with self.db.read_cursor() as cur:
+            return func(cur, *args)
+
+    def _run_write(self, func, args):
+        with self.db.transaction(), self.db.write_cursor() as cur:
+            return func(cur, *args)
+
+    def _run_transaction(self, func, args):
+        with self.db.transaction():
+            return func(*args)
+
+    def _run_helper(self, func, args):
+        try:
+            return func(*args)
+        finally:
+            # Legacy writes the helper left uncommitted would keep the writer locked
+            self.db.flush_legacy_writes()
+
+    async def _call(self, executor, method, *args):
+        loop = asyncio.get_running_loop()
+        if executor is self._writer:
+            self.db.flush_legacy_writes()
+            return await loop.run_in_executor(executor, self._run_helper, method, args)
+        return await loop.run_in_executor(executor, functools.partial(method, *args))
+
+    # ===============================
+    # GENERIC API
+    # ===============================
+
+    async def run_read(self, func, *args):
+        """Run ``func(cursor, *args)`` on a read-only pooled connection"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run_read, func, args)
+
+    async def run_write(self, func, *args):
+        """Run ``func(cursor, *args)`` on the writer thread as one committed transaction"""
+        self.db.flush_legacy_writes()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_write, func, args)
+
+    async def run_transaction(self, func, *args):
+        """Run ``func(*args)`` on the writer thread inside one ``Database.transaction()``"""
+        self.db.flush_legacy_writes()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_transaction, func, args)
+
+    async def run_helper(self, func, *args):
+        """Run a sync write helper ``func(*args)`` on the writer thread.
+
+        For code written against the synchronous API: ``func`` commits (or opens
+        ``transaction()``) itself, exactly as it would on the event loop.
+        """
+        return await self._call(self._writer, func, *args)
+
+    async def fetchone(self, sql, params=()):
+        """Run a read query and return the first row"""
+        def query(cur):
+            cur.execute(sql, params)
+            return cur.fetchone()
+        return await self.run_read(query)
+
+    async def fetchall(self, sql, params=()):
+        """Run a read query and return all rows"""
+        def query(cur):
+            cur.execute(sql, params)
+            return cur.fetchall()
+        return await self.run_read(query)
+
+    async def execute(self, sql, params=()):
+        """Run a single write statement and commit, returning the last row id"""
+        def write(cur):
+            cur.execute(sql, params)
+            return cur.lastrowid
+        return await self.run_write(write)
+
+    async def executemany(self, sql, seq_of_params):
+        """Run a write statement for every parameter set in one transaction"""
+        def write(cur):
+            cur.executemany(sql, seq_of_params)
+            return cur.rowcount
+        return await self.run_write(write)
+
+    # ===============================
+    # AWAITABLE DATABASE HELPERS
+    # ===============================
+
+    async def get_user_alliance(self, user_id):
+        """Get user's alliance information"""
+        return await self._call(self._readers, self.db.get_user_alliance, user_id)
+
+    async def get_alliance_by_id(self, alliance_id):
+        """Get alliance by ID"""
+        return await self._call(self._readers, self.db.get_alliance_by_id, alliance_id)
+
+    async def get_alliance_by_name(self, name):
+        """Get alliance by name"""
+        return await self._call(self._readers, self.db.get_alliance_by_name, name)
+
+    async def get_alliance_members(self, alliance_id):
+        """Get all members of an alliance"""
+        return await self._call(self._readers, self.db.get_alliance_members, alliance_id)
+
+    async def get_active_wars(self, alliance_id=None):
+        """Get active wars, optionally filtered by alliance"""
+        return await self._call(self._readers, self.db.get_active_wars, alliance_id)
+
+    async def get_income_sources(self, house_id):
+        """Get all income sources for a house"""
+        return await self._call(self._readers, self.db.get_income_sources, house_id)
+
+    async def get_user_member_data(self, user_id):
+        """Get complete member data for a user"""
+        return await self._call(self._readers, self.db.get_user_member_data, user_id)
+
+    async def update_alliance_resources(self, alliance_id, gold_change=0, soldiers_change=0, reason="adjustment"):
+        """Update alliance resources"""
+        return await self._call(self._writer, self.db.update_alliance_resources, alliance_id, gold_change,
+                                soldiers_change, reason)
+
+    async def transfer_gold(self, from_id, to_id, amount, reason):
+        """Move gold between two ledger accounts"""
+        return await self._call(self._writer, self.db.transfer_gold, from_id, to_id, amount, reason)
+
+    def close(self):
+        """Stop worker threads (connections are owned by the Database pool)"""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
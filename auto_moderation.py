@@ -1,10 +1,13 @@
 import discord
 from discord.ext import commands
 import asyncio
+import json
 import re
 import time
 from collections import defaultdict
 import logging
+from alliance_cache import is_write_statement
+from profanity_filter import get_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +18,18 @@ class AutoModerationSystem:
         self.spam_cache = defaultdict(list)
         self.warning_counts = defaultdict(int)
 
-        # Profanity filter words (basic implementation)
+        # Default profanity list; guilds can replace it (moderation_config.profanity_words)
         self.bad_words = ['spam', 'hack', 'cheat', 'bot', 'fake']
+        # guild_id -> compiled matcher, dropped whenever moderation_config is written
+        self.guild_matchers = {}
+        self._word_list_generation = 0
+        db.add_write_listener(self._on_write)
+
+    def _on_write(self, sql):
+        """Write listener: a changed word list means recompiling on the next message"""
+        if sql is None or (is_write_statement(sql) and 'moderation_config' in sql):
+            self._word_list_generation += 1
+            self.guild_matchers.clear()
 
     def setup_automod_events(self):
         """Setup automatic moderation event listeners"""
@@ -33,6 +46,47 @@ class AutoModerationSystem:
             # Then check for violations
             await self.check_message_violations(message)
 
+    def setup_automod_commands(self):
+        """Setup commands managing the per-guild profanity list"""
+
+        @self.bot.command(name='küfür_filtresi')
+        @commands.has_permissions(manage_messages=True)
+        async def profanity_list(ctx, action: str = "liste", *words: str):
+            """Küfür filtresini yönet: liste / ekle <kelimeler> / sil <kelimeler> / sıfırla"""
+            try:
+                guild_id = ctx.guild.id
+                current = await self.db.aio.run_read(self._load_word_list, guild_id)
+                custom = current is not None
+                current = set(self.bad_words if current is None else current)
+
+                if action == "ekle" and words:
+                    saved = self.set_word_list(guild_id, current | {word.strip() for word in words})
+                elif action == "sil" and words:
+                    saved = self.set_word_list(guild_id, current - {word.strip() for word in words})
+                elif action == "sıfırla":
+                    saved = self.set_word_list(guild_id, None)
+                elif action == "liste":
+                    embed = discord.Embed(
+                        title="🧹 Küfür Filtresi",
+                        description=", ".join(f"`{word}`" for word in sorted(current)) or "Liste boş",
+                        color=discord.Color.blue()
+                    )
+                    embed.set_footer(text="Sunucuya özel liste" if custom else "Varsayılan liste")
+                    await ctx.send(embed=embed)
+                    return
+                else:
+                    await ctx.send("❌ Kullanım: `!küfür_filtresi liste | ekle <kelimeler> | sil <kelimeler> | sıfırla`")
+                    return
+
+                if saved:
+                    await ctx.send(f"✅ Küfür filtresi güncellendi! ({action})")
+                else:
+                    await ctx.send("❌ Küfür filtresi kaydedilemedi!")
+
+            except Exception as e:
+                logger.error(f"Profanity list command error: {e}")
+                await ctx.send(f"❌ Küfür filtresi hatası: {str(e)}")
+
     async def check_message_violations(self, message):
         """Check message for various violations"""
         try:
@@ -80,9 +134,41 @@ class AutoModerationSystem:
         return len(self.spam_cache[user_id]) >= 5
 
     async def detect_profanity(self, message):
-        """Detect profanity in message"""
-        content = message.content.lower()
-        return any(word in content for word in self.bad_words)
+        """Detect profanity in message (whole words, after case/leetspeak folding)"""
+        matcher = await self.get_profanity_matcher(message.guild.id)
+        return matcher.find(message.content) is not None
+
+    async def get_profanity_matcher(self, guild_id):
+        """Compiled matcher for a guild's word list, loaded once until the list changes"""
+        matcher = self.guild_matchers.get(guild_id)
+        if matcher is None:
+            generation = self._word_list_generation
+            words = await self.db.aio.run_read(self._load_word_list, guild_id)
+            matcher = get_matcher(self.bad_words if words is None else words)
+            if generation == self._word_list_generation:  # Not stale: no list changed meanwhile
+                self.guild_matchers[guild_id] = matcher
+        return matcher
+
+    def _load_word_list(self, cur, guild_id):
+        """A guild's custom word list, or None for the default"""
+        cur.execute('SELECT profanity_words FROM moderation_config WHERE guild_id = ?', (guild_id,))
+        row = cur.fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def set_word_list(self, guild_id, words):
+        """Store a guild's word list (None restores the default)"""
+        try:
+            self.db.c.execute('''
+            INSERT INTO moderation_config (guild_id, profanity_words)
+            VALUES (?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET profanity_words = excluded.profanity_words
+            ''', (guild_id, None if words is None else json.dumps(sorted(set(words)), ensure_ascii=False)))
+            self.db.conn.commit()
+            self._on_write(None)  # Also drop anything loaded between the write and the commit
+            return True
+        except Exception as e:
+            logger.error(f"Error saving word list: {e}")
+            return False
 
     async def detect_excessive_caps(self, message):
         """Detect excessive caps"""
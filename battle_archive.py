@@ -0,0 +1,286 @@
+"""
+Battle log archive.
+
+Finished wars' battle logs are packed into one zlib-compressed JSON blob per
+war in ``battle_archives``; the rows are then purged from the hot
+``battle_logs`` table in batches. Generated result texts are stored as
+(result code, flavor index) and rebuilt on replay, anything else is kept
+verbatim.
+"""
+import json
+import zlib
+import logging
+from datetime import datetime
+from config import BATTLE_ARCHIVE_AFTER_HOURS, BATTLE_ARCHIVE_BATCH_WARS, BATTLE_LOG_PURGE_BATCH
+from utils import BATTLE_FLAVOR_TEXTS
+from war_system import BATTLE_RESULT_TEXTS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1  # zlib-compressed JSON, see pack_turns
+
+RESULT_CODES = list(BATTLE_RESULT_TEXTS)
+_CODE_BY_HEADLINE = {text: i for i, text in enumerate(BATTLE_RESULT_TEXTS.values())}
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+def _result_text(code, flavor_index):
+    result = RESULT_CODES[code]
+    return f"{BATTLE_RESULT_TEXTS[result]}\n*{BATTLE_FLAVOR_TEXTS[result][flavor_index]}*"
+
+def _encode_result(result):
+    """(code, flavor index, end reason) for a generated result text, None otherwise"""
+    headline, _, rest = (result or "").partition("\n")
+    code = _CODE_BY_HEADLINE.get(headline)
+    if code is None:
+        return None
+    flavor, _, end_reason = rest.partition("\n\n")
+    try:
+        flavor_index = BATTLE_FLAVOR_TEXTS[RESULT_CODES[code]].index(flavor.strip("*"))
+    except ValueError:
+        return None
+    if _result_text(code, flavor_index) != f"{headline}\n{flavor}":
+        return None
+    return code, flavor_index, end_reason
+
+def pack_turns(logs, started_at=None):
+    """Compress battle log rows into an archive payload.
+
+    ``logs`` rows are (turn_number, attacker_action, defender_action, result,
+    attacker_damage, defender_damage, timestamp). Each turn becomes
+    [turn, attacker action index, defender action index, attacker damage,
+    defender damage, result code (-1 = verbatim), flavor index, seconds since start].
+    """
+    start = _parse_time(started_at)
+    actions = []
+    action_index = {}
+    turns = []
+    texts = {}
+    end_reason = ""
+
+    def index_of(action):
+        if action not in action_index:
+            action_index[action] = len(actions)
+            actions.append(action)
+        return action_index[action]
+
+    for turn, att_action, def_action, result, att_damage, def_damage, timestamp in logs:
+        encoded = _encode_result(result)
+        if encoded is None:
+            code, flavor_index = -1, -1
+            texts[str(turn)] = result
+        else:
+            code, flavor_index, reason = encoded
+            end_reason = reason or end_reason
+        logged_at = _parse_time(timestamp)
+        offset = int((logged_at - start).total_seconds()) if start and logged_at else None
+        turns.append([turn, index_of(att_action), index_of(def_action), att_damage or 0, def_damage or 0,
+                      code, flavor_index, offset])
+
+    document = {"actions": actions, "turns": turns}
+    if texts:
+        document["texts"] = texts
+    if end_reason:
+        document["end"] = end_reason
+    return zlib.compress(json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+
+def unpack_turns(payload):
+    """Inverse of ``pack_turns``: a list of turn dicts with rebuilt result texts"""
+    document = json.loads(zlib.decompress(payload).decode("utf-8"))
+    actions = document["actions"]
+    texts = document.get("texts", {})
+    turns = []
+    for turn, att_action, def_action, att_damage, def_damage, code, flavor_index, offset in document["turns"]:
+        if code < 0:
+            result = texts.get(str(turn), "")
+        else:
+            result = _result_text(code, flavor_index)
+        turns.append({
+            "turn": turn,
+            "attacker_action": actions[att_action],
+            "defender_action": actions[def_action],
+            "attacker_damage": att_damage,
+            "defender_damage": def_damage,
+            "result": result,
+            "offset_seconds": offset
+        })
+    if turns and document.get("end") and turns[-1]["result"] and "\n\n" not in turns[-1]["result"]:
+        turns[-1]["result"] += f"\n\n{document['end']}"
+    return turns
+
+class BattleArchive:
+    """Moves finished wars from battle_logs into compressed battle_archives rows"""
+
+    def __init__(self, database, after_hours=BATTLE_ARCHIVE_AFTER_HOURS,
+                 batch_wars=BATTLE_ARCHIVE_BATCH_WARS, purge_batch=BATTLE_LOG_PURGE_BATCH):
+        self.db = database
+        self.after_hours = after_hours
+        self.batch_wars = batch_wars
+        self.purge_batch = purge_batch
+
+    # ===============================
+    # ARCHIVING
+    # ===============================
+
+    async def run(self):
+        """Archive every eligible war, then purge their hot logs, one batch per transaction"""
+        archived = raw_bytes = packed_bytes = 0
+        while True:
+            count, raw, packed = await self.db.aio.run_write(self.archive_finished_wars)
+            archived += count
+            raw_bytes += raw
+            packed_bytes += packed
+            if count < self.batch_wars:
+                break
+
+        purged = 0
+        while True:
+            deleted = await self.db.aio.run_write(self.purge_archived_logs)
+            purged += deleted
+            if deleted < self.purge_batch:
+                break
+
+        if archived or purged:
+            logger.info(f"Archived {archived} wars ({raw_bytes / 1024:.1f} KB of logs -> "
+                        f"{packed_bytes / 1024:.1f} KB), purged {purged} battle log rows")
+        return archived, purged
+
+    def archive_finished_wars(self, cur):
+        """Pack up to ``batch_wars`` finished, unarchived wars.
+
+        Returns (wars archived, result text bytes seen, payload bytes written).
+        """
+        cur.execute('''
+        SELECT w.id, w.attacker_id, w.defender_id, a1.name, a2.name, w.winner_id,
+               w.weather, w.terrain, w.battle_size, w.start_time, w.end_time
+        FROM wars w
+        LEFT JOIN alliances a1 ON a1.id = w.attacker_id
+        LEFT JOIN alliances a2 ON a2.id = w.defender_id
+        WHERE w.status != 'active' AND w.end_time <= datetime('now', ?)
+          AND NOT EXISTS (SELECT 1 FROM battle_archives ba WHERE ba.war_id = w.id)
+        ORDER BY w.id
+        LIMIT ?
+        ''', (f'-{self.after_hours} hours', self.batch_wars))
+        wars = cur.fetchall()
+
+        rows = []
+        raw_bytes = packed_bytes = 0
+        for war in wars:
+            cur.execute('''
+            SELECT turn_number, attacker_action, defender_action, result,
+                   attacker_damage, defender_damage, timestamp
+            FROM battle_logs
+            WHERE war_id = ?
+            ORDER BY turn_number
+            ''', (war[0],))
+            logs = cur.fetchall()
+            payload = pack_turns(logs, war[9])
+            raw_bytes += sum(len((log[3] or "").encode("utf-8")) for log in logs)
+            packed_bytes += len(payload)
+            rows.append(war + (len(logs), ARCHIVE_FORMAT, payload))
+
+        if rows:
+            cur.executemany('''
+            INSERT INTO battle_archives (war_id, attacker_id, defender_id, attacker_name, defender_name,
+                                         winner_id, weather, terrain, battle_size, started_at, ended_at,
+                                         turns, format, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return len(rows), raw_bytes, packed_bytes
+
+    def purge_archived_logs(self, cur):
+        """Delete up to ``purge_batch`` hot log rows of archived wars"""
+        cur.execute('''
+        DELETE FROM battle_logs WHERE id IN (
+            SELECT id FROM battle_logs
+            WHERE EXISTS (SELECT 1 FROM battle_archives ba WHERE ba.war_id = battle_logs.war_id)
+            LIMIT ?
+        )
+        ''', (self.purge_batch,))
+        return cur.rowcount
+
+    # ===============================
+    # REPLAY
+    # ===============================
+
+    def load_replay(self, cur, war_id):
+        """Replay of a war from the archive, or from the hot tables if not archived yet"""
+        cur.execute('''
+        SELECT war_id, attacker_name, defender_name, winner_id, attacker_id, defender_id,
+               weather, terrain, battle_size, turns, started_at, ended_at, format, payload
+        FROM battle_archives WHERE war_id = ?
+        ''', (war_id,))
+        archive = cur.fetchone()
+        if archive:
+            if archive[12] != ARCHIVE_FORMAT:
+                raise ValueError(f"Unknown battle archive format {archive[12]}")
+            return {
+                "war_id": archive[0],
+                "attacker": archive[1] or f"Hane #{archive[4]}",
+                "defender": archive[2] or f"Hane #{archive[5]}",
+                "winner_id": archive[3],
+                "attacker_id": archive[4],
+                "defender_id": archive[5],
+                "weather": archive[6],
+                "terrain": archive[7],
+                "battle_size": archive[8],
+                "started_at": archive[10],
+                "ended_at": archive[11],
+                "status": "ended",
+                "archived": True,
+                "archive_bytes": len(archive[13]),
+                "turns": unpack_turns(archive[13])
+            }
+
+        cur.execute('''
+        SELECT w.id, a1.name, a2.name, w.winner_id, w.attacker_id, w.defender_id,
+               w.weather, w.terrain, w.battle_size, w.start_time, w.end_time, w.status
+        FROM wars w
+        LEFT JOIN alliances a1 ON a1.id = w.attacker_id
+        LEFT JOIN alliances a2 ON a2.id = w.defender_id
+        WHERE w.id = ?
+        ''', (war_id,))
+        war = cur.fetchone()
+        if not war:
+            return None
+        cur.execute('''
+        SELECT turn_number, attacker_action, defender_action, result,
+               attacker_damage, defender_damage, timestamp
+        FROM battle_logs
+        WHERE war_id = ?
+        ORDER BY turn_number
+        ''', (war_id,))
+        start = _parse_time(war[9])
+        turns = []
+        for turn, att_action, def_action, result, att_damage, def_damage, timestamp in cur.fetchall():
+            logged_at = _parse_time(timestamp)
+            turns.append({
+                "turn": turn,
+                "attacker_action": att_action,
+                "defender_action": def_action,
+                "attacker_damage": att_damage or 0,
+                "defender_damage": def_damage or 0,
+                "result": result,
+                "offset_seconds": int((logged_at - start).total_seconds()) if start and logged_at else None
+            })
+        return {
+            "war_id": war[0],
+            "attacker": war[1] or f"Hane #{war[4]}",
+            "defender": war[2] or f"Hane #{war[5]}",
+            "winner_id": war[3],
+            "attacker_id": war[4],
+            "defender_id": war[5],
+            "weather": war[6],
+            "terrain": war[7],
+            "battle_size": war[8],
+            "started_at": war[9],
+            "ended_at": war[10],
+            "status": war[11],
+            "archived": False,
+            "archive_bytes": None,
+            "turns": turns
+        }
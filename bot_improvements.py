@@ -18,114 +18,7 @@ class BotImprovements:
     def __init__(self, bot, db):
         self.bot = bot
         self.db = db
-        self.create_tables()
-    
-    def create_tables(self):
-        """İyileştirme sistemleri için yeni tablolar oluştur"""
-        conn = self.db.conn
-        cursor = conn.cursor()
-        
-        # Gelişmiş görev sistemi
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS advanced_quests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                quest_name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                difficulty TEXT NOT NULL,
-                reward_gold INTEGER DEFAULT 0,
-                reward_soldiers INTEGER DEFAULT 0,
-                reward_power INTEGER DEFAULT 0,
-                requirements TEXT,
-                duration_hours INTEGER DEFAULT 24,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Karakter gelişim sistemi
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS character_progression (
-                user_id INTEGER PRIMARY KEY,
-                character_class TEXT DEFAULT 'Noble',
-                level INTEGER DEFAULT 1,
-                experience INTEGER DEFAULT 0,
-                skill_points INTEGER DEFAULT 0,
-                strength INTEGER DEFAULT 10,
-                intelligence INTEGER DEFAULT 10,
-                charisma INTEGER DEFAULT 10,
-                diplomacy INTEGER DEFAULT 10,
-                warfare INTEGER DEFAULT 10,
-                stealth INTEGER DEFAULT 10,
-                last_training TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Gelişmiş ekonomi sistemi
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS advanced_economy (
-                user_id INTEGER PRIMARY KEY,
-                trading_reputation INTEGER DEFAULT 0,
-                merchant_level INTEGER DEFAULT 1,
-                trade_routes INTEGER DEFAULT 0,
-                ships INTEGER DEFAULT 0,
-                caravans INTEGER DEFAULT 0,
-                market_shares TEXT DEFAULT '{}',
-                investment_portfolio TEXT DEFAULT '{}',
-                last_trade TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Savaş geçmişi ve başarılar
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS war_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                battle_type TEXT NOT NULL,
-                opponent TEXT,
-                result TEXT NOT NULL,
-                soldiers_lost INTEGER DEFAULT 0,
-                gold_gained INTEGER DEFAULT 0,
-                experience_gained INTEGER DEFAULT 0,
-                battle_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Gelişmiş evlilik sistemi
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS marriage_enhancements (
-                marriage_id INTEGER PRIMARY KEY,
-                wedding_date TIMESTAMP,
-                ceremony_type TEXT DEFAULT 'Simple',
-                dowry_gold INTEGER DEFAULT 0,
-                alliance_bonus INTEGER DEFAULT 0,
-                children_count INTEGER DEFAULT 0,
-                relationship_status TEXT DEFAULT 'Happy',
-                anniversary_rewards TEXT DEFAULT '[]',
-                FOREIGN KEY (marriage_id) REFERENCES marriages (id)
-            )
-        ''')
-        
-        # Kraliyet sistemi
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS royal_system (
-                kingdom_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                kingdom_name TEXT NOT NULL,
-                king_user_id INTEGER,
-                queen_user_id INTEGER,
-                hand_user_id INTEGER,
-                treasury INTEGER DEFAULT 10000,
-                army_size INTEGER DEFAULT 1000,
-                stability INTEGER DEFAULT 50,
-                popularity INTEGER DEFAULT 50,
-                laws TEXT DEFAULT '[]',
-                founded_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("Bot improvements tables created successfully")
+        # Tables are created by migrations.py
 
 def setup_improved_commands(bot):
     """Gelişmiş komutları bot'a ekle"""
@@ -0,0 +1,227 @@
+"""
+Table-driven combat kernel.
+
+Every combat multiplier is precomputed once into a flat table indexed by
+(house ability, weather, terrain, action, role, battle size), so a turn is a
+few index lookups. Live turns, auto-resolve and the war forecaster all share
+one kernel (``WarSystem.kernel``). Run this module directly for a per-turn
+benchmark.
+"""
+import time
+import random
+import bisect
+
+ATTACKER, DEFENDER = 0, 1
+ROLES = (ATTACKER, DEFENDER)
+
+DEFAULT_WEATHER = "normal"
+DEFAULT_TERRAIN = "ova"
+DEFAULT_BATTLE_SIZE = "orta"
+DEFAULT_ACTIONS = {ATTACKER: "saldır", DEFENDER: "savun"}
+
+# Battle size -> share of the army that fights and how hard each soldier hits
+BATTLE_SIZE_MODIFIERS = {
+    "küçük": {"soldiers_ratio": 0.3, "intensity": 0.8},
+    "orta": {"soldiers_ratio": 0.6, "intensity": 1.0},
+    "büyük": {"soldiers_ratio": 0.8, "intensity": 1.2},
+    "topyekün": {"soldiers_ratio": 1.0, "intensity": 1.5}
+}
+
+# House special abilities. "all" always applies, "attack"/"defense" only in that
+# role, "weather"/"terrain" are keyed by the war's weather/terrain name.
+HOUSE_ABILITIES = {
+    "Stark": {"defense": 1.25, "weather": {"kar": 1.15}},    # Defensive, winter bonus
+    "Lannister": {"all": 1.15},                               # Gold advantage
+    "Targaryen": {"all": 1.2},                                # Dragon heritage
+    "Baratheon": {"attack": 1.3},                             # Fury in attack
+    "Tyrell": {"all": 1.2},                                   # Numbers advantage
+    "Martell": {"all": 1.1, "terrain": {"çöl": 1.2}}          # Desert/guerrilla tactics
+}
+
+BASE_POWER = 10
+BASE_CASUALTY_RATE = 0.05  # 5% base casualty rate
+
+# Power-ratio bands: a ratio <= edge falls in that band, above the last edge in the final one
+CASUALTY_BAND_EDGES = [0.5, 0.8, 1.2, 1.5]
+ATTACKER_CASUALTY_FACTORS = [1.5, 1.3, 1.0, 0.7, 0.5]
+DEFENDER_CASUALTY_FACTORS = [0.5, 0.7, 1.0, 1.3, 1.5]
+
+MAX_CASUALTY_DIVISOR = 5  # Max 20% of a side per turn
+
+class CombatKernel:
+    """Precomputed combat multipliers and casualty rules"""
+
+    def __init__(self, battle_actions, weather_effects, terrain_effects,
+                 battle_sizes=BATTLE_SIZE_MODIFIERS, house_abilities=HOUSE_ABILITIES):
+        self.battle_actions = battle_actions
+        self.weather_effects = weather_effects
+        self.terrain_effects = terrain_effects
+        self.battle_sizes = battle_sizes
+        self.house_abilities = house_abilities
+
+        # Index 0 is "no special ability"
+        self.houses = [None] + list(house_abilities)
+        self.weathers = list(weather_effects)
+        self.terrains = list(terrain_effects)
+        self.actions = list(battle_actions)
+        self.sizes = list(battle_sizes)
+
+        self.house_index = {name: i for i, name in enumerate(self.houses) if name is not None}
+        self.weather_index = {name: i for i, name in enumerate(self.weathers)}
+        self.terrain_index = {name: i for i, name in enumerate(self.terrains)}
+        self.action_index = {name: i for i, name in enumerate(self.actions)}
+        self.size_index = {name: i for i, name in enumerate(self.sizes)}
+
+        self._default_weather = self.weather_index[DEFAULT_WEATHER]
+        self._default_terrain = self.terrain_index[DEFAULT_TERRAIN]
+        self._default_size = self.size_index[DEFAULT_BATTLE_SIZE]
+        self._default_action = {role: self.action_index[name] for role, name in DEFAULT_ACTIONS.items()}
+
+        self.shape = (len(self.houses), len(self.weathers), len(self.terrains),
+                      len(self.actions), len(ROLES), len(self.sizes))
+        strides = [1] * len(self.shape)
+        for axis in range(len(self.shape) - 2, -1, -1):
+            strides[axis] = strides[axis + 1] * self.shape[axis + 1]
+        self.strides = tuple(strides)
+
+        self.soldiers_ratio = [battle_sizes[size]["soldiers_ratio"] for size in self.sizes]
+        self.table = [0.0] * (self.strides[0] * self.shape[0])
+        # Hot path: one dict lookup by names -> (soldiers_ratio, multiplier)
+        self._entries = {}
+        for h, house in enumerate(self.houses):
+            for w, weather in enumerate(self.weathers):
+                for t, terrain in enumerate(self.terrains):
+                    for a, action in enumerate(self.actions):
+                        for role in ROLES:
+                            for s, size in enumerate(self.sizes):
+                                multiplier = self.compute_multiplier(house, weather, terrain, action, role, size)
+                                self.table[self._offset(h, w, t, a, role, s)] = multiplier
+                                self._entries[(house, action, weather, terrain, role == ATTACKER, size)] = (
+                                    self.soldiers_ratio[s], multiplier)
+
+        self.attacker_casualty_rates = [BASE_CASUALTY_RATE * f for f in ATTACKER_CASUALTY_FACTORS]
+        self.defender_casualty_rates = [BASE_CASUALTY_RATE * f for f in DEFENDER_CASUALTY_FACTORS]
+
+    def compute_multiplier(self, house, weather, terrain, action, role, size):
+        """Power per effective soldier, computed from the effect dicts (used to fill the table)"""
+        power = BASE_POWER * self.battle_sizes[size]["intensity"]
+        action_effect = self.battle_actions[action]
+        weather_effect = self.weather_effects[weather]
+        terrain_effect = self.terrain_effects[terrain]
+        if role == ATTACKER:
+            power *= action_effect["damage_multiplier"]
+            power *= weather_effect["attack_mod"]
+            power *= terrain_effect["attack_mod"]
+        else:
+            power *= action_effect["defense_multiplier"]
+            power *= weather_effect["defense_mod"]
+            power *= terrain_effect["defense_mod"]
+
+        ability = self.house_abilities.get(house)
+        if ability:
+            if "all" in ability:
+                power *= ability["all"]
+            if role == ATTACKER and "attack" in ability:
+                power *= ability["attack"]
+            if role == DEFENDER and "defense" in ability:
+                power *= ability["defense"]
+            if weather in ability.get("weather", {}):
+                power *= ability["weather"][weather]
+            if terrain in ability.get("terrain", {}):
+                power *= ability["terrain"][terrain]
+        return power
+
+    def _offset(self, house, weather, terrain, action, role, size):
+        st = self.strides
+        return house * st[0] + weather * st[1] + terrain * st[2] + action * st[3] + role * st[4] + size
+
+    # ===============================
+    # LOOKUPS
+    # ===============================
+
+    def indices(self, house_name, weather, terrain, battle_size):
+        """Resolve names to table indices, falling back to the defaults"""
+        return (self.house_index.get(house_name, 0),
+                self.weather_index.get(weather, self._default_weather),
+                self.terrain_index.get(terrain, self._default_terrain),
+                self.size_index.get(battle_size, self._default_size))
+
+    def multiplier(self, house_name, action, weather, terrain, is_attacker, battle_size=DEFAULT_BATTLE_SIZE):
+        role = ATTACKER if is_attacker else DEFENDER
+        h, w, t, s = self.indices(house_name, weather, terrain, battle_size)
+        a = self.action_index.get(action, self._default_action[role])
+        return self.table[self._offset(h, w, t, a, role, s)]
+
+    def action_multipliers(self, house_name, weather, terrain, is_attacker, battle_size=DEFAULT_BATTLE_SIZE):
+        """Multipliers for every action in ``self.actions`` order"""
+        role = ATTACKER if is_attacker else DEFENDER
+        h, w, t, s = self.indices(house_name, weather, terrain, battle_size)
+        start = self._offset(h, w, t, 0, role, s)
+        return self.table[start:start + self.strides[3] * len(self.actions):self.strides[3]]
+
+    def ratio(self, battle_size=DEFAULT_BATTLE_SIZE):
+        return self.soldiers_ratio[self.size_index.get(battle_size, self._default_size)]
+
+    def power(self, house_name, soldiers, action, weather, terrain, is_attacker, battle_size=DEFAULT_BATTLE_SIZE):
+        """Combat power of ``soldiers`` for one side"""
+        house = house_name if house_name in self.house_index else None
+        entry = self._entries.get((house, action, weather, terrain, is_attacker, battle_size))
+        if entry is None:  # Unknown name somewhere: resolve with defaults
+            entry = (self.ratio(battle_size),
+                     self.multiplier(house_name, action, weather, terrain, is_attacker, battle_size))
+        soldiers_ratio, multiplier = entry
+        return int(int(soldiers * soldiers_ratio) * multiplier)
+
+    # ===============================
+    # TURN RESOLUTION
+    # ===============================
+
+    def casualty_band(self, power_ratio):
+        return bisect.bisect_left(CASUALTY_BAND_EDGES, power_ratio)
+
+    def resolve_turn(self, att_soldiers, def_soldiers, att_power, def_power, rng=random):
+        """Roll one turn: returns (att_power, def_power, att_casualties, def_casualties)"""
+        att_power *= rng.uniform(0.8, 1.2)
+        def_power *= rng.uniform(0.8, 1.2)
+
+        band = self.casualty_band(att_power / max(def_power, 1))
+        att_casualties = int(att_soldiers * self.attacker_casualty_rates[band] * rng.uniform(0.5, 1.5))
+        def_casualties = int(def_soldiers * self.defender_casualty_rates[band] * rng.uniform(0.5, 1.5))
+
+        att_casualties = max(0, min(att_casualties, att_soldiers // MAX_CASUALTY_DIVISOR))
+        def_casualties = max(0, min(def_casualties, def_soldiers // MAX_CASUALTY_DIVISOR))
+        return att_power, def_power, att_casualties, def_casualties
+
+def benchmark(turns=200000):
+    """Per-turn cost: combat power from the table vs. recomputed, plus the casualty roll"""
+    from war_system import WarSystem
+
+    started = time.perf_counter()
+    kernel = WarSystem(None).kernel
+    build_ms = (time.perf_counter() - started) * 1000
+    rng = random.Random(7)
+    ratio = kernel.ratio("büyük")
+
+    def per_turn(step):
+        started = time.perf_counter()
+        for _ in range(turns):
+            step()
+        return (time.perf_counter() - started) / turns * 1e6
+
+    recomputed = per_turn(lambda: (
+        int(int(45000 * ratio) * kernel.compute_multiplier("Stark", "kar", "orman", "saldır", ATTACKER, "büyük")),
+        int(int(60000 * ratio) * kernel.compute_multiplier("Lannister", "kar", "orman", "savun", DEFENDER, "büyük"))))
+    table = per_turn(lambda: (
+        kernel.power("Stark", 45000, "saldır", "kar", "orman", True, "büyük"),
+        kernel.power("Lannister", 60000, "savun", "kar", "orman", False, "büyük")))
+    roll = per_turn(lambda: kernel.resolve_turn(45000, 60000, 500000, 520000, rng))
+
+    print(f"table: {len(kernel.table)} entries {kernel.shape}, built in {build_ms:.2f} ms")
+    print(f"power (recomputed): {recomputed:6.2f} us/turn")
+    print(f"power (table):      {table:6.2f} us/turn ({recomputed / max(table, 1e-9):.1f}x)")
+    print(f"casualty roll:      {roll:6.2f} us/turn")
+    print(f"full turn:          {table + roll:6.2f} us/turn")
+    return recomputed, table, roll
+
+if __name__ == "__main__":
+    benchmark()
@@ -4,9 +4,16 @@ from discord.ext import commands
 import random
 import json
 import asyncio
+import functools
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
+from war_forecast import forecast_war, RANDOM_ACTION
+from tournament_odds import duel_odds
+from order_book import SELL
+from database import TransactionRollback
+from gold_ledger import ESCROW, ACCOUNT_NAMES
+from config import BATTLE_REPLAY_TURNS_PER_PAGE, BATTLE_REPLAY_PAGE_DELAY_SECONDS
 from utils import (
     create_embed, format_number, get_house_emoji, get_weather_emoji, get_terrain_emoji,
     validate_house_name, validate_character_name, calculate_level_from_experience,
@@ -273,6 +280,7 @@ def setup_commands(bot, db, war_system, economy_system):
 • !borçlarım - Tüm borçları listele
 • !boşan - Eşinden boşan
 • !düello_çağır - Düello teklif et
+• !düello_oran - Düello olasılıkları
 • !düello_kabul - Düelloyu kabul et
 • !düello_reddet - Düelloyu reddet
 • !düellolarım - Aktif düelloları gör
@@ -316,6 +324,7 @@ def setup_commands(bot, db, war_system, economy_system):
 • !ticaret_antlaşması - Antlaşma öner
 • !turnuva_düzenle - Turnuva organize et
 • !turnuva_katıl - Turnuvaya katıl
+• !turnuva_oranlar - Turnuva olasılıkları
 • !turnuvalar - Aktif turnuvaları listele
 • !üyeler - Hane üyelerini listele
 • !vs - İki şey arasında karşılaştırma
@@ -379,7 +388,8 @@ def setup_commands(bot, db, war_system, economy_system):
                 value="`/ban <@kullanıcı> [sebep]` - Kullanıcıyı yasakla\n"
                       "`/kick <@kullanıcı> [sebep]` - Kullanıcıyı at\n"
                       "`/mute <@kullanıcı> [süre]` - Kullanıcıyı sustur\n"
-                      "`/warn <@kullanıcı> [sebep]` - Uyarı ver",
+                      "`/warn <@kullanıcı> [sebep]` - Uyarı ver\n"
+                      "`!küfür_filtresi [liste|ekle|sil|sıfırla]` - Sunucunun küfür listesi",
                 inline=False
             )
             
@@ -397,6 +407,8 @@ def setup_commands(bot, db, war_system, economy_system):
                 value="`/altın_ver <@kullanıcı> <miktar>` - Altın ver\n"
                       "`/altın_al <@kullanıcı> <miktar>` - Altın al\n"
                       "`/borç_sıfırla <hane>` - Hane borcunu sıfırla\n"
+                      "`/altın_defteri <hane> [saat]` - Hanenin altın hareketleri\n"
+                      "`/altın_mutabakat` - Hazineleri defterle karşılaştır\n"
                       "`/ekonomi_reset` - Ekonomiyi sıfırla",
                 inline=False
             )
@@ -666,12 +678,14 @@ def setup_commands(bot, db, war_system, economy_system):
                           value="`!turnuva_düzenle <isim> <tür> [ücret] [ödül]` - Turnuva düzenle\n"
                                 "`!turnuva_katıl <turnuva_id>` - Turnuvaya katıl\n"
                                 "`!turnuvalar` - Aktif turnuvaları listele\n"
+                                "`!turnuva_oranlar <turnuva_adı>` - Kazanma olasılıkları\n"
                                 "`!turnuva_başlat <turnuva_id>` - Turnuvayı başlat",
                           inline=False)
 
             embed.add_field(name="⚔️ Düello Sistemi",
                           value="`!düello_teklif <@kullanıcı> <tür> [bahis]` - Düello teklif et\n"
                                 "`!düello_kabul <düello_id>` - Düello teklifini kabul et\n"
+                                "`!düello_oran <@kullanıcı> [tür]` - Düello olasılıkları\n"
                                 "`!düellolar` - Aktif düelloları listele",
                           inline=False)
 
@@ -728,8 +742,7 @@ def setup_commands(bot, db, war_system, economy_system):
     async def list_alliances(ctx):
         """List all available houses"""
         try:
-            db.c.execute('SELECT name, region, gold, soldiers, special_ability FROM alliances ORDER BY gold DESC')
-            alliances = db.c.fetchall()
+            alliances = await db.aio.fetchall('SELECT name, region, gold, soldiers, special_ability FROM alliances ORDER BY gold DESC')
 
             if not alliances:
                 embed = create_embed("📋 Haneler", "Henüz hiç hane oluşturulmamış!", discord.Color.blue())
@@ -767,18 +780,16 @@ def setup_commands(bot, db, war_system, economy_system):
 
         try:
             # Get user alliance
-            alliance_data = db.get_user_alliance(user_id)
+            alliance_data = await db.aio.get_user_alliance(user_id)
             if not alliance_data:
                 embed = create_embed("❌ Hata", f"{target.display_name} henüz hiçbir haneye katılmamış!", discord.Color.red())
                 await ctx.send(embed=embed)
                 return
 
             # Get character data
-            db.c.execute('SELECT * FROM asoiaf_characters WHERE user_id = ?', (user_id,))
-            character = db.c.fetchone()
+            character = await db.aio.fetchone('SELECT * FROM asoiaf_characters WHERE user_id = ?', (user_id,))
 
-            db.c.execute('SELECT * FROM members WHERE user_id = ?', (user_id,))
-            member_data = db.c.fetchone()
+            member_data = await db.aio.get_user_member_data(user_id)
 
             house_emoji = get_house_emoji(alliance_data[1])
             embed = create_embed(f"{house_emoji} {target.display_name} Profili", 
@@ -1001,7 +1012,7 @@ def setup_commands(bot, db, war_system, economy_system):
             
             from army_management import ArmyManagement
             army_mgmt = ArmyManagement(db)
-            success, message = army_mgmt.upgrade_army_component(alliance[0], component, levels)
+            success, message = await db.aio.run_helper(army_mgmt.upgrade_army_component, alliance[0], component, levels)
             
             color = discord.Color.green() if success else discord.Color.red()
             icon = "✅" if success else "❌"
@@ -1027,7 +1038,7 @@ def setup_commands(bot, db, war_system, economy_system):
             
             from army_management import ArmyManagement
             army_mgmt = ArmyManagement(db)
-            success, message = army_mgmt.buy_resources(alliance[0], resource_type, quantity)
+            success, message = await db.aio.run_helper(army_mgmt.buy_resources, alliance[0], resource_type, quantity)
             
             color = discord.Color.green() if success else discord.Color.red()
             icon = "✅" if success else "❌"
@@ -1204,6 +1215,7 @@ def setup_commands(bot, db, war_system, economy_system):
             INSERT INTO trade_offers (seller_id, offer_type, resource_type, quantity, price_per_unit, total_price, created_at)
             VALUES (?, 'resource', ?, ?, ?, ?, datetime('now'))
             ''', (alliance[0], resource_type, quantity, price_per_unit, quantity * price_per_unit))
+            offer_id = db.c.lastrowid
             
             # Remove resources from house
             db.c.execute('''
@@ -1212,6 +1224,7 @@ def setup_commands(bot, db, war_system, economy_system):
             ''', (quantity, alliance[0], resource_type))
             
             db.conn.commit()
+            db.offer_book.add(offer_id, alliance[0], SELL, resource_type, quantity, price_per_unit, alliance[1])
             
             embed = create_embed("✅ Kaynak Satışa Çıkarıldı", 
                                f"**{format_number(quantity)}** {resource_type} pazara çıkarıldı!", 
@@ -1229,22 +1242,8 @@ def setup_commands(bot, db, war_system, economy_system):
     async def find_resources(ctx, resource_type: Optional[str] = None):
         """Find available resources for sale"""
         try:
-            if resource_type:
-                db.c.execute('''
-                SELECT to.*, a.name FROM trade_offers to
-                JOIN alliances a ON to.seller_id = a.id
-                WHERE to.offer_type = 'resource' AND to.resource_type = ?
-                ORDER BY to.price_per_unit ASC
-                ''', (resource_type,))
-            else:
-                db.c.execute('''
-                SELECT to.*, a.name FROM trade_offers to
-                JOIN alliances a ON to.seller_id = a.id
-                WHERE to.offer_type = 'resource'
-                ORDER BY to.resource_type, to.price_per_unit ASC
-                ''')
-            
-            offers = db.c.fetchall()
+            # Served from the in-memory offer book, cheapest first per resource
+            offers = db.offer_book.orders(SELL, resource_type, 20)
             
             if not offers:
                 filter_text = f" ({resource_type})" if resource_type else ""
@@ -1259,14 +1258,14 @@ def setup_commands(bot, db, war_system, economy_system):
             current_resource = None
             resource_text = ""
             
-            for offer in offers[:20]:  # Limit to 20 offers
-                if current_resource != offer[2]:  # resource_type
+            for offer in offers:
+                if current_resource != offer.resource:
                     if resource_text and current_resource:
                         embed.add_field(name=f"📦 {current_resource.title()}", value=resource_text, inline=False)
-                    current_resource = offer[2]
+                    current_resource = offer.resource
                     resource_text = ""
                 
-                resource_text += f"**{offer[7]}:** {format_number(offer[3])} adet - {format_number(offer[4])} altın/adet\n"
+                resource_text += f"**{offer.house_name}:** {format_number(offer.quantity)} adet - {format_number(offer.price)} altın/adet\n"
             
             if resource_text and current_resource:
                 embed.add_field(name=f"📦 {current_resource.title()}", value=resource_text, inline=False)
@@ -1324,16 +1323,15 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Process transaction
-            db.c.execute('BEGIN TRANSACTION')
-            
-            try:
-                # Transfer gold
-                db.update_alliance_resources(buyer_alliance[0], -total_cost, 0)
-                db.update_alliance_resources(seller_id, total_cost, 0)
+            # Gold, resources, offer and trade log are committed together on the writer thread
+            def purchase(cur):
+                # Transfer gold (the payer is never taken below zero)
+                paid = db.transfer_gold(buyer_alliance[0], seller_id, total_cost, "trade")
+                if paid < total_cost:
+                    raise TransactionRollback(f"Yetersiz altın! Gerekli: {format_number(total_cost)}")
                 
                 # Transfer resources
-                db.c.execute('''
+                cur.execute('''
                 INSERT OR REPLACE INTO house_resources (house_id, resource_type, quantity, quality)
                 VALUES (?, ?, COALESCE((SELECT quantity FROM house_resources WHERE house_id = ? AND resource_type = ?), 0) + ?, 60)
                 ''', (buyer_alliance[0], resource_type, buyer_alliance[0], resource_type, quantity))
@@ -1341,31 +1339,33 @@ def setup_commands(bot, db, war_system, economy_system):
                 # Update or remove offer
                 remaining_quantity = offer[3] - quantity
                 if remaining_quantity <= 0:
-                    db.c.execute('UPDATE trade_offers SET status = "completed" WHERE id = ?', (offer[0],))
+                    cur.execute('UPDATE trade_offers SET status = "completed" WHERE id = ?', (offer[0],))
                 else:
-                    db.c.execute('UPDATE trade_offers SET quantity = ?, total_price = ? WHERE id = ?', 
+                    cur.execute('UPDATE trade_offers SET quantity = ?, total_price = ? WHERE id = ?', 
                                (remaining_quantity, remaining_quantity * offer[4], offer[0]))
                 
                 # Record transaction
-                db.c.execute('''
+                cur.execute('''
                 INSERT INTO trade_transactions (buyer_id, seller_id, offer_id, quantity, total_cost)
                 VALUES (?, ?, ?, ?, ?)
                 ''', (buyer_alliance[0], seller_id, offer[0], quantity, total_cost))
-                
-                db.c.execute('COMMIT')
-                
-                seller_alliance = db.get_alliance_by_id(seller_id)
-                embed = create_embed("✅ Ticaret Tamamlandı", 
-                                   f"**{format_number(quantity)}** {resource_type} satın alındı!", 
-                                   discord.Color.green())
-                embed.add_field(name="Satıcı", value=seller_alliance[1], inline=True)
-                embed.add_field(name="Toplam Maliyet", value=f"{format_number(total_cost)} altın", inline=True)
-                embed.add_field(name="Birim Fiyat", value=f"{format_number(offer[4])} altın", inline=True)
+            
+            try:
+                await db.aio.run_write(purchase)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
                 await ctx.send(embed=embed)
-                
-            except Exception as e:
-                db.c.execute('ROLLBACK')
-                raise e
+                return
+            db.offer_book.reduce(offer[0], quantity)
+            
+            seller_alliance = db.get_alliance_by_id(seller_id)
+            embed = create_embed("✅ Ticaret Tamamlandı", 
+                               f"**{format_number(quantity)}** {resource_type} satın alındı!", 
+                               discord.Color.green())
+            embed.add_field(name="Satıcı", value=seller_alliance[1], inline=True)
+            embed.add_field(name="Toplam Maliyet", value=f"{format_number(total_cost)} altın", inline=True)
+            embed.add_field(name="Birim Fiyat", value=f"{format_number(offer[4])} altın", inline=True)
+            await ctx.send(embed=embed)
                 
         except Exception as e:
             logger.error(f"Buy resource from market error: {e}")
@@ -1603,17 +1603,24 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Create tournament
+            # Create tournament and escrow its prize pool in one writer-thread transaction
             tournament_name = f"{alliance[1]} {tournament_type.title()} Turnuvası"
-            db.c.execute('''
-            INSERT INTO tournaments (name, host_house_id, tournament_type, entry_fee, prize_pool, start_time)
-            VALUES (?, ?, ?, ?, ?, datetime('now', '+1 day'))
-            ''', (tournament_name, alliance[0], tournament_type, entry_fee, prize_pool))
-            
-            # Deduct prize pool from house gold
-            db.update_alliance_resources(alliance[0], -prize_pool, 0)
+            def create(cur):
+                cur.execute('''
+                INSERT INTO tournaments (name, host_house_id, tournament_type, entry_fee, prize_pool, start_time)
+                VALUES (?, ?, ?, ?, ?, datetime('now', '+1 day'))
+                ''', (tournament_name, alliance[0], tournament_type, entry_fee, prize_pool))
+                
+                # Deduct prize pool from house gold
+                if db.transfer_gold(alliance[0], ESCROW, prize_pool, "tournament_prize_pool") < prize_pool:
+                    raise TransactionRollback(f"Yetersiz altın! Ödül havuzu için {format_number(prize_pool)} altın gerekli.")
             
-            db.conn.commit()
+            try:
+                await db.aio.run_write(create)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
+                await ctx.send(embed=embed)
+                return
             
             embed = create_embed("🏆 Turnuva Oluşturuldu", 
                                f"**{tournament_name}** başarıyla organize edildi!", 
@@ -1719,16 +1726,17 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Join tournament
-            db.c.execute('''
-            INSERT INTO tournament_participants (tournament_id, user_id, character_skill, equipment_bonus)
-            VALUES (?, ?, ?, ?)
-            ''', (tournament[0], user_id, random.randint(40, 80), random.randint(5, 20)))
-            
-            # Pay entry fee
-            db.update_alliance_resources(alliance[0], -tournament[4], 0)
+            # Join tournament and pay the entry fee in one writer-thread transaction
+            def join(cur):
+                cur.execute('''
+                INSERT INTO tournament_participants (tournament_id, user_id, character_skill, equipment_bonus)
+                VALUES (?, ?, ?, ?)
+                ''', (tournament[0], user_id, random.randint(40, 80), random.randint(5, 20)))
+                
+                # Pay entry fee
+                db.update_alliance_resources(alliance[0], -tournament[4], 0, "tournament_entry_fee")
             
-            db.conn.commit()
+            await db.aio.run_write(join)
             
             embed = create_embed("🏆 Turnuvaya Katıldınız", 
                                f"**{tournament[1]}** turnuvasına başarıyla katıldınız!", 
@@ -1784,18 +1792,26 @@ def setup_commands(bot, db, war_system, economy_system):
             
             participants = db.c.fetchall()
             
-            # Refund entry fees
-            for participant in participants:
-                db.update_alliance_resources(participant[2], tournament[4], 0)  # alliance_id, entry_fee
-            
-            # Refund prize pool to host
-            db.update_alliance_resources(alliance[0], tournament[5], 0)  # prize_pool
-            
-            # Cancel tournament
-            db.c.execute('UPDATE tournaments SET status = "cancelled" WHERE id = ?', (tournament[0],))
-            db.c.execute('DELETE FROM tournament_participants WHERE tournament_id = ?', (tournament[0],))
+            # Cancel and refund in one writer-thread transaction
+            def cancel(cur):
+                cur.execute('UPDATE tournaments SET status = "cancelled" WHERE id = ? AND status = "open"', (tournament[0],))
+                if cur.rowcount == 0:
+                    raise TransactionRollback("Turnuva zaten kapanmış!")
+                cur.execute('DELETE FROM tournament_participants WHERE tournament_id = ?', (tournament[0],))
+                
+                # Refund entry fees
+                for participant in participants:
+                    db.update_alliance_resources(participant[2], tournament[4], 0, "tournament_entry_refund")  # alliance_id, entry_fee
+                
+                # Refund prize pool to host
+                db.transfer_gold(ESCROW, alliance[0], tournament[5], "tournament_prize_refund")  # prize_pool
             
-            db.conn.commit()
+            try:
+                await db.aio.run_write(cancel)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
+                await ctx.send(embed=embed)
+                return
             
             embed = create_embed("🏆 Turnuva İptal Edildi", 
                                f"**{tournament[1]}** turnuvası iptal edildi!", 
@@ -1842,71 +1858,31 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Get participants and simulate tournament
-            db.c.execute('''
-            SELECT tp.*, m.alliance_id 
-            FROM tournament_participants tp
-            JOIN members m ON tp.user_id = m.user_id
-            WHERE tp.tournament_id = ? AND tp.eliminated = 0
-            ORDER BY (tp.character_skill + tp.equipment_bonus + ABS(RANDOM() % 30)) DESC
-            ''', (tournament[0],))
-            
-            participants = db.c.fetchall()
+            # Play the whole bracket and pay out prizes in one transaction
+            results = await db.aio.run_write(bot.tournament_system.run_tournament, tournament[0])
             
-            if len(participants) < 2:
+            if results is None:
                 embed = create_embed("❌ Hata", "Turnuvayı bitirmek için en az 2 katılımcı gerekli!", discord.Color.red())
                 await ctx.send(embed=embed)
                 return
             
-            # Award prizes
-            prize_pool = tournament[5]  # prize_pool
-            first_prize = int(prize_pool * 0.5)
-            second_prize = int(prize_pool * 0.3)
-            third_prize = int(prize_pool * 0.2)
-            
-            winners = []
-            if len(participants) >= 1:
-                # First place
-                db.update_alliance_resources(participants[0][9], first_prize, 0)  # alliance_id
-                db.c.execute('UPDATE tournament_participants SET final_position = 1, prize_won = ? WHERE id = ?', 
-                           (first_prize, participants[0][0]))
-                winners.append((1, participants[0][2], first_prize))  # position, user_id, prize
-            
-            if len(participants) >= 2:
-                # Second place
-                db.update_alliance_resources(participants[1][9], second_prize, 0)
-                db.c.execute('UPDATE tournament_participants SET final_position = 2, prize_won = ? WHERE id = ?', 
-                           (second_prize, participants[1][0]))
-                winners.append((2, participants[1][2], second_prize))
-            
-            if len(participants) >= 3:
-                # Third place
-                db.update_alliance_resources(participants[2][9], third_prize, 0)
-                db.c.execute('UPDATE tournament_participants SET final_position = 3, prize_won = ? WHERE id = ?', 
-                           (third_prize, participants[2][0]))
-                winners.append((3, participants[2][2], third_prize))
-            
-            # Mark tournament as finished
-            db.c.execute('UPDATE tournaments SET status = "finished", end_time = datetime("now") WHERE id = ?', 
-                        (tournament[0],))
-            
-            db.conn.commit()
-            
             embed = create_embed("🏆 Turnuva Tamamlandı", 
                                f"**{tournament[1]}** turnuvası sona erdi!", 
                                discord.Color.gold())
             
             winner_text = ""
             medals = ["🥇", "🥈", "🥉"]
-            for position, user_id, prize in winners:
+            for position, user_id, prize in results["podium"]:
                 user = bot.get_user(user_id)
                 winner_text += f"{medals[position-1]} **{user.display_name if user else 'Bilinmeyen'}**: {format_number(prize)} altın\n"
             
             embed.add_field(name="🏆 Kazananlar", value=winner_text, inline=False)
-            embed.add_field(name="📊 İstatistikler", 
-                          value=f"Toplam Katılımcı: {len(participants)}\n"
-                                f"Toplam Ödül: {format_number(prize_pool)} altın", 
-                          inline=False)
+            stats_text = (f"Toplam Katılımcı: {results['participants']}\n"
+                          f"Tur: {results['rounds']} | Maç: {results['matches']}\n"
+                          f"Toplam Ödül: {format_number(results['prize_pool'])} altın")
+            if results["refunded"]:
+                stats_text += f"\nOrganizatöre İade: {format_number(results['refunded'])} altın"
+            embed.add_field(name="📊 İstatistikler", value=stats_text, inline=False)
             await ctx.send(embed=embed)
                 
         except Exception as e:
@@ -1914,6 +1890,58 @@ def setup_commands(bot, db, war_system, economy_system):
             embed = create_embed("❌ Hata", f"Turnuva bitirme hatası: {str(e)}", discord.Color.red())
             await ctx.send(embed=embed)
 
+    @bot.command(name='turnuva_oranlar', aliases=['tournament_odds'])
+    async def tournament_odds(ctx, *, tournament_name: str):
+        """Show every entrant's chances in an open tournament"""
+        try:
+            tournament = await db.aio.fetchone('''
+            SELECT * FROM tournaments 
+            WHERE name LIKE ? AND status = 'open'
+            ''', (f'%{tournament_name}%',))
+            
+            if not tournament:
+                embed = create_embed("❌ Hata", f"'{tournament_name}' turnuvası bulunamadı!", discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            entrants = await db.aio.run_read(bot.tournament_system._load_entrants, tournament[0])
+            if len(entrants) < 2:
+                embed = create_embed("❌ Hata", "Olasılık hesabı için en az 2 katılımcı gerekli!", discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            # Simulate off the event loop (cached until someone joins)
+            rows, simulations, elapsed_ms, cached = await asyncio.get_running_loop().run_in_executor(
+                None, bot.tournament_odds.get, tournament[0], entrants)
+            
+            embed = create_embed(f"🎲 Turnuva Oranları: {tournament[1]}", 
+                               f"{format_number(simulations)} turnuva simüle edildi "
+                               f"({'önbellek' if cached else f'{elapsed_ms:.0f} ms'})", 
+                               discord.Color.purple())
+            
+            odds_text = ""
+            for user_id, strength, win, final, podium in rows[:15]:
+                user = bot.get_user(user_id)
+                name = user.display_name if user else f"#{user_id}"
+                odds_text += (f"**{name}** ({strength}): 🥇 %{win * 100:.1f} | "
+                              f"Final %{final * 100:.1f} | İlk 3 %{podium * 100:.1f}\n")
+            if len(rows) > 15:
+                odds_text += f"... ve {len(rows) - 15} katılımcı daha"
+            embed.add_field(name="📊 Olasılıklar", value=odds_text, inline=False)
+            
+            if ctx.author.id not in {row[0] for row in rows}:
+                embed.add_field(name="💰 Katılım", 
+                              value=f"Ücret: {format_number(tournament[4])} altın | "
+                                    f"Ödül Havuzu: {format_number(tournament[5])} altın", 
+                              inline=False)
+            embed.set_footer(text="Güç = yetenek + ekipman; her maçta 1-30 arası zar eklenir")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Tournament odds error: {e}")
+            embed = create_embed("❌ Hata", f"Turnuva oranı hatası: {str(e)}", discord.Color.red())
+            await ctx.send(embed=embed)
+
     # ===============================
     # DÜELLO SİSTEMİ
     # ===============================
@@ -1986,6 +2014,47 @@ def setup_commands(bot, db, war_system, economy_system):
             embed = create_embed("❌ Hata", f"Düello çağrısı hatası: {str(e)}", discord.Color.red())
             await ctx.send(embed=embed)
 
+    @bot.command(name='düello_oran', aliases=['duel_odds'])
+    async def duel_odds_command(ctx, opponent: discord.Member, duel_type: str = 'sword'):
+        """Show the odds of a duel before wagering on it"""
+        try:
+            tournament_system = bot.tournament_system
+            if duel_type not in tournament_system.duel_types:
+                embed = create_embed("❌ Hata", 
+                                   f"Geçersiz düello türü! Kullanılabilir: {', '.join(tournament_system.duel_types)}", 
+                                   discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            members = db.get_members_data([ctx.author.id, opponent.id])
+            challenger_score = tournament_system._calculate_duel_score(members.get(ctx.author.id), duel_type)
+            challenged_score = tournament_system._calculate_duel_score(members.get(opponent.id), duel_type)
+            
+            odds = await asyncio.get_running_loop().run_in_executor(
+                None, duel_odds, challenger_score, challenged_score)
+            
+            duel_info = tournament_system.duel_types[duel_type]
+            embed = create_embed(f"🎲 Düello Oranı {duel_info['emoji']}", 
+                               f"**{ctx.author.display_name}** vs **{opponent.display_name}** - {duel_info['name']}\n"
+                               f"{format_number(odds['simulations'])} düello simüle edildi ({odds['elapsed_ms']:.0f} ms)", 
+                               discord.Color.purple())
+            embed.add_field(name="📊 Kazanma Olasılığı", 
+                          value=f"**{ctx.author.display_name}** ({challenger_score}): %{odds['challenger_win'] * 100:.1f}\n"
+                                f"**{opponent.display_name}** ({challenged_score}): %{odds['challenged_win'] * 100:.1f}", 
+                          inline=False)
+            embed.add_field(name="⚔️ Dövüş Şekli", 
+                          value=f"Ezici zafer: %{odds['decisive'] * 100:.1f}\n"
+                                f"Net zafer: %{odds['clear'] * 100:.1f}\n"
+                                f"Çekişmeli: %{odds['close'] * 100:.1f}", 
+                          inline=False)
+            embed.set_footer(text=f"!düello_çağır {opponent.display_name} {duel_type} [bahis] ile meydan oku")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Duel odds error: {e}")
+            embed = create_embed("❌ Hata", f"Düello oranı hatası: {str(e)}", discord.Color.red())
+            await ctx.send(embed=embed)
+
     @bot.command(name='düello_kabul')
     async def accept_duel(ctx, challenger: discord.Member):
         """Accept a duel challenge"""
@@ -2016,18 +2085,12 @@ def setup_commands(bot, db, war_system, economy_system):
                     await ctx.send(embed=embed)
                     return
             
-            # Simulate duel
-            challenger_skill = random.randint(40, 90)
-            challenged_skill = random.randint(40, 90)
-            
-            # Add some randomness
-            challenger_roll = random.randint(1, 20)
-            challenged_roll = random.randint(1, 20)
-            
-            challenger_total = challenger_skill + challenger_roll
-            challenged_total = challenged_skill + challenged_roll
+            # Simulate duel (same model as !düello_oran)
+            result = bot.tournament_system._simulate_duel(challenger_id, challenged_id, duel[3])
+            challenger_total = result['challenger_score']
+            challenged_total = result['challenged_score']
             
-            if challenger_total > challenged_total:
+            if result['winner_id'] == challenger_id:
                 winner_id = challenger_id
                 winner_name = challenger.display_name
                 loser_name = ctx.author.display_name
@@ -2036,24 +2099,32 @@ def setup_commands(bot, db, war_system, economy_system):
                 winner_name = ctx.author.display_name
                 loser_name = challenger.display_name
             
-            # Handle wager
-            if duel[4] > 0:  # wager_amount
-                if winner_id == challenger_id:
-                    db.update_alliance_resources(challenger_alliance[0], duel[4], 0)
-                    db.update_alliance_resources(challenged_alliance[0], -duel[4], 0)
-                else:
-                    db.update_alliance_resources(challenged_alliance[0], duel[4], 0)
-                    db.update_alliance_resources(challenger_alliance[0], -duel[4], 0)
-            
-            # Update duel
             fight_details = f"{challenger.display_name}: {challenger_total} vs {ctx.author.display_name}: {challenged_total}"
-            db.c.execute('''
-            UPDATE duels 
-            SET status = 'completed', winner_id = ?, fight_details = ?, completed_at = datetime('now')
-            WHERE id = ?
-            ''', (winner_id, fight_details, duel[0]))
             
-            db.conn.commit()
+            # Duel result and wager are committed together on the writer thread
+            def settle(cur):
+                # Update duel
+                cur.execute('''
+                UPDATE duels 
+                SET status = 'completed', winner_id = ?, fight_details = ?, completed_at = datetime('now')
+                WHERE id = ? AND status = 'challenged'
+                ''', (winner_id, fight_details, duel[0]))
+                if cur.rowcount == 0:
+                    raise TransactionRollback("Bu düello zaten sonuçlandı!")
+                
+                # Handle wager
+                if duel[4] > 0:  # wager_amount
+                    if winner_id == challenger_id:
+                        db.transfer_gold(challenged_alliance[0], challenger_alliance[0], duel[4], "duel_wager")
+                    else:
+                        db.transfer_gold(challenger_alliance[0], challenged_alliance[0], duel[4], "duel_wager")
+            
+            try:
+                await db.aio.run_write(settle)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
+                await ctx.send(embed=embed)
+                return
             
             embed = create_embed("⚔️ Düello Sonucu", 
                                f"**{winner_name}** düelloyu kazandı!", 
@@ -2522,11 +2593,11 @@ def setup_commands(bot, db, war_system, economy_system):
         weather = random.choice(list(war_system.weather_effects.keys()))
         terrain = random.choice(list(war_system.terrain_effects.keys()))
         
-        war_id = db.declare_war(alliance[0], target[0], weather, terrain)
-        
-        # Store battle size in war
-        db.c.execute('UPDATE wars SET battle_size = ? WHERE id = ?', (size, war_id))
-        db.conn.commit()
+        war_id = db.create_war(alliance[0], target[0], weather, terrain, size)
+        if not war_id:
+            embed = create_embed("❌ Hata", "Savaş ilan edilirken hata oluştu!", discord.Color.red())
+            await ctx.send(embed=embed)
+            return
         
         size_descriptions = {
             "küçük": "🔸 Küçük çaplı çatışma",
@@ -2546,6 +2617,136 @@ def setup_commands(bot, db, war_system, economy_system):
         
         await ctx.send(embed=embed)
 
+    @bot.command(name='savaş_tahmin', aliases=['war_forecast'])
+    async def war_forecast_command(ctx, war_id: int, attacker_action: str = "saldır", defender_action: str = "savun"):
+        """Forecast an active war with Monte Carlo simulation"""
+        try:
+            valid_actions = list(war_system.battle_actions) + [RANDOM_ACTION]
+            if attacker_action not in valid_actions or defender_action not in valid_actions:
+                embed = create_embed("❌ Hata", 
+                                   f"Geçersiz aksiyon! Seçenekler: {', '.join(valid_actions)}", 
+                                   discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            war = await db.aio.fetchone('SELECT * FROM wars WHERE id = ? AND status = "active"', (war_id,))
+            if not war:
+                embed = create_embed("❌ Hata", "Savaş bulunamadı veya bitmiş!", discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            attacker = await db.aio.get_alliance_by_id(war[1])
+            defender = await db.aio.get_alliance_by_id(war[2])
+            if not attacker or not defender:
+                embed = create_embed("❌ Hata", "Hane verileri alınamadı!", discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            turns_played = war[12] or 0  # current_turn
+            
+            # Simulate off the event loop
+            forecast = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                forecast_war, war_system, attacker, defender,
+                attacker_losses=war[4], defender_losses=war[5],
+                weather=war[8], terrain=war[9], turns_played=turns_played,
+                attacker_action=attacker_action, defender_action=defender_action,
+                battle_size=war[11] or "orta"
+            ))
+            
+            att_emoji = get_house_emoji(attacker[1])
+            def_emoji = get_house_emoji(defender[1])
+            embed = create_embed(f"🔮 Savaş Tahmini #{war_id}", 
+                               f"{att_emoji} **{attacker[1]}** vs {def_emoji} **{defender[1]}**\n"
+                               f"{format_number(forecast['simulations'])} savaş simüle edildi "
+                               f"({forecast['elapsed_ms']:.0f} ms)", 
+                               discord.Color.purple())
+            
+            embed.add_field(name="📊 Olasılıklar", 
+                          value=f"{att_emoji} Saldıran kazanır: **%{forecast['attacker_win'] * 100:.1f}**\n"
+                                f"{def_emoji} Savunan kazanır: **%{forecast['defender_win'] * 100:.1f}**\n"
+                                f"🤝 Berabere: **%{forecast['draw'] * 100:.1f}**", 
+                          inline=True)
+            
+            embed.add_field(name="💀 Beklenen Ek Kayıplar", 
+                          value=f"{att_emoji} {format_number(int(forecast['expected_attacker_casualties']))} asker\n"
+                                f"{def_emoji} {format_number(int(forecast['expected_defender_casualties']))} asker\n"
+                                f"🔄 ~{forecast['expected_turns']:.0f} tur", 
+                          inline=True)
+            
+            embed.add_field(name="⚙️ Varsayımlar", 
+                          value=f"Saldıran: {attacker_action} | Savunan: {defender_action}\n"
+                                f"Hava: {war[8]} | Arazi: {war[9]} | Büyüklük: {war[11] or 'orta'} | Oynanan tur: {turns_played}", 
+                          inline=False)
+            embed.set_footer(text=f"Aksiyonları değiştir: !savaş_tahmin {war_id} <saldıran> <savunan> ({RANDOM_ACTION} = her tur rastgele)")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"War forecast error: {e}")
+            embed = create_embed("❌ Hata", f"Savaş tahmini hatası: {str(e)}", discord.Color.red())
+            await ctx.send(embed=embed)
+
+    @bot.command(name='savaş_tekrar', aliases=['war_replay'])
+    async def war_replay(ctx, war_id: int):
+        """Replay a war turn by turn from the battle archive"""
+        try:
+            replay = await db.aio.run_read(bot.battle_archive.load_replay, war_id)
+            if not replay:
+                embed = create_embed("❌ Hata", "Savaş bulunamadı!", discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
+            turns = replay["turns"]
+            att_emoji = get_house_emoji(replay["attacker"])
+            def_emoji = get_house_emoji(replay["defender"])
+            if replay["winner_id"] == replay["attacker_id"]:
+                outcome = f"🏆 Kazanan: {att_emoji} **{replay['attacker']}**"
+            elif replay["winner_id"] == replay["defender_id"]:
+                outcome = f"🏆 Kazanan: {def_emoji} **{replay['defender']}**"
+            elif replay["status"] == "active":
+                outcome = "⚔️ Savaş devam ediyor"
+            else:
+                outcome = "🤝 Berabere"
+            
+            source = (f"📦 Arşivden ({format_number(replay['archive_bytes'])} bayt)" 
+                      if replay["archived"] else "📜 Canlı kayıtlardan")
+            embed = create_embed(f"🎬 Savaş Tekrarı #{war_id}", 
+                               f"{att_emoji} **{replay['attacker']}** vs {def_emoji} **{replay['defender']}**\n"
+                               f"{outcome}", 
+                               discord.Color.dark_gold())
+            embed.add_field(name="🌤️ Koşullar", 
+                          value=f"{get_weather_emoji(replay['weather'] or 'normal')} {(replay['weather'] or 'normal').title()} | "
+                                f"{get_terrain_emoji(replay['terrain'] or 'ova')} {(replay['terrain'] or 'ova').title()} | "
+                                f"{(replay['battle_size'] or 'orta').title()}", 
+                          inline=False)
+            embed.add_field(name="🔄 Tur Sayısı", value=str(len(turns)), inline=True)
+            embed.add_field(name="💀 Toplam Kayıp", 
+                          value=f"{att_emoji} {format_number(sum(t['attacker_damage'] for t in turns))} | "
+                                f"{def_emoji} {format_number(sum(t['defender_damage'] for t in turns))}", 
+                          inline=True)
+            embed.set_footer(text=source)
+            await ctx.send(embed=embed)
+            
+            # Stream the turns a page at a time
+            for start in range(0, len(turns), BATTLE_REPLAY_TURNS_PER_PAGE):
+                page = turns[start:start + BATTLE_REPLAY_TURNS_PER_PAGE]
+                embed = create_embed(f"🎬 Savaş #{war_id} - Tur {page[0]['turn']}-{page[-1]['turn']}", "", 
+                                   discord.Color.dark_gold())
+                for turn in page:
+                    embed.add_field(
+                        name=f"Tur {turn['turn']}: {turn['attacker_action']} vs {turn['defender_action']}",
+                        value=f"{turn['result'][:900]}\n"
+                              f"💀 {att_emoji} {format_number(turn['attacker_damage'])} | "
+                              f"{def_emoji} {format_number(turn['defender_damage'])}",
+                        inline=False
+                    )
+                await asyncio.sleep(BATTLE_REPLAY_PAGE_DELAY_SECONDS)
+                await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"War replay error: {e}")
+            embed = create_embed("❌ Hata", f"Savaş tekrarı hatası: {str(e)}", discord.Color.red())
+            await ctx.send(embed=embed)
+
     # ===============================
     # GELİR YÖNETİMİ SİSTEMİ
     # ===============================
@@ -2658,16 +2859,17 @@ def setup_commands(bot, db, war_system, economy_system):
             if not name or name == "":
                 name = f"{alliance[1]} {source_type.title()}"
             
-            # Create income source
-            db.c.execute('''
-            INSERT INTO income_sources (house_id, source_type, name, region, income_per_minute, cost)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (alliance[0], source_type, name, region, income, cost))
-            
-            # Pay cost
-            db.update_alliance_resources(alliance[0], -cost, 0)
+            # Create income source and pay its cost in one writer-thread transaction
+            def purchase(cur):
+                cur.execute('''
+                INSERT INTO income_sources (house_id, source_type, name, region, income_per_minute, cost)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', (alliance[0], source_type, name, region, income, cost))
+                
+                # Pay cost
+                db.update_alliance_resources(alliance[0], -cost, 0, "income_source_purchase")
             
-            db.conn.commit()
+            await db.aio.run_write(purchase)
             
             embed = create_embed("💰 Gelir Kaynağı Satın Alındı", 
                                f"**{name}** başarıyla satın alındı!", 
@@ -2727,18 +2929,24 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Create debt
+            # Create debt and transfer the money in one writer-thread transaction
             due_date = "datetime('now', '+30 days')"
-            db.c.execute(f'''
-            INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
-            VALUES (?, ?, ?, {due_date}, ?)
-            ''', (debtor_id, creditor_alliance[0], amount, interest_rate))
-            
-            # Transfer money
-            db.update_alliance_resources(creditor_alliance[0], -amount, 0)
-            db.update_alliance_resources(debtor_id, amount, 0)
+            def lend(cur):
+                cur.execute(f'''
+                INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
+                VALUES (?, ?, ?, {due_date}, ?)
+                ''', (debtor_id, creditor_alliance[0], amount, interest_rate))
+                
+                # Transfer money (the creditor is never taken below zero)
+                if db.transfer_gold(creditor_alliance[0], debtor_id, amount, "loan") < amount:
+                    raise TransactionRollback(f"Yetersiz altın! Gerekli: {format_number(amount)}")
             
-            db.conn.commit()
+            try:
+                await db.aio.run_write(lend)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
+                await ctx.send(embed=embed)
+                return
             
             embed = create_embed("💰 Borç Verildi", 
                                f"**{debtor_name}** hanesine {format_number(amount)} altın borç verildi!", 
@@ -2884,15 +3092,28 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(embed=embed)
                 return
             
-            # Make payment
-            db.update_alliance_resources(debtor_alliance[0], -amount, 0)  # Pay from debtor
-            db.update_alliance_resources(creditor_id, amount, 0)  # Give to creditor
-            
             remaining_debt = current_debt - amount
             
+            # Payment and debt update are committed together on the writer thread
+            def pay(cur):
+                if db.transfer_gold(debtor_alliance[0], creditor_id, amount, "debt_payment") < amount:
+                    raise TransactionRollback(f"Yetersiz altın! Gerekli: {format_number(amount)}")
+                if remaining_debt <= 0:
+                    cur.execute('UPDATE house_debts SET status = "paid" WHERE id = ?', (debt[0],))
+                else:
+                    # Partial payment - remove interest from remaining
+                    new_principal = int(remaining_debt / (1 + debt[4]))
+                    cur.execute('UPDATE house_debts SET amount = ? WHERE id = ?', (new_principal, debt[0]))
+            
+            try:
+                await db.aio.run_write(pay)
+            except TransactionRollback as e:
+                embed = create_embed("❌ Hata", str(e), discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+            
             if remaining_debt <= 0:
                 # Debt fully paid
-                db.c.execute('UPDATE house_debts SET status = "paid" WHERE id = ?', (debt[0],))
                 embed = create_embed("💰 Borç Tamamen Ödendi", 
                                    f"**{creditor_name}** hanesine olan borcunuz tamamen ödendi!", 
                                    discord.Color.green())
@@ -2900,10 +3121,7 @@ def setup_commands(bot, db, war_system, economy_system):
                 embed.add_field(name="Orijinal Borç", value=f"{format_number(debt[3])} altın", inline=True)
                 embed.add_field(name="Faiz", value=f"%{debt[4] * 100:.1f}", inline=True)
             else:
-                # Partial payment - update debt amount
-                new_principal = int(remaining_debt / (1 + debt[4]))  # Remove interest from remaining
-                db.c.execute('UPDATE house_debts SET amount = ? WHERE id = ?', (new_principal, debt[0]))
-                
+                # Partial payment
                 embed = create_embed("💰 Kısmi Borç Ödemesi", 
                                    f"**{creditor_name}** hanesine kısmi ödeme yapıldı!", 
                                    discord.Color.orange())
@@ -2911,7 +3129,6 @@ def setup_commands(bot, db, war_system, economy_system):
                 embed.add_field(name="Kalan Borç", value=f"{format_number(remaining_debt)} altın", inline=True)
                 embed.add_field(name="Faiz Oranı", value=f"%{debt[4] * 100:.1f}", inline=True)
             
-            db.conn.commit()
             await ctx.send(embed=embed)
                 
         except Exception as e:
@@ -3043,53 +3260,19 @@ def setup_commands(bot, db, war_system, economy_system):
     async def show_leaderboard(ctx):
         """Show house leaderboard"""
         try:
-            # Get top houses by different metrics
-            db.c.execute('''
-            SELECT name, gold, soldiers, debt, (gold - debt) as net_worth
-            FROM alliances 
-            WHERE name NOT IN ('System', 'Admin')
-            ORDER BY net_worth DESC
-            LIMIT 10
-            ''')
-            
-            wealth_leaders = db.c.fetchall()
-            
-            db.c.execute('''
-            SELECT name, soldiers, gold
-            FROM alliances 
-            WHERE name NOT IN ('System', 'Admin')
-            ORDER BY soldiers DESC
-            LIMIT 10
-            ''')
-            
-            military_leaders = db.c.fetchall()
+            # Precomputed rankings served from memory
+            wealth_leaders = await bot.leaderboards.get('wealth')
+            military_leaders = await bot.leaderboards.get('military')
             
             embed = create_embed("👑 Liderlik Tablosu", 
                                "En güçlü haneler", 
                                discord.Color.gold())
             
-            # Wealth leaderboard
-            if wealth_leaders:
-                wealth_text = ""
-                for i, house in enumerate(wealth_leaders[:5], 1):
-                    medals = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
-                    medal = medals[i-1] if i <= 5 else f"{i}."
-                    emoji = get_house_emoji(house[0])
-                    net_worth = house[4]  # net_worth
-                    wealth_text += f"{medal} {emoji} **{house[0]}**: {format_number(net_worth)} altın\n"
-                
-                embed.add_field(name="💰 En Zengin Haneler", value=wealth_text, inline=True)
-            
-            # Military leaderboard
-            if military_leaders:
-                military_text = ""
-                for i, house in enumerate(military_leaders[:5], 1):
-                    medals = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
-                    medal = medals[i-1] if i <= 5 else f"{i}."
-                    emoji = get_house_emoji(house[0])
-                    military_text += f"{medal} {emoji} **{house[0]}**: {format_number(house[1])} asker\n"
-                
-                embed.add_field(name="⚔️ Askeri Güç", value=military_text, inline=True)
+            if wealth_leaders.rows:
+                embed.add_field(name="💰 En Zengin Haneler", value=wealth_leaders.text, inline=True)
+            
+            if military_leaders.rows:
+                embed.add_field(name="⚔️ Askeri Güç", value=military_leaders.text, inline=True)
             
             embed.set_footer(text="Haneni büyütmek için savaş, ticaret ve diplomasi kullan!")
             await ctx.send(embed=embed)
@@ -3184,24 +3367,15 @@ def setup_commands(bot, db, war_system, economy_system):
             db.c.execute('SELECT COUNT(*) FROM members WHERE alliance_id = ?', (house_id,))
             member_count = db.c.fetchone()[0]
             
-            # Get income sources
-            db.c.execute('SELECT COUNT(*), SUM(income_per_minute) FROM income_sources WHERE house_id = ? AND seized = 0', (house_id,))
-            income_data = db.c.fetchone()
-            income_sources = income_data[0] if income_data[0] else 0
-            total_income = income_data[1] if income_data[1] else 0
-            
-            # Get debt information
-            db.c.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN debtor_house_id = ? THEN amount ELSE 0 END), 0) as owed,
-                COALESCE(SUM(CASE WHEN creditor_house_id = ? THEN amount ELSE 0 END), 0) as owed_to_us
-            FROM house_debts 
-            WHERE (debtor_house_id = ? OR creditor_house_id = ?) AND status = 'active'
-            ''', (house_id, house_id, house_id, house_id))
-            
-            debt_data = db.c.fetchone()
-            debt_owed = debt_data[0] if debt_data else 0
-            debt_owed_to_us = debt_data[1] if debt_data else 0
+            # Income sources, debts and net worth from the all-house economy snapshot
+            snapshot = await economy_system.get_economy_snapshot()
+            economy = snapshot.get(house_id)
+            income_sources = economy["source_count"] if economy else 0
+            total_income = economy["owned_income"] if economy else 0
+            debt_owed = economy["debt_owed"] if economy else 0
+            debt_owed_to_us = economy["debt_receivable"] if economy else 0
+            net_worth = economy["net_worth"] if economy else max(0, alliance[3] - alliance[5])
+            net_worth_rank = sum(1 for other in snapshot.values() if other["net_worth"] > net_worth) + 1
             
             embed = create_embed(f"{house_emoji} Hane İstatistikleri", 
                                f"**{alliance[1]}** hanesi detayları", 
@@ -3210,7 +3384,7 @@ def setup_commands(bot, db, war_system, economy_system):
             embed.add_field(name="💰 Ekonomi", 
                           value=f"Altın: {format_number(alliance[3])}\n"
                                 f"Borç: {format_number(alliance[5])}\n" 
-                                f"Net Değer: {format_number(alliance[3] - alliance[5])}", 
+                                f"Net Değer: {format_number(net_worth)} (#{net_worth_rank})", 
                           inline=True)
             
             embed.add_field(name="⚔️ Askeri Güç", 
@@ -3482,7 +3656,7 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(f"❌ {member.display_name} herhangi bir haneye üye değil!")
                 return
             
-            db.update_alliance_resources(alliance[0], amount, 0)
+            await db.aio.update_alliance_resources(alliance[0], amount, 0, f"admin_grant:{ctx.author.id}")
             
             embed = create_embed(
                 "💰 Altın Verildi",
@@ -3512,7 +3686,7 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(f"❌ {alliance[1]} hanesinde yeterli altın yok! Mevcut: {format_number(alliance[3])}")
                 return
             
-            db.update_alliance_resources(alliance[0], -amount, 0)
+            await db.aio.update_alliance_resources(alliance[0], -amount, 0, f"admin_seize:{ctx.author.id}")
             
             embed = create_embed(
                 "💸 Altın Alındı",
@@ -3562,6 +3736,79 @@ def setup_commands(bot, db, war_system, economy_system):
         except Exception as e:
             await ctx.send(f"❌ Borç sıfırlama hatası: {str(e)}")
 
+    @bot.command(name="altın_defteri")
+    @commands.has_permissions(administrator=True)
+    async def gold_ledger_history(ctx, house_name: str, hours: int = 24):
+        """Show a house's gold movements over the last hours (Admin only)"""
+        try:
+            house = db.get_alliance_by_name(house_name)
+            if not house:
+                await ctx.send(f"❌ '{house_name}' hanesi bulunamadı!")
+                return
+
+            hours = max(1, min(hours, 24 * 30))
+            since = datetime.now().timestamp() - hours * 3600
+            rows = await db.aio.run_read(db.gold_ledger.history, house[0], since, None, 20)
+            balance = await db.aio.run_read(db.gold_ledger.balance, house[0])
+
+            embed = create_embed(
+                f"📒 {house[1]} Altın Defteri",
+                f"Son {hours} saatteki altın hareketleri",
+                discord.Color.gold()
+            )
+
+            lines = []
+            for _, from_id, to_id, amount, reason, created_at in rows:
+                incoming = to_id == house[0]
+                other = from_id if incoming else to_id
+                if other in ACCOUNT_NAMES:
+                    other_name = ACCOUNT_NAMES[other]
+                else:
+                    other_house = db.get_alliance_by_id(other)
+                    other_name = other_house[1] if other_house else f"#{other}"
+                sign = "+" if incoming else "-"
+                when = datetime.fromtimestamp(created_at).strftime('%d.%m %H:%M')
+                lines.append(f"`{when}` **{sign}{format_number(amount)}** {reason} ({other_name})")
+
+            embed.add_field(name="📜 Hareketler", value="\n".join(lines) if lines else "Hareket yok", inline=False)
+            embed.add_field(name="💰 Hazine", value=format_number(house[3]), inline=True)
+            embed.add_field(name="📒 Defter Bakiyesi", value=format_number(balance or 0), inline=True)
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            await ctx.send(f"❌ Altın defteri hatası: {str(e)}")
+
+    @bot.command(name="altın_mutabakat")
+    @commands.has_permissions(administrator=True)
+    async def gold_ledger_reconcile(ctx):
+        """Checkpoint the gold ledger and reconcile every house (Admin only)"""
+        try:
+            checkpoints, houses, mismatches = await db.gold_ledger.run()
+
+            if mismatches:
+                embed = create_embed(
+                    "⚠️ Altın Mutabakatı",
+                    f"**{len(mismatches)}** hanenin hazinesi defterle uyuşmuyor!",
+                    discord.Color.red()
+                )
+                lines = []
+                for house_id, gold, balance in mismatches[:10]:
+                    house = db.get_alliance_by_id(house_id)
+                    name = house[1] if house else f"#{house_id}"
+                    lines.append(f"**{name}**: hazine {format_number(gold or 0)}, defter {format_number(balance)}")
+                embed.add_field(name="❌ Uyuşmayanlar", value="\n".join(lines), inline=False)
+            else:
+                embed = create_embed(
+                    "✅ Altın Mutabakatı",
+                    f"**{houses}** hanenin hazinesi defterle uyuşuyor.",
+                    discord.Color.green()
+                )
+            embed.add_field(name="📌 Yeni Kontrol Noktası", value=str(checkpoints), inline=True)
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            await ctx.send(f"❌ Altın mutabakatı hatası: {str(e)}")
+
     @bot.command(name="asker_ver")
     @commands.has_permissions(administrator=True)
     async def give_soldiers(ctx, member: discord.Member, amount: int):
@@ -3573,7 +3820,7 @@ def setup_commands(bot, db, war_system, economy_system):
                 await ctx.send(f"❌ {member.display_name} herhangi bir haneye üye değil!")
                 return
             
-            db.update_alliance_resources(alliance[0], 0, amount)
+            await db.aio.update_alliance_resources(alliance[0], 0, amount)
             
             embed = create_embed(
                 "⚔️ Asker Verildi",
@@ -3600,8 +3847,7 @@ def setup_commands(bot, db, war_system, economy_system):
             db.c.execute('SELECT COUNT(*) FROM members')
             total_members = db.c.fetchone()[0]
             
-            db.c.execute('SELECT COUNT(*) FROM wars WHERE status = "active"')
-            active_wars = db.c.fetchone()[0]
+            active_wars = len(db.war_registry)
             
             db.c.execute('SELECT SUM(gold) FROM alliances')
             total_gold = db.c.fetchone()[0] or 0
@@ -4596,13 +4842,13 @@ def setup_commands(bot, db, war_system, economy_system):
             message = await ctx.send(embed=embed)
             
             # Run optimization
-            success = bot.perf_optimizer.optimize_database()
+            success = await bot.perf_optimizer.run_maintenance()
             
             if success:
                 embed = create_embed("✅ Optimizasyon Tamamlandı", 
                                    "Veritabanı başarıyla optimize edildi!", 
                                    discord.Color.green())
-                embed.add_field(name="İşlemler", value="• Indexler oluşturuldu\n• VACUUM çalıştırıldı\n• ANALYZE çalıştırıldı", inline=False)
+                embed.add_field(name="İşlemler", value="• Boş sayfalar geri kazanıldı\n• Sorgu istatistikleri güncellendi", inline=False)
             else:
                 embed = create_embed("❌ Optimizasyon Hatası", 
                                    "Optimizasyon sırasında hata oluştu!", 
@@ -4620,7 +4866,7 @@ def setup_commands(bot, db, war_system, economy_system):
     async def database_stats(ctx):
         """Show database statistics"""
         try:
-            stats = bot.perf_optimizer.get_performance_stats()
+            stats = await db.aio.run_read(bot.perf_optimizer.get_performance_stats)
             
             embed = create_embed("📊 Veritabanı İstatistikleri", 
                                "Sistem performans bilgileri", 
@@ -4641,6 +4887,13 @@ def setup_commands(bot, db, war_system, economy_system):
                 embed.add_field(name="💾 Veritabanı Boyutu", value=f"{size_mb:.2f} MB", inline=True)
             
             embed.add_field(name="⚡ Performans", value="Optimized ✅", inline=True)
+
+            cache_stats = db.alliance_cache.stats()
+            embed.add_field(name="🗃️ Hane Önbelleği",
+                          value=f"İsabet: {cache_stats['hits']:,} / Iska: {cache_stats['misses']:,}\n"
+                                f"Oran: %{cache_stats['hit_rate'] * 100:.1f}\n"
+                                f"Kayıt: {cache_stats['alliances_cached']} hane, {cache_stats['memberships_cached']} üyelik",
+                          inline=False)
             embed.set_footer(text="Son güncelleme: Şimdi")
             
             await ctx.send(embed=embed)
@@ -4650,5 +4903,48 @@ def setup_commands(bot, db, war_system, economy_system):
             embed = create_embed("❌ Hata", f"İstatistik hatası: {str(e)}", discord.Color.red())
             await ctx.send(embed=embed)
 
+    @bot.command(name='performans', aliases=['perf'])
+    @commands.has_permissions(moderate_members=True)
+    async def performance_report(ctx):
+        """Show command latency, database timing and event-loop lag"""
+        try:
+            monitor = bot.perf_monitor
+            embed = create_embed("⏱️ Performans Raporu", 
+                               f"Çalışma süresi: {monitor.get_uptime() / 3600:.1f} saat", 
+                               discord.Color.blue())
+            
+            # Slowest commands by p95
+            command_text = ""
+            for name, summary in monitor.slowest_commands(top=8):
+                command_text += (f"`!{name}` ×{summary['count']}: "
+                                 f"p50 {summary['p50_ms']:.0f} / p95 {summary['p95_ms']:.0f} / "
+                                 f"p99 {summary['p99_ms']:.0f} ms\n")
+            embed.add_field(name="🐢 En Yavaş Komutlar (p95)", value=command_text or "Henüz veri yok", inline=False)
+            
+            # Database timing
+            db_stats = db.query_monitor.snapshot(top=3)
+            queries = db_stats['queries']
+            db_text = (f"Sorgu: {queries['count']:,} | p95 {queries['p95_ms']:.1f} ms | "
+                       f"max {queries['max_ms']:.0f} ms\n"
+                       f"Yavaş (≥{db_stats['slow_query_ms']:.0f} ms): {db_stats['slow_queries']:,}\n")
+            for statement in db_stats['top_statements']:
+                db_text += f"`{statement['sql'][:60]}` {statement['total_ms']:.0f} ms toplam\n"
+            embed.add_field(name="🗄️ Veritabanı", value=db_text[:1024], inline=False)
+            
+            # Event loop lag
+            lag = monitor.loop_lag.summary()
+            embed.add_field(name="🔁 Event Loop Gecikmesi", 
+                          value=f"p50 {lag['p50_ms']:.1f} / p95 {lag['p95_ms']:.1f} / "
+                                f"p99 {lag['p99_ms']:.1f} / max {lag['max_ms']:.0f} ms", 
+                          inline=False)
+            
+            embed.set_footer(text="Ayrıntılı JSON: /metrics")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Performance report error: {e}")
+            embed = create_embed("❌ Hata", f"Performans raporu hatası: {str(e)}", discord.Color.red())
+            await ctx.send(embed=embed)
+
     logger.info("All commands have been set up successfully")
     logger.info(f"Total commands available: {len(bot.commands)}")
\ No newline at end of file
@@ -3,14 +3,45 @@ import os
 # Bot Configuration
 BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN", "your_bot_token_here")
 DATABASE_PATH = os.getenv("DATABASE_PATH", "got_rp.db")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_VACUUM_PAGES_PER_STEP = int(os.getenv("DB_VACUUM_PAGES_PER_STEP", "2000"))  # Free pages reclaimed per writer turn
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the in-process /metrics server
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # Bind address of the /metrics server
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # When set, /metrics requires it and includes SQL text
 
 # Game Configuration
 MAX_ALLIANCE_MEMBERS = 50
 STARTING_GOLD = 1000
 STARTING_SOLDIERS = 100
 MAX_WAR_TURNS = 50
+WAR_FORECAST_SIMULATIONS = 5000  # Wars simulated per !savaş_tahmin
+TOURNAMENT_ODDS_SIMULATIONS = 10000  # Brackets simulated per !turnuva_oranlar
+DUEL_ODDS_SIMULATIONS = 20000  # Duels simulated per !düello_oran
+WAR_AUTO_RESOLVE_INTERVAL_MINUTES = 5  # How often idle wars are swept
+WAR_IDLE_MINUTES = 60  # Wars without a turn for this long are auto-resolved
+WAR_AUTO_RESOLVE_BATCH = 25  # Max wars resolved per sweep
+WAR_REPORT_CHANNEL_ID = int(os.getenv("WAR_REPORT_CHANNEL_ID", "0"))  # 0 disables auto-resolve reports
+WAR_REPORT_SEND_INTERVAL_SECONDS = 2.0  # Delay between queued report messages
+BATTLE_ARCHIVE_INTERVAL_MINUTES = 60  # How often finished wars are archived
+BATTLE_ARCHIVE_AFTER_HOURS = 24  # Finished wars keep their hot battle logs this long
+BATTLE_ARCHIVE_BATCH_WARS = 10  # Wars packed per archive transaction (keeps each writer job short)
+BATTLE_LOG_PURGE_BATCH = 5000  # Archived battle_logs rows deleted per transaction
+BATTLE_REPLAY_TURNS_PER_PAGE = 10  # Turns per !savaş_tekrar message
+BATTLE_REPLAY_PAGE_DELAY_SECONDS = 1.0  # Pause between replay messages
+MARKET_ROLLUP_INTERVAL_MINUTES = 1  # How often new trades are rolled into candles
+MARKET_ROLLUP_BATCH = 5000  # trade_history rows rolled up per transaction
+TRADE_HISTORY_RETENTION_DAYS = 30  # Rolled up raw trades are kept this long
+MARKET_CANDLE_1M_RETENTION_DAYS = 2  # 1 minute candles are kept this long
+MARKET_CANDLE_1H_RETENTION_DAYS = 90  # 1 hour candles are kept this long (1 day candles forever)
+FACILITY_SETTLEMENT_INTERVAL_HOURS = 24  # Bulk settlement of pending facility production
+FACILITY_SETTLEMENT_BATCH = 5000  # resource_facilities rows settled per transaction
+GOLD_LEDGER_CHECKPOINT_INTERVAL_MINUTES = 60  # Balance checkpoints + reconciliation against alliances.gold
+GOLD_LEDGER_CHECKPOINT_RETENTION_DAYS = 7  # Older checkpoints are dropped (each house keeps its latest)
 INCOME_INTERVAL_MINUTES = 1
+INCOME_MAX_CATCHUP_MINUTES = 1440  # Max missed minutes credited after downtime
 DEBT_INTEREST_INTERVAL_HOURS = 1
+DEBT_INTEREST_MAX_CATCHUP_HOURS = 72  # Max missed hours accrued after downtime
 
 # Combat Configuration
 BASE_CASUALTY_RATE = 0.1  # 10% max casualties per turn
@@ -25,3 +56,9 @@ BASE_HEALTH = 100
 BASE_ATTACK = 20
 BASE_DEFENSE = 15
 EXPERIENCE_PER_LEVEL = 100
+
+# Leaderboard Configuration
+LEADERBOARD_SIZE = 10
+LEADERBOARD_REFRESH_SECONDS = 60  # Dirty boards are recomputed this often
+LEADERBOARD_MAX_AGE_SECONDS = 600  # Clean boards are recomputed at least this often
+ECONOMY_SNAPSHOT_TTL_SECONDS = 30  # All-house net worth snapshot is reused this long
@@ -53,28 +53,6 @@ class DailyChallengesSystem:
                 "difficulty": "Zor"
             }
         }
-        
-        self.setup_challenges_table()
-    
-    def setup_challenges_table(self):
-        """Create daily challenges table"""
-        try:
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS daily_challenges (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                challenge_id TEXT NOT NULL,
-                assigned_date DATE NOT NULL,
-                completed BOOLEAN DEFAULT FALSE,
-                completed_at TIMESTAMP NULL,
-                UNIQUE(user_id, challenge_id, assigned_date)
-            )
-            ''')
-            
-            self.db.conn.commit()
-            logger.info("Daily challenges table created successfully")
-        except Exception as e:
-            logger.error(f"Error creating daily challenges table: {e}")
     
     def setup_daily_challenges_commands(self, bot):
         """Setup daily challenges commands"""
@@ -218,16 +196,7 @@ class DailyChallengesSystem:
             try:
                 today = datetime.now().date()
                 
-                self.db.c.execute('''
-                SELECT user_id, COUNT(*) as completed_count
-                FROM daily_challenges 
-                WHERE assigned_date = ? AND completed = TRUE
-                GROUP BY user_id 
-                ORDER BY completed_count DESC 
-                LIMIT 10
-                ''', (today,))
-                
-                leaderboard = self.db.c.fetchall()
+                leaderboard = await bot.leaderboards.get('daily')
                 
                 embed = create_embed(
                     "🏆 GÜNLÜK GÖREV SIRALAMASI",
@@ -235,25 +204,8 @@ class DailyChallengesSystem:
                     discord.Color.gold()
                 )
                 
-                if leaderboard:
-                    leaderboard_text = ""
-                    for i, (user_id, count) in enumerate(leaderboard, 1):
-                        try:
-                            user = bot.get_user(user_id)
-                            username = user.display_name if user else f"User #{user_id}"
-                            
-                            if i == 1:
-                                leaderboard_text += f"👑 **{username}** - {count} görev\n"
-                            elif i == 2:
-                                leaderboard_text += f"🥈 **{username}** - {count} görev\n"
-                            elif i == 3:
-                                leaderboard_text += f"🥉 **{username}** - {count} görev\n"
-                            else:
-                                leaderboard_text += f"{i}. **{username}** - {count} görev\n"
-                        except:
-                            continue
-                    
-                    embed.add_field(name="🏆 Bugünün En İyileri", value=leaderboard_text, inline=False)
+                if leaderboard.rows:
+                    embed.add_field(name="🏆 Bugünün En İyileri", value=leaderboard.text, inline=False)
                 else:
                     embed.add_field(name="📝 Sonuç", value="Bugün henüz kimse görev tamamlamamış!", inline=False)
                 
@@ -287,28 +239,30 @@ class DailyChallengesSystem:
         """Complete a daily challenge and give rewards"""
         try:
             today = datetime.now().date()
-            
-            # Mark as completed
-            self.db.c.execute('''
-            UPDATE daily_challenges 
-            SET completed = TRUE, completed_at = CURRENT_TIMESTAMP
-            WHERE user_id = ? AND challenge_id = ? AND assigned_date = ?
-            ''', (user_id, challenge_id, today))
-            
-            if self.db.c.rowcount == 0:
-                return False  # Challenge not found or already completed
-            
             challenge = self.challenges[challenge_id]
-            
-            # Give rewards
             alliance = self.db.get_user_alliance(user_id)
-            if alliance:
-                alliance_id = alliance[0]
-                self.db.update_alliance_resources(alliance_id, 
-                                                challenge['reward_gold'], 
-                                                challenge['reward_soldiers'])
             
-            self.db.conn.commit()
+            def complete(cur):
+                # Mark as completed
+                cur.execute('''
+                UPDATE daily_challenges 
+                SET completed = TRUE, completed_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND challenge_id = ? AND assigned_date = ?
+                ''', (user_id, challenge_id, today))
+                
+                if cur.rowcount == 0:
+                    return False  # Challenge not found or already completed
+                
+                # Give rewards
+                if alliance:
+                    self.db.update_alliance_resources(alliance[0], 
+                                                    challenge['reward_gold'], 
+                                                    challenge['reward_soldiers'],
+                                                    "daily_challenge_reward")
+                return True
+            
+            if not await self.db.aio.run_write(complete):
+                return False
             
             # Notify user if context available
             if ctx:
@@ -1,583 +1,651 @@
 import sqlite3
 import json
+import hashlib
+import queue
 import logging
+import asyncio
+import threading
+import itertools
+import weakref
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from config import DATABASE_PATH
+from pathlib import Path
+from config import DATABASE_PATH, DB_READ_POOL_SIZE, DB_SLOW_QUERY_MS
+from async_database import AsyncDatabase
+from alliance_cache import AllianceCache, InvalidatingCursor, MISS, is_write_statement
+from war_registry import WarRegistry
+from order_book import OrderBook, SELL
+from gold_ledger import GoldLedger, movement
+from migrations import migrate
+from performance_monitor import QueryMonitor, TimedCursor
 
 logger = logging.getLogger(__name__)
 
+# ===============================
+# SEED DATA
+# ===============================
+
+SEED_CHECKSUM_KEY = 'seed_checksum'
+
+DEFAULT_HOUSES = {
+    "Lannister": {
+        "region": "Batı", "gold": 2000000, "soldiers": 60000, "debt": 0,
+        "special_ability": "Altın Gücü", "army_quality": 85
+    },
+    "Tyrell": {
+        "region": "Ulaşım", "gold": 800000, "soldiers": 100000, "debt": 0,
+        "special_ability": "Bahçe Gücü", "army_quality": 75
+    },
+    "Stark": {
+        "region": "Kuzey", "gold": 120000, "soldiers": 45000, "debt": 200000,
+        "special_ability": "Kış Savaşçısı", "army_quality": 80
+    },
+    "Arryn": {
+        "region": "Vadi", "gold": 350000, "soldiers": 35000, "debt": 0,
+        "special_ability": "Kartal Uçuşu", "army_quality": 78
+    },
+    "Baratheon": {
+        "region": "Fırtına Toprakları", "gold": 80000, "soldiers": 30000, "debt": 6000000,
+        "special_ability": "Savaş Öfkesi", "army_quality": 82
+    },
+    "Martell": {
+        "region": "Dorne", "gold": 200000, "soldiers": 25000, "debt": 50000,
+        "special_ability": "Çöl Savaşçısı", "army_quality": 70
+    },
+    "Tully": {
+        "region": "Nehir Toprakları", "gold": 150000, "soldiers": 25000, "debt": 300000,
+        "special_ability": "Nehir Kontrollü", "army_quality": 65
+    },
+    "Greyjoy": {
+        "region": "Demir Adalar", "gold": 60000, "soldiers": 20000, "debt": 150000,
+        "special_ability": "Deniz Lordluğu", "army_quality": 72
+    },
+    "Targaryen": {
+        "region": "Dragonstone", "gold": 30000, "soldiers": 8000, "debt": 100000,
+        "special_ability": "Eski Valyria Mirası", "army_quality": 90
+    },
+    "Bolton": {
+        "region": "Dreadfort", "gold": 40000, "soldiers": 12000, "debt": 200000,
+        "special_ability": "Korku Tacticsi", "army_quality": 75
+    }
+}
+
+DEFAULT_RESOURCE_TYPES = ['food', 'stone', 'wood', 'iron', 'horses', 'wine']
+
+DEFAULT_DEBTS = [
+    # (Debtor, Creditor, Amount, Interest Rate, Days)
+    ("Baratheon", "Lannister", 6000000, 0.15, 365),  # Crown debt to Lannisters
+    ("Stark", "Lannister", 500000, 0.12, 300),       # War loans
+    ("Targaryen", "Tyrell", 200000, 0.10, 200),      # Exile support
+    ("Greyjoy", "Lannister", 300000, 0.18, 180),     # Rebellion reparations  
+    ("Tully", "Tyrell", 800000, 0.14, 400),         # Agricultural loans
+    ("Bolton", "Lannister", 400000, 0.16, 250),     # Military support
+    ("Martell", "Tyrell", 100000, 0.08, 150),       # Trade agreements
+]
+
+_SET_STATE_SQL = '''
+INSERT INTO app_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+'''
+
+def _current_owner():
+    """Identify the current unit of concurrency: the running asyncio task, else the thread"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task or threading.current_thread()
+
+def _is_read_statement(sql):
+    return sql.lstrip()[:6].upper() == "SELECT"
+
+class TransactionRollback(Exception):
+    """Raise inside ``Database.transaction()`` to discard the whole unit of work"""
+
+class WriterBusy(sqlite3.OperationalError):
+    """Another task on this thread has a write open; waiting for it would deadlock"""
+
+class WriteLock:
+    """Reentrant writer lock owned by an asyncio task or a thread (``_current_owner``).
+
+    ``threading.RLock`` belongs to a thread, so every task on the event loop
+    would share it and join each other's open transactions. Here an owner
+    that would have to wait for another owner on its own thread (a task for
+    a task) raises ``WriterBusy`` instead: the holder needs that thread to
+    finish. Owners on other threads wait. A lock still held by a finished
+    owner (a task that left legacy writes uncommitted) is taken over and
+    settled through ``on_abandoned`` before the next owner gets it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._owner = None
+        self._owner_thread = None
+        self._count = 0
+        self.on_abandoned = None
+
+    def _abandoned(self):
+        owner = self._owner
+        if isinstance(owner, asyncio.Task):
+            return owner.done()
+        return not owner.is_alive()
+
+    def held_by_other(self):
+        """Whether an owner other than the current one holds the lock"""
+        owner = self._owner
+        return owner is not None and owner is not _current_owner()
+
+    def acquire(self):
+        owner = _current_owner()
+        while True:
+            with self._cond:
+                while self._owner is not None and self._owner is not owner and not self._abandoned():
+                    if self._owner_thread == threading.get_ident():
+                        raise WriterBusy("Another task has an uncommitted write open, try again")
+                    self._cond.wait(timeout=1.0)
+                if self._owner is None or self._owner is owner:
+                    self._owner, self._owner_thread = owner, threading.get_ident()
+                    self._count += 1
+                    return True
+                # Take over the finished owner's hold; on_abandoned releases it
+                self._owner, self._owner_thread, self._count = owner, threading.get_ident(), 1
+            self.on_abandoned()
+
+    def release(self):
+        with self._cond:
+            if self._owner is not _current_owner():
+                raise RuntimeError("cannot release a write lock held by another owner")
+            self._count -= 1
+            if self._count == 0:
+                self._owner = self._owner_thread = None
+                self._cond.notify_all()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class WriterConnection(sqlite3.Connection):
+    """Writer connection that reports the end of every transaction to ``on_end(committed)``.
+
+    Only the owner of ``write_lock`` ends a transaction: a ``commit()`` or
+    ``rollback()`` from anyone else (legacy code ending "its" transaction while
+    another task's write is open) is ignored.
+    """
+
+    on_end = None
+    write_lock = None
+
+    def _ends_other_owners_transaction(self):
+        return self.write_lock is not None and self.write_lock.held_by_other()
+
+    def commit(self):
+        if self._ends_other_owners_transaction():
+            logger.debug("Ignoring commit() while another owner holds the writer")
+            return
+        super().commit()
+        if self.on_end is not None:
+            self.on_end(True)
+
+    def rollback(self):
+        if self._ends_other_owners_transaction():
+            logger.debug("Ignoring rollback() while another owner holds the writer")
+            return
+        super().rollback()
+        if self.on_end is not None:
+            self.on_end(False)
+
+class LegacyCursor(InvalidatingCursor):
+    """Cursor behind ``Database.c``.
+
+    Legacy code writes on the shared writer connection and commits later with
+    ``db.conn.commit()``, so the first write takes the writer lock for its task
+    and keeps it until that commit or rollback - nobody else can commit, roll
+    back or join a half-finished legacy write. SELECTs go through
+    ``Database.read_cursor`` (a pooled reader unless this task has writes open).
+    Result rows are buffered on ``execute`` so no statement is left in progress
+    between awaits.
+    """
+
+    def __init__(self, connection, monitor, on_write, database):
+        super().__init__(connection, monitor, on_write)
+        self._db = database
+        self._rows = iter(())
+
+    def execute(self, sql, parameters=()):
+        if _is_read_statement(sql):
+            with self._db.read_cursor() as cur:
+                cur.execute(sql, parameters)
+                self._rows = iter(cur.fetchall())
+            return self
+        self._db._begin_legacy_write()
+        try:
+            super().execute(sql, parameters)
+            self._rows = iter(super().fetchall())
+        finally:
+            self._db._settle_legacy_write()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._db._begin_legacy_write()
+        try:
+            super().executemany(sql, seq_of_parameters)
+            self._rows = iter(())
+        finally:
+            self._db._settle_legacy_write()
+        return self
+
+    def executescript(self, sql_script):
+        self._db._begin_legacy_write()
+        try:
+            super().executescript(sql_script)
+            self._rows = iter(())
+        finally:
+            self._db._settle_legacy_write()
+        return self
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchmany(self, size=None):
+        return list(itertools.islice(self._rows, self.arraysize if size is None else size))
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._rows)
+
+class ConnectionPool:
+    """One serialized writer connection plus a pool of read-only WAL readers"""
+
+    def __init__(self, db_path, read_pool_size=DB_READ_POOL_SIZE):
+        self.db_path = db_path
+        self.writer = sqlite3.connect(db_path, check_same_thread=False, timeout=30, factory=WriterConnection)
+        self.writer.execute("PRAGMA foreign_keys = ON")
+        self.writer.execute("PRAGMA journal_mode = WAL")  # Better performance
+        self.writer.execute("PRAGMA synchronous = NORMAL")  # Faster writes
+        self.writer.execute("PRAGMA cache_size = 1000")  # Larger cache
+        self.writer.execute("PRAGMA temp_store = memory")  # Use memory for temp
+        self.write_lock = WriteLock()
+        self.writer.write_lock = self.write_lock
+
+        # In-memory databases cannot be shared, so reads fall back to the writer
+        self.read_pool_size = 0 if db_path == ":memory:" else max(0, read_pool_size)
+        self._readers = queue.LifoQueue()
+        self._opened_readers = []
+        self._readers_lock = threading.Lock()
+
+    def _open_reader(self):
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA temp_store = memory")
+        return conn
+
+    def _checkout_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if len(self._opened_readers) < self.read_pool_size:
+                conn = self._open_reader()
+                self._opened_readers.append(conn)
+                return conn
+        # Pool exhausted: wait for a reader to come back
+        return self._readers.get()
+
+    @contextmanager
+    def reader(self, factory=None):
+        """Yield a fresh cursor on a pooled read-only connection"""
+        if self.read_pool_size == 0:
+            cur = self.writer.cursor(factory) if factory else self.writer.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+            return
+
+        conn = self._checkout_reader()
+        cur = conn.cursor(factory) if factory else conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+            self._readers.put(conn)
+
+    @contextmanager
+    def write(self, factory=None):
+        """Yield a fresh cursor on the writer connection while holding the write lock"""
+        with self.write_lock:
+            cur = self.writer.cursor(factory) if factory else self.writer.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def close(self):
+        with self._readers_lock:
+            for conn in self._opened_readers:
+                conn.close()
+            self._opened_readers.clear()
+        self.writer.close()
+
 class Database:
     def __init__(self, db_path=DATABASE_PATH):
         try:
-            self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
-            self.conn.execute("PRAGMA foreign_keys = ON")
-            self.conn.execute("PRAGMA journal_mode = WAL")  # Better performance
-            self.conn.execute("PRAGMA synchronous = NORMAL")  # Faster writes
-            self.conn.execute("PRAGMA cache_size = 1000")  # Larger cache
-            self.conn.execute("PRAGMA temp_store = memory")  # Use memory for temp
-            self.c = self.conn.cursor()
+            self.db_path = db_path
+            # Times every statement run through our cursors (slow ones are logged)
+            self.query_monitor = QueryMonitor(DB_SLOW_QUERY_MS)
+            self.pool = ConnectionPool(db_path)
+            self.conn = self.pool.writer
+            self.conn.on_end = self._on_transaction_end
+            self.pool.write_lock.on_abandoned = self._settle_abandoned_write
+            self._legacy_cursors = weakref.WeakKeyDictionary()
+            self._legacy_cursors_lock = threading.Lock()
+            # Task (or thread) whose legacy ``db.c`` writes hold the writer lock until commit
+            self._legacy_holder = None
+            self._tx_depth = weakref.WeakKeyDictionary()
+            # Hot alliance/membership lookups; raw writes through our cursors invalidate it
+            self.alliance_cache = AllianceCache()
+            self._write_listeners = []
+            # Active wars by house pair / house id, kept in sync by create_war and end_war
+            self.war_registry = WarRegistry(self._load_active_wars)
+            # Open market_orders / trade_offers as in-memory books (order_book.py)
+            self.order_book = OrderBook(self._load_market_orders)
+            self.offer_book = OrderBook(self._load_trade_offers)
+            # Every gold movement is journaled here (gold_ledger.py)
+            self.gold_ledger = GoldLedger(self)
             self.create_tables()
             self.populate_default_data()
+            self._enable_incremental_vacuum()
+            self.war_registry.load()
+            self.order_book.load()
+            self.offer_book.load()
+            # Awaitable facade for coroutines (writer thread + read-only pool)
+            self.aio = AsyncDatabase(self)
             logger.info("Database initialized successfully with optimizations")
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
             raise
 
+    @property
+    def c(self):
+        """Compatibility shim for legacy ``db.c`` callers.
+
+        Each asyncio task (or thread, outside the event loop) gets its own cursor on
+        the writer connection, so interleaved awaits no longer clobber each other's
+        ``fetchone()`` results. Writes hold the writer lock until ``db.conn.commit()``
+        or ``rollback()`` (see ``LegacyCursor``). New code should use
+        ``read_cursor``/``write_cursor``.
+        """
+        owner = _current_owner()
+        with self._legacy_cursors_lock:
+            cur = self._legacy_cursors.get(owner)
+            if cur is None:
+                cur = self.conn.cursor(self._legacy_cursor_factory)
+                self._legacy_cursors[owner] = cur
+            return cur
+
+    def read_cursor(self):
+        """Context manager yielding a per-call cursor on a pooled reader.
+
+        Inside a transaction, or while this task has uncommitted legacy writes,
+        reads go to the writer so they see uncommitted changes.
+        """
+        if self.in_transaction() or self.holds_legacy_write():
+            return self.pool.write(self._timed_cursor_factory)
+        return self.pool.reader(self._timed_cursor_factory)
+
+    def write_cursor(self):
+        """Context manager yielding a per-call cursor on the serialized writer"""
+        return self.pool.write(self._cursor_factory)
+
+    def _cursor_factory(self, connection):
+        return InvalidatingCursor(connection, self.query_monitor, self._notify_write)
+
+    def _timed_cursor_factory(self, connection):
+        return TimedCursor(connection, self.query_monitor)
+
+    def _legacy_cursor_factory(self, connection):
+        return LegacyCursor(connection, self.query_monitor, self._notify_write, self)
+
+    # ===============================
+    # LEGACY WRITES
+    # ===============================
+
+    def holds_legacy_write(self):
+        """Whether this task (or thread) has uncommitted ``db.c`` writes (and the writer lock)"""
+        holder = self._legacy_holder
+        return holder is not None and holder is _current_owner()
+
+    def _begin_legacy_write(self):
+        """Take the writer lock before a legacy write; kept until the transaction ends"""
+        if not self.holds_legacy_write():
+            self.pool.write_lock.acquire()
+            self._legacy_holder = _current_owner()
+
+    def _settle_legacy_write(self):
+        """Release the writer lock if the statement didn't leave a transaction open"""
+        if self.holds_legacy_write() and not self.conn.in_transaction:
+            self._release_legacy_write()
+
+    def _release_legacy_write(self):
+        self._legacy_holder = None
+        self.pool.write_lock.release()
+
+    def _settle_abandoned_write(self):
+        """WriteLock hook: commit legacy writes left open by a task that has finished"""
+        logger.warning("Committing legacy writes left uncommitted by a finished task")
+        self._legacy_holder = _current_owner()
+        if self.conn.in_transaction:
+            self.conn.commit()
+        if self._legacy_holder is not None:
+            self._release_legacy_write()
+
+    def flush_legacy_writes(self):
+        """Commit this task's pending legacy writes before it hands work to the writer thread.
+
+        Otherwise the writer thread would wait for a commit that only comes
+        after the awaited call returns. Other tasks' writes are left alone; the
+        writer thread waits for them.
+        """
+        if self.holds_legacy_write():
+            logger.debug("Committing pending legacy writes before a writer-thread call")
+            self.conn.commit()
+
+    def _on_transaction_end(self, committed):
+        """WriterConnection hook: runs after every commit/rollback on the writer"""
+        self.alliance_cache.note_transaction_end(committed)
+        if self.holds_legacy_write():
+            self._release_legacy_write()
+
+    def add_write_listener(self, listener):
+        """Call ``listener(sql)`` for every statement run on writer cursors (None for scripts)"""
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, sql):
+        self.alliance_cache.note_write(sql)
+        self._notify_listeners(sql)
+
+    def _notify_listeners(self, sql):
+        for listener in self._write_listeners:
+            listener(sql)
+
+    def in_transaction(self):
+        """Whether the current task/thread is inside ``transaction()``"""
+        return self._tx_depth.get(_current_owner(), 0) > 0
+
+    @contextmanager
+    def transaction(self):
+        """Unit of work: helpers called inside join it instead of committing.
+
+        The outermost block commits once on success and rolls everything back on
+        error; write helpers re-raise instead of returning a failure value while
+        one is open. Keep the body synchronous - don't await inside it.
+        """
+        owner = _current_owner()
+        with self.pool.write_lock:
+            depth = self._tx_depth.get(owner, 0)
+            self._tx_depth[owner] = depth + 1
+            try:
+                yield self
+                if depth == 0:
+                    self.conn.commit()
+            except BaseException:
+                if depth == 0:
+                    # The rollback hook drops the alliance cache; in-memory
+                    # registries may describe rolled back rows too
+                    self.conn.rollback()
+                    self.war_registry.invalidate()
+                    self.order_book.invalidate()
+                    self.offer_book.invalidate()
+                raise
+            finally:
+                if depth == 0:
+                    del self._tx_depth[owner]
+                else:
+                    self._tx_depth[owner] = depth
+
+    def _commit(self):
+        """Commit unless a surrounding ``transaction()`` will do it"""
+        if not self.in_transaction():
+            self.conn.commit()
+
     def create_tables(self):
-        """Create all necessary database tables"""
-
-        # Alliances/Houses table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS alliances (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT UNIQUE NOT NULL,
-            leader_id INTEGER,
-            gold INTEGER DEFAULT 1000,
-            soldiers INTEGER DEFAULT 100,
-            power_points INTEGER DEFAULT 0,
-            house_type TEXT DEFAULT 'Custom',
-            special_ability TEXT DEFAULT '',
-            region TEXT DEFAULT '',
-            debt INTEGER DEFAULT 0,
-            army_quality INTEGER DEFAULT 50,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Handle schema migrations - add army_quality column if it doesn't exist
-        try:
-            self.c.execute('SELECT army_quality FROM alliances LIMIT 1')
-        except sqlite3.OperationalError:
-            # Column doesn't exist, add it
-            self.c.execute('ALTER TABLE alliances ADD COLUMN army_quality INTEGER DEFAULT 50')
-            logger.info("Added army_quality column to alliances table")
-
-        # Members table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS members (
-            user_id INTEGER PRIMARY KEY,
-            alliance_id INTEGER,
-            role TEXT DEFAULT 'Üye',
-            married_to INTEGER,
-            character_class TEXT DEFAULT 'Lord',
-            level INTEGER DEFAULT 1,
-            experience INTEGER DEFAULT 0,
-            health INTEGER DEFAULT 100,
-            attack_power INTEGER DEFAULT 20,
-            defense INTEGER DEFAULT 15,
-            special_skills TEXT DEFAULT '[]',
-            legendary_weapon TEXT DEFAULT '',
-            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(alliance_id) REFERENCES alliances(id),
-            FOREIGN KEY(married_to) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Wars table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS wars (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            attacker_id INTEGER NOT NULL,
-            defender_id INTEGER NOT NULL,
-            status TEXT DEFAULT 'active',
-            attacker_losses INTEGER DEFAULT 0,
-            defender_losses INTEGER DEFAULT 0,
-            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            end_time TIMESTAMP,
-            weather TEXT DEFAULT 'normal',
-            terrain TEXT DEFAULT 'ova',
-            winner_id INTEGER,
-            battle_size TEXT DEFAULT 'orta',
-            FOREIGN KEY(attacker_id) REFERENCES alliances(id),
-            FOREIGN KEY(defender_id) REFERENCES alliances(id),
-            FOREIGN KEY(winner_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Battle logs table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS battle_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            war_id INTEGER NOT NULL,
-            turn_number INTEGER NOT NULL,
-            attacker_action TEXT NOT NULL,
-            defender_action TEXT NOT NULL,
-            result TEXT NOT NULL,
-            attacker_damage INTEGER DEFAULT 0,
-            defender_damage INTEGER DEFAULT 0,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(war_id) REFERENCES wars(id)
-        )
-        ''')
-
-        # ASOIAF Characters table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS asoiaf_characters (
-            user_id INTEGER PRIMARY KEY,
-            character_name TEXT UNIQUE NOT NULL,
-            house TEXT NOT NULL,
-            title TEXT NOT NULL,
-            alive BOOLEAN DEFAULT 1,
-            age INTEGER DEFAULT 25,
-            skills TEXT DEFAULT '[]',
-            relationships TEXT DEFAULT '{}',
-            backstory TEXT DEFAULT '',
-            FOREIGN KEY(user_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # House debts table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS house_debts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            debtor_house_id INTEGER NOT NULL,
-            creditor_house_id INTEGER NOT NULL,
-            amount INTEGER NOT NULL,
-            due_date TEXT NOT NULL,
-            interest_rate REAL DEFAULT 0.1,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(debtor_house_id) REFERENCES alliances(id),
-            FOREIGN KEY(creditor_house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Income sources table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS income_sources (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            house_id INTEGER NOT NULL,
-            source_type TEXT NOT NULL,
-            name TEXT NOT NULL,
-            region TEXT NOT NULL,
-            income_per_minute INTEGER NOT NULL,
-            cost INTEGER NOT NULL,
-            level INTEGER DEFAULT 1,
-            seized BOOLEAN DEFAULT 0,
-            seized_by INTEGER,
-            last_income TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(house_id) REFERENCES alliances(id),
-            FOREIGN KEY(seized_by) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Marriages table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS marriages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user1_id INTEGER NOT NULL,
-            user2_id INTEGER NOT NULL,
-            married_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'married',
-            FOREIGN KEY(user1_id) REFERENCES members(user_id),
-            FOREIGN KEY(user2_id) REFERENCES members(user_id),
-            UNIQUE(user1_id, user2_id)
-        )
-        ''')
-
-        # Pregnancies table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS pregnancies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            mother_id INTEGER NOT NULL,
-            father_id INTEGER NOT NULL,
-            conception_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            due_date TIMESTAMP NOT NULL,
-            status TEXT DEFAULT 'pregnant',
-            baby_name TEXT,
-            baby_gender TEXT,
-            FOREIGN KEY(mother_id) REFERENCES members(user_id),
-            FOREIGN KEY(father_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Children table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS children (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            gender TEXT NOT NULL,
-            birth_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            mother_id INTEGER NOT NULL,
-            father_id INTEGER NOT NULL,
-            house_id INTEGER NOT NULL,
-            age_years INTEGER DEFAULT 0,
-            traits TEXT DEFAULT '[]',
-            FOREIGN KEY(mother_id) REFERENCES members(user_id),
-            FOREIGN KEY(father_id) REFERENCES members(user_id),
-            FOREIGN KEY(house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Heirs table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS heirs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            house_id INTEGER NOT NULL,
-            heir_user_id INTEGER NOT NULL,
-            succession_order INTEGER DEFAULT 1,
-            appointed_by INTEGER NOT NULL,
-            appointed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(house_id) REFERENCES alliances(id),
-            FOREIGN KEY(heir_user_id) REFERENCES members(user_id),
-            FOREIGN KEY(appointed_by) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Army resources table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS army_resources (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            house_id INTEGER NOT NULL,
-            food_supplies INTEGER DEFAULT 1000,
-            weapons_quality INTEGER DEFAULT 50,
-            armor_quality INTEGER DEFAULT 50,
-            siege_weapons INTEGER DEFAULT 0,
-            cavalry INTEGER DEFAULT 0,
-            archers INTEGER DEFAULT 0,
-            infantry INTEGER DEFAULT 0,
-            navy_ships INTEGER DEFAULT 0,
-            army_training INTEGER DEFAULT 50,
-            morale INTEGER DEFAULT 70,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Tournaments table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS tournaments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            host_house_id INTEGER NOT NULL,
-            tournament_type TEXT CHECK(tournament_type IN ('joust', 'melee', 'archery', 'mixed')),
-            entry_fee INTEGER DEFAULT 1000,
-            prize_pool INTEGER DEFAULT 10000,
-            status TEXT DEFAULT 'open',
-            start_time TIMESTAMP,
-            end_time TIMESTAMP,
-            max_participants INTEGER DEFAULT 16,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(host_house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Tournament participants table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS tournament_participants (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tournament_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            character_skill INTEGER DEFAULT 50,
-            equipment_bonus INTEGER DEFAULT 0,
-            eliminated BOOLEAN DEFAULT 0,
-            final_position INTEGER,
-            prize_won INTEGER DEFAULT 0,
-            FOREIGN KEY(tournament_id) REFERENCES tournaments(id),
-            FOREIGN KEY(user_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Duels table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS duels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            challenger_id INTEGER NOT NULL,
-            challenged_id INTEGER NOT NULL,
-            duel_type TEXT CHECK(duel_type IN ('sword', 'lance', 'trial_by_combat')),
-            wager_amount INTEGER DEFAULT 0,
-            status TEXT DEFAULT 'challenged',
-            winner_id INTEGER,
-            fight_details TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            completed_at TIMESTAMP,
-            FOREIGN KEY(challenger_id) REFERENCES members(user_id),
-            FOREIGN KEY(challenged_id) REFERENCES members(user_id),
-            FOREIGN KEY(winner_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # House resources (food, materials, etc.)
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS house_resources (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            house_id INTEGER NOT NULL,
-            resource_type TEXT CHECK(resource_type IN ('food', 'stone', 'wood', 'iron', 'horses', 'wine')),
-            quantity INTEGER DEFAULT 0,
-            quality INTEGER DEFAULT 50,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Trade offers table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS trade_offers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            seller_id INTEGER NOT NULL,
-            offer_type TEXT CHECK(offer_type IN ('resource', 'soldiers', 'gold')),
-            resource_type TEXT,
-            quantity INTEGER NOT NULL,
-            price_per_unit INTEGER NOT NULL,
-            total_price INTEGER NOT NULL,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            FOREIGN KEY(seller_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Trade agreements table  
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS trade_agreements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            house1_id INTEGER NOT NULL,
-            house2_id INTEGER NOT NULL,
-            agreement_type TEXT DEFAULT 'trade_route',
-            terms TEXT DEFAULT '{}',
-            discount_percentage REAL DEFAULT 0.1,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            FOREIGN KEY(house1_id) REFERENCES alliances(id),
-            FOREIGN KEY(house2_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Trade transactions table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS trade_transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            buyer_id INTEGER NOT NULL,
-            seller_id INTEGER NOT NULL,
-            offer_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL,
-            total_cost INTEGER NOT NULL,
-            transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(buyer_id) REFERENCES alliances(id),
-            FOREIGN KEY(seller_id) REFERENCES alliances(id),
-            FOREIGN KEY(offer_id) REFERENCES trade_offers(id)
-        )
-        ''')
-
-        # Marriages table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS marriages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user1_id INTEGER NOT NULL,
-            user2_id INTEGER NOT NULL,
-            status TEXT DEFAULT 'proposed',
-            married_at TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user1_id) REFERENCES members(user_id),
-            FOREIGN KEY(user2_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Pregnancies table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS pregnancies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            mother_id INTEGER NOT NULL,
-            father_id INTEGER NOT NULL,
-            status TEXT DEFAULT 'pregnant',
-            due_date TIMESTAMP,
-            birth_date TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(mother_id) REFERENCES members(user_id),
-            FOREIGN KEY(father_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # Children table
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS children (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            mother_id INTEGER NOT NULL,
-            father_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            gender TEXT CHECK(gender IN ('male', 'female')),
-            birth_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            skills TEXT DEFAULT '{}',
-            alive BOOLEAN DEFAULT 1,
-            FOREIGN KEY(mother_id) REFERENCES members(user_id),
-            FOREIGN KEY(father_id) REFERENCES members(user_id)
-        )
-        ''')
-
-        # House debts table (Game of Thrones authentic debt system)
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS house_debts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            debtor_house_id INTEGER NOT NULL,
-            creditor_house_id INTEGER NOT NULL,
-            amount INTEGER NOT NULL,
-            interest_rate REAL DEFAULT 0.1,
-            due_date TIMESTAMP,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(debtor_house_id) REFERENCES alliances(id),
-            FOREIGN KEY(creditor_house_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        # Create warnings table for moderation
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS warnings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT NOT NULL,
-            warned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Create users table for compatibility
-        self.c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            alliance_id INTEGER,
-            username TEXT,
-            join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(alliance_id) REFERENCES alliances(id)
-        )
-        ''')
-
-        self.conn.commit()
-        logger.info("Database tables created successfully")
+        """Bring the schema up to date via versioned migrations (see migrations.py)"""
+        with self.write_cursor() as cur:
+            version = migrate(cur)
+            logger.info(f"Database schema at version {version}")
+
+    def _enable_incremental_vacuum(self):
+        """Switch the file to incremental auto-vacuum (one full VACUUM, first start only).
+
+        Free pages are then reclaimed in small steps by
+        ``PerformanceOptimizer.vacuum_step`` instead of a VACUUM that holds the writer.
+        """
+        with self.write_cursor() as cur:
+            cur.execute("PRAGMA auto_vacuum")
+            if cur.fetchone()[0] == 2:
+                return
+            self.conn.commit()
+            cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cur.execute("VACUUM")
+            logger.info("Database converted to incremental auto-vacuum")
 
     def populate_default_data(self):
-        """Populate database with default GOT houses if they don't exist"""
-
-        houses_data = {
-            "Lannister": {
-                "region": "Batı", "gold": 2000000, "soldiers": 60000, "debt": 0,
-                "special_ability": "Altın Gücü", "army_quality": 85
-            },
-            "Tyrell": {
-                "region": "Ulaşım", "gold": 800000, "soldiers": 100000, "debt": 0,
-                "special_ability": "Bahçe Gücü", "army_quality": 75
-            },
-            "Stark": {
-                "region": "Kuzey", "gold": 120000, "soldiers": 45000, "debt": 200000,
-                "special_ability": "Kış Savaşçısı", "army_quality": 80
-            },
-            "Arryn": {
-                "region": "Vadi", "gold": 350000, "soldiers": 35000, "debt": 0,
-                "special_ability": "Kartal Uçuşu", "army_quality": 78
-            },
-            "Baratheon": {
-                "region": "Fırtına Toprakları", "gold": 80000, "soldiers": 30000, "debt": 6000000,
-                "special_ability": "Savaş Öfkesi", "army_quality": 82
-            },
-            "Martell": {
-                "region": "Dorne", "gold": 200000, "soldiers": 25000, "debt": 50000,
-                "special_ability": "Çöl Savaşçısı", "army_quality": 70
-            },
-            "Tully": {
-                "region": "Nehir Toprakları", "gold": 150000, "soldiers": 25000, "debt": 300000,
-                "special_ability": "Nehir Kontrollü", "army_quality": 65
-            },
-            "Greyjoy": {
-                "region": "Demir Adalar", "gold": 60000, "soldiers": 20000, "debt": 150000,
-                "special_ability": "Deniz Lordluğu", "army_quality": 72
-            },
-            "Targaryen": {
-                "region": "Dragonstone", "gold": 30000, "soldiers": 8000, "debt": 100000,
-                "special_ability": "Eski Valyria Mirası", "army_quality": 90
-            },
-            "Bolton": {
-                "region": "Dreadfort", "gold": 40000, "soldiers": 12000, "debt": 200000,
-                "special_ability": "Korku Tacticsi", "army_quality": 75
-            }
-        }
-
-        for house_name, house_data in houses_data.items():
-            try:
-                self.c.execute('''
+        """Seed default GOT houses, their army/resources and debts in one pass.
+
+        Existing rows are loaded in bulk and diffed against the seed spec; only
+        missing rows are inserted. Skipped entirely when the stored checksum matches.
+        """
+        army_seed = {name: self._get_house_base_resources(name, data)
+                     for name, data in DEFAULT_HOUSES.items()}
+        resource_seed = {(name, resource): self._get_base_resource_quantity(name, resource, data)
+                         for name, data in DEFAULT_HOUSES.items()
+                         for resource in DEFAULT_RESOURCE_TYPES}
+        checksum = hashlib.sha256(json.dumps(
+            [DEFAULT_HOUSES, army_seed, sorted(resource_seed.items()), DEFAULT_DEBTS],
+            sort_keys=True, ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+
+        if self.get_state(SEED_CHECKSUM_KEY) == checksum:
+            logger.info("Default house data up to date")
+            return
+
+        with self.transaction(), self.write_cursor() as cur:
+            names = list(DEFAULT_HOUSES)
+            placeholders = ','.join('?' * len(names))
+            cur.execute(f'SELECT name, id FROM alliances WHERE name IN ({placeholders})', names)
+            house_ids = dict(cur.fetchall())
+
+            missing_houses = [name for name in names if name not in house_ids]
+            if missing_houses:
+                cur.executemany('''
                 INSERT OR IGNORE INTO alliances (name, house_type, region, gold, soldiers, debt, special_ability, army_quality)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (house_name, house_name, house_data["region"], house_data["gold"], 
-                      house_data["soldiers"], house_data["debt"], house_data["special_ability"], house_data["army_quality"]))
-
-                # Initialize army resources for each house
-                self.c.execute('SELECT id FROM alliances WHERE name = ?', (house_name,))
-                house_result = self.c.fetchone()
-                if house_result:
-                    house_id = house_result[0]
-
-                    # Check if army resources already exist
-                    self.c.execute('SELECT id FROM army_resources WHERE house_id = ?', (house_id,))
-                    if not self.c.fetchone():
-                        # Initialize based on house wealth and characteristics
-                        base_resources = self._get_house_base_resources(house_name, house_data)
-                        self.c.execute('''
-                        INSERT INTO army_resources 
-                        (house_id, food_supplies, weapons_quality, armor_quality, siege_weapons, 
-                         cavalry, archers, infantry, navy_ships, army_training, morale)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (house_id, base_resources['food'], base_resources['weapons'], 
-                             base_resources['armor'], base_resources['siege'], base_resources['cavalry'],
-                             base_resources['archers'], base_resources['infantry'], base_resources['navy'],
-                             base_resources['training'], base_resources['morale']))
-
-                    # Initialize basic resources
-                    resource_types = ['food', 'stone', 'wood', 'iron', 'horses', 'wine']
-                    for resource in resource_types:
-                        self.c.execute('SELECT id FROM house_resources WHERE house_id = ? AND resource_type = ?', 
-                                     (house_id, resource))
-                        if not self.c.fetchone():
-                            base_quantity = self._get_base_resource_quantity(house_name, resource, house_data)
-                            self.c.execute('''
-                            INSERT INTO house_resources (house_id, resource_type, quantity, quality)
-                            VALUES (?, ?, ?, ?)
-                            ''', (house_id, resource, base_quantity, 60))
-            except sqlite3.IntegrityError:
-                pass  # House already exists
-
-        self.conn.commit()
-
-        # Add realistic debt relationships between houses
-        try:
-            debt_relationships = [
-                # (Debtor, Creditor, Amount, Interest Rate, Days)
-                ("Baratheon", "Lannister", 6000000, 0.15, 365),  # Crown debt to Lannisters
-                ("Stark", "Lannister", 500000, 0.12, 300),       # War loans
-                ("Targaryen", "Tyrell", 200000, 0.10, 200),      # Exile support
-                ("Greyjoy", "Lannister", 300000, 0.18, 180),     # Rebellion reparations  
-                ("Tully", "Tyrell", 800000, 0.14, 400),         # Agricultural loans
-                ("Bolton", "Lannister", 400000, 0.16, 250),     # Military support
-                ("Martell", "Tyrell", 100000, 0.08, 150),       # Trade agreements
-            ]
-
-            for debtor_name, creditor_name, amount, interest_rate, days in debt_relationships:
-                # Get house IDs
-                self.c.execute('SELECT id FROM alliances WHERE name = ?', (debtor_name,))
-                debtor_result = self.c.fetchone()
-                self.c.execute('SELECT id FROM alliances WHERE name = ?', (creditor_name,))
-                creditor_result = self.c.fetchone()
-
-                if debtor_result and creditor_result:
-                    debtor_id = debtor_result[0]
-                    creditor_id = creditor_result[0]
-
-                    # Check if debt already exists
-                    self.c.execute('SELECT id FROM house_debts WHERE debtor_house_id = ? AND creditor_house_id = ?', 
-                                  (debtor_id, creditor_id))
-                    if not self.c.fetchone():
-                        # Create the debt
-                        due_date = (datetime.now() + timedelta(days=days)).isoformat()
-                        self.c.execute('''
-                        INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
-                        VALUES (?, ?, ?, ?, ?)
-                        ''', (debtor_id, creditor_id, amount, due_date, interest_rate))
-                        logger.info(f"Debt created: {debtor_name} owes {creditor_name} {amount:,} gold")
+                ''', [(name, name, DEFAULT_HOUSES[name]["region"], DEFAULT_HOUSES[name]["gold"],
+                       DEFAULT_HOUSES[name]["soldiers"], DEFAULT_HOUSES[name]["debt"],
+                       DEFAULT_HOUSES[name]["special_ability"], DEFAULT_HOUSES[name]["army_quality"])
+                      for name in missing_houses])
+                cur.execute(f'SELECT name, id FROM alliances WHERE name IN ({placeholders})', names)
+                house_ids = dict(cur.fetchall())
+                self.gold_ledger.open_accounts(cur, [house_ids[name] for name in missing_houses if name in house_ids])
+
+            cur.execute('SELECT DISTINCT house_id FROM army_resources')
+            armed = {row[0] for row in cur.fetchall()}
+            army_rows = []
+            for name, base in army_seed.items():
+                house_id = house_ids.get(name)
+                if house_id is not None and house_id not in armed:
+                    army_rows.append((house_id, base['food'], base['weapons'], base['armor'], base['siege'],
+                                      base['cavalry'], base['archers'], base['infantry'], base['navy'],
+                                      base['training'], base['morale']))
+            cur.executemany('''
+            INSERT INTO army_resources 
+            (house_id, food_supplies, weapons_quality, armor_quality, siege_weapons, 
+             cavalry, archers, infantry, navy_ships, army_training, morale)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', army_rows)
+
+            cur.execute('SELECT house_id, resource_type FROM house_resources')
+            stocked = set(cur.fetchall())
+            resource_rows = [(house_ids[name], resource, quantity, 60)
+                             for (name, resource), quantity in resource_seed.items()
+                             if name in house_ids and (house_ids[name], resource) not in stocked]
+            cur.executemany('''
+            INSERT INTO house_resources (house_id, resource_type, quantity, quality)
+            VALUES (?, ?, ?, ?)
+            ''', resource_rows)
+
+            cur.execute('SELECT debtor_house_id, creditor_house_id FROM house_debts')
+            existing_debts = set(cur.fetchall())
+            debt_rows = []
+            for debtor_name, creditor_name, amount, interest_rate, days in DEFAULT_DEBTS:
+                debtor_id, creditor_id = house_ids.get(debtor_name), house_ids.get(creditor_name)
+                if debtor_id is None or creditor_id is None or (debtor_id, creditor_id) in existing_debts:
+                    continue
+                due_date = (datetime.now() + timedelta(days=days)).isoformat()
+                debt_rows.append((debtor_id, creditor_id, amount, due_date, interest_rate))
+                logger.info(f"Debt created: {debtor_name} owes {creditor_name} {amount:,} gold")
+            cur.executemany('''
+            INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
+            VALUES (?, ?, ?, ?, ?)
+            ''', debt_rows)
 
-            self.conn.commit()
+            cur.execute(_SET_STATE_SQL, (SEED_CHECKSUM_KEY, checksum))
+
+        logger.info(f"Default house data populated ({len(missing_houses)} houses, {len(army_rows)} armies, "
+                    f"{len(resource_rows)} resources, {len(debt_rows)} debts added)")
+
+    def get_state(self, key, default=None):
+        """Read a value from the app_state key/value table"""
+        try:
+            with self.read_cursor() as cur:
+                cur.execute('SELECT value FROM app_state WHERE key = ?', (key,))
+                row = cur.fetchone()
+                return row[0] if row else default
         except Exception as e:
-            logger.error(f"Error creating default debts: {e}")
+            logger.error(f"Error reading app state {key}: {e}")
+            return default
 
-        logger.info("Default house data populated")
+    def set_state(self, key, value):
+        """Store a value in the app_state key/value table"""
+        try:
+            with self.write_cursor() as cur:
+                cur.execute(_SET_STATE_SQL, (key, str(value)))
+                self._commit()
+            return True
+        except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
+            logger.error(f"Error writing app state {key}: {e}")
+            return False
 
     def _get_house_base_resources(self, house_name, house_data):
         """Get base army resources for a house based on its characteristics"""
@@ -657,12 +725,27 @@ class Database:
     def get_user_alliance(self, user_id):
         """Get user's alliance information"""
         try:
-            self.c.execute('''
-            SELECT a.*, m.role FROM alliances a 
-            JOIN members m ON a.id = m.alliance_id 
-            WHERE m.user_id = ?
-            ''', (user_id,))
-            return self.c.fetchone()
+            membership = self.alliance_cache.get_membership(user_id)
+            if membership is not MISS:
+                if membership is None:
+                    return None
+                alliance = self.get_alliance_by_id(membership[0])
+                return alliance + (membership[1],) if alliance else None
+
+            generation = self.alliance_cache.generation()
+            with self.read_cursor() as cur:
+                cur.execute('''
+                SELECT a.*, m.role FROM alliances a 
+                JOIN members m ON a.id = m.alliance_id 
+                WHERE m.user_id = ?
+                ''', (user_id,))
+                row = cur.fetchone()
+            if row:
+                self.alliance_cache.fill(row[:-1], generation)
+                self.alliance_cache.fill_membership(user_id, (row[0], row[-1]), generation)
+            else:
+                self.alliance_cache.fill_membership(user_id, None, generation)
+            return row
         except Exception as e:
             logger.error(f"Error getting user alliance: {e}")
             return None
@@ -670,8 +753,16 @@ class Database:
     def get_alliance_by_id(self, alliance_id):
         """Get alliance by ID"""
         try:
-            self.c.execute('SELECT * FROM alliances WHERE id = ?', (alliance_id,))
-            return self.c.fetchone()
+            alliance = self.alliance_cache.get_by_id(alliance_id)
+            if alliance is not MISS:
+                return alliance
+
+            generation = self.alliance_cache.generation()
+            with self.read_cursor() as cur:
+                cur.execute('SELECT * FROM alliances WHERE id = ?', (alliance_id,))
+                alliance = cur.fetchone()
+            self.alliance_cache.fill(alliance, generation)
+            return alliance
         except Exception as e:
             logger.error(f"Error getting alliance by ID: {e}")
             return None
@@ -679,8 +770,16 @@ class Database:
     def get_alliance_by_name(self, name):
         """Get alliance by name"""
         try:
-            self.c.execute('SELECT * FROM alliances WHERE name = ?', (name,))
-            return self.c.fetchone()
+            alliance = self.alliance_cache.get_by_name(name)
+            if alliance is not MISS:
+                return alliance
+
+            generation = self.alliance_cache.generation()
+            with self.read_cursor() as cur:
+                cur.execute('SELECT * FROM alliances WHERE name = ?', (name,))
+                alliance = cur.fetchone()
+            self.alliance_cache.fill(alliance, generation)
+            return alliance
         except Exception as e:
             logger.error(f"Error getting alliance by name: {e}")
             return None
@@ -688,96 +787,187 @@ class Database:
     def get_alliance_members(self, alliance_id):
         """Get all members of an alliance"""
         try:
-            self.c.execute('''
-            SELECT m.*, ac.character_name FROM members m 
-            LEFT JOIN asoiaf_characters ac ON m.user_id = ac.user_id
-            WHERE m.alliance_id = ?
-            ORDER BY m.role DESC, m.joined_at ASC
-            ''', (alliance_id,))
-            return self.c.fetchall()
+            with self.read_cursor() as cur:
+                cur.execute('''
+                SELECT m.*, ac.character_name FROM members m 
+                LEFT JOIN asoiaf_characters ac ON m.user_id = ac.user_id
+                WHERE m.alliance_id = ?
+                ORDER BY m.role DESC, m.joined_at ASC
+                ''', (alliance_id,))
+                return cur.fetchall()
         except Exception as e:
             logger.error(f"Error getting alliance members: {e}")
             return []
 
-    def update_alliance_resources(self, alliance_id, gold_change=0, soldiers_change=0):
-        """Update alliance resources"""
+    def update_alliance_resources(self, alliance_id, gold_change=0, soldiers_change=0, reason="adjustment"):
+        """Update alliance resources; gold moves through the ledger against the outside world"""
         try:
-            self.c.execute('''
-            UPDATE alliances 
-            SET gold = max(0, gold + ?), soldiers = max(0, soldiers + ?)
-            WHERE id = ?
-            ''', (gold_change, soldiers_change, alliance_id))
-            self.conn.commit()
+            # Timed (not invalidating) cursor: this row is refreshed below instead
+            with self.pool.write(self._timed_cursor_factory) as cur:
+                sql = '''
+                UPDATE alliances 
+                SET soldiers = max(0, soldiers + ?)
+                WHERE id = ?
+                '''
+                self._notify_listeners(sql)
+                if gold_change:
+                    self.gold_ledger.post(cur, [movement(alliance_id, gold_change, reason)])
+                if soldiers_change:
+                    cur.execute(sql, (soldiers_change, alliance_id))
+                cur.execute('SELECT * FROM alliances WHERE id = ?', (alliance_id,))
+                self.alliance_cache.put(cur.fetchone())
+                self._commit()
             return True
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error updating alliance resources: {e}")
             return False
 
+    def transfer_gold(self, from_id, to_id, amount, reason):
+        """Move gold between two accounts (houses, or WORLD/ESCROW from gold_ledger.py).
+
+        The payer is never taken below zero; returns the amount actually
+        moved, or None on error.
+        """
+        try:
+            with self.transaction(), self.write_cursor() as cur:
+                applied = self.gold_ledger.post(cur, [(from_id, to_id, amount, reason)])
+            return applied[0][2] if applied else 0
+        except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
+            logger.error(f"Error transferring gold: {e}")
+            return None
+
     def create_war(self, attacker_id, defender_id, weather='normal', terrain='ova', battle_size='orta'):
         """Create a new war"""
         try:
-            self.c.execute('''
-            INSERT INTO wars (attacker_id, defender_id, weather, terrain, battle_size)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (attacker_id, defender_id, weather, terrain, battle_size))
-            war_id = self.c.lastrowid
-            self.conn.commit()
+            with self.write_cursor() as cur:
+                cur.execute('''
+                INSERT INTO wars (attacker_id, defender_id, weather, terrain, battle_size, last_turn_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (attacker_id, defender_id, weather, terrain, battle_size))
+                war_id = cur.lastrowid
+                self._commit()
+            self.war_registry.add(war_id, attacker_id, defender_id)
             return war_id
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error creating war: {e}")
             return None
 
     def get_active_wars(self, alliance_id=None):
         """Get active wars, optionally filtered by alliance"""
         try:
-            if alliance_id:
-                self.c.execute('''
-                SELECT * FROM wars 
-                WHERE (attacker_id = ? OR defender_id = ?) AND status = 'active'
-                ''', (alliance_id, alliance_id))
-            else:
-                self.c.execute("SELECT * FROM wars WHERE status = 'active'")
-            return self.c.fetchall()
+            with self.read_cursor() as cur:
+                if alliance_id:
+                    cur.execute('''
+                    SELECT * FROM wars 
+                    WHERE (attacker_id = ? OR defender_id = ?) AND status = 'active'
+                    ''', (alliance_id, alliance_id))
+                else:
+                    cur.execute("SELECT * FROM wars WHERE status = 'active'")
+                return cur.fetchall()
         except Exception as e:
             logger.error(f"Error getting active wars: {e}")
             return []
 
+    def _load_market_orders(self):
+        """Open market_orders as OrderBook entries; buy orders belong to buyer_house_id"""
+        with self.read_cursor() as cur:
+            cur.execute('''
+            SELECT mo.id, CASE WHEN mo.side = 'buy' THEN mo.buyer_house_id ELSE mo.seller_house_id END,
+                   mo.side, mo.resource_type, mo.quantity, mo.price_per_unit, a.name
+            FROM market_orders mo
+            LEFT JOIN alliances a ON a.id = CASE WHEN mo.side = 'buy' THEN mo.buyer_house_id ELSE mo.seller_house_id END
+            WHERE mo.status = 'active' AND mo.quantity > 0
+            ''')
+            return cur.fetchall()
+
+    def _load_trade_offers(self):
+        """Active resource trade_offers as an ask-only OrderBook"""
+        with self.read_cursor() as cur:
+            cur.execute('''
+            SELECT o.id, o.seller_id, ?, o.resource_type, o.quantity, o.price_per_unit, a.name
+            FROM trade_offers o
+            LEFT JOIN alliances a ON a.id = o.seller_id
+            WHERE o.status = 'active' AND o.offer_type = 'resource' AND o.quantity > 0
+            ''', (SELL,))
+            return cur.fetchall()
+
+    def _load_active_wars(self):
+        """(war_id, attacker_id, defender_id) for every active war (WarRegistry loader)"""
+        with self.read_cursor() as cur:
+            cur.execute("SELECT id, attacker_id, defender_id FROM wars WHERE status = 'active'")
+            return cur.fetchall()
+
     def end_war(self, war_id, winner_id):
         """End a war with a winner"""
         try:
-            self.c.execute('''
-            UPDATE wars 
-            SET status = 'ended', winner_id = ?, end_time = CURRENT_TIMESTAMP
-            WHERE id = ?
-            ''', (winner_id, war_id))
-            self.conn.commit()
+            with self.write_cursor() as cur:
+                cur.execute('''
+                UPDATE wars 
+                SET status = 'ended', winner_id = ?, end_time = CURRENT_TIMESTAMP
+                WHERE id = ?
+                ''', (winner_id, war_id))
+                self._commit()
+            self.war_registry.remove(war_id)
             return True
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error ending war: {e}")
             return False
 
+    def advance_war_turn(self, war_id, turn_number, attacker_losses, defender_losses,
+                         attacker_remaining, defender_remaining):
+        """Store a resolved turn's counters; False if that turn was already played"""
+        try:
+            with self.write_cursor() as cur:
+                cur.execute('''
+                UPDATE wars SET current_turn = ?, attacker_losses = ?, defender_losses = ?,
+                                attacker_remaining = ?, defender_remaining = ?,
+                                last_turn_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND current_turn = ?
+                ''', (turn_number, attacker_losses, defender_losses,
+                      attacker_remaining, defender_remaining, war_id, turn_number - 1))
+                advanced = cur.rowcount == 1
+                self._commit()
+            return advanced
+        except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
+            logger.error(f"Error advancing war turn: {e}")
+            return False
+
     def add_battle_log(self, war_id, turn_number, attacker_action, defender_action, result, attacker_damage=0, defender_damage=0):
         """Add a battle log entry"""
         try:
-            self.c.execute('''
-            INSERT INTO battle_logs (war_id, turn_number, attacker_action, defender_action, result, attacker_damage, defender_damage)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (war_id, turn_number, attacker_action, defender_action, result, attacker_damage, defender_damage))
-            self.conn.commit()
+            with self.write_cursor() as cur:
+                cur.execute('''
+                INSERT INTO battle_logs (war_id, turn_number, attacker_action, defender_action, result, attacker_damage, defender_damage)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (war_id, turn_number, attacker_action, defender_action, result, attacker_damage, defender_damage))
+                self._commit()
             return True
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error adding battle log: {e}")
             return False
 
     def get_income_sources(self, house_id):
         """Get all income sources for a house"""
         try:
-            self.c.execute('''
-            SELECT * FROM income_sources 
-            WHERE house_id = ? OR seized_by = ?
-            ORDER BY income_per_minute DESC
-            ''', (house_id, house_id))
-            return self.c.fetchall()
+            with self.read_cursor() as cur:
+                cur.execute('''
+                SELECT * FROM income_sources 
+                WHERE house_id = ? OR seized_by = ?
+                ORDER BY income_per_minute DESC
+                ''', (house_id, house_id))
+                return cur.fetchall()
         except Exception as e:
             logger.error(f"Error getting income sources: {e}")
             return []
@@ -785,48 +975,71 @@ class Database:
     def add_income_source(self, house_id, source_type, name, region, income_per_minute, cost):
         """Add a new income source"""
         try:
-            self.c.execute('''
-            INSERT INTO income_sources (house_id, source_type, name, region, income_per_minute, cost)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (house_id, source_type, name, region, income_per_minute, cost))
-            self.conn.commit()
-            return self.c.lastrowid
+            with self.write_cursor() as cur:
+                cur.execute('''
+                INSERT INTO income_sources (house_id, source_type, name, region, income_per_minute, cost)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', (house_id, source_type, name, region, income_per_minute, cost))
+                source_id = cur.lastrowid
+                self._commit()
+            return source_id
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error adding income source: {e}")
             return None
 
     def create_marriage(self, user1_id, user2_id):
         """Create a marriage between two users"""
         try:
-            # Insert marriage record
-            self.c.execute('''
-            INSERT INTO marriages (user1_id, user2_id)
-            VALUES (?, ?)
-            ''', (user1_id, user2_id))
-
-            # Update member records
-            self.c.execute('UPDATE members SET married_to = ? WHERE user_id = ?', (user2_id, user1_id))
-            self.c.execute('UPDATE members SET married_to = ? WHERE user_id = ?', (user1_id, user2_id))
-
-            self.conn.commit()
+            with self.write_cursor() as cur:
+                # Insert marriage record
+                cur.execute('''
+                INSERT INTO marriages (user1_id, user2_id)
+                VALUES (?, ?)
+                ''', (user1_id, user2_id))
+
+                # Update member records
+                cur.execute('UPDATE members SET married_to = ? WHERE user_id = ?', (user2_id, user1_id))
+                cur.execute('UPDATE members SET married_to = ? WHERE user_id = ?', (user1_id, user2_id))
+
+                self._commit()
             return True
         except Exception as e:
+            if self.in_transaction():
+                raise  # Let the enclosing transaction() roll back
             logger.error(f"Error creating marriage: {e}")
             return False
 
     def get_user_member_data(self, user_id):
         """Get complete member data for a user"""
         try:
-            self.c.execute('SELECT * FROM members WHERE user_id = ?', (user_id,))
-            return self.c.fetchone()
+            with self.read_cursor() as cur:
+                cur.execute('SELECT * FROM members WHERE user_id = ?', (user_id,))
+                return cur.fetchone()
         except Exception as e:
             logger.error(f"Error getting member data: {e}")
             return None
 
+    def get_members_data(self, user_ids):
+        """Member rows for several users in one query, keyed by user_id"""
+        try:
+            user_ids = list(set(user_ids))
+            if not user_ids:
+                return {}
+            with self.read_cursor() as cur:
+                placeholders = ",".join("?" * len(user_ids))
+                cur.execute(f'SELECT * FROM members WHERE user_id IN ({placeholders})', user_ids)
+                return {row[0]: row for row in cur.fetchall()}
+        except Exception as e:
+            logger.error(f"Error getting members data: {e}")
+            return {}
+
     def close(self):
         """Close database connection"""
         try:
-            self.conn.close()
+            self.aio.close()
+            self.pool.close()
             logger.info("Database connection closed")
         except Exception as e:
             logger.error(f"Error closing database: {e}")
\ No newline at end of file
@@ -94,7 +94,7 @@ def setup_easy_commands(bot, db):
         
         if success:
             profit = trade["profit"] - trade["cost"]
-            db.update_alliance_resources(alliance[0], profit, 0)
+            await db.aio.update_alliance_resources(alliance[0], profit, 0, "easy_trade")
             
             embed = create_embed("🎉 TİCARET BAŞARILI!",
                                f"**{trade['item']}** ticareti başarılı!",
@@ -102,7 +102,7 @@ def setup_easy_commands(bot, db):
             embed.add_field(name="Kar", value=f"+{profit} altın", inline=True)
             embed.add_field(name="Yeni Bakiye", value=f"{gold + profit:,} altın", inline=True)
         else:
-            db.update_alliance_resources(alliance[0], -trade["cost"], 0)
+            await db.aio.update_alliance_resources(alliance[0], -trade["cost"], 0, "easy_trade")
             
             embed = create_embed("💔 TİCARET BAŞARISIZ",
                                f"**{trade['item']}** ticareti başarısız!",
@@ -240,12 +240,20 @@ def setup_easy_commands(bot, db):
         
         reward = result[0]
         
-        # Give reward
-        db.update_alliance_resources(alliance[0], reward, 0)
-        
-        # Clear quest
-        db.c.execute('UPDATE user_progress SET current_quest_reward = NULL WHERE user_id = ?', (user_id,))
-        db.conn.commit()
+        # Give reward and clear quest in one writer-thread transaction
+        def claim(cur):
+            cur.execute('''
+            UPDATE user_progress SET current_quest_reward = NULL
+            WHERE user_id = ? AND current_quest_reward = ?
+            ''', (user_id, reward))
+            if cur.rowcount == 0:
+                return False  # Already claimed
+            db.update_alliance_resources(alliance[0], reward, 0, "daily_quest_reward")
+            return True
+        
+        if not await db.aio.run_write(claim):
+            await ctx.send("❌ Aktif görevin yok! `!günlük_görev` ile görev al.")
+            return
         
         embed = create_embed("🎉 GÖREV TAMAMLANDI!",
                            f"Tebrikler! Günlük görevi tamamladın!",
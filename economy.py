@@ -1,65 +1,93 @@
+import time
 import asyncio
 import logging
 from datetime import datetime, timedelta
+from config import INCOME_MAX_CATCHUP_MINUTES, DEBT_INTEREST_MAX_CATCHUP_HOURS, ECONOMY_SNAPSHOT_TTL_SECONDS
+from database import TransactionRollback
+from gold_ledger import WORLD
 from utils import format_number
 
 logger = logging.getLogger(__name__)
 
+# Shared SQL fragments for the batched income tick (``:now`` is the tick timestamp)
+_BENEFICIARY_SQL = "CASE WHEN seized AND seized_by IS NOT NULL THEN seized_by ELSE house_id END"
+_ELAPSED_MINUTES_SQL = "((CAST(strftime('%s', :now) AS INTEGER) - CAST(strftime('%s', last_income) AS INTEGER)) / 60)"
+_DUE_SQL = "datetime(last_income) <= datetime(:now, '-1 minute')"
+
+# One hour of interest (annual rate / 8760 hours), minimum 1 gold
+_HOURLY_INTEREST_SQL = "max(1, CAST(amount * interest_rate / 8760 AS INTEGER))"
+_ACCRUING_DEBT_SQL = "status = 'active' AND amount > 0"
+DEBT_ACCRUAL_STATE_KEY = 'debt_interest_last_accrual'
+
+# Net worth valuation
+SOLDIER_VALUE = 10  # Each soldier worth 10 gold
+RECEIVABLE_COLLECTION_RATE = 0.8  # Receivable debts might not all be collected
+
+def net_worth(gold, soldiers, sources_value, debt_owed, debt_receivable):
+    """Gold + soldiers + owned source cost - debts owed + discounted receivables"""
+    worth = ((gold or 0) + (soldiers or 0) * SOLDIER_VALUE + sources_value
+             - debt_owed + debt_receivable * RECEIVABLE_COLLECTION_RATE)
+    return max(0, int(worth))
+
 class EconomySystem:
     def __init__(self, database):
         self.db = database
+        self._snapshot = None  # (built_at, {house_id: economy})
 
     async def generate_income(self):
-        """Generate income from all income sources"""
+        """Generate income from all income sources in one set-based tick"""
         try:
             # Check if database connection is alive
             if not hasattr(self.db, 'conn') or self.db.conn is None:
                 logger.warning("Database connection not available for income generation")
                 return
             
-            # Get all active income sources that haven't generated income in the last minute
-            self.db.c.execute('''
-            SELECT income_sources.*, a.name as house_name
-            FROM income_sources
-            LEFT JOIN alliances a ON (income_sources.house_id = a.id)
-            LEFT JOIN alliances a2 ON (income_sources.seized_by = a2.id)
-            WHERE datetime(income_sources.last_income) <= datetime('now', '-1 minute')
-            AND (a.id IS NOT NULL OR a2.id IS NOT NULL)
-            ''')
+            houses_credited, sources_paid = await self.db.aio.run_write(self._apply_income_tick)
             
-            sources = self.db.c.fetchall()
-            
-            income_generated = 0
-            for source in sources:
-                source_id = source[0]
-                house_id = source[1]
-                seized_by = source[10]
-                income_per_minute = source[5]
-                
-                # Determine who gets the income (owner or seizer)
-                beneficiary_id = seized_by if source[9] else house_id  # seized field check
-                
-                if beneficiary_id:
-                    # Add income to alliance
-                    success = self.db.update_alliance_resources(beneficiary_id, income_per_minute, 0)
-                    
-                    if success:
-                        # Update last income timestamp
-                        self.db.c.execute('''
-                        UPDATE income_sources 
-                        SET last_income = CURRENT_TIMESTAMP 
-                        WHERE id = ?
-                        ''', (source_id,))
-                        income_generated += income_per_minute
-            
-            self.db.conn.commit()
-            
-            if income_generated > 0:
-                logger.info(f"Generated {income_generated} gold from {len(sources)} income sources")
+            if sources_paid > 0:
+                logger.info(f"Generated income for {houses_credited} houses from {sources_paid} income sources")
             
         except Exception as e:
             logger.error(f"Income generation error: {e}")
 
+    def _apply_income_tick(self, cur):
+        """Credit every due income source to its beneficiary.
+
+        Gold deltas are aggregated per beneficiary (the seizer for seized sources,
+        otherwise the owner) and missed minutes since ``last_income`` are paid as
+        catch-up, capped at ``INCOME_MAX_CATCHUP_MINUTES``. Runs on the database
+        writer thread, which commits both statements as one transaction.
+        """
+        # One timestamp for the whole tick so both statements agree on elapsed minutes
+        cur.execute("SELECT datetime('now')")
+        now = cur.fetchone()[0]
+        params = {"now": now, "cap": INCOME_MAX_CATCHUP_MINUTES}
+        
+        # Aggregate each beneficiary's gold delta and post it as one ledger batch
+        houses_credited, _ = self.db.gold_ledger.post_select(cur, f'''
+        SELECT {WORLD}, beneficiary_id, amount, 'income' FROM (
+            SELECT {_BENEFICIARY_SQL} AS beneficiary_id,
+                   SUM(income_per_minute * min(:cap, {_ELAPSED_MINUTES_SQL})) AS amount
+            FROM income_sources
+            WHERE {_DUE_SQL}
+            GROUP BY beneficiary_id
+        )
+        ''', params)
+        
+        # Advance timestamps by the whole minutes paid so partial minutes carry over
+        cur.execute(f'''
+        UPDATE income_sources
+        SET last_income = CASE
+            WHEN {_ELAPSED_MINUTES_SQL} > :cap THEN :now
+            ELSE datetime(last_income, '+' || {_ELAPSED_MINUTES_SQL} || ' minutes')
+        END
+        WHERE {_DUE_SQL}
+        AND {_BENEFICIARY_SQL} IN (SELECT id FROM alliances)
+        ''', params)
+        sources_paid = cur.rowcount
+        
+        return houses_credited, sources_paid
+
     async def calculate_debt_interest(self):
         """Calculate and apply interest to all active debts"""
         try:
@@ -68,48 +96,72 @@ class EconomySystem:
                 logger.warning("Database connection not available for debt calculation")
                 return
             
-            # Get all active debts
-            self.db.c.execute('''
-            SELECT id, debtor_house_id, amount, interest_rate, creditor_house_id
-            FROM house_debts 
-            WHERE status = 'active' AND amount > 0
-            ''')
-            
-            debts = self.db.c.fetchall()
-            
-            total_interest = 0
-            for debt in debts:
-                debt_id, debtor_id, amount, interest_rate, creditor_id = debt
-                
-                # Calculate hourly interest (annual rate / 8760 hours)
-                hourly_rate = interest_rate / 8760
-                interest = max(1, int(amount * hourly_rate))  # Minimum 1 gold interest
-                new_amount = amount + interest
-                
-                # Update debt amount
-                self.db.c.execute('''
-                UPDATE house_debts 
-                SET amount = ?
-                WHERE id = ?
-                ''', (new_amount, debt_id))
-                
-                # Add interest to house debt total
-                self.db.c.execute('''
-                UPDATE alliances 
-                SET debt = debt + ?
-                WHERE id = ?
-                ''', (interest, debtor_id))
-                
-                total_interest += interest
-            
-            self.db.conn.commit()
+            debt_count, total_interest = await self.db.aio.run_write(self._apply_debt_interest)
             
             if total_interest > 0:
-                logger.info(f"Applied {total_interest} gold in debt interest to {len(debts)} debts")
+                logger.info(f"Applied {total_interest} gold in debt interest to {debt_count} debts")
             
         except Exception as e:
             logger.error(f"Debt calculation error: {e}")
 
+    def _apply_debt_interest(self, cur):
+        """Accrue interest on every active debt, set-based (runs on the writer thread).
+
+        Hours missed while the bot was down are caught up from the persisted
+        last-accrual timestamp (capped at ``DEBT_INTEREST_MAX_CATCHUP_HOURS``), one
+        compounding step per hour, so the result matches running every hour.
+        """
+        cur.execute("SELECT CAST(strftime('%s', 'now') AS INTEGER)")
+        now = cur.fetchone()[0]
+        last_accrual = self.db.get_state(DEBT_ACCRUAL_STATE_KEY)
+        
+        if last_accrual is None:
+            hours, next_accrual = 1, now
+        else:
+            hours = (now - int(last_accrual)) // 3600
+            if hours < 1:
+                return 0, 0  # Already accrued this hour (e.g. task fired right after a restart)
+            if hours > DEBT_INTEREST_MAX_CATCHUP_HOURS:
+                hours, next_accrual = DEBT_INTEREST_MAX_CATCHUP_HOURS, now
+            else:
+                # Keep the remainder so partial hours carry over to the next run
+                next_accrual = int(last_accrual) + hours * 3600
+        
+        debt_count, total_interest = 0, 0
+        for _ in range(hours):
+            cur.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM({_HOURLY_INTEREST_SQL}), 0)
+            FROM house_debts WHERE {_ACCRUING_DEBT_SQL}
+            ''')
+            count, interest = cur.fetchone()
+            if count == 0:
+                break
+            
+            # Roll each debtor's interest into alliances.debt before amounts change
+            cur.execute(f'''
+            UPDATE alliances
+            SET debt = debt + accrued.interest
+            FROM (
+                SELECT debtor_house_id, SUM({_HOURLY_INTEREST_SQL}) AS interest
+                FROM house_debts
+                WHERE {_ACCRUING_DEBT_SQL}
+                GROUP BY debtor_house_id
+            ) AS accrued
+            WHERE alliances.id = accrued.debtor_house_id
+            ''')
+            
+            cur.execute(f'''
+            UPDATE house_debts
+            SET amount = amount + {_HOURLY_INTEREST_SQL}
+            WHERE {_ACCRUING_DEBT_SQL}
+            ''')
+            
+            debt_count = count
+            total_interest += interest
+        
+        self.db.set_state(DEBT_ACCRUAL_STATE_KEY, next_accrual)
+        return debt_count, total_interest
+
     def create_loan(self, creditor_id, debtor_id, amount, interest_rate=0.1, duration_days=30):
         """Create a loan between houses"""
         try:
@@ -140,29 +192,26 @@ class EconomySystem:
             # Calculate due date
             due_date = (datetime.now() + timedelta(days=duration_days)).isoformat()
             
-            # Transfer gold
-            if not self.db.update_alliance_resources(creditor_id, -amount, 0):
-                return False, "Altın transferi başarısız!"
-            
-            if not self.db.update_alliance_resources(debtor_id, amount, 0):
-                # Rollback creditor transaction
-                self.db.update_alliance_resources(creditor_id, amount, 0)
-                return False, "Altın transferi başarısız!"
-            
-            # Create debt record
-            self.db.c.execute('''
-            INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (debtor_id, creditor_id, amount, due_date, interest_rate))
-            
-            # Update debtor's total debt
-            self.db.c.execute('''
-            UPDATE alliances 
-            SET debt = debt + ?
-            WHERE id = ?
-            ''', (amount, debtor_id))
-            
-            self.db.conn.commit()
+            try:
+                # Transfer gold and record the debt as one unit of work
+                with self.db.transaction():
+                    if self.db.transfer_gold(creditor_id, debtor_id, amount, "loan") != amount:
+                        raise TransactionRollback("Altın transferi başarısız!")
+                    
+                    # Create debt record
+                    self.db.c.execute('''
+                    INSERT INTO house_debts (debtor_house_id, creditor_house_id, amount, due_date, interest_rate)
+                    VALUES (?, ?, ?, ?, ?)
+                    ''', (debtor_id, creditor_id, amount, due_date, interest_rate))
+                    
+                    # Update debtor's total debt
+                    self.db.c.execute('''
+                    UPDATE alliances 
+                    SET debt = debt + ?
+                    WHERE id = ?
+                    ''', (amount, debtor_id))
+            except TransactionRollback as e:
+                return False, str(e)
             
             return True, f"{format_number(amount)} altın başarıyla borç olarak verildi! Vade: {duration_days} gün, Faiz: %{int(interest_rate*100)}"
             
@@ -197,40 +246,37 @@ class EconomySystem:
             debt_id, creditor_id, debt_amount = debt
             payment = min(amount, debt_amount)
             
-            # Transfer gold
-            if not self.db.update_alliance_resources(debtor_id, -payment, 0):
-                return False, "Ödeme transferi başarısız!"
-            
-            if not self.db.update_alliance_resources(creditor_id, payment, 0):
-                # Rollback debtor transaction
-                self.db.update_alliance_resources(debtor_id, payment, 0)
-                return False, "Ödeme transferi başarısız!"
-            
-            # Update debt
             remaining_debt = debt_amount - payment
-            if remaining_debt <= 0:
-                # Debt fully paid
-                self.db.c.execute('''
-                UPDATE house_debts 
-                SET status = 'paid', amount = 0
-                WHERE id = ?
-                ''', (debt_id,))
-            else:
-                # Partial payment
-                self.db.c.execute('''
-                UPDATE house_debts 
-                SET amount = ?
-                WHERE id = ?
-                ''', (remaining_debt, debt_id))
-            
-            # Update house total debt
-            self.db.c.execute('''
-            UPDATE alliances 
-            SET debt = debt - ?
-            WHERE id = ?
-            ''', (payment, debtor_id))
-            
-            self.db.conn.commit()
+            try:
+                # Transfer gold and settle the debt as one unit of work
+                with self.db.transaction():
+                    if self.db.transfer_gold(debtor_id, creditor_id, payment, "debt_payment") != payment:
+                        raise TransactionRollback("Ödeme transferi başarısız!")
+                    
+                    # Update debt
+                    if remaining_debt <= 0:
+                        # Debt fully paid
+                        self.db.c.execute('''
+                        UPDATE house_debts 
+                        SET status = 'paid', amount = 0
+                        WHERE id = ?
+                        ''', (debt_id,))
+                    else:
+                        # Partial payment
+                        self.db.c.execute('''
+                        UPDATE house_debts 
+                        SET amount = ?
+                        WHERE id = ?
+                        ''', (remaining_debt, debt_id))
+                    
+                    # Update house total debt
+                    self.db.c.execute('''
+                    UPDATE alliances 
+                    SET debt = debt - ?
+                    WHERE id = ?
+                    ''', (payment, debtor_id))
+            except TransactionRollback as e:
+                return False, str(e)
             
             if remaining_debt <= 0:
                 return True, f"{format_number(payment)} Lannister Altını ödendi! Borç tamamen kapatıldı. 🎉"
@@ -303,6 +349,72 @@ class EconomySystem:
             logger.error(f"Error getting house economy status: {e}")
             return None
 
+    def build_economy_snapshot(self, cur):
+        """Economy of every house in three aggregate queries, keyed by house id.
+
+        Each entry has name, gold, soldiers, debt (alliances.debt),
+        source_count, owned_income, seized_income, sources_value, debt_owed,
+        debt_receivable and net_worth, valued like ``calculate_house_net_worth``.
+        The result also refreshes the ``get_economy_snapshot`` cache.
+        """
+        cur.execute('SELECT id, name, gold, soldiers, debt FROM alliances')
+        snapshot = {
+            house_id: {
+                "name": name, "gold": gold or 0, "soldiers": soldiers or 0, "debt": debt or 0,
+                "source_count": 0, "owned_income": 0, "seized_income": 0, "sources_value": 0,
+                "debt_owed": 0, "debt_receivable": 0
+            }
+            for house_id, name, gold, soldiers, debt in cur.fetchall()
+        }
+        
+        # Owned sources count towards value, seized ones only towards the seizer's income
+        cur.execute('''
+        SELECT house_id, 0, COUNT(*), SUM(income_per_minute), SUM(cost)
+        FROM income_sources WHERE NOT seized
+        GROUP BY house_id
+        UNION ALL
+        SELECT seized_by, 1, COUNT(*), SUM(income_per_minute), 0
+        FROM income_sources WHERE seized AND seized_by IS NOT NULL
+        GROUP BY seized_by
+        ''')
+        for house_id, seized, count, income, cost in cur.fetchall():
+            house = snapshot.get(house_id)
+            if house is None:
+                continue
+            if seized:
+                house["seized_income"] = income or 0
+            else:
+                house["source_count"] = count
+                house["owned_income"] = income or 0
+                house["sources_value"] = cost or 0
+        
+        # Both sides of every active debt between existing houses
+        cur.execute('''
+        SELECT debtor_house_id, creditor_house_id, SUM(amount)
+        FROM house_debts
+        WHERE status = 'active' AND amount > 0
+        GROUP BY debtor_house_id, creditor_house_id
+        ''')
+        for debtor_id, creditor_id, amount in cur.fetchall():
+            debtor, creditor = snapshot.get(debtor_id), snapshot.get(creditor_id)
+            if debtor is not None and creditor is not None:
+                debtor["debt_owed"] += amount
+                creditor["debt_receivable"] += amount
+        
+        for house in snapshot.values():
+            house["net_worth"] = net_worth(house["gold"], house["soldiers"], house["sources_value"],
+                                           house["debt_owed"], house["debt_receivable"])
+        
+        self._snapshot = (time.monotonic(), snapshot)
+        return snapshot
+
+    async def get_economy_snapshot(self, max_age=ECONOMY_SNAPSHOT_TTL_SECONDS):
+        """``build_economy_snapshot``, reused for ``max_age`` seconds"""
+        cached = self._snapshot
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        return await self.db.aio.run_read(self.build_economy_snapshot)
+
     def calculate_house_net_worth(self, house_id):
         """Calculate total net worth of a house"""
         try:
@@ -311,20 +423,12 @@ class EconomySystem:
                 return 0
             
             house = economy_status["house"]
-            gold = house[3] or 0
-            soldiers_value = (house[4] or 0) * 10  # Each soldier worth 10 gold
             
             # Value of income sources (owned only)
             sources_value = sum(source[6] for source in economy_status["owned_sources"])  # cost field
             
-            # Subtract debts owed
-            total_debts_owed = economy_status["total_debt_owed"]
-            
-            # Add receivable debts (partial value, as they might not be collected)
-            receivable_value = economy_status["total_debt_receivable"] * 0.8  # 80% collection rate assumption
-            
-            net_worth = gold + soldiers_value + sources_value - total_debts_owed + receivable_value
-            return max(0, int(net_worth))
+            return net_worth(house[3], house[4], sources_value,
+                             economy_status["total_debt_owed"], economy_status["total_debt_receivable"])
             
         except Exception as e:
             logger.error(f"Error calculating net worth: {e}")
@@ -371,19 +475,19 @@ class EconomySystem:
             if not house or house[3] < cost:
                 return False, f"Yetersiz altın! Gerekli: {format_number(cost)}, Mevcut: {format_number(house[3] if house else 0)}"
             
-            # Deduct cost
-            if not self.db.update_alliance_resources(house_id, -cost, 0):
-                return False, "Altın düşülemedi!"
-            
-            # Create income source
-            source_id = self.db.add_income_source(house_id, source_type, name.strip(), region.strip(), income_per_minute, cost)
+            try:
+                # Deduct cost and create the income source together
+                with self.db.transaction():
+                    if not self.db.update_alliance_resources(house_id, -cost, 0, "income_source_purchase"):
+                        raise TransactionRollback("Altın düşülemedi!")
+                    
+                    source_id = self.db.add_income_source(house_id, source_type, name.strip(), region.strip(), income_per_minute, cost)
+                    if not source_id:
+                        raise TransactionRollback("Gelir kaynağı oluşturulamadı!")
+            except TransactionRollback as e:
+                return False, str(e)
             
-            if source_id:
-                return True, f"'{name}' gelir kaynağı oluşturuldu! Dakikalık gelir: {format_number(income_per_minute)} altın"
-            else:
-                # Rollback payment
-                self.db.update_alliance_resources(house_id, cost, 0)
-                return False, "Gelir kaynağı oluşturulamadı!"
+            return True, f"'{name}' gelir kaynağı oluşturuldu! Dakikalık gelir: {format_number(income_per_minute)} altın"
             
         except Exception as e:
             logger.error(f"Error creating income source: {e}")
@@ -418,7 +522,7 @@ class EconomySystem:
                 return False, f"Yetersiz altın! Gerekli: {format_number(total_cost)}, Mevcut: {format_number(house[3] if house else 0)}"
             
             # Purchase soldiers
-            success = self.db.update_alliance_resources(house_id, -total_cost, soldier_count)
+            success = self.db.update_alliance_resources(house_id, -total_cost, soldier_count, "soldier_purchase")
             
             if success:
                 return True, f"{format_number(soldier_count)} asker satın alındı! Toplam maliyet: {format_number(total_cost)} altın"
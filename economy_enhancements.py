@@ -1,14 +1,21 @@
 import discord
 import random
+import heapq
 import logging
 from datetime import datetime, timedelta
-from utils import create_embed, format_number, get_house_emoji
+from typing import Optional
+from order_book import BUY, SELL
+from gold_ledger import ESCROW
+from market_data import MarketData, CANDLE_INTERVALS
+from utils import create_embed, format_number, get_house_emoji, create_sparkline
 
 logger = logging.getLogger(__name__)
 
 class EconomyEnhancements:
     def __init__(self, database):
         self.db = database
+        # OHLCV candles rolled up from trade_history (main.py runs the rollup loop)
+        self.market_data = MarketData(database)
         
         # Market prices for different resources
         self.market_prices = {
@@ -19,46 +26,97 @@ class EconomyEnhancements:
             "horses": {"base_price": 300, "current": 300, "demand": 1.0},
             "wine": {"base_price": 200, "current": 200, "demand": 1.0}
         }
-        
-        # Setup market table
-        self.setup_market_tables()
-    
-    def setup_market_tables(self):
-        """Create market and trading tables"""
-        try:
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS market_orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                seller_house_id INTEGER NOT NULL,
-                resource_type TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price_per_unit INTEGER NOT NULL,
-                total_price INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'active',
-                buyer_house_id INTEGER NULL,
-                completed_at TIMESTAMP NULL
-            )
-            ''')
-            
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS trade_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                seller_house_id INTEGER NOT NULL,
-                buyer_house_id INTEGER NOT NULL,
-                resource_type TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price_per_unit INTEGER NOT NULL,
-                total_price INTEGER NOT NULL,
-                trade_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            self.db.conn.commit()
-            logger.info("Market tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating market tables: {e}")
     
+    # ===============================
+    # ORDER BOOK
+    # ===============================
+
+    def submit_order(self, cur, house_id, side, resource, quantity, limit_price=None):
+        """Match an order against the book and settle it on ``cur`` (run via ``db.aio.run_write``).
+
+        ``limit_price`` None is a market order: it fills what it can and the
+        rest is dropped. A limit order rests whatever doesn't fill; buy limit
+        orders escrow their gold up front and pay the resting asks' prices.
+        Market buys spend at most the house's gold. A buy limit order the house
+        can't escrow writes nothing and returns ``{"error": message}``.
+        """
+        book = self.db.order_book
+        cur.execute('SELECT name, gold FROM alliances WHERE id = ?', (house_id,))
+        house_name, gold = cur.fetchone()
+
+        budget = None
+        if side == BUY:
+            if limit_price is None:
+                budget = gold
+            elif gold < quantity * limit_price:
+                # Returned, not raised: a rollback would force the order books to reload
+                return {"error": f"Bu emir için {format_number(quantity * limit_price)} altın gerekli!"}
+
+        fills = book.match(side, resource, quantity, limit_price, house_id, budget)
+
+        gold_movements = []
+        trades = []
+        for fill in fills:
+            cost = fill.quantity * fill.price
+            if side == BUY:
+                seller_id, buyer_id = fill.house_id, house_id
+                gold_movements.append((buyer_id, seller_id, cost, "market_trade"))
+            else:
+                # The resting bid escrowed its gold when it was placed
+                seller_id, buyer_id = house_id, fill.house_id
+                gold_movements.append((ESCROW, seller_id, cost, "market_trade"))
+            trades.append((seller_id, buyer_id, resource, fill.quantity, fill.price, cost))
+
+        if fills:
+            cur.executemany('''
+            UPDATE market_orders
+            SET quantity = ?,
+                status = CASE WHEN ? = 0 THEN 'completed' ELSE status END,
+                completed_at = CASE WHEN ? = 0 THEN CURRENT_TIMESTAMP ELSE completed_at END
+            WHERE id = ?
+            ''', [(fill.remaining, fill.remaining, fill.remaining, fill.order_id) for fill in fills])
+            cur.executemany('''
+            INSERT INTO trade_history (seller_house_id, buyer_house_id, resource_type, quantity, price_per_unit, total_price)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', trades)
+
+        filled = sum(fill.quantity for fill in fills)
+        remaining = quantity - filled
+        order_id = None
+        if remaining > 0 and limit_price is not None:
+            owner_column = 'buyer_house_id' if side == BUY else 'seller_house_id'
+            cur.execute(f'''
+            INSERT INTO market_orders (side, {owner_column}, resource_type, quantity, price_per_unit, total_price)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (side, house_id, resource, remaining, limit_price, remaining * limit_price))
+            order_id = cur.lastrowid
+            if side == BUY:
+                gold_movements.append((house_id, ESCROW, remaining * limit_price, "market_escrow"))
+            book.add(order_id, house_id, side, resource, remaining, limit_price, house_name)
+
+        self.db.gold_ledger.post(cur, gold_movements)
+
+        return {
+            "fills": fills,
+            "filled": filled,
+            "remaining": remaining,
+            "order_id": order_id,
+            "value": sum(trade[5] for trade in trades),
+            "escrow": remaining * limit_price if order_id and side == BUY else 0
+        }
+
+    def cancel_order(self, cur, house_id, order_id):
+        """Cancel an open order of ``house_id``, refunding a buy order's escrow. Returns the order or None"""
+        order = self.db.order_book.get(order_id)
+        if order is None or order.house_id != house_id:
+            return None
+        cur.execute("UPDATE market_orders SET status = 'cancelled' WHERE id = ? AND status = 'active'", (order_id,))
+        if cur.rowcount == 0:
+            return None
+        if order.side == BUY:
+            self.db.gold_ledger.post(cur, [(ESCROW, house_id, order.quantity * order.price, "market_escrow_refund")])
+        return self.db.order_book.remove(order_id)
+
     def setup_economy_commands(self, bot):
         """Setup enhanced economy commands"""
         
@@ -80,29 +138,36 @@ class EconomyEnhancements:
                 
                 embed.add_field(name="💰 Güncel Fiyatlar", value=price_text, inline=False)
                 
-                # Show active market orders
-                self.db.c.execute('''
-                SELECT mo.resource_type, mo.quantity, mo.price_per_unit, a.name
-                FROM market_orders mo
-                JOIN alliances a ON mo.seller_house_id = a.id
-                WHERE mo.status = 'active'
-                ORDER BY mo.price_per_unit ASC
-                LIMIT 5
-                ''')
-                
-                orders = self.db.c.fetchall()
+                # Top of each resource's book, served from memory
+                book = self.db.order_book
+                book_text = ""
+                for resource in self.market_prices:
+                    best_bid = book.best(BUY, resource)
+                    best_ask = book.best(SELL, resource)
+                    if best_bid or best_ask:
+                        bid_text = f"{format_number(best_bid.price)} ({format_number(best_bid.quantity)})" if best_bid else "-"
+                        ask_text = f"{format_number(best_ask.price)} ({format_number(best_ask.quantity)})" if best_ask else "-"
+                        book_text += f"📖 **{resource.title()}**: Alış {bid_text} | Satış {ask_text}\n"
+                if book_text:
+                    embed.add_field(name="📖 Emir Defteri (en iyi alış / satış)", value=book_text, inline=False)
+                
+                # Show the cheapest sell orders
+                orders = heapq.nsmallest(5, book.orders(SELL), key=lambda order: (order.price, order.id))
                 
                 if orders:
                     orders_text = ""
-                    for resource, quantity, price, house in orders:
-                        orders_text += f"🏷️ **{resource.title()}** x{quantity} - {format_number(price)} altın/adet ({house})\n"
+                    for order in orders:
+                        orders_text += f"🏷️ **{order.resource.title()}** x{order.quantity} - {format_number(order.price)} altın/adet ({order.house_name})\n"
                     embed.add_field(name="🛒 Aktif Satış Emirleri", value=orders_text, inline=False)
                 else:
                     embed.add_field(name="🛒 Aktif Satış Emirleri", value="Henüz satış emri yok!", inline=False)
                 
                 embed.add_field(name="📊 Komutlar", 
-                              value="`!sat <kaynak> <miktar> <fiyat>` - Kaynak sat\n"
-                                    "`!al <kaynak> <miktar>` - Kaynak al\n"
+                              value="`!sat <kaynak> <miktar> [fiyat]` - Kaynak sat (fiyatsız = piyasa emri)\n"
+                                    "`!al <kaynak> <miktar> [fiyat]` - Kaynak al (fiyatlı = alış emri)\n"
+                                    "`!emir_defteri <kaynak>` - Fiyat kademeleri\n"
+                                    "`!piyasa_grafik <kaynak> [1m/1h/1d]` - Fiyat grafiği\n"
+                                    "`!satış_iptal <emir_id>` - Emri iptal et\n"
                                     "`!ticaret_geçmişi` - Geçmiş işlemler", 
                               inline=False)
                 
@@ -114,8 +179,8 @@ class EconomyEnhancements:
                 await ctx.send(embed=embed)
         
         @bot.command(name='sat')
-        async def sell_resource(ctx, resource_type: str, quantity: int, price_per_unit: int):
-            """Pazarda kaynak sat: !sat food 100 55"""
+        async def sell_resource(ctx, resource_type: str, quantity: int, price_per_unit: Optional[int] = None):
+            """Pazarda kaynak sat: !sat food 100 55 (fiyatsız = en iyi alış emirlerine sat)"""
             try:
                 user_id = ctx.author.id
                 alliance = self.db.get_user_alliance(user_id)
@@ -133,7 +198,7 @@ class EconomyEnhancements:
                     await ctx.send(embed=embed)
                     return
                 
-                if quantity <= 0 or price_per_unit <= 0:
+                if quantity <= 0 or (price_per_unit is not None and price_per_unit <= 0):
                     embed = create_embed("❌ Hata", "Miktar ve fiyat pozitif olmalı!", discord.Color.red())
                     await ctx.send(embed=embed)
                     return
@@ -147,33 +212,48 @@ class EconomyEnhancements:
                     await ctx.send(embed=embed)
                     return
                 
-                total_price = quantity * price_per_unit
+                # Match against resting buy orders, rest the remainder (limit orders only)
+                result = await self.db.aio.run_write(
+                    self.submit_order, alliance_id, SELL, resource_type, quantity, price_per_unit)
                 
-                # Create market order
-                self.db.c.execute('''
-                INSERT INTO market_orders (seller_house_id, resource_type, quantity, price_per_unit, total_price)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (alliance_id, resource_type, quantity, price_per_unit, total_price))
-                
-                order_id = self.db.c.lastrowid
-                self.db.conn.commit()
+                if result["order_id"] is None and not result["fills"]:
+                    embed = create_embed("❌ Alıcı Yok", f"{resource_type.title()} için aktif alış emri bulunamadı!", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
                 
-                embed = create_embed(
-                    "🏷️ SATIŞ EMRİ OLUŞTURULDU",
-                    f"Pazarda satış emrin yerleştirildi!",
-                    discord.Color.green()
-                )
+                if result["order_id"] is not None and not result["fills"]:
+                    embed = create_embed(
+                        "🏷️ SATIŞ EMRİ OLUŞTURULDU",
+                        f"Pazarda satış emrin yerleştirildi!",
+                        discord.Color.green()
+                    )
+                else:
+                    embed = create_embed(
+                        "💰 SATIŞ GERÇEKLEŞTİ",
+                        f"{format_number(result['filled'])} {resource_type} satıldı!",
+                        discord.Color.green()
+                    )
+                    fills_text = ""
+                    for fill in result["fills"][:10]:
+                        fills_text += f"• {fill.quantity}x - {fill.house_name} ({format_number(fill.price)} altın/adet)\n"
+                    embed.add_field(name="📋 Eşleşmeler", value=fills_text, inline=False)
+                    embed.add_field(name="💰 Toplam Gelir", value=f"{format_number(result['value'])} altın", inline=True)
                 
                 embed.add_field(name="📦 Kaynak", value=resource_type.title(), inline=True)
                 embed.add_field(name="📊 Miktar", value=format_number(quantity), inline=True)
-                embed.add_field(name="💰 Birim Fiyat", value=f"{format_number(price_per_unit)} altın", inline=True)
-                embed.add_field(name="💎 Toplam Değer", value=f"{format_number(total_price)} altın", inline=True)
-                embed.add_field(name="🆔 Emir ID", value=f"#{order_id}", inline=True)
+                if price_per_unit is not None:
+                    embed.add_field(name="💰 Birim Fiyat", value=f"{format_number(price_per_unit)} altın", inline=True)
+                if result["order_id"] is not None:
+                    embed.add_field(name="🆔 Emir ID", value=f"#{result['order_id']} ({format_number(result['remaining'])} adet bekliyor)", inline=True)
+                elif result["remaining"] > 0:
+                    embed.add_field(name="⚠️ Uyarı", value=f"{result['remaining']} adet satılamadı (alıcı yetersiz)", inline=False)
                 embed.add_field(name="📈 Pazar Fiyatı", value=f"{format_number(self.market_prices[resource_type]['current'])} altın", inline=True)
                 
                 # Price comparison
                 market_price = self.market_prices[resource_type]['current']
-                if price_per_unit < market_price * 0.8:
+                if price_per_unit is None:
+                    pass
+                elif price_per_unit < market_price * 0.8:
                     embed.add_field(name="💸 Fiyat Analizi", value="Çok ucuz! Hızla satılabilir", inline=False)
                 elif price_per_unit > market_price * 1.2:
                     embed.add_field(name="💰 Fiyat Analizi", value="Pahalı! Satılması zaman alabilir", inline=False)
@@ -188,8 +268,8 @@ class EconomyEnhancements:
                 await ctx.send(embed=embed)
         
         @bot.command(name='al')
-        async def buy_resource(ctx, resource_type: str, quantity: int):
-            """Pazardan kaynak al: !al food 50"""
+        async def buy_resource(ctx, resource_type: str, quantity: int, price_per_unit: Optional[int] = None):
+            """Pazardan kaynak al: !al food 50 (fiyatlı = alış emri, altın emanete alınır)"""
             try:
                 user_id = ctx.author.id
                 alliance = self.db.get_user_alliance(user_id)
@@ -207,105 +287,166 @@ class EconomyEnhancements:
                     await ctx.send(embed=embed)
                     return
                 
-                # Find cheapest available orders
-                self.db.c.execute('''
-                SELECT mo.id, mo.seller_house_id, mo.quantity, mo.price_per_unit, a.name
-                FROM market_orders mo
-                JOIN alliances a ON mo.seller_house_id = a.id
-                WHERE mo.resource_type = ? AND mo.status = 'active' AND mo.seller_house_id != ?
-                ORDER BY mo.price_per_unit ASC
-                ''', (resource_type, alliance_id))
-                
-                orders = self.db.c.fetchall()
+                if quantity <= 0 or (price_per_unit is not None and price_per_unit <= 0):
+                    embed = create_embed("❌ Hata", "Miktar ve fiyat pozitif olmalı!", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
                 
-                if not orders:
+                if price_per_unit is None and self.db.order_book.best(SELL, resource_type) is None:
                     embed = create_embed("❌ Stok Yok", f"{resource_type.title()} için aktif satış emri bulunamadı!", discord.Color.red())
                     await ctx.send(embed=embed)
                     return
                 
-                # Try to fulfill the order
-                remaining_quantity = quantity
-                total_cost = 0
-                successful_purchases = []
+                # All fills settle as one transaction
+                result = await self.db.aio.run_write(
+                    self.submit_order, alliance_id, BUY, resource_type, quantity, price_per_unit)
+                if "error" in result:
+                    embed = create_embed("❌ Yetersiz Altın", result["error"], discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
                 
-                for order_id, seller_id, available_qty, price_per_unit, seller_name in orders:
-                    if remaining_quantity <= 0:
-                        break
-                    
-                    buy_qty = min(remaining_quantity, available_qty)
-                    cost = buy_qty * price_per_unit
-                    
-                    # Check if buyer has enough gold
-                    buyer_data = self.db.get_alliance_by_id(alliance_id)
-                    if buyer_data[3] < cost:  # gold field
-                        embed = create_embed("❌ Yetersiz Altın", f"Bu satın alma için {format_number(cost)} altın gerekli!", discord.Color.red())
-                        await ctx.send(embed=embed)
-                        return
-                    
-                    # Process the purchase
-                    # Update buyer's resources
-                    self.db.update_alliance_resources(alliance_id, -cost, 0)
-                    
-                    # Update seller's resources  
-                    self.db.update_alliance_resources(seller_id, cost, 0)
-                    
-                    # Update market order
-                    if buy_qty == available_qty:
-                        # Complete order
-                        self.db.c.execute('''
-                        UPDATE market_orders SET status = 'completed', buyer_house_id = ?, completed_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                        ''', (alliance_id, order_id))
-                    else:
-                        # Partial fulfillment
-                        self.db.c.execute('''
-                        UPDATE market_orders SET quantity = quantity - ?
-                        WHERE id = ?
-                        ''', (buy_qty, order_id))
+                if not result["fills"] and result["order_id"] is None:
+                    embed = create_embed("❌ Eşleşme Yok", "Uygun satış emri yok ya da en ucuzu için bile altının yetmiyor!", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
+                
+                if result["fills"]:
+                    embed = create_embed(
+                        "🛒 SATIN ALMA TAMAMLANDI",
+                        f"{resource_type.title()} kaynağı başarıyla satın alındı!",
+                        discord.Color.green()
+                    )
                     
-                    # Record trade
-                    self.db.c.execute('''
-                    INSERT INTO trade_history (seller_house_id, buyer_house_id, resource_type, quantity, price_per_unit, total_price)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (seller_id, alliance_id, resource_type, buy_qty, price_per_unit, cost))
+                    embed.add_field(name="📦 Toplam Alınan", value=f"{result['filled']} {resource_type}", inline=True)
+                    embed.add_field(name="💰 Toplam Maliyet", value=f"{format_number(result['value'])} altın", inline=True)
+                    embed.add_field(name="📊 Ortalama Fiyat", value=f"{format_number(result['value'] // result['filled'])} altın/adet", inline=True)
                     
-                    successful_purchases.append({
-                        'seller': seller_name,
-                        'quantity': buy_qty,
-                        'price': price_per_unit,
-                        'cost': cost
-                    })
+                    # Show purchase details
+                    purchase_details = ""
+                    for fill in result["fills"][:10]:
+                        purchase_details += f"• {fill.quantity}x {resource_type} - {fill.house_name} ({format_number(fill.price)} altın/adet)\n"
+                    if len(result["fills"]) > 10:
+                        purchase_details += f"... ve {len(result['fills']) - 10} eşleşme daha\n"
                     
-                    remaining_quantity -= buy_qty
-                    total_cost += cost
+                    embed.add_field(name="📋 Satın Alma Detayları", value=purchase_details, inline=False)
+                else:
+                    embed = create_embed(
+                        "📗 ALIŞ EMRİ OLUŞTURULDU",
+                        f"{resource_type.title()} için alış emrin deftere yazıldı!",
+                        discord.Color.green()
+                    )
+                
+                if result["order_id"] is not None:
+                    embed.add_field(name="📗 Bekleyen Alış Emri", 
+                                  value=f"#{result['order_id']}: {format_number(result['remaining'])} adet @ {format_number(price_per_unit)} altın\n"
+                                        f"Emanetteki altın: {format_number(result['escrow'])}", 
+                                  inline=False)
+                elif result["remaining"] > 0:
+                    embed.add_field(name="⚠️ Uyarı", value=f"{result['remaining']} adet daha alınamadı (stok veya altın yetersiz)", inline=False)
+                
+                await ctx.send(embed=embed)
                 
-                self.db.conn.commit()
+            except Exception as e:
+                logger.error(f"Buy resource error: {e}")
+                embed = create_embed("❌ Hata", f"Satın alma hatası: {str(e)}", discord.Color.red())
+                await ctx.send(embed=embed)
+        
+        @bot.command(name='emir_defteri')
+        async def order_book_view(ctx, resource_type: str):
+            """Bir kaynağın emir defteri: !emir_defteri iron"""
+            try:
+                resource_type = resource_type.lower()
+                if resource_type not in self.market_prices:
+                    embed = create_embed("❌ Hata", f"Geçersiz kaynak! Kullanılabilir: {', '.join(self.market_prices.keys())}", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
                 
+                book = self.db.order_book
                 embed = create_embed(
-                    "🛒 SATIN ALMA TAMAMLANDI",
-                    f"{resource_type.title()} kaynağı başarıyla satın alındı!",
-                    discord.Color.green()
+                    f"📖 EMİR DEFTERİ: {resource_type.title()}",
+                    f"Pazar fiyatı: {format_number(self.market_prices[resource_type]['current'])} altın/adet",
+                    discord.Color.blue()
                 )
                 
-                embed.add_field(name="📦 Toplam Alınan", value=f"{quantity - remaining_quantity} {resource_type}", inline=True)
-                embed.add_field(name="💰 Toplam Maliyet", value=f"{format_number(total_cost)} altın", inline=True)
-                embed.add_field(name="📊 Ortalama Fiyat", value=f"{format_number(total_cost // (quantity - remaining_quantity))} altın/adet", inline=True)
+                for name, side in (("📕 Satış Emirleri", SELL), ("📗 Alış Emirleri", BUY)):
+                    levels = book.levels(side, resource_type, 5)
+                    text = "".join(f"**{format_number(price)}** altın - {format_number(quantity)} adet ({count} emir)\n"
+                                   for price, quantity, count in levels)
+                    embed.add_field(name=name, value=text or "Emir yok", inline=True)
+                
+                best_bid = book.best(BUY, resource_type)
+                best_ask = book.best(SELL, resource_type)
+                if best_bid and best_ask:
+                    embed.add_field(name="↔️ Makas", value=f"{format_number(best_ask.price - best_bid.price)} altın", inline=False)
+                
+                await ctx.send(embed=embed)
+                
+            except Exception as e:
+                logger.error(f"Order book view error: {e}")
+                embed = create_embed("❌ Hata", f"Emir defteri hatası: {str(e)}", discord.Color.red())
+                await ctx.send(embed=embed)
+        
+        @bot.command(name='piyasa_grafik')
+        async def market_chart(ctx, resource_type: str, interval: str = "1h"):
+            """Kaynak fiyat grafiği: !piyasa_grafik iron 1h"""
+            try:
+                resource_type = resource_type.lower()
+                if resource_type not in self.market_prices:
+                    embed = create_embed("❌ Hata", f"Geçersiz kaynak! Kullanılabilir: {', '.join(self.market_prices.keys())}", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
+                
+                if interval not in CANDLE_INTERVALS:
+                    embed = create_embed("❌ Hata", f"Geçersiz aralık! Kullanılabilir: {', '.join(CANDLE_INTERVALS)}", discord.Color.red())
+                    await ctx.send(embed=embed)
+                    return
+                
+                # Rollups only - raw trades are never scanned here
+                candles = await self.db.aio.run_read(self.market_data.load_candles, resource_type, interval, 24)
                 
-                # Show purchase details
-                purchase_details = ""
-                for purchase in successful_purchases:
-                    purchase_details += f"• {purchase['quantity']}x {resource_type} - {purchase['seller']} ({format_number(purchase['price'])} altın/adet)\n"
+                if not candles:
+                    embed = create_embed("📉 Veri Yok", f"{resource_type.title()} için henüz işlem yapılmamış!", discord.Color.orange())
+                    await ctx.send(embed=embed)
+                    return
+                
+                first_open = candles[0][1]
+                last_close = candles[-1][4]
+                change = (last_close - first_open) / first_open * 100 if first_open else 0
+                trend = "📈" if change > 0 else "📉" if change < 0 else "➡️"
+                
+                embed = create_embed(
+                    f"{trend} PİYASA GRAFİĞİ: {resource_type.title()} ({interval})",
+                    f"Son {len(candles)} mum - işlem olan periyotlar",
+                    discord.Color.blue()
+                )
                 
-                embed.add_field(name="📋 Satın Alma Detayları", value=purchase_details, inline=False)
+                embed.add_field(name="📊 Kapanış", value=f"`{create_sparkline([candle[4] for candle in candles])}`", inline=False)
+                embed.add_field(name="💰 Son Fiyat", value=f"{format_number(last_close)} altın", inline=True)
+                embed.add_field(name="📈 Değişim", value=f"%{change:+.1f}", inline=True)
+                embed.add_field(name="↕️ En Yüksek / En Düşük", 
+                              value=f"{format_number(max(candle[2] for candle in candles))} / {format_number(min(candle[3] for candle in candles))}", 
+                              inline=True)
+                embed.add_field(name="📦 Hacim", 
+                              value=f"{format_number(sum(candle[5] for candle in candles))} adet - "
+                                    f"{format_number(sum(candle[6] for candle in candles))} altın "
+                                    f"({sum(candle[7] for candle in candles)} işlem)", 
+                              inline=False)
                 
-                if remaining_quantity > 0:
-                    embed.add_field(name="⚠️ Uyarı", value=f"{remaining_quantity} adet daha alınamadı (stok yetersiz)", inline=False)
+                # Latest candles as a small OHLC table
+                time_format = "%d/%m" if interval == "1d" else "%d/%m %H:%M"
+                rows = ""
+                for bucket_start, open_, high, low, close, volume, turnover, trades in candles[-8:]:
+                    label = datetime.utcfromtimestamp(bucket_start).strftime(time_format)
+                    rows += f"{label:<11} {open_:>6} {high:>6} {low:>6} {close:>6} {volume:>7}\n"
+                embed.add_field(name="🕯️ Son Mumlar (UTC)", 
+                              value=f"```\n{'Zaman':<11} {'Açılış':>6} {'Yüksek':>6} {'Düşük':>6} {'Kapanış':>6} {'Hacim':>7}\n{rows}```", 
+                              inline=False)
                 
                 await ctx.send(embed=embed)
                 
             except Exception as e:
-                logger.error(f"Buy resource error: {e}")
-                embed = create_embed("❌ Hata", f"Satın alma hatası: {str(e)}", discord.Color.red())
+                logger.error(f"Market chart error: {e}")
+                embed = create_embed("❌ Hata", f"Piyasa grafiği hatası: {str(e)}", discord.Color.red())
                 await ctx.send(embed=embed)
         
         @bot.command(name='ticaret_geçmişi')
@@ -375,7 +516,7 @@ class EconomyEnhancements:
         
         @bot.command(name='satış_iptal')
         async def cancel_order(ctx, order_id: int):
-            """Satış emrini iptal et"""
+            """Alış veya satış emrini iptal et"""
             try:
                 user_id = ctx.author.id
                 alliance = self.db.get_user_alliance(user_id)
@@ -387,38 +528,30 @@ class EconomyEnhancements:
                 
                 alliance_id = alliance[0]
                 
-                # Check if order exists and belongs to user
-                self.db.c.execute('''
-                SELECT resource_type, quantity, price_per_unit FROM market_orders
-                WHERE id = ? AND seller_house_id = ? AND status = 'active'
-                ''', (order_id, alliance_id))
-                
-                order = self.db.c.fetchone()
+                # Cancel the order (buy orders get their escrowed gold back)
+                order = await self.db.aio.run_write(self.cancel_order, alliance_id, order_id)
                 
                 if not order:
-                    embed = create_embed("❌ Hata", "Bu satış emri bulunamadı veya sana ait değil!", discord.Color.red())
+                    embed = create_embed("❌ Hata", "Bu emir bulunamadı veya sana ait değil!", discord.Color.red())
                     await ctx.send(embed=embed)
                     return
                 
-                # Cancel the order
-                self.db.c.execute('''
-                UPDATE market_orders SET status = 'cancelled' WHERE id = ?
-                ''', (order_id,))
-                
-                self.db.conn.commit()
-                
-                resource, quantity, price = order
+                resource, quantity, price = order.resource, order.quantity, order.price
                 
+                side_name = "Alış" if order.side == BUY else "Satış"
                 embed = create_embed(
-                    "❌ SATIŞ EMRİ İPTAL EDİLDİ",
-                    f"Satış emrin başarıyla iptal edildi!",
+                    f"❌ {side_name.upper()} EMRİ İPTAL EDİLDİ",
+                    f"{side_name} emrin başarıyla iptal edildi!",
                     discord.Color.orange()
                 )
                 
                 embed.add_field(name="🆔 Emir ID", value=f"#{order_id}", inline=True)
                 embed.add_field(name="📦 Kaynak", value=resource.title(), inline=True)
                 embed.add_field(name="📊 Miktar", value=format_number(quantity), inline=True)
-                embed.add_field(name="💰 İptal Edilen Değer", value=f"{format_number(quantity * price)} altın", inline=False)
+                if order.side == BUY:
+                    embed.add_field(name="💰 İade Edilen Altın", value=f"{format_number(quantity * price)} altın", inline=False)
+                else:
+                    embed.add_field(name="💰 İptal Edilen Değer", value=f"{format_number(quantity * price)} altın", inline=False)
                 
                 await ctx.send(embed=embed)
                 
@@ -125,7 +125,7 @@ class EnhancedEntertainmentSystem:
                         # Correct answer
                         alliance = self.db.get_user_alliance(ctx.author.id)
                         if alliance:
-                            self.db.update_alliance_resources(alliance[0], riddle['reward'], 0)
+                            await self.db.aio.update_alliance_resources(alliance[0], riddle['reward'], 0, "riddle_reward")
                         
                         embed = create_embed(
                             "🎉 DOĞRU CEVAP!",
@@ -208,7 +208,7 @@ class EnhancedEntertainmentSystem:
                     if any(ans in user_answer for ans in question['a']):
                         alliance = self.db.get_user_alliance(ctx.author.id)
                         if alliance:
-                            self.db.update_alliance_resources(alliance[0], question['r'], 0)
+                            await self.db.aio.update_alliance_resources(alliance[0], question['r'], 0, "trivia_reward")
                         
                         embed = create_embed("🎉 DOĞRU!", "Trivia uzmanısın!", discord.Color.green())
                         embed.add_field(name="🎁 Ödül", value=f"{format_number(question['r'])} altın", inline=True)
@@ -318,7 +318,7 @@ class EnhancedEntertainmentSystem:
                     
                     alliance = self.db.get_user_alliance(ctx.author.id)
                     if alliance:
-                        self.db.update_alliance_resources(alliance[0], reward, 0)
+                        await self.db.aio.update_alliance_resources(alliance[0], reward, 0, "story_reward")
                     
                     embed = create_embed(
                         "📝 HİKAYE TESLİMİ",
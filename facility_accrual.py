@@ -0,0 +1,122 @@
+"""
+Lazy facility production.
+
+``resource_facilities`` produce ``production_rate`` units per hour, but no
+tick ever writes them. Pending output is derived from ``last_settled_at``
+and the rate, and is only credited - gold to the house treasury, any other
+resource to ``resource_storage`` - when a house reads or spends its balance,
+or in the nightly bulk settlement. ``last_settled_at`` advances only by the
+time the credited whole units took, so partial units carry over.
+"""
+import time
+import logging
+from config import FACILITY_SETTLEMENT_BATCH
+from gold_ledger import WORLD
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR = 3600
+
+# Facilities inserted without last_settled_at start producing at created_at
+_FACILITY_COLUMNS = '''
+id, house_id, resource_type, production_rate,
+COALESCE(last_settled_at, CAST(strftime('%s', created_at) AS REAL))
+'''
+
+_CREDIT_STORAGE_SQL = '''
+INSERT INTO resource_storage (house_id, resource_type, quantity)
+VALUES (?, ?, ?)
+ON CONFLICT(house_id, resource_type) DO UPDATE SET
+    quantity = quantity + excluded.quantity,
+    last_updated = CURRENT_TIMESTAMP
+'''
+
+def accrue(rate, settled_at, now):
+    """(whole units produced since ``settled_at``, new settled_at) at ``rate`` per hour"""
+    if rate <= 0 or settled_at is None:
+        return 0, now
+    elapsed = max(0, now - settled_at)
+    units = int(rate * elapsed // SECONDS_PER_HOUR)
+    # Advance by exactly the time those units took; the rest carries over
+    return units, settled_at + units * SECONDS_PER_HOUR / rate
+
+class FacilityAccrual:
+    """Computes and settles facility production from resource_facilities"""
+
+    def __init__(self, database, batch_size=FACILITY_SETTLEMENT_BATCH):
+        self.db = database
+        self.batch_size = batch_size
+
+    # ===============================
+    # PER HOUSE
+    # ===============================
+
+    def settle_house(self, cur, house_id, now=None):
+        """Credit a house's pending production, returning units per resource.
+
+        Call before showing or spending the house's balance and before a
+        facility's rate changes. Writes nothing when no whole unit is due.
+        """
+        now = time.time() if now is None else now
+        cur.execute(f'SELECT {_FACILITY_COLUMNS} FROM resource_facilities WHERE house_id = ?', (house_id,))
+        credited = self._credit(cur, cur.fetchall(), now)
+        return {resource: units for (_, resource), units in credited.items()}
+
+    # ===============================
+    # BULK SETTLEMENT
+    # ===============================
+
+    async def run(self):
+        """Settle every facility, one batch per transaction"""
+        now = time.time()
+        last_id = 0
+        houses = set()
+        settled = 0
+        while True:
+            count, last_id, credited = await self.db.aio.run_write(self.settle_batch, last_id, now)
+            settled += count
+            houses.update(house_id for house_id, _ in credited)
+            if count < self.batch_size:
+                break
+
+        if houses:
+            logger.info(f"Settled production of {settled} facilities for {len(houses)} houses")
+        return settled, len(houses)
+
+    def settle_batch(self, cur, after_id, now):
+        """Settle up to ``batch_size`` facilities with id > ``after_id``.
+
+        Returns (facilities read, last id, {(house_id, resource): units}).
+        """
+        cur.execute(f'''
+        SELECT {_FACILITY_COLUMNS} FROM resource_facilities
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        ''', (after_id, self.batch_size))
+        facilities = cur.fetchall()
+        if not facilities:
+            return 0, after_id, {}
+        return len(facilities), facilities[-1][0], self._credit(cur, facilities, now)
+
+    def _credit(self, cur, facilities, now):
+        credited = {}
+        advanced = []
+        for facility_id, house_id, resource, rate, settled_at in facilities:
+            units, settled_to = accrue(rate, settled_at, now)
+            if units:
+                credited[(house_id, resource)] = credited.get((house_id, resource), 0) + units
+                advanced.append((settled_to, facility_id))
+        if not advanced:
+            return credited
+
+        cur.executemany('UPDATE resource_facilities SET last_settled_at = ? WHERE id = ?', advanced)
+        gold = [(WORLD, house_id, units, "facility_production")
+                for (house_id, resource), units in credited.items() if resource == "gold"]
+        if gold:
+            self.db.gold_ledger.post(cur, gold)
+        stored = [(house_id, resource, units) for (house_id, resource), units in credited.items()
+                  if resource != "gold"]
+        if stored:
+            cur.executemany(_CREDIT_STORAGE_SQL, stored)
+        return credited
@@ -0,0 +1,264 @@
+"""
+Gold ledger.
+
+Every gold movement is an append-only journal row moving ``amount`` from
+one account to another, so the books always balance. Houses are accounts by
+alliance id; ``WORLD`` is gold entering or leaving the economy (income,
+rewards, fees) and ``ESCROW`` holds gold parked outside a house (market bid
+escrow, tournament prize pools, duel wagers). Movements are applied and
+journaled in batches through ``post``/``post_select``. A house's ledger
+balance is its latest checkpoint plus the tail of rows after it, and
+``reconcile`` checks that against alliances.gold for every house at once.
+"""
+import time
+import logging
+from config import GOLD_LEDGER_CHECKPOINT_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+WORLD = 0
+ESCROW = -1
+ACCOUNT_NAMES = {WORLD: "Dünya", ESCROW: "Emanet"}
+
+_INSERT_SQL = '''
+INSERT INTO gold_ledger (from_house_id, to_house_id, amount, reason, created_at)
+VALUES (?, ?, ?, ?, ?)
+'''
+
+# Ledger balance per house as of ledger id :upto - latest checkpoint at or
+# before it plus the journal tail after it (index range scans per house)
+_BALANCES_SQL = '''
+SELECT a.id, a.gold,
+       COALESCE(cp.balance, 0)
+       + COALESCE((SELECT SUM(amount) FROM gold_ledger
+                   WHERE to_house_id = a.id AND id > COALESCE(cp.ledger_id, 0) AND id <= :upto), 0)
+       - COALESCE((SELECT SUM(amount) FROM gold_ledger
+                   WHERE from_house_id = a.id AND id > COALESCE(cp.ledger_id, 0) AND id <= :upto), 0),
+       EXISTS (SELECT 1 FROM gold_ledger
+               WHERE to_house_id = a.id AND id > COALESCE(cp.ledger_id, 0) AND id <= :upto)
+       OR EXISTS (SELECT 1 FROM gold_ledger
+                  WHERE from_house_id = a.id AND id > COALESCE(cp.ledger_id, 0) AND id <= :upto)
+FROM alliances a
+LEFT JOIN gold_ledger_checkpoints cp
+       ON cp.house_id = a.id
+      AND cp.ledger_id = (SELECT MAX(ledger_id) FROM gold_ledger_checkpoints
+                          WHERE house_id = a.id AND ledger_id <= :upto)
+'''
+
+def movement(house_id, change, reason):
+    """(from, to, amount, reason) for a signed gold change of a house against WORLD"""
+    if change >= 0:
+        return (WORLD, house_id, change, reason)
+    return (house_id, WORLD, -change, reason)
+
+class GoldLedger:
+    """Applies gold movements to alliances.gold and journals them in gold_ledger"""
+
+    def __init__(self, database, checkpoint_retention_days=GOLD_LEDGER_CHECKPOINT_RETENTION_DAYS):
+        self.db = database
+        self.checkpoint_retention_days = checkpoint_retention_days
+        self.last_reconciliation = None  # (checked_at, houses checked, mismatches)
+
+    # ===============================
+    # POSTING
+    # ===============================
+
+    def post(self, cur, movements):
+        """Apply and journal (from, to, amount, reason) movements as one batch.
+
+        Run on a writer cursor. Like ``update_alliance_resources`` a house is
+        never taken below zero: a debit is capped at the house's gold and the
+        other side receives only what was actually taken. Movements naming a
+        missing house are dropped. Returns the applied movements.
+        """
+        movements = [m for m in movements if m[2] > 0 and m[0] != m[1]]
+        if not movements:
+            return []
+
+        house_ids = list({account for m in movements for account in m[:2] if account > 0})
+        balances = {}
+        for start in range(0, len(house_ids), 500):
+            chunk = house_ids[start:start + 500]
+            cur.execute(f"SELECT id, gold FROM alliances WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            balances.update(cur.fetchall())
+
+        applied = []
+        deltas = {}
+        for from_id, to_id, amount, reason in movements:
+            if (from_id > 0 and from_id not in balances) or (to_id > 0 and to_id not in balances):
+                continue
+            if from_id > 0:
+                amount = min(amount, max(0, balances[from_id] or 0))
+                if amount <= 0:
+                    continue
+                balances[from_id] -= amount
+                deltas[from_id] = deltas.get(from_id, 0) - amount
+            if to_id > 0:
+                balances[to_id] = (balances[to_id] or 0) + amount
+                deltas[to_id] = deltas.get(to_id, 0) + amount
+            applied.append((from_id, to_id, amount, reason))
+
+        if deltas:
+            cur.executemany('UPDATE alliances SET gold = gold + ? WHERE id = ?',
+                            [(delta, house_id) for house_id, delta in deltas.items() if delta])
+        now = time.time()
+        cur.executemany(_INSERT_SQL, [entry + (now,) for entry in applied])
+        return applied
+
+    def post_select(self, cur, select_sql, params=()):
+        """Set-based ``post`` for movements produced by a query.
+
+        ``select_sql`` yields (from, to, amount, reason) rows. No overdraft
+        check is done, so use it for credits and transfers already known to
+        be covered (e.g. the income tick). Returns (movements, total amount).
+        """
+        cur.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS gold_ledger_batch (
+            from_house_id INTEGER NOT NULL,
+            to_house_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            reason TEXT NOT NULL
+        )
+        ''')
+        cur.execute('DELETE FROM gold_ledger_batch')
+        cur.execute(f'INSERT INTO gold_ledger_batch {select_sql}', params)
+        cur.execute('''
+        DELETE FROM gold_ledger_batch
+        WHERE amount <= 0 OR from_house_id = to_house_id
+           OR (from_house_id > 0 AND from_house_id NOT IN (SELECT id FROM alliances))
+           OR (to_house_id > 0 AND to_house_id NOT IN (SELECT id FROM alliances))
+        ''')
+        cur.execute('''
+        UPDATE alliances
+        SET gold = gold + moved.delta
+        FROM (
+            SELECT house_id, SUM(delta) AS delta FROM (
+                SELECT to_house_id AS house_id, amount AS delta FROM gold_ledger_batch WHERE to_house_id > 0
+                UNION ALL
+                SELECT from_house_id, -amount FROM gold_ledger_batch WHERE from_house_id > 0
+            )
+            GROUP BY house_id
+        ) AS moved
+        WHERE alliances.id = moved.house_id
+        ''')
+        cur.execute('''
+        INSERT INTO gold_ledger (from_house_id, to_house_id, amount, reason, created_at)
+        SELECT from_house_id, to_house_id, amount, reason, ?
+        FROM gold_ledger_batch
+        ''', (time.time(),))
+        cur.execute('SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM gold_ledger_batch')
+        result = cur.fetchone()
+        cur.execute('DELETE FROM gold_ledger_batch')
+        return result
+
+    def open_accounts(self, cur, house_ids=None):
+        """Journal houses' current gold as opening balances (new houses only)"""
+        where = ""
+        params = [time.time()]
+        if house_ids is not None:
+            house_ids = list(house_ids)
+            if not house_ids:
+                return 0
+            where = f"AND id IN ({','.join('?' * len(house_ids))})"
+            params += house_ids
+        cur.execute(f'''
+        INSERT INTO gold_ledger (from_house_id, to_house_id, amount, reason, created_at)
+        SELECT {WORLD}, id, gold, 'opening_balance', ?
+        FROM alliances
+        WHERE gold > 0 {where}
+        ''', params)
+        return cur.rowcount
+
+    # ===============================
+    # BALANCES AND CHECKPOINTS
+    # ===============================
+
+    def balance(self, cur, house_id):
+        """Ledger balance of one house (latest checkpoint + tail)"""
+        for row in self._balances(cur, house_id=house_id):
+            return row[2]
+        return None
+
+    def _balances(self, cur, upto=None, house_id=None):
+        """(house_id, alliances.gold, ledger balance, moved since checkpoint) rows"""
+        if upto is None:
+            cur.execute('SELECT COALESCE(MAX(id), 0) FROM gold_ledger')
+            upto = cur.fetchone()[0]
+        if house_id is None:
+            cur.execute(_BALANCES_SQL, {"upto": upto})
+        else:
+            cur.execute(_BALANCES_SQL + ' WHERE a.id = :house_id', {"upto": upto, "house_id": house_id})
+        return cur.fetchall()
+
+    def checkpoint(self, cur):
+        """Checkpoint every house whose ledger moved since its last checkpoint.
+
+        Also drops checkpoints past retention, keeping each house's latest.
+        Returns the number of checkpoints written.
+        """
+        cur.execute('SELECT COALESCE(MAX(id), 0) FROM gold_ledger')
+        upto = cur.fetchone()[0]
+        now = time.time()
+        rows = [(house_id, upto, balance, now)
+                for house_id, _, balance, moved in self._balances(cur, upto) if moved]
+        cur.executemany('''
+        INSERT OR REPLACE INTO gold_ledger_checkpoints (house_id, ledger_id, balance, created_at)
+        VALUES (?, ?, ?, ?)
+        ''', rows)
+        cur.execute('''
+        DELETE FROM gold_ledger_checkpoints
+        WHERE created_at < ?
+          AND ledger_id < (SELECT MAX(ledger_id) FROM gold_ledger_checkpoints latest
+                           WHERE latest.house_id = gold_ledger_checkpoints.house_id)
+        ''', (now - self.checkpoint_retention_days * 86400,))
+        return len(rows)
+
+    def reconcile(self, cur):
+        """Check every house against the ledger.
+
+        Returns (houses checked, [(house_id, alliances.gold, ledger balance)]
+        for each house that differs).
+        """
+        rows = self._balances(cur)
+        return len(rows), [(house_id, gold, balance) for house_id, gold, balance, _ in rows
+                           if (gold or 0) != balance]
+
+    async def run(self):
+        """Checkpoint, then reconcile every house against the ledger"""
+        started = time.perf_counter()
+        checkpoints = await self.db.aio.run_write(self.checkpoint)
+        houses, mismatches = await self.db.aio.run_read(self.reconcile)
+        self.last_reconciliation = (time.time(), houses, mismatches)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if mismatches:
+            logger.warning(f"Gold ledger mismatch for {len(mismatches)} houses "
+                           f"(house, gold, ledger): {mismatches[:10]}")
+        else:
+            logger.info(f"Gold ledger reconciled for {houses} houses ({checkpoints} checkpoints, {elapsed_ms:.0f} ms)")
+        return checkpoints, houses, mismatches
+
+    # ===============================
+    # AUDIT
+    # ===============================
+
+    def history(self, cur, house_id=None, since=None, until=None, limit=50):
+        """Journal rows (newest first) touching ``house_id`` within [since, until) unix times"""
+        conditions, params = [], []
+        if house_id is not None:
+            conditions.append('(from_house_id = ? OR to_house_id = ?)')
+            params += [house_id, house_id]
+        if since is not None:
+            conditions.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('created_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cur.execute(f'''
+        SELECT id, from_house_id, to_house_id, amount, reason, created_at
+        FROM gold_ledger {where}
+        ORDER BY id DESC
+        LIMIT ?
+        ''', params + [limit])
+        return cur.fetchall()
@@ -2,10 +2,11 @@
 Render deployment service - combines Discord bot with web server
 """
 import os
+import hmac
 import threading
 import time
 import asyncio
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 
 # Flask web servisi
 app = Flask(__name__)
@@ -14,6 +15,25 @@ app = Flask(__name__)
 bot_status = "Starting..."
 bot_error = None
 
+# Bot süreci tarafından kaydedilen metrik kaynağı (bkz. main.py)
+metrics_provider = None
+metrics_token = None
+
+def register_metrics_provider(provider, token=None):
+    """Expose ``provider(include_sql=...)`` (a JSON-serializable dict) on /metrics.
+
+    With a ``token`` the endpoint requires it (``Authorization: Bearer`` or
+    ``?token=``) and includes SQL text; without one the SQL text is left out.
+    """
+    global metrics_provider, metrics_token
+    metrics_provider = provider
+    metrics_token = token or None
+
+def _metrics_authorized():
+    header = request.headers.get('Authorization', '')
+    supplied = header[len('Bearer '):] if header.startswith('Bearer ') else request.args.get('token', '')
+    return hmac.compare_digest(supplied.encode(), metrics_token.encode())
+
 @app.route('/')
 def home():
     return f'''
@@ -41,6 +61,14 @@ def health():
 def ping():
     return jsonify({'response': 'pong'})
 
+@app.route('/metrics')
+def metrics():
+    if metrics_provider is None:
+        return jsonify({'error': 'metrics not available in this process'}), 503
+    if metrics_token is not None and not _metrics_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    return jsonify(metrics_provider(include_sql=metrics_token is not None))
+
 def start_discord_bot():
     """Discord botunu ayrı thread'de başlat"""
     global bot_status, bot_error
@@ -88,6 +116,17 @@ def start_discord_bot():
         bot_status = "Hata"
         print(f"❌ Bot hatası: {e}")
 
+def start_metrics_server(port, host='127.0.0.1'):
+    """Web serverini arka planda başlat (bot sürecinin içinden /metrics için)"""
+    thread = threading.Thread(
+        target=lambda: app.run(host=host, port=port, debug=False, use_reloader=False),
+        name="metrics-server",
+        daemon=True
+    )
+    thread.start()
+    print(f"📊 Metrics server başlatıldı - {host}:{port}")
+    return thread
+
 def start_web_server():
     """Web serverini başlat"""
     port = int(os.environ.get('PORT', 5000))
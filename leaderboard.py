@@ -0,0 +1,176 @@
+import re
+import time
+import heapq
+import logging
+from datetime import datetime
+from config import LEADERBOARD_SIZE, LEADERBOARD_MAX_AGE_SECONDS
+from alliance_cache import is_write_statement
+from utils import format_number, get_house_emoji
+
+logger = logging.getLogger(__name__)
+
+# Board name -> tables whose writes make it stale
+BOARD_SOURCES = {
+    "wealth": ("alliances", "income_sources", "house_debts"),
+    "military": ("alliances",),
+    "achievements": ("achievements",),
+    "daily": ("daily_challenges",)
+}
+
+HOUSE_MEDALS = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
+PLAYER_MEDALS = ["👑", "🥈", "🥉"]
+
+class Leaderboard:
+    """A precomputed ranking: raw rows plus the rendered embed field text"""
+
+    def __init__(self, rows, text, key=None):
+        self.rows = rows
+        self.text = text
+        self.key = key  # e.g. the day a daily ranking belongs to
+        self.refreshed_at = time.monotonic()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.refreshed_at
+
+class LeaderboardService:
+    """Keeps top-N rankings in memory so leaderboard commands never hit SQLite.
+
+    Writes to a board's source table (seen through the database's writer cursors)
+    mark it dirty; ``refresh_due`` - called from a short background loop - recomputes
+    dirty boards and anything older than ``LEADERBOARD_MAX_AGE_SECONDS``.
+    """
+
+    def __init__(self, bot, database, size=LEADERBOARD_SIZE):
+        self.bot = bot
+        self.db = database
+        self.size = size
+        self._boards = {}
+        self._dirty = set(BOARD_SOURCES)
+        self._source_patterns = {
+            name: re.compile(rf"\b({'|'.join(tables)})\b", re.IGNORECASE) for name, tables in BOARD_SOURCES.items()
+        }
+        database.add_write_listener(self._on_write)
+
+    def _on_write(self, sql):
+        """Write listener (runs on whichever thread issued the statement)"""
+        if sql is None:
+            self._dirty.update(BOARD_SOURCES)
+            return
+        if not is_write_statement(sql):
+            return
+        for name, pattern in self._source_patterns.items():
+            if pattern.search(sql):
+                self._dirty.add(name)
+
+    # ===============================
+    # SERVING
+    # ===============================
+
+    async def get(self, name):
+        """Return the cached board, computing it only on first use or a new day"""
+        board = self._boards.get(name)
+        if board is None or board.key != self._board_key(name):
+            await self.refresh([name])
+            board = self._boards[name]
+        return board
+
+    def _board_key(self, name):
+        return datetime.now().date().isoformat() if name == "daily" else None
+
+    # ===============================
+    # REFRESHING
+    # ===============================
+
+    async def refresh_due(self):
+        """Recompute dirty, expired or missing boards"""
+        due = [
+            name for name in BOARD_SOURCES
+            if name in self._dirty
+            or name not in self._boards
+            or self._boards[name].age >= LEADERBOARD_MAX_AGE_SECONDS
+            or self._boards[name].key != self._board_key(name)
+        ]
+        if due:
+            await self.refresh(due)
+
+    async def refresh(self, names=None):
+        """Recompute the given boards (all by default) in one read-pool round trip"""
+        names = list(names or BOARD_SOURCES)
+        # Clear first so writes that land during the query mark the board again
+        self._dirty.difference_update(names)
+        keys = {name: self._board_key(name) for name in names}
+        try:
+            results = await self.db.aio.run_read(self._query_boards, names, keys)
+        except Exception as e:
+            self._dirty.update(names)
+            logger.error(f"Leaderboard refresh error: {e}")
+            raise
+        for name, rows in results.items():
+            self._boards[name] = Leaderboard(rows, self._render(name, rows), keys[name])
+
+    def _query_boards(self, cur, names, keys):
+        results = {}
+        for name in names:
+            if name == "wealth":
+                # Real net worth (sources and debts included) from the all-house snapshot
+                snapshot = self.bot.economy_system.build_economy_snapshot(cur)
+                houses = (house for house in snapshot.values() if house["name"] not in ('System', 'Admin'))
+                results[name] = [(house["name"], house["gold"], house["soldiers"], house["debt"], house["net_worth"])
+                                 for house in heapq.nlargest(self.size, houses, key=lambda house: house["net_worth"])]
+                continue
+            elif name == "military":
+                cur.execute('''
+                SELECT name, soldiers, gold
+                FROM alliances
+                WHERE name NOT IN ('System', 'Admin')
+                ORDER BY soldiers DESC
+                LIMIT ?
+                ''', (self.size,))
+            elif name == "achievements":
+                cur.execute('''
+                SELECT user_id, COUNT(*) as achievement_count
+                FROM achievements
+                GROUP BY user_id
+                ORDER BY achievement_count DESC
+                LIMIT ?
+                ''', (self.size,))
+            elif name == "daily":
+                cur.execute('''
+                SELECT user_id, COUNT(*) as completed_count
+                FROM daily_challenges
+                WHERE assigned_date = ? AND completed = TRUE
+                GROUP BY user_id
+                ORDER BY completed_count DESC
+                LIMIT ?
+                ''', (keys[name], self.size))
+            results[name] = cur.fetchall()
+        return results
+
+    # ===============================
+    # RENDERING
+    # ===============================
+
+    def _render(self, name, rows):
+        if name == "wealth":
+            return self._render_houses(rows, lambda house: f"{format_number(house[4])} altın")
+        if name == "military":
+            return self._render_houses(rows, lambda house: f"{format_number(house[1])} asker")
+        if name == "achievements":
+            return self._render_players(rows, "başarı")
+        return self._render_players(rows, "görev")
+
+    def _render_houses(self, rows, describe):
+        text = ""
+        for i, house in enumerate(rows[:len(HOUSE_MEDALS)]):
+            text += f"{HOUSE_MEDALS[i]} {get_house_emoji(house[0])} **{house[0]}**: {describe(house)}\n"
+        return text
+
+    def _render_players(self, rows, unit):
+        text = ""
+        for i, (user_id, count) in enumerate(rows, 1):
+            user = self.bot.get_user(user_id)
+            username = user.display_name if user else f"User #{user_id}"
+            prefix = PLAYER_MEDALS[i - 1] if i <= len(PLAYER_MEDALS) else f"{i}."
+            text += f"{prefix} **{username}** - {count} {unit}\n"
+        return text
@@ -1,14 +1,18 @@
 import discord
 from discord.ext import commands
+import heapq
 import logging
 from datetime import datetime, timedelta
 from utils import create_embed, format_number, get_house_emoji
+from facility_accrual import FacilityAccrual
+from gold_ledger import movement
 
 logger = logging.getLogger(__name__)
 
 class LoreEconomicSystem:
     def __init__(self, database):
         self.db = database
+        self.accrual = FacilityAccrual(database)
         
         # Game of Thrones kitaplarına göre gerçek hane zenginlikleri
         self.lore_house_wealth = {
@@ -133,44 +137,28 @@ class LoreEconomicSystem:
             "spices": {"name": "Baharat", "emoji": "🌶️", "base_value": 15}
         }
         
-        self.setup_lore_tables()
+        self._wealth_ranking = None
     
-    def setup_lore_tables(self):
-        """Create lore-based economic tables"""
-        try:
-            # Kaynak üretim tesisleri
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS resource_facilities (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                house_id INTEGER NOT NULL,
-                facility_name TEXT NOT NULL,
-                facility_type TEXT NOT NULL,
-                resource_type TEXT NOT NULL,
-                production_rate INTEGER NOT NULL,
-                maintenance_cost INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (house_id) REFERENCES alliances (id)
-            )
-            ''')
-            
-            # Kaynak depoları
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS resource_storage (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                house_id INTEGER NOT NULL,
-                resource_type TEXT NOT NULL,
-                quantity INTEGER DEFAULT 0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(house_id, resource_type),
-                FOREIGN KEY (house_id) REFERENCES alliances (id)
-            )
-            ''')
-            
-            self.db.conn.commit()
-            logger.info("Lore economic tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating lore economic tables: {e}")
+    def _render_wealth_ranking(self):
+        """Render the lore wealth ranking text (data is static)"""
+        # Kitap verilerine göre sıralama
+        sorted_houses = sorted(self.lore_house_wealth.items(), key=lambda x: x[1]['gold'], reverse=True)
+
+        ranking_text = ""
+        for i, (house_name, data) in enumerate(sorted_houses, 1):
+            if i == 1:
+                ranking_text += f"👑 **{house_name}**: {format_number(data['gold'])} altın\n"
+                ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
+            elif i == 2:
+                ranking_text += f"🥈 **{house_name}**: {format_number(data['gold'])} altın\n"
+                ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
+            elif i == 3:
+                ranking_text += f"🥉 **{house_name}**: {format_number(data['gold'])} altın\n"
+                ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
+            else:
+                ranking_text += f"{i}. **{house_name}**: {format_number(data['gold'])} altın\n"
+        
+        return ranking_text, sorted_houses[0][1]['gold'], sorted_houses[-1][1]['gold']
     
     def setup_lore_commands(self, bot):
         """Setup lore-based economic commands"""
@@ -193,17 +181,20 @@ class LoreEconomicSystem:
                 # Tüm haneleri güncelle
                 for house_name, house_data in self.lore_house_wealth.items():
                     # Haneyi bul
-                    self.db.c.execute('SELECT id FROM alliances WHERE name = ?', (house_name,))
+                    self.db.c.execute('SELECT id, gold FROM alliances WHERE name = ?', (house_name,))
                     result = self.db.c.fetchone()
                     
                     if result:
-                        house_id = result[0]
+                        house_id, current_gold = result
                         
-                        # Altın miktarını güncelle
+                        # Altın miktarını güncelle (fark deftere işlenir)
+                        self.db.gold_ledger.post(self.db.c, [
+                            movement(house_id, house_data['gold'] - (current_gold or 0), "lore_economy_setup")
+                        ])
                         self.db.c.execute('''
-                        UPDATE alliances SET gold = ?, soldiers = ?
+                        UPDATE alliances SET soldiers = ?
                         WHERE id = ?
-                        ''', (house_data['gold'], house_data['soldiers'], house_id))
+                        ''', (house_data['soldiers'], house_id))
                         
                         # Gelir kaynaklarını ekle
                         for source in house_data['income_sources']:
@@ -265,6 +256,8 @@ class LoreEconomicSystem:
                     return
                 
                 alliance_id = alliance[0]
+                # Reading the treasury collects facility production accrued since the last look
+                collected = await self.db.aio.run_write(self.accrual.settle_house, alliance_id)
                 alliance_data = self.db.get_alliance_by_id(alliance_id)
                 house_name = alliance_data[1]
                 
@@ -299,6 +292,13 @@ class LoreEconomicSystem:
                     
                     embed.add_field(name="🏭 Üretim Tesisleri", value=facilities_text[:1000], inline=False)
                     embed.add_field(name="📈 Toplam Gelir", value=f"{format_number(total_income)} altın/saat", inline=True)
+
+                if collected:
+                    collected_text = ""
+                    for resource_type, quantity in collected.items():
+                        resource = self.resource_types.get(resource_type, {"emoji": "📦", "name": resource_type})
+                        collected_text += f"{resource['emoji']} +{format_number(quantity)} {resource['name']}\n"
+                    embed.add_field(name="📥 Tahsil Edilen Üretim", value=collected_text, inline=True)
                 
                 # Kaynak depoları
                 self.db.c.execute('''
@@ -348,6 +348,8 @@ class LoreEconomicSystem:
                     return
                 
                 alliance_id = alliance[0]
+                # Collect production at the old rate before spending and changing it
+                await self.db.aio.run_write(self.accrual.settle_house, alliance_id)
                 alliance_data = self.db.get_alliance_by_id(alliance_id)
                 
                 # Tesisi bul
@@ -377,16 +379,17 @@ class LoreEconomicSystem:
                     await ctx.send(embed=embed)
                     return
                 
-                # Yükseltmeyi yap
-                self.db.update_alliance_resources(alliance_id, -upgrade_cost, 0)
+                # Yükseltmeyi yap (ödeme ve seviye aynı transaction'da)
+                def upgrade(cur):
+                    self.db.update_alliance_resources(alliance_id, -upgrade_cost, 0, "facility_upgrade")
+                    
+                    cur.execute('''
+                    UPDATE resource_facilities 
+                    SET level = ?, production_rate = ?
+                    WHERE id = ?
+                    ''', (new_level, new_production, facility_id))
                 
-                self.db.c.execute('''
-                UPDATE resource_facilities 
-                SET level = ?, production_rate = ?
-                WHERE id = ?
-                ''', (new_level, new_production, facility_id))
-                
-                self.db.conn.commit()
+                await self.db.aio.run_write(upgrade)
                 
                 embed = create_embed(
                     "⬆️ TESİS YÜKSELTİLDİ!",
@@ -419,28 +422,14 @@ class LoreEconomicSystem:
                     discord.Color.gold()
                 )
                 
-                # Kitap verilerine göre sıralama
-                sorted_houses = sorted(self.lore_house_wealth.items(), key=lambda x: x[1]['gold'], reverse=True)
-                
-                ranking_text = ""
-                for i, (house_name, data) in enumerate(sorted_houses, 1):
-                    if i == 1:
-                        ranking_text += f"👑 **{house_name}**: {format_number(data['gold'])} altın\n"
-                        ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
-                    elif i == 2:
-                        ranking_text += f"🥈 **{house_name}**: {format_number(data['gold'])} altın\n"
-                        ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
-                    elif i == 3:
-                        ranking_text += f"🥉 **{house_name}**: {format_number(data['gold'])} altın\n"
-                        ranking_text += f"    └ {len(data['income_sources'])} gelir kaynağı\n\n"
-                    else:
-                        ranking_text += f"{i}. **{house_name}**: {format_number(data['gold'])} altın\n"
+                # Kitap verileri sabit, sıralama bir kez hazırlanır
+                if self._wealth_ranking is None:
+                    self._wealth_ranking = self._render_wealth_ranking()
+                ranking_text, richest, poorest = self._wealth_ranking
                 
                 embed.add_field(name="💰 Zenginlik Sıralaması", value=ranking_text, inline=False)
                 
                 # En zengin ve en fakir arasındaki fark
-                richest = sorted_houses[0][1]['gold']
-                poorest = sorted_houses[-1][1]['gold']
                 difference = richest / poorest
                 
                 embed.add_field(name="📊 İstatistikler", 
@@ -453,6 +442,16 @@ class LoreEconomicSystem:
                               value="A Song of Ice and Fire kitap serisi\nGeorge R.R. Martin", 
                               inline=True)
                 
+                # Oyundaki güncel net değer sıralaması
+                snapshot = await bot.economy_system.get_economy_snapshot()
+                current = heapq.nlargest(5, (house for house in snapshot.values() if house["name"] not in ('System', 'Admin')),
+                                         key=lambda house: house["net_worth"])
+                if current:
+                    current_text = ""
+                    for i, house in enumerate(current, 1):
+                        current_text += f"{i}. {get_house_emoji(house['name'])} **{house['name']}**: {format_number(house['net_worth'])} altın\n"
+                    embed.add_field(name="🏰 Güncel Net Değer", value=current_text, inline=False)
+                
                 await ctx.send(embed=embed)
                 
             except Exception as e:
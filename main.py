@@ -8,6 +8,7 @@ from war_system import WarSystem
 from economy import EconomySystem
 from army_management import ArmyManagement
 from tournament_system import TournamentSystem
+from tournament_odds import TournamentOdds
 from commands import setup_commands
 # keep_alive is now handled by separate web server
 from special_events import SpecialEventsSystem
@@ -17,6 +18,15 @@ from enhanced_entertainment import EnhancedEntertainmentSystem
 from economy_enhancements import EconomyEnhancements
 from advanced_moderation import AdvancedModerationSystem
 from lore_economic_system import LoreEconomicSystem
+from leaderboard import LeaderboardService
+from war_scheduler import WarScheduler
+from battle_archive import BattleArchive
+from config import (LEADERBOARD_REFRESH_SECONDS, METRICS_PORT, METRICS_HOST, METRICS_TOKEN,
+                    WAR_AUTO_RESOLVE_INTERVAL_MINUTES,
+                    BATTLE_ARCHIVE_INTERVAL_MINUTES, MARKET_ROLLUP_INTERVAL_MINUTES,
+                    FACILITY_SETTLEMENT_INTERVAL_HOURS, GOLD_LEDGER_CHECKPOINT_INTERVAL_MINUTES)
+from performance_monitor import PerformanceMonitor
+import keep_alive
 import threading
 
 # Configure logging
@@ -46,6 +56,12 @@ class GameOfThronesBot(commands.Bot):
         self.db = Database()
         self.war_system = WarSystem(self.db)
         self.economy_system = EconomySystem(self.db)
+        self.leaderboards = LeaderboardService(self, self.db)
+        self.war_scheduler = WarScheduler(self, self.db, self.war_system)
+        self.battle_archive = BattleArchive(self.db)
+        self.tournament_system = TournamentSystem(self.db)
+        self.tournament_odds = TournamentOdds()
+        self.army_management = ArmyManagement(self.db)
         
         # Initialize new systems
         self.special_events = SpecialEventsSystem(self.db)
@@ -64,6 +80,9 @@ class GameOfThronesBot(commands.Bot):
         self._commands_loaded = False
         self._prevent_duplicate_response = set()  # Track which commands have responded
         
+        # Command latency, query timing and event-loop lag (see !performans and /metrics)
+        self.perf_monitor = PerformanceMonitor(self)
+        
         # Initialize performance optimizer
         from performance_optimizer import PerformanceOptimizer
         self.perf_optimizer = PerformanceOptimizer(self.db)
@@ -72,6 +91,7 @@ class GameOfThronesBot(commands.Bot):
         from auto_moderation import AutoModerationSystem
         self.auto_mod = AutoModerationSystem(self, self.db)
         self.auto_mod.setup_automod_events()
+        self.auto_mod.setup_automod_commands()
         
         # Initialize bot improvements
         from bot_improvements import BotImprovements
@@ -119,6 +139,18 @@ class GameOfThronesBot(commands.Bot):
         self.income_task.start()
         self.debt_task.start()
         self.maintenance_task.start()
+        self.leaderboard_task.start()
+        self.war_task.start()
+        self.war_scheduler.start()
+        self.archive_task.start()
+        self.market_task.start()
+        self.facility_task.start()
+        self.ledger_task.start()
+        
+        self.perf_monitor.start()
+        if METRICS_PORT:
+            keep_alive.register_metrics_provider(self.perf_monitor.snapshot, METRICS_TOKEN)
+            keep_alive.start_metrics_server(METRICS_PORT, METRICS_HOST)
         logger.info("Bot is ready for 24/7 operation!")
     
     async def _load_commands(self):
@@ -164,8 +196,21 @@ class GameOfThronesBot(commands.Bot):
             activity=discord.Game(name="🏰 Westeros'ta Hüküm Sürüyor | 👨‍💻 xxkaan44xx tarafından | !yardım")
         )
         
+    async def on_command(self, ctx):
+        """Start the latency clock for a prefix command"""
+        self.perf_monitor.command_started(ctx)
+    
+    async def on_command_completion(self, ctx):
+        """Record prefix command latency"""
+        self.perf_monitor.command_finished(ctx)
+    
+    async def on_app_command_completion(self, interaction, command):
+        """Record slash command latency"""
+        self.perf_monitor.app_command_finished(interaction, command)
+    
     async def on_command_error(self, ctx, error):
         """Global error handler"""
+        self.perf_monitor.command_finished(ctx, error)
         if isinstance(error, commands.CommandNotFound):
             return
         elif isinstance(error, commands.MissingRequiredArgument):
@@ -227,22 +272,79 @@ class GameOfThronesBot(commands.Bot):
     async def maintenance_task(self):
         """Daily maintenance and optimization"""
         try:
-            # Optimize database performance
-            self.perf_optimizer.optimize_database()
+            # Charge army upkeep before the database is vacuumed
+            await self.army_management.apply_daily_upkeep()
+            
+            # Reclaim free pages in short writer turns and refresh planner statistics
+            await self.perf_optimizer.run_maintenance()
             
             # Clean old data
-            self.perf_optimizer.cleanup_old_data()
+            await self.db.aio.run_write(self.perf_optimizer.cleanup_old_data)
             
             # Log statistics
-            stats = self.perf_optimizer.get_performance_stats()
+            stats = await self.db.aio.run_read(self.perf_optimizer.get_performance_stats)
             logger.info(f"Daily maintenance completed. DB stats: {stats}")
             
         except Exception as e:
             logger.error(f"Maintenance task error: {e}")
     
+    @tasks.loop(seconds=LEADERBOARD_REFRESH_SECONDS)
+    async def leaderboard_task(self):
+        """Recompute stale leaderboards in the background"""
+        try:
+            await self.leaderboards.refresh_due()
+        except Exception as e:
+            logger.error(f"Leaderboard refresh error: {e}")
+    
+    @tasks.loop(minutes=WAR_AUTO_RESOLVE_INTERVAL_MINUTES)
+    async def war_task(self):
+        """Auto-resolve wars nobody has played for a while"""
+        try:
+            await self.war_scheduler.sweep()
+        except Exception as e:
+            logger.error(f"War auto-resolve error: {e}")
+    
+    @tasks.loop(minutes=BATTLE_ARCHIVE_INTERVAL_MINUTES)
+    async def archive_task(self):
+        """Move finished wars' battle logs into the compressed archive"""
+        try:
+            await self.battle_archive.run()
+        except Exception as e:
+            logger.error(f"Battle archive error: {e}")
+    
+    @tasks.loop(minutes=MARKET_ROLLUP_INTERVAL_MINUTES)
+    async def market_task(self):
+        """Roll new trades into market candles and purge expired market data"""
+        try:
+            await self.economy_enhancements.market_data.run()
+        except Exception as e:
+            logger.error(f"Market rollup error: {e}")
+    
+    @tasks.loop(hours=FACILITY_SETTLEMENT_INTERVAL_HOURS)
+    async def facility_task(self):
+        """Bulk-settle facility production that no house has collected"""
+        try:
+            await self.lore_economy.accrual.run()
+        except Exception as e:
+            logger.error(f"Facility settlement error: {e}")
+    
+    @tasks.loop(minutes=GOLD_LEDGER_CHECKPOINT_INTERVAL_MINUTES)
+    async def ledger_task(self):
+        """Checkpoint the gold ledger and reconcile it against house treasuries"""
+        try:
+            await self.db.gold_ledger.run()
+        except Exception as e:
+            logger.error(f"Gold ledger error: {e}")
+    
     @income_task.before_loop
     @debt_task.before_loop
     @maintenance_task.before_loop
+    @leaderboard_task.before_loop
+    @war_task.before_loop
+    @archive_task.before_loop
+    @market_task.before_loop
+    @facility_task.before_loop
+    @ledger_task.before_loop
     async def before_tasks(self):
         """Wait for bot to be ready before starting tasks"""
         await self.wait_until_ready()
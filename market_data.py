@@ -0,0 +1,145 @@
+"""
+Market data rollups.
+
+New ``trade_history`` rows are folded into per-resource OHLCV candles
+(1m/1h/1d) in ``market_candles``, tracked by a trade id watermark in
+app_state so each trade is counted exactly once. Raw trades older than
+``TRADE_HISTORY_RETENTION_DAYS`` and fine-grained candles past their
+retention are purged in batches; price queries only ever read candles.
+"""
+import time
+import logging
+from config import (MARKET_ROLLUP_BATCH, TRADE_HISTORY_RETENTION_DAYS,
+                    MARKET_CANDLE_1M_RETENTION_DAYS, MARKET_CANDLE_1H_RETENTION_DAYS)
+
+logger = logging.getLogger(__name__)
+
+CANDLE_INTERVALS = {"1m": 60, "1h": 3600, "1d": 86400}
+ROLLUP_STATE_KEY = "market_rollup_trade_id"
+
+_UPSERT_CANDLE_SQL = '''
+INSERT INTO market_candles (interval_seconds, resource_type, bucket_start, open, high, low, close,
+                            volume, turnover, trades)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(interval_seconds, resource_type, bucket_start) DO UPDATE SET
+    high = MAX(high, excluded.high),
+    low = MIN(low, excluded.low),
+    close = excluded.close,
+    volume = volume + excluded.volume,
+    turnover = turnover + excluded.turnover,
+    trades = trades + excluded.trades
+'''
+
+class MarketData:
+    """Rolls trade_history into market_candles and enforces retention"""
+
+    def __init__(self, database, batch_size=MARKET_ROLLUP_BATCH,
+                 trade_retention_days=TRADE_HISTORY_RETENTION_DAYS):
+        self.db = database
+        self.batch_size = batch_size
+        self.trade_retention_days = trade_retention_days
+        # Candle retention per interval; None keeps them forever
+        self.candle_retention_days = {
+            CANDLE_INTERVALS["1m"]: MARKET_CANDLE_1M_RETENTION_DAYS,
+            CANDLE_INTERVALS["1h"]: MARKET_CANDLE_1H_RETENTION_DAYS,
+            CANDLE_INTERVALS["1d"]: None
+        }
+
+    # ===============================
+    # ROLLUP
+    # ===============================
+
+    async def run(self):
+        """Roll up every new trade, then purge expired rows, one batch per transaction"""
+        rolled = 0
+        while True:
+            count = await self.db.aio.run_write(self.rollup_trades)
+            rolled += count
+            if count < self.batch_size:
+                break
+
+        purged = 0
+        while True:
+            deleted = await self.db.aio.run_write(self.purge_expired)
+            purged += deleted
+            if deleted < self.batch_size:
+                break
+
+        if rolled or purged:
+            logger.info(f"Rolled {rolled} trades into candles, purged {purged} expired rows")
+        return rolled, purged
+
+    def rollup_trades(self, cur):
+        """Fold up to ``batch_size`` trades past the watermark into candles"""
+        last_id = int(self.db.get_state(ROLLUP_STATE_KEY, 0))
+        cur.execute('''
+        SELECT id, resource_type, CAST(strftime('%s', trade_date) AS INTEGER), quantity, price_per_unit, total_price
+        FROM trade_history
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        ''', (last_id, self.batch_size))
+        trades = cur.fetchall()
+        if not trades:
+            return 0
+
+        # (interval, resource, bucket) -> [open, high, low, close, volume, turnover, trades]
+        candles = {}
+        for _, resource, traded_at, quantity, price, total in trades:
+            if traded_at is None:
+                continue
+            for seconds in CANDLE_INTERVALS.values():
+                key = (seconds, resource, traded_at - traded_at % seconds)
+                candle = candles.get(key)
+                if candle is None:
+                    candles[key] = [price, price, price, price, quantity, total, 1]
+                else:
+                    candle[1] = max(candle[1], price)
+                    candle[2] = min(candle[2], price)
+                    candle[3] = price
+                    candle[4] += quantity
+                    candle[5] += total
+                    candle[6] += 1
+
+        cur.executemany(_UPSERT_CANDLE_SQL, [key + tuple(candle) for key, candle in candles.items()])
+        self.db.set_state(ROLLUP_STATE_KEY, trades[-1][0])
+        return len(trades)
+
+    def purge_expired(self, cur):
+        """Delete expired candles and up to ``batch_size`` rolled up raw trades (returns trades deleted)"""
+        last_id = int(self.db.get_state(ROLLUP_STATE_KEY, 0))
+        cur.execute('''
+        DELETE FROM trade_history WHERE id IN (
+            SELECT id FROM trade_history
+            WHERE trade_date < datetime('now', ?) AND id <= ?
+            ORDER BY trade_date
+            LIMIT ?
+        )
+        ''', (f'-{self.trade_retention_days} days', last_id, self.batch_size))
+        deleted = cur.rowcount
+
+        # Candles per interval are few; expired ones go in one statement each
+        now = int(time.time())
+        for seconds, days in self.candle_retention_days.items():
+            if days is not None:
+                cur.execute('DELETE FROM market_candles WHERE interval_seconds = ? AND bucket_start < ?',
+                            (seconds, now - days * 86400))
+        return deleted
+
+    # ===============================
+    # QUERIES
+    # ===============================
+
+    def load_candles(self, cur, resource, interval="1h", limit=24):
+        """Latest ``limit`` candles for a resource, oldest first.
+
+        Rows are (bucket_start, open, high, low, close, volume, turnover, trades).
+        """
+        cur.execute('''
+        SELECT bucket_start, open, high, low, close, volume, turnover, trades
+        FROM market_candles
+        WHERE interval_seconds = ? AND resource_type = ?
+        ORDER BY bucket_start DESC
+        LIMIT ?
+        ''', (CANDLE_INTERVALS[interval], resource, limit))
+        return cur.fetchall()[::-1]
@@ -0,0 +1,919 @@
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations.
+#
+# Each step runs once, in order, inside its own transaction and is recorded in
+# ``schema_version``. When the stored version is current, startup costs a single
+# SELECT and no DDL at all. Never edit a shipped step - append a new one.
+
+def _core_schema(cur):
+    """Core game tables (formerly Database.create_tables)"""
+    # Alliances/Houses table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS alliances (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        leader_id INTEGER,
+        gold INTEGER DEFAULT 1000,
+        soldiers INTEGER DEFAULT 100,
+        power_points INTEGER DEFAULT 0,
+        house_type TEXT DEFAULT 'Custom',
+        special_ability TEXT DEFAULT '',
+        region TEXT DEFAULT '',
+        debt INTEGER DEFAULT 0,
+        army_quality INTEGER DEFAULT 50,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Members table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS members (
+        user_id INTEGER PRIMARY KEY,
+        alliance_id INTEGER,
+        role TEXT DEFAULT 'Üye',
+        married_to INTEGER,
+        character_class TEXT DEFAULT 'Lord',
+        level INTEGER DEFAULT 1,
+        experience INTEGER DEFAULT 0,
+        health INTEGER DEFAULT 100,
+        attack_power INTEGER DEFAULT 20,
+        defense INTEGER DEFAULT 15,
+        special_skills TEXT DEFAULT '[]',
+        legendary_weapon TEXT DEFAULT '',
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(alliance_id) REFERENCES alliances(id),
+        FOREIGN KEY(married_to) REFERENCES members(user_id)
+    )
+    ''')
+
+    # Wars table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS wars (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        attacker_id INTEGER NOT NULL,
+        defender_id INTEGER NOT NULL,
+        status TEXT DEFAULT 'active',
+        attacker_losses INTEGER DEFAULT 0,
+        defender_losses INTEGER DEFAULT 0,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        end_time TIMESTAMP,
+        weather TEXT DEFAULT 'normal',
+        terrain TEXT DEFAULT 'ova',
+        winner_id INTEGER,
+        battle_size TEXT DEFAULT 'orta',
+        FOREIGN KEY(attacker_id) REFERENCES alliances(id),
+        FOREIGN KEY(defender_id) REFERENCES alliances(id),
+        FOREIGN KEY(winner_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Battle logs table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS battle_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        war_id INTEGER NOT NULL,
+        turn_number INTEGER NOT NULL,
+        attacker_action TEXT NOT NULL,
+        defender_action TEXT NOT NULL,
+        result TEXT NOT NULL,
+        attacker_damage INTEGER DEFAULT 0,
+        defender_damage INTEGER DEFAULT 0,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(war_id) REFERENCES wars(id)
+    )
+    ''')
+
+    # ASOIAF Characters table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS asoiaf_characters (
+        user_id INTEGER PRIMARY KEY,
+        character_name TEXT UNIQUE NOT NULL,
+        house TEXT NOT NULL,
+        title TEXT NOT NULL,
+        alive BOOLEAN DEFAULT 1,
+        age INTEGER DEFAULT 25,
+        skills TEXT DEFAULT '[]',
+        relationships TEXT DEFAULT '{}',
+        backstory TEXT DEFAULT '',
+        FOREIGN KEY(user_id) REFERENCES members(user_id)
+    )
+    ''')
+
+    # House debts table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS house_debts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        debtor_house_id INTEGER NOT NULL,
+        creditor_house_id INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        due_date TEXT NOT NULL,
+        interest_rate REAL DEFAULT 0.1,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(debtor_house_id) REFERENCES alliances(id),
+        FOREIGN KEY(creditor_house_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Income sources table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS income_sources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        source_type TEXT NOT NULL,
+        name TEXT NOT NULL,
+        region TEXT NOT NULL,
+        income_per_minute INTEGER NOT NULL,
+        cost INTEGER NOT NULL,
+        level INTEGER DEFAULT 1,
+        seized BOOLEAN DEFAULT 0,
+        seized_by INTEGER,
+        last_income TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(house_id) REFERENCES alliances(id),
+        FOREIGN KEY(seized_by) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Marriages table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS marriages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user1_id INTEGER NOT NULL,
+        user2_id INTEGER NOT NULL,
+        married_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'married',
+        FOREIGN KEY(user1_id) REFERENCES members(user_id),
+        FOREIGN KEY(user2_id) REFERENCES members(user_id),
+        UNIQUE(user1_id, user2_id)
+    )
+    ''')
+
+    # Pregnancies table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS pregnancies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        mother_id INTEGER NOT NULL,
+        father_id INTEGER NOT NULL,
+        conception_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        due_date TIMESTAMP NOT NULL,
+        status TEXT DEFAULT 'pregnant',
+        baby_name TEXT,
+        baby_gender TEXT,
+        FOREIGN KEY(mother_id) REFERENCES members(user_id),
+        FOREIGN KEY(father_id) REFERENCES members(user_id)
+    )
+    ''')
+
+    # Children table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS children (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        gender TEXT NOT NULL,
+        birth_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        mother_id INTEGER NOT NULL,
+        father_id INTEGER NOT NULL,
+        house_id INTEGER NOT NULL,
+        age_years INTEGER DEFAULT 0,
+        traits TEXT DEFAULT '[]',
+        FOREIGN KEY(mother_id) REFERENCES members(user_id),
+        FOREIGN KEY(father_id) REFERENCES members(user_id),
+        FOREIGN KEY(house_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Heirs table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS heirs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        heir_user_id INTEGER NOT NULL,
+        succession_order INTEGER DEFAULT 1,
+        appointed_by INTEGER NOT NULL,
+        appointed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(house_id) REFERENCES alliances(id),
+        FOREIGN KEY(heir_user_id) REFERENCES members(user_id),
+        FOREIGN KEY(appointed_by) REFERENCES members(user_id)
+    )
+    ''')
+
+    # Army resources table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS army_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        food_supplies INTEGER DEFAULT 1000,
+        weapons_quality INTEGER DEFAULT 50,
+        armor_quality INTEGER DEFAULT 50,
+        siege_weapons INTEGER DEFAULT 0,
+        cavalry INTEGER DEFAULT 0,
+        archers INTEGER DEFAULT 0,
+        infantry INTEGER DEFAULT 0,
+        navy_ships INTEGER DEFAULT 0,
+        army_training INTEGER DEFAULT 50,
+        morale INTEGER DEFAULT 70,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(house_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Tournaments table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS tournaments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        host_house_id INTEGER NOT NULL,
+        tournament_type TEXT CHECK(tournament_type IN ('joust', 'melee', 'archery', 'mixed')),
+        entry_fee INTEGER DEFAULT 1000,
+        prize_pool INTEGER DEFAULT 10000,
+        status TEXT DEFAULT 'open',
+        start_time TIMESTAMP,
+        end_time TIMESTAMP,
+        max_participants INTEGER DEFAULT 16,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(host_house_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Tournament participants table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS tournament_participants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tournament_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        character_skill INTEGER DEFAULT 50,
+        equipment_bonus INTEGER DEFAULT 0,
+        eliminated BOOLEAN DEFAULT 0,
+        final_position INTEGER,
+        prize_won INTEGER DEFAULT 0,
+        FOREIGN KEY(tournament_id) REFERENCES tournaments(id),
+        FOREIGN KEY(user_id) REFERENCES members(user_id)
+    )
+    ''')
+
+    # Duels table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS duels (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        challenger_id INTEGER NOT NULL,
+        challenged_id INTEGER NOT NULL,
+        duel_type TEXT CHECK(duel_type IN ('sword', 'lance', 'trial_by_combat')),
+        wager_amount INTEGER DEFAULT 0,
+        status TEXT DEFAULT 'challenged',
+        winner_id INTEGER,
+        fight_details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        FOREIGN KEY(challenger_id) REFERENCES members(user_id),
+        FOREIGN KEY(challenged_id) REFERENCES members(user_id),
+        FOREIGN KEY(winner_id) REFERENCES members(user_id)
+    )
+    ''')
+
+    # House resources (food, materials, etc.)
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS house_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        resource_type TEXT CHECK(resource_type IN ('food', 'stone', 'wood', 'iron', 'horses', 'wine')),
+        quantity INTEGER DEFAULT 0,
+        quality INTEGER DEFAULT 50,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(house_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Trade offers table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trade_offers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seller_id INTEGER NOT NULL,
+        offer_type TEXT CHECK(offer_type IN ('resource', 'soldiers', 'gold')),
+        resource_type TEXT,
+        quantity INTEGER NOT NULL,
+        price_per_unit INTEGER NOT NULL,
+        total_price INTEGER NOT NULL,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP,
+        FOREIGN KEY(seller_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Trade agreements table  
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trade_agreements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house1_id INTEGER NOT NULL,
+        house2_id INTEGER NOT NULL,
+        agreement_type TEXT DEFAULT 'trade_route',
+        terms TEXT DEFAULT '{}',
+        discount_percentage REAL DEFAULT 0.1,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP,
+        FOREIGN KEY(house1_id) REFERENCES alliances(id),
+        FOREIGN KEY(house2_id) REFERENCES alliances(id)
+    )
+    ''')
+
+    # Trade transactions table
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trade_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        buyer_id INTEGER NOT NULL,
+        seller_id INTEGER NOT NULL,
+        offer_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        total_cost INTEGER NOT NULL,
+        transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(buyer_id) REFERENCES alliances(id),
+        FOREIGN KEY(seller_id) REFERENCES alliances(id),
+        FOREIGN KEY(offer_id) REFERENCES trade_offers(id)
+    )
+    ''')
+
+
+    # Create warnings table for moderation
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS warnings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        moderator_id INTEGER NOT NULL,
+        reason TEXT NOT NULL,
+        warned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Create users table for compatibility
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        alliance_id INTEGER,
+        username TEXT,
+        join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(alliance_id) REFERENCES alliances(id)
+    )
+    ''')
+
+
+def _alliances_army_quality(cur):
+    """Databases created before army_quality existed"""
+    cur.execute('PRAGMA table_info(alliances)')
+    if 'army_quality' not in [column[1] for column in cur.fetchall()]:
+        cur.execute('ALTER TABLE alliances ADD COLUMN army_quality INTEGER DEFAULT 50')
+        logger.info("Added army_quality column to alliances table")
+
+
+def _achievements_tables(cur):
+    """AchievementsSystem"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS achievements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        achievement_id TEXT NOT NULL,
+        unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, achievement_id)
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS achievement_progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        achievement_type TEXT NOT NULL,
+        progress INTEGER DEFAULT 0,
+        UNIQUE(user_id, achievement_type)
+    )
+    ''')
+
+
+def _daily_challenges_table(cur):
+    """DailyChallengesSystem"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS daily_challenges (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        challenge_id TEXT NOT NULL,
+        assigned_date DATE NOT NULL,
+        completed BOOLEAN DEFAULT FALSE,
+        completed_at TIMESTAMP NULL,
+        UNIQUE(user_id, challenge_id, assigned_date)
+    )
+    ''')
+
+
+def _market_tables(cur):
+    """EconomyEnhancements"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS market_orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seller_house_id INTEGER NOT NULL,
+        resource_type TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        price_per_unit INTEGER NOT NULL,
+        total_price INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'active',
+        buyer_house_id INTEGER NULL,
+        completed_at TIMESTAMP NULL
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trade_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seller_house_id INTEGER NOT NULL,
+        buyer_house_id INTEGER NOT NULL,
+        resource_type TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        price_per_unit INTEGER NOT NULL,
+        total_price INTEGER NOT NULL,
+        trade_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _moderation_tables(cur):
+    """AdvancedModerationSystem"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS user_infractions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        guild_id INTEGER NOT NULL,
+        infraction_type TEXT NOT NULL,
+        reason TEXT,
+        moderator_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NULL,
+        active BOOLEAN DEFAULT TRUE
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS moderation_config (
+        guild_id INTEGER PRIMARY KEY,
+        log_channel_id INTEGER,
+        mute_role_id INTEGER,
+        auto_mod_enabled BOOLEAN DEFAULT TRUE,
+        warn_threshold INTEGER DEFAULT 3,
+        auto_ban_enabled BOOLEAN DEFAULT FALSE
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS message_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message_id INTEGER UNIQUE,
+        user_id INTEGER NOT NULL,
+        guild_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        content TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        deleted_at TIMESTAMP NULL
+    )
+    ''')
+
+
+def _lore_tables(cur):
+    """LoreEconomicSystem"""
+    # Kaynak üretim tesisleri
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS resource_facilities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        facility_name TEXT NOT NULL,
+        facility_type TEXT NOT NULL,
+        resource_type TEXT NOT NULL,
+        production_rate INTEGER NOT NULL,
+        maintenance_cost INTEGER DEFAULT 0,
+        level INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (house_id) REFERENCES alliances (id)
+    )
+    ''')
+
+    # Kaynak depoları
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS resource_storage (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        house_id INTEGER NOT NULL,
+        resource_type TEXT NOT NULL,
+        quantity INTEGER DEFAULT 0,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(house_id, resource_type),
+        FOREIGN KEY (house_id) REFERENCES alliances (id)
+    )
+    ''')
+
+
+def _user_friendly_tables(cur):
+    """UserFriendlySystem"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS user_progress (
+        user_id INTEGER PRIMARY KEY,
+        tutorial_step INTEGER DEFAULT 0,
+        first_join_date TEXT,
+        last_help_time TEXT,
+        commands_used INTEGER DEFAULT 0,
+        difficulty_level TEXT DEFAULT 'beginner'
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS quick_actions (
+        user_id INTEGER,
+        action_name TEXT,
+        last_used TEXT,
+        usage_count INTEGER DEFAULT 0
+    )
+    ''')
+
+
+def _bot_improvements_tables(cur):
+    """BotImprovements"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS advanced_quests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quest_name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        reward_gold INTEGER DEFAULT 0,
+        reward_soldiers INTEGER DEFAULT 0,
+        reward_power INTEGER DEFAULT 0,
+        requirements TEXT,
+        duration_hours INTEGER DEFAULT 24,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS character_progression (
+        user_id INTEGER PRIMARY KEY,
+        character_class TEXT DEFAULT 'Noble',
+        level INTEGER DEFAULT 1,
+        experience INTEGER DEFAULT 0,
+        skill_points INTEGER DEFAULT 0,
+        strength INTEGER DEFAULT 10,
+        intelligence INTEGER DEFAULT 10,
+        charisma INTEGER DEFAULT 10,
+        diplomacy INTEGER DEFAULT 10,
+        warfare INTEGER DEFAULT 10,
+        stealth INTEGER DEFAULT 10,
+        last_training TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS advanced_economy (
+        user_id INTEGER PRIMARY KEY,
+        trading_reputation INTEGER DEFAULT 0,
+        merchant_level INTEGER DEFAULT 1,
+        trade_routes INTEGER DEFAULT 0,
+        ships INTEGER DEFAULT 0,
+        caravans INTEGER DEFAULT 0,
+        market_shares TEXT DEFAULT '{}',
+        investment_portfolio TEXT DEFAULT '{}',
+        last_trade TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS war_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        battle_type TEXT NOT NULL,
+        opponent TEXT,
+        result TEXT NOT NULL,
+        soldiers_lost INTEGER DEFAULT 0,
+        gold_gained INTEGER DEFAULT 0,
+        experience_gained INTEGER DEFAULT 0,
+        battle_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS marriage_enhancements (
+        marriage_id INTEGER PRIMARY KEY,
+        wedding_date TIMESTAMP,
+        ceremony_type TEXT DEFAULT 'Simple',
+        dowry_gold INTEGER DEFAULT 0,
+        alliance_bonus INTEGER DEFAULT 0,
+        children_count INTEGER DEFAULT 0,
+        relationship_status TEXT DEFAULT 'Happy',
+        anniversary_rewards TEXT DEFAULT '[]',
+        FOREIGN KEY (marriage_id) REFERENCES marriages (id)
+    )
+    ''')
+
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS royal_system (
+        kingdom_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kingdom_name TEXT NOT NULL,
+        king_user_id INTEGER,
+        queen_user_id INTEGER,
+        hand_user_id INTEGER,
+        treasury INTEGER DEFAULT 10000,
+        army_size INTEGER DEFAULT 1000,
+        stability INTEGER DEFAULT 50,
+        popularity INTEGER DEFAULT 50,
+        laws TEXT DEFAULT '[]',
+        founded_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _indexes(cur):
+    """Lookup indexes (formerly recreated by the daily optimize pass)"""
+    indexes = [
+        "CREATE INDEX IF NOT EXISTS idx_members_user_id ON members(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_members_alliance_id ON members(alliance_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_alliance_id ON users(alliance_id)",
+        "CREATE INDEX IF NOT EXISTS idx_wars_attacker_id ON wars(attacker_id)",
+        "CREATE INDEX IF NOT EXISTS idx_wars_defender_id ON wars(defender_id)",
+        "CREATE INDEX IF NOT EXISTS idx_wars_status ON wars(status)",
+        "CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments(status)",
+        "CREATE INDEX IF NOT EXISTS idx_duels_challenger_id ON duels(challenger_id)",
+        "CREATE INDEX IF NOT EXISTS idx_duels_challenged_id ON duels(challenged_id)",
+        "CREATE INDEX IF NOT EXISTS idx_marriages_user1_id ON marriages(user1_id)",
+        "CREATE INDEX IF NOT EXISTS idx_marriages_user2_id ON marriages(user2_id)",
+        "CREATE INDEX IF NOT EXISTS idx_income_sources_house_id ON income_sources(house_id)",
+        "CREATE INDEX IF NOT EXISTS idx_house_debts_creditor_house_id ON house_debts(creditor_house_id)",
+        "CREATE INDEX IF NOT EXISTS idx_house_debts_debtor_house_id ON house_debts(debtor_house_id)"
+    ]
+    for index_sql in indexes:
+        cur.execute(index_sql)
+
+
+def _app_state_table(cur):
+    """Small key/value store for bookkeeping (seed checksum, job timestamps)"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS app_state (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _war_turn_counters(cur):
+    """Denormalized turn/remaining-soldier counters on wars, per-war battle log index"""
+    cur.execute('PRAGMA table_info(wars)')
+    columns = [column[1] for column in cur.fetchall()]
+    if 'current_turn' not in columns:
+        cur.execute('ALTER TABLE wars ADD COLUMN current_turn INTEGER DEFAULT 0')
+    if 'attacker_remaining' not in columns:
+        cur.execute('ALTER TABLE wars ADD COLUMN attacker_remaining INTEGER')
+    if 'defender_remaining' not in columns:
+        cur.execute('ALTER TABLE wars ADD COLUMN defender_remaining INTEGER')
+
+    # Covers the turn history query (everything but the result text)
+    cur.execute('''
+    CREATE INDEX IF NOT EXISTS idx_battle_logs_war_turn ON battle_logs(
+        war_id, turn_number, attacker_action, defender_action,
+        attacker_damage, defender_damage, timestamp
+    )
+    ''')
+
+    # Backfill from the logs once; afterwards the counters move with each turn
+    cur.execute('''
+    UPDATE wars SET current_turn = (
+        SELECT COUNT(*) FROM battle_logs WHERE battle_logs.war_id = wars.id
+    )
+    ''')
+    cur.execute('''
+    UPDATE wars SET
+        attacker_remaining = (SELECT MAX(0, a.soldiers - wars.attacker_losses) FROM alliances a WHERE a.id = wars.attacker_id),
+        defender_remaining = (SELECT MAX(0, a.soldiers - wars.defender_losses) FROM alliances a WHERE a.id = wars.defender_id)
+    WHERE status = 'active'
+    ''')
+
+
+def _war_last_turn_at(cur):
+    """wars.last_turn_at for the idle-war auto-resolve sweep"""
+    cur.execute('PRAGMA table_info(wars)')
+    if 'last_turn_at' not in [column[1] for column in cur.fetchall()]:
+        cur.execute('ALTER TABLE wars ADD COLUMN last_turn_at TIMESTAMP')
+    cur.execute('''
+    UPDATE wars SET last_turn_at = COALESCE(
+        (SELECT MAX(timestamp) FROM battle_logs WHERE battle_logs.war_id = wars.id),
+        start_time
+    )
+    WHERE last_turn_at IS NULL
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_wars_status_last_turn ON wars(status, last_turn_at)")
+
+
+def _battle_archives_table(cur):
+    """Compressed replays of finished wars (battle_archive.py)"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS battle_archives (
+        war_id INTEGER PRIMARY KEY,
+        attacker_id INTEGER,
+        defender_id INTEGER,
+        attacker_name TEXT,
+        defender_name TEXT,
+        winner_id INTEGER,
+        weather TEXT,
+        terrain TEXT,
+        battle_size TEXT,
+        turns INTEGER DEFAULT 0,
+        started_at TIMESTAMP,
+        ended_at TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        format INTEGER NOT NULL,
+        payload BLOB NOT NULL
+    )
+    ''')
+
+
+def _market_order_book(cur):
+    """Buy orders on market_orders (side column, nullable seller) for the order book"""
+    cur.execute('PRAGMA table_info(market_orders)')
+    if 'side' not in [column[1] for column in cur.fetchall()]:
+        # seller_house_id was NOT NULL; buy orders are owned through buyer_house_id instead
+        cur.execute('''
+        CREATE TABLE market_orders_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            seller_house_id INTEGER,
+            resource_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price_per_unit INTEGER NOT NULL,
+            total_price INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'active',
+            buyer_house_id INTEGER NULL,
+            completed_at TIMESTAMP NULL,
+            side TEXT NOT NULL DEFAULT 'sell' CHECK(side IN ('buy', 'sell'))
+        )
+        ''')
+        cur.execute('''
+        INSERT INTO market_orders_new (id, seller_house_id, resource_type, quantity, price_per_unit,
+                                       total_price, created_at, status, buyer_house_id, completed_at, side)
+        SELECT id, seller_house_id, resource_type, quantity, price_per_unit,
+               total_price, created_at, status, buyer_house_id, completed_at, 'sell'
+        FROM market_orders
+        ''')
+        cur.execute('DROP TABLE market_orders')
+        cur.execute('ALTER TABLE market_orders_new RENAME TO market_orders')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_market_orders_status_resource ON market_orders(status, resource_type)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_trade_offers_status ON trade_offers(status)")
+
+
+def _market_candles_table(cur):
+    """OHLCV rollups of trade_history (market_data.py), trade_date index for retention"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS market_candles (
+        interval_seconds INTEGER NOT NULL,
+        resource_type TEXT NOT NULL,
+        bucket_start INTEGER NOT NULL,
+        open INTEGER NOT NULL,
+        high INTEGER NOT NULL,
+        low INTEGER NOT NULL,
+        close INTEGER NOT NULL,
+        volume INTEGER NOT NULL DEFAULT 0,
+        turnover INTEGER NOT NULL DEFAULT 0,
+        trades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (interval_seconds, resource_type, bucket_start)
+    ) WITHOUT ROWID
+    ''')
+    # Raw trade retention walks trades oldest first
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_trade_history_trade_date ON trade_history(trade_date)")
+
+
+def _facility_accrual(cur):
+    """resource_facilities.last_settled_at (unix seconds, fractional) for lazy production, see facility_accrual.py"""
+    cur.execute('PRAGMA table_info(resource_facilities)')
+    if 'last_settled_at' not in [column[1] for column in cur.fetchall()]:
+        cur.execute('ALTER TABLE resource_facilities ADD COLUMN last_settled_at REAL')
+    # Production starts now for existing facilities; nothing was ever paid out before
+    cur.execute("UPDATE resource_facilities SET last_settled_at = CAST(strftime('%s', 'now') AS REAL) "
+                "WHERE last_settled_at IS NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_resource_facilities_house ON resource_facilities(house_id)")
+
+
+
+def _army_upkeep_indexes(cur):
+    """Per-house lookups for the daily army upkeep pass (ArmyManagement._apply_upkeep)"""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_army_resources_house ON army_resources(house_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_house_resources_house_type ON house_resources(house_id, resource_type)")
+
+
+def _gold_ledger(cur):
+    """Double-entry gold journal and per-house balance checkpoints (gold_ledger.py)"""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS gold_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        from_house_id INTEGER NOT NULL,
+        to_house_id INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        reason TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    ''')
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS gold_ledger_checkpoints (
+        house_id INTEGER NOT NULL,
+        ledger_id INTEGER NOT NULL,
+        balance INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (house_id, ledger_id)
+    ) WITHOUT ROWID
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_gold_ledger_from ON gold_ledger(from_house_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_gold_ledger_to ON gold_ledger(to_house_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_gold_ledger_created_at ON gold_ledger(created_at)")
+    # Existing treasuries enter the books as opening balances
+    cur.execute('''
+    INSERT INTO gold_ledger (from_house_id, to_house_id, amount, reason, created_at)
+    SELECT 0, id, gold, 'opening_balance', CAST(strftime('%s', 'now') AS REAL)
+    FROM alliances
+    WHERE gold > 0
+    ''')
+
+
+def _moderation_word_lists(cur):
+    """Per-guild profanity word lists (JSON array; NULL uses the built-in list), see profanity_filter.py"""
+    cur.execute('PRAGMA table_info(moderation_config)')
+    if 'profanity_words' not in [column[1] for column in cur.fetchall()]:
+        cur.execute('ALTER TABLE moderation_config ADD COLUMN profanity_words TEXT')
+
+
+# (version, description, step) - append only
+MIGRATIONS = [
+    (1, "core game tables", _core_schema),
+    (2, "alliances.army_quality", _alliances_army_quality),
+    (3, "achievements tables", _achievements_tables),
+    (4, "daily challenges table", _daily_challenges_table),
+    (5, "market tables", _market_tables),
+    (6, "moderation tables", _moderation_tables),
+    (7, "lore economy tables", _lore_tables),
+    (8, "user friendly tables", _user_friendly_tables),
+    (9, "bot improvements tables", _bot_improvements_tables),
+    (10, "lookup indexes", _indexes),
+    (11, "app state table", _app_state_table),
+    (12, "war turn counters", _war_turn_counters),
+    (13, "wars.last_turn_at", _war_last_turn_at),
+    (14, "battle archives table", _battle_archives_table),
+    (15, "market order book", _market_order_book),
+    (16, "market candles table", _market_candles_table),
+    (17, "facility accrual", _facility_accrual),
+    (18, "army upkeep indexes", _army_upkeep_indexes),
+    (19, "gold ledger", _gold_ledger),
+    (20, "moderation word lists", _moderation_word_lists),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(cur):
+    """Highest applied migration, 0 for a fresh or pre-migration database"""
+    try:
+        cur.execute('SELECT MAX(version) FROM schema_version')
+    except sqlite3.OperationalError:
+        return 0
+    return cur.fetchone()[0] or 0
+
+
+def migrate(cur):
+    """Apply pending migrations on the writer cursor, returning the schema version"""
+    version = get_schema_version(cur)
+    if version >= LATEST_VERSION:
+        if version > LATEST_VERSION:
+            logger.warning(f"Database schema v{version} is newer than this code (v{LATEST_VERSION})")
+        return version
+
+    conn = cur.connection
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    conn.commit()
+
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        try:
+            cur.execute('BEGIN')
+            step(cur)
+            cur.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                        (step_version, description))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Migration {step_version} ({description}) failed: {e}")
+            raise
+        logger.info(f"Applied migration {step_version}: {description}")
+        version = step_version
+
+    return version
@@ -0,0 +1,228 @@
+import heapq
+import logging
+import threading
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUY, SELL = "buy", "sell"
+
+# (order_id, house_id, side, resource, quantity, price, house_name)
+OrderEntry = Tuple[int, int, str, str, int, int, Optional[str]]
+
+# One match against a resting order; ``remaining`` is what is left of it afterwards
+Fill = namedtuple("Fill", "order_id house_id house_name quantity price remaining")
+
+class Order:
+    __slots__ = ("id", "house_id", "side", "resource", "quantity", "price", "house_name")
+
+    def __init__(self, order_id, house_id, side, resource, quantity, price, house_name=None):
+        self.id = order_id
+        self.house_id = house_id
+        self.side = side
+        self.resource = resource
+        self.quantity = quantity
+        self.price = price
+        self.house_name = house_name
+
+class OrderBook:
+    """Open orders per resource as bid/ask heaps with price-time priority.
+
+    Asks are keyed (price, id) and bids (-price, id); order ids grow with
+    arrival so the id breaks price ties. Loaded from the database through
+    ``loader``; callers update the book inside the write transaction that
+    changes the rows, and a rolled back transaction calls ``invalidate`` so
+    the next lookup reloads. Filled and cancelled orders leave the heaps
+    lazily.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[OrderEntry]]):
+        self._loader = loader
+        self._orders: Dict[int, Order] = {}
+        self._bids: Dict[str, list] = {}
+        self._asks: Dict[str, list] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dead = 0  # Heap entries of orders removed outside match
+
+    # ===============================
+    # LOOKUPS
+    # ===============================
+
+    def get(self, order_id: int) -> Optional[Order]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._orders.get(order_id)
+
+    def best(self, side: str, resource: str) -> Optional[Order]:
+        """Best resting order on one side (lowest ask / highest bid)"""
+        with self._lock:
+            self._ensure_loaded()
+            heap = self._heap(side, resource)
+            while heap and heap[0][1] not in self._orders:
+                heapq.heappop(heap)
+            return self._orders[heap[0][1]] if heap else None
+
+    def orders(self, side: str, resource: Optional[str] = None, limit: Optional[int] = None) -> List[Order]:
+        """Resting orders in priority order, for one resource or all (grouped by resource)"""
+        with self._lock:
+            self._ensure_loaded()
+            books = self._asks if side == SELL else self._bids
+            resources = [resource] if resource is not None else sorted(books)
+            result = []
+            for name in resources:
+                live = [entry for entry in books.get(name, ()) if entry[1] in self._orders]
+                count = len(live) if limit is None else limit - len(result)
+                result.extend(self._orders[entry[1]] for entry in heapq.nsmallest(count, live))
+                if limit is not None and len(result) >= limit:
+                    break
+            return result
+
+    def levels(self, side: str, resource: str, limit: int = 5) -> List[Tuple[int, int, int]]:
+        """Aggregated depth: (price, total quantity, order count) per price level"""
+        levels = []
+        for order in self.orders(side, resource):
+            if levels and levels[-1][0] == order.price:
+                price, quantity, count = levels[-1]
+                levels[-1] = (price, quantity + order.quantity, count + 1)
+            elif len(levels) == limit:
+                break
+            else:
+                levels.append((order.price, order.quantity, 1))
+        return levels
+
+    def orders_for(self, house_id: int) -> List[Order]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted((order for order in self._orders.values() if order.house_id == house_id),
+                          key=lambda order: order.id)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._orders)
+
+    # ===============================
+    # MATCHING
+    # ===============================
+
+    def match(self, side: str, resource: str, quantity: int, limit_price: Optional[int] = None,
+              house_id: Optional[int] = None, budget: Optional[int] = None) -> List[Fill]:
+        """Take up to ``quantity`` from the opposite side, best price first.
+
+        ``limit_price`` stops at worse prices (None = market order), resting
+        orders of ``house_id`` are skipped and ``budget`` caps the gold a buyer
+        spends. Matched quantities are removed from the book immediately.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            heap = self._heap(BUY if side == SELL else SELL, resource)
+            fills = []
+            skipped = []
+            while quantity > 0 and heap:
+                order = self._orders.get(heap[0][1])
+                if order is None:
+                    heapq.heappop(heap)
+                    continue
+                if limit_price is not None and (order.price > limit_price if side == BUY
+                                                else order.price < limit_price):
+                    break
+                if order.house_id == house_id:  # No trading with yourself
+                    skipped.append(heapq.heappop(heap))
+                    continue
+
+                take = min(quantity, order.quantity)
+                if budget is not None:
+                    take = min(take, budget // order.price)
+                    if take <= 0:
+                        break
+                    budget -= take * order.price
+                order.quantity -= take
+                quantity -= take
+                fills.append(Fill(order.id, order.house_id, order.house_name, take, order.price, order.quantity))
+                if order.quantity == 0:
+                    heapq.heappop(heap)
+                    del self._orders[order.id]
+
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            return fills
+
+    # ===============================
+    # MAINTENANCE
+    # ===============================
+
+    def load(self, entries: Optional[Iterable[OrderEntry]] = None):
+        """(Re)build the heaps, from ``entries`` or the loader"""
+        with self._lock:
+            if entries is None:
+                entries = self._loader()
+            self._orders.clear()
+            self._bids.clear()
+            self._asks.clear()
+            self._dead = 0
+            self._loaded = True
+            for entry in entries:
+                self._index(Order(*entry))
+            for heap in list(self._bids.values()) + list(self._asks.values()):
+                heapq.heapify(heap)
+
+    def add(self, order_id: int, house_id: int, side: str, resource: str, quantity: int, price: int,
+            house_name: Optional[str] = None):
+        with self._lock:
+            if self._loaded and quantity > 0:
+                order = Order(order_id, house_id, side, resource, quantity, price, house_name)
+                self._orders[order_id] = order
+                heapq.heappush(self._heap(side, resource), self._key(order))
+
+    def reduce(self, order_id: int, quantity: int):
+        """Take ``quantity`` off an order filled outside ``match``"""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is not None:
+                order.quantity -= quantity
+                if order.quantity <= 0:
+                    self._discard(order_id)
+
+    def remove(self, order_id: int) -> Optional[Order]:
+        with self._lock:
+            return self._discard(order_id)
+
+    def invalidate(self):
+        """Drop everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._loaded = False
+            self._orders.clear()
+            self._bids.clear()
+            self._asks.clear()
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _discard(self, order_id):
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            self._dead += 1
+            if self._dead > max(64, len(self._orders)):  # Mostly garbage: rebuild the heaps
+                self.load(list(self._entries()))
+        return order
+
+    def _entries(self):
+        for order in self._orders.values():
+            yield (order.id, order.house_id, order.side, order.resource, order.quantity, order.price,
+                   order.house_name)
+
+    def _heap(self, side, resource):
+        books = self._asks if side == SELL else self._bids
+        return books.setdefault(resource, [])
+
+    def _key(self, order):
+        return (order.price if order.side == SELL else -order.price, order.id)
+
+    def _index(self, order):
+        if order.quantity <= 0:
+            return
+        self._orders[order.id] = order
+        self._heap(order.side, order.resource).append(self._key(order))
@@ -1,34 +1,228 @@
-
+import re
 import time
+import bisect
+import sqlite3
+import logging
+import threading
 import psutil
 import discord
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 
+logger = logging.getLogger(__name__)
+
+# Log-spaced latency bucket upper bounds in milliseconds (~0.05 ms .. ~2 min)
+_BUCKET_BOUNDS_MS = [0.05 * 1.25 ** i for i in range(67)]
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds"""
+
+    def __init__(self):
+        self._buckets = [0] * (len(_BUCKET_BOUNDS_MS) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms):
+        with self._lock:
+            self._buckets[bisect.bisect_left(_BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q):
+        with self._lock:
+            return self._percentile(q)
+
+    def _percentile(self, q):
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= target:
+                bound = _BUCKET_BOUNDS_MS[i] if i < len(_BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "p50_ms": round(self._percentile(0.50), 2),
+                "p95_ms": round(self._percentile(0.95), 2),
+                "p99_ms": round(self._percentile(0.99), 2),
+                "max_ms": round(self.max_ms, 2),
+                "total_ms": round(self.total_ms, 2)
+            }
+
+class QueryMonitor:
+    """Per-statement timing for every query run through Database cursors"""
+
+    MAX_STATEMENTS = 500  # Distinct SQL texts tracked before folding into "other"
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.all_queries = LatencyHistogram()
+        self.slow_queries = 0
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(sql):
+        return re.sub(r"\s+", " ", sql).strip()[:160]
+
+    def record(self, sql, elapsed):
+        elapsed_ms = elapsed * 1000
+        key = self.normalize(sql)
+        with self._lock:
+            histogram = self._statements.get(key)
+            if histogram is None:
+                if len(self._statements) >= self.MAX_STATEMENTS:
+                    key = "other"
+                    histogram = self._statements.get(key)
+                if histogram is None:
+                    histogram = self._statements[key] = LatencyHistogram()
+        histogram.record(elapsed_ms)
+        self.all_queries.record(elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {key}")
+
+    def snapshot(self, top=20, include_sql=True):
+        with self._lock:
+            statements = list(self._statements.items())
+        summaries = sorted(((sql, h.summary()) for sql, h in statements),
+                           key=lambda item: item[1]["total_ms"], reverse=True)
+        return {
+            "queries": self.all_queries.summary(),
+            "slow_queries": self.slow_queries,
+            "slow_query_ms": self.slow_query_ms,
+            "top_statements": [dict(sql=sql, **summary) if include_sql else summary
+                               for sql, summary in summaries[:top]]
+        }
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execution time to a QueryMonitor.
+
+    Only ``execute`` is timed; rows stepped later by ``fetchall`` are not.
+    """
+
+    def __init__(self, connection, monitor):
+        super().__init__(connection)
+        self._monitor = monitor
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._monitor.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._monitor.record(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._monitor.record(sql_script, time.perf_counter() - start)
+
 class PerformanceMonitor:
-    def __init__(self, bot):
+    def __init__(self, bot, loop_lag_interval=0.5):
         self.bot = bot
         self.start_time = time.time()
         self.command_counts = {}
         self.error_counts = {}
-        
+        self.command_latency = {}
+        self.loop_lag = LatencyHistogram()
+        self.loop_lag_interval = loop_lag_interval
+        self._inflight = {}
+        self._lag_task = None
+
     async def log_command(self, command_name):
         """Log command usage"""
         self.command_counts[command_name] = self.command_counts.get(command_name, 0) + 1
-        
+
     async def log_error(self, error_type):
         """Log error occurrence"""
         self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
-        
+
+    # ===============================
+    # COMMAND LATENCY
+    # ===============================
+
+    def command_started(self, ctx):
+        """Hook for on_command"""
+        self._inflight[ctx.message.id] = time.perf_counter()
+
+    def command_finished(self, ctx, error=None):
+        """Hook for on_command_completion / on_command_error"""
+        start = self._inflight.pop(ctx.message.id, None)
+        if ctx.command is None:
+            return
+        name = ctx.command.qualified_name
+        self.command_counts[name] = self.command_counts.get(name, 0) + 1
+        if error is not None:
+            error_type = type(error).__name__
+            self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
+        if start is not None:
+            self._record_latency(name, (time.perf_counter() - start) * 1000)
+
+    def app_command_finished(self, interaction, command):
+        """Hook for on_app_command_completion (measured from interaction creation)"""
+        name = f"/{command.qualified_name}"
+        self.command_counts[name] = self.command_counts.get(name, 0) + 1
+        elapsed = datetime.now(timezone.utc) - interaction.created_at
+        self._record_latency(name, elapsed.total_seconds() * 1000)
+
+    def _record_latency(self, name, elapsed_ms):
+        histogram = self.command_latency.get(name)
+        if histogram is None:
+            histogram = self.command_latency[name] = LatencyHistogram()
+        histogram.record(elapsed_ms)
+
+    # ===============================
+    # EVENT LOOP LAG
+    # ===============================
+
+    def start(self):
+        """Start sampling event-loop lag (call from a running loop)"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.loop_lag_interval
+            await asyncio.sleep(self.loop_lag_interval)
+            self.loop_lag.record(max(0.0, loop.time() - expected) * 1000)
+
+    def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+
+    # ===============================
+    # REPORTING
+    # ===============================
+
     def get_uptime(self):
         """Get bot uptime"""
         return time.time() - self.start_time
-        
+
     def get_memory_usage(self):
         """Get memory usage"""
         process = psutil.Process()
         return process.memory_info().rss / 1024 / 1024  # MB
-        
+
     def get_performance_stats(self):
         """Get comprehensive performance stats"""
         return {
@@ -39,3 +233,22 @@ class PerformanceMonitor:
             "guilds": len(self.bot.guilds),
             "users": len(self.bot.users)
         }
+
+    def slowest_commands(self, top=10, by="p95_ms"):
+        """Command latency summaries, slowest first"""
+        summaries = [(name, histogram.summary()) for name, histogram in list(self.command_latency.items())]
+        summaries.sort(key=lambda item: item[1][by], reverse=True)
+        return summaries[:top]
+
+    def snapshot(self, include_sql=True):
+        """Everything at once, JSON-serializable (served on /metrics)"""
+        query_monitor = getattr(getattr(self.bot, "db", None), "query_monitor", None)
+        return {
+            "uptime_seconds": round(self.get_uptime(), 1),
+            "memory_mb": round(self.get_memory_usage(), 1),
+            "commands_used": sum(self.command_counts.values()),
+            "errors": dict(self.error_counts),
+            "commands": {name: summary for name, summary in self.slowest_commands(top=len(self.command_latency))},
+            "event_loop_lag": self.loop_lag.summary(),
+            "database": query_monitor.snapshot(include_sql=include_sql) if query_monitor else None
+        }
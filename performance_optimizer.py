@@ -2,6 +2,7 @@ import sqlite3
 import asyncio
 import logging
 from datetime import datetime, timedelta
+from config import DB_VACUUM_PAGES_PER_STEP
 
 logger = logging.getLogger(__name__)
 
@@ -9,44 +10,12 @@ class PerformanceOptimizer:
     def __init__(self, db):
         self.db = db
         
-    def optimize_database(self):
-        """Optimize database performance"""
+    def optimize_database(self, cursor=None):
+        """Refresh query planner statistics where they are stale"""
+        cur = cursor or self.db.c
         try:
-            # Create indexes for faster queries
-            indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_members_user_id ON members(user_id)",
-                "CREATE INDEX IF NOT EXISTS idx_members_alliance_id ON members(alliance_id)",
-                "CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id)",
-                "CREATE INDEX IF NOT EXISTS idx_users_alliance_id ON users(alliance_id)",
-                "CREATE INDEX IF NOT EXISTS idx_wars_attacker_id ON wars(attacker_id)",
-                "CREATE INDEX IF NOT EXISTS idx_wars_defender_id ON wars(defender_id)",
-                "CREATE INDEX IF NOT EXISTS idx_wars_status ON wars(status)",
-                "CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments(status)",
-                "CREATE INDEX IF NOT EXISTS idx_duels_challenger_id ON duels(challenger_id)",
-                "CREATE INDEX IF NOT EXISTS idx_duels_challenged_id ON duels(challenged_id)",
-                "CREATE INDEX IF NOT EXISTS idx_marriages_user1_id ON marriages(user1_id)",
-                "CREATE INDEX IF NOT EXISTS idx_marriages_user2_id ON marriages(user2_id)",
-                "CREATE INDEX IF NOT EXISTS idx_income_sources_house_id ON income_sources(house_id)",
-                "CREATE INDEX IF NOT EXISTS idx_house_debts_creditor_house_id ON house_debts(creditor_house_id)",
-                "CREATE INDEX IF NOT EXISTS idx_house_debts_debtor_house_id ON house_debts(debtor_house_id)"
-            ]
-            
-            for index_sql in indexes:
-                try:
-                    self.db.c.execute(index_sql)
-                except sqlite3.OperationalError as e:
-                    if "no such table" in str(e):
-                        logger.warning(f"Skipping index creation - table doesn't exist: {e}")
-                    else:
-                        raise
-            
-            # Vacuum database to reclaim space
-            self.db.c.execute("VACUUM")
-            
-            # Analyze tables for query optimization
-            self.db.c.execute("ANALYZE")
-            
-            self.db.conn.commit()
+            # Indexes are created once by migrations.py; space is reclaimed by vacuum_step
+            cur.execute("PRAGMA optimize")
             logger.info("Database optimization completed successfully")
             return True
             
@@ -54,12 +23,38 @@ class PerformanceOptimizer:
             logger.error(f"Database optimization error: {e}")
             return False
     
-    def cleanup_old_data(self):
+    def vacuum_step(self, cursor, pages=DB_VACUUM_PAGES_PER_STEP):
+        """Return up to ``pages`` free pages to the OS; returns the free pages left"""
+        # executescript steps the pragma to completion (execute frees a single page)
+        cursor.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        cursor.execute("PRAGMA freelist_count")
+        return cursor.fetchone()[0]
+    
+    async def run_maintenance(self):
+        """Vacuum in short writer turns, then optimize; returns optimize_database's result.
+
+        Each step holds the writer for a few milliseconds, so writes from the event
+        loop interleave with it instead of waiting behind a full VACUUM.
+        """
+        left = None
+        try:
+            while True:
+                remaining = await self.db.aio.run_write(self.vacuum_step)
+                if remaining == 0 or remaining == left:
+                    break
+                left = remaining
+                await asyncio.sleep(0)
+        except Exception as e:
+            logger.error(f"Incremental vacuum error: {e}")
+        return await self.db.aio.run_write(self.optimize_database)
+    
+    def cleanup_old_data(self, cursor=None):
         """Clean up old data to improve performance"""
+        cur = cursor or self.db.c
         try:
             # Clean up old data - use simpler approach since created_at column may not exist
             # Remove finished tournaments older than 30 days
-            self.db.c.execute('''
+            cur.execute('''
             DELETE FROM tournaments 
             WHERE status = 'finished' AND id NOT IN (
                 SELECT id FROM tournaments 
@@ -69,19 +64,22 @@ class PerformanceOptimizer:
             )
             ''')
             
-            # Remove finished wars older than 30 days
-            self.db.c.execute('''
+            # Remove finished wars beyond the last 50 once battle_archive.py has
+            # archived them and purged their logs (replays are served from the archive)
+            cur.execute('''
             DELETE FROM wars 
-            WHERE status IN ('finished', 'cancelled') AND id NOT IN (
+            WHERE status IN ('ended', 'finished', 'cancelled') AND id NOT IN (
                 SELECT id FROM wars 
-                WHERE status IN ('finished', 'cancelled') 
+                WHERE status IN ('ended', 'finished', 'cancelled') 
                 ORDER BY id DESC 
                 LIMIT 50
             )
+            AND id IN (SELECT war_id FROM battle_archives)
+            AND NOT EXISTS (SELECT 1 FROM battle_logs WHERE battle_logs.war_id = wars.id)
             ''')
             
             # Remove finished duels (keep only last 20)
-            self.db.c.execute('''
+            cur.execute('''
             DELETE FROM duels 
             WHERE status IN ('finished', 'cancelled') AND id NOT IN (
                 SELECT id FROM duels 
@@ -91,7 +89,7 @@ class PerformanceOptimizer:
             )
             ''')
             
-            self.db.conn.commit()
+            cur.connection.commit()
             logger.info("Old data cleanup completed")
             return True
             
@@ -99,14 +97,15 @@ class PerformanceOptimizer:
             logger.error(f"Data cleanup error: {e}")
             return False
     
-    def get_performance_stats(self):
+    def get_performance_stats(self, cursor=None):
         """Get database performance statistics"""
+        cur = cursor or self.db.c
         try:
             stats = {}
             
             # Check which tables actually exist
-            self.db.c.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            existing_tables = [row[0] for row in self.db.c.fetchall()]
+            cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            existing_tables = [row[0] for row in cur.fetchall()]
             
             # Table sizes - only check existing tables
             tables = ['alliances', 'members', 'wars', 'tournaments', 
@@ -116,8 +115,8 @@ class PerformanceOptimizer:
             for table in tables:
                 if table in existing_tables:
                     try:
-                        self.db.c.execute(f"SELECT COUNT(*) FROM {table}")
-                        stats[f"{table}_count"] = self.db.c.fetchone()[0]
+                        cur.execute(f"SELECT COUNT(*) FROM {table}")
+                        stats[f"{table}_count"] = cur.fetchone()[0]
                     except sqlite3.OperationalError as e:
                         logger.warning(f"Error counting {table}: {e}")
                         stats[f"{table}_count"] = 0
@@ -125,8 +124,8 @@ class PerformanceOptimizer:
                     stats[f"{table}_count"] = 0
             
             # Database size
-            self.db.c.execute("SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size()")
-            stats['database_size_bytes'] = self.db.c.fetchone()[0]
+            cur.execute("SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size()")
+            stats['database_size_bytes'] = cur.fetchone()[0]
             
             return stats
             
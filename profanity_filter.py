@@ -0,0 +1,70 @@
+"""
+Profanity matching.
+
+A word list is folded (Turkish-aware case folding, diacritics dropped,
+leetspeak undone) and compiled into one regex shaped like a trie of the
+words, anchored at word boundaries. A message is folded the same way and
+searched once: the regex descends the trie from each word start, so the
+cost per message depends on its length, not on how many words are listed.
+Compiled matchers are cached by word set and shared between guilds.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional
+
+# Unify dotted/dotless i before casefold: 'I'.lower() is 'i' but Turkish 'I' is 'ı',
+# and 'İ'.lower() leaves a combining dot behind
+_TURKISH_I = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+_LEET_DIGITS = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g"})
+_LEET_SYMBOLS = {"@": "a", "$": "s", "!": "i", "|": "i", "€": "e"}
+# Symbols only stand in for a letter between letters ("sp@m", "b!t"), not as
+# punctuation or a prefix ("bot!", "!bot", "@user")
+_LEET_SYMBOL_PATTERN = re.compile(r"(?<=\w)[@$!|€](?=\w)")
+
+def fold(text: str) -> str:
+    """Normalize text for matching: case, diacritics, leetspeak and whitespace"""
+    text = text.translate(_TURKISH_I).casefold()
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    text = _LEET_SYMBOL_PATTERN.sub(lambda match: _LEET_SYMBOLS[match.group()], text)
+    return " ".join(text.translate(_LEET_DIGITS).split())
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation factored by common prefixes"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # End of a word
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+class ProfanityMatcher:
+    """Whole-word matcher for one word list"""
+
+    def __init__(self, words: FrozenSet[str]):
+        self.words = words
+        self._pattern = re.compile(rf"(?<!\w)(?:{_trie_pattern(words)})(?!\w)") if words else None
+
+    def find(self, text: str) -> Optional[str]:
+        """First listed word in ``text`` (folded), or None"""
+        if self._pattern is None or not text:
+            return None
+        match = self._pattern.search(fold(text))
+        return match.group() if match else None
+
+@lru_cache(maxsize=128)
+def _compile(words: FrozenSet[str]) -> ProfanityMatcher:
+    return ProfanityMatcher(words)
+
+def get_matcher(words: Iterable[str]) -> ProfanityMatcher:
+    """Shared compiled matcher for a word list (compiled once per distinct folded set)"""
+    return _compile(frozenset(filter(None, (fold(word) for word in words))))
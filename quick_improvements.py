@@ -20,26 +20,16 @@ def setup_quick_improvements(bot):
         bonus_soldiers = random.randint(10, 50)
         
         try:
-            conn = bot.db.conn
-            cursor = conn.cursor()
-            
             # Check if user has alliance
-            cursor.execute('SELECT gold, soldiers FROM alliances WHERE user_id = ?', (user_id,))
-            result = cursor.fetchone()
+            alliance = bot.db.get_user_alliance(user_id)
             
-            if not result:
+            if not alliance:
                 embed = create_embed("❌ İttifak Bulunamadı", "Önce bir ittifak kurmalısınız!")
                 await ctx.send(embed=embed)
                 return
             
             # Add bonus
-            cursor.execute('''
-                UPDATE alliances 
-                SET gold = gold + ?, soldiers = soldiers + ?
-                WHERE user_id = ?
-            ''', (bonus_gold, bonus_soldiers, user_id))
-            
-            conn.commit()
+            await bot.db.aio.update_alliance_resources(alliance[0], bonus_gold, bonus_soldiers, "daily_bonus")
             
             embed = create_embed(
                 "🎁 Günlük Bonus Alındı!",
@@ -61,14 +51,10 @@ def setup_quick_improvements(bot):
         cost = 100
         
         try:
-            conn = bot.db.conn
-            cursor = conn.cursor()
-            
             # Check gold
-            cursor.execute('SELECT gold FROM alliances WHERE user_id = ?', (user_id,))
-            result = cursor.fetchone()
+            alliance = bot.db.get_user_alliance(user_id)
             
-            if not result or result[0] < cost:
+            if not alliance or alliance[3] < cost:
                 embed = create_embed("💰 Yetersiz Altın", f"Şans çarkı için {cost} altın gerekli!")
                 await ctx.send(embed=embed)
                 return
@@ -98,13 +84,7 @@ def setup_quick_improvements(bot):
                 won_prize = prizes[-1]  # Default to last prize
             
             # Apply cost and reward
-            cursor.execute('''
-                UPDATE alliances 
-                SET gold = gold - ? + ?, soldiers = soldiers + ?
-                WHERE user_id = ?
-            ''', (cost, won_prize["gold"], won_prize["soldiers"], user_id))
-            
-            conn.commit()
+            await bot.db.aio.update_alliance_resources(alliance[0], won_prize["gold"] - cost, won_prize["soldiers"], "lucky_wheel")
             
             embed = create_embed(
                 "🎰 Şans Çarkı Sonucu!",
@@ -126,19 +106,15 @@ def setup_quick_improvements(bot):
         user_id = ctx.author.id
         
         try:
-            conn = bot.db.conn
-            cursor = conn.cursor()
-            
             # Check user army
-            cursor.execute('SELECT soldiers, power FROM alliances WHERE user_id = ?', (user_id,))
-            result = cursor.fetchone()
+            alliance = bot.db.get_user_alliance(user_id)
             
-            if not result:
+            if not alliance:
                 embed = create_embed("❌ İttifak Bulunamadı", "Önce bir ittifak kurmalısınız!")
                 await ctx.send(embed=embed)
                 return
             
-            soldiers, power = result
+            soldiers, power = alliance[4], alliance[5] or 0  # soldiers, power_points
             
             if soldiers < 50:
                 embed = create_embed("⚔️ Yetersiz Ordu", "Savaş için en az 50 asker gerekli!")
@@ -165,11 +141,12 @@ def setup_quick_improvements(bot):
                 power_reward = random.randint(1, 5) * enemy["difficulty"]
                 soldiers_lost = random.randint(5, 20)
                 
-                cursor.execute('''
-                    UPDATE alliances 
-                    SET gold = gold + ?, power = power + ?, soldiers = soldiers - ?
-                    WHERE user_id = ?
-                ''', (int(gold_reward), power_reward, soldiers_lost, user_id))
+                def reward(cur):
+                    bot.db.update_alliance_resources(alliance[0], int(gold_reward), -soldiers_lost, "quick_battle")
+                    cur.execute('UPDATE alliances SET power_points = power_points + ? WHERE id = ?',
+                                (power_reward, alliance[0]))
+                
+                await bot.db.aio.run_write(reward)
                 
                 embed = create_embed(
                     "⚔️ Zafer!",
@@ -183,11 +160,7 @@ def setup_quick_improvements(bot):
                 soldiers_lost = random.randint(20, 40)
                 gold_lost = random.randint(100, 300)
                 
-                cursor.execute('''
-                    UPDATE alliances 
-                    SET soldiers = soldiers - ?, gold = gold - ?
-                    WHERE user_id = ?
-                ''', (soldiers_lost, gold_lost, user_id))
+                await bot.db.aio.update_alliance_resources(alliance[0], -gold_lost, -soldiers_lost, "quick_battle")
                 
                 embed = create_embed(
                     "💀 Yenilgi!",
@@ -197,8 +170,6 @@ def setup_quick_improvements(bot):
                     f"**🔄 Tekrar deneyin!**"
                 )
             
-            conn.commit()
-            
         except Exception as e:
             logger.error(f"Quick battle error: {e}")
             embed = create_embed("❌ Hata", "Savaş sırasında bir hata oluştu!")
@@ -211,19 +182,15 @@ def setup_quick_improvements(bot):
         user_id = ctx.author.id
         
         try:
-            conn = bot.db.conn
-            cursor = conn.cursor()
-            
             # Check user resources
-            cursor.execute('SELECT gold, soldiers FROM alliances WHERE user_id = ?', (user_id,))
-            result = cursor.fetchone()
+            alliance = bot.db.get_user_alliance(user_id)
             
-            if not result:
+            if not alliance:
                 embed = create_embed("❌ İttifak Bulunamadı", "Önce bir ittifak kurmalısınız!")
                 await ctx.send(embed=embed)
                 return
             
-            gold, soldiers = result
+            gold, soldiers = alliance[3], alliance[4]
             
             # Trade options
             trades = [
@@ -251,13 +218,13 @@ def setup_quick_improvements(bot):
             soldiers_change = chosen_trade.get("get_soldiers", 0) - chosen_trade.get("give_soldiers", 0)
             power_change = chosen_trade.get("get_power", 0)
             
-            cursor.execute('''
-                UPDATE alliances 
-                SET gold = gold + ?, soldiers = soldiers + ?, power = power + ?
-                WHERE user_id = ?
-            ''', (gold_change, soldiers_change, power_change, user_id))
+            def trade(cur):
+                bot.db.update_alliance_resources(alliance[0], gold_change, soldiers_change, "quick_trade")
+                if power_change:
+                    cur.execute('UPDATE alliances SET power_points = power_points + ? WHERE id = ?',
+                                (power_change, alliance[0]))
             
-            conn.commit()
+            await bot.db.aio.run_write(trade)
             
             # Format results
             changes = []
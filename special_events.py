@@ -44,14 +44,14 @@ class SpecialEventsSystem:
                 hunt_success = random.randint(1, 100)
 
                 # Deduct costs
-                self.db.update_alliance_resources(alliance_id, -1000, -100)
+                await self.db.aio.update_alliance_resources(alliance_id, -1000, -100, "dragon_hunt")
 
                 if hunt_success <= 15:  # 15% chance - HUGE SUCCESS
                     reward_gold = random.randint(10000, 25000)
                     reward_soldiers = random.randint(200, 500)
                     dragon_name = random.choice(["Balerion", "Vhagar", "Meraxes", "Syrax", "Caraxes"])
 
-                    self.db.update_alliance_resources(alliance_id, reward_gold, reward_soldiers)
+                    await self.db.aio.update_alliance_resources(alliance_id, reward_gold, reward_soldiers, "dragon_hunt")
 
                     embed = create_embed("🐉 EFSANE BAŞARI!",
                                        f"🔥 {dragon_name} ejderini alt ettin!",
@@ -65,7 +65,7 @@ class SpecialEventsSystem:
                     reward_gold = random.randint(3000, 8000)
                     reward_soldiers = random.randint(50, 150)
 
-                    self.db.update_alliance_resources(alliance_id, reward_gold, reward_soldiers)
+                    await self.db.aio.update_alliance_resources(alliance_id, reward_gold, reward_soldiers, "dragon_hunt")
 
                     embed = create_embed("🐲 Başarılı Av!",
                                        "Genç bir ejderi yakaladın!",
@@ -76,7 +76,7 @@ class SpecialEventsSystem:
                 elif hunt_success <= 70:  # 30% chance - PARTIAL SUCCESS
                     reward_gold = random.randint(500, 2000)
 
-                    self.db.update_alliance_resources(alliance_id, reward_gold, 0)
+                    await self.db.aio.update_alliance_resources(alliance_id, reward_gold, 0, "dragon_hunt")
 
                     embed = create_embed("🔥 Kısmi Başarı",
                                        "Ejder izlerini buldun ve hazineler keşfettin!",
@@ -86,7 +86,7 @@ class SpecialEventsSystem:
                 else:  # 30% chance - FAILURE
                     loss_soldiers = random.randint(50, 200)
 
-                    self.db.update_alliance_resources(alliance_id, 0, -loss_soldiers)
+                    await self.db.aio.update_alliance_resources(alliance_id, 0, -loss_soldiers)
 
                     embed = create_embed("💀 Felaket!",
                                        "Ejder saldırısında askerler kaybettin!",
@@ -157,11 +157,11 @@ class SpecialEventsSystem:
                 success = random.randint(1, 100) <= mission["success_rate"]
 
                 # Deduct mission cost
-                self.db.update_alliance_resources(alliance_id, -2000, 0)
+                await self.db.aio.update_alliance_resources(alliance_id, -2000, 0, "secret_mission")
 
                 if success:
                     reward = random.randint(mission["reward"][0], mission["reward"][1])
-                    self.db.update_alliance_resources(alliance_id, reward, 0)
+                    await self.db.aio.update_alliance_resources(alliance_id, reward, 0, "secret_mission")
 
                     embed = create_embed("🎯 GÖREV BAŞARILI!",
                                        mission["name"],
@@ -171,7 +171,7 @@ class SpecialEventsSystem:
                     embed.add_field(name="🎖️ Statü", value="Gizli Operasyon Uzmanı", inline=True)
                 else:
                     punishment = random.randint(mission["punishment"][0], mission["punishment"][1])
-                    self.db.update_alliance_resources(alliance_id, -punishment, 0)
+                    await self.db.aio.update_alliance_resources(alliance_id, -punishment, 0, "secret_mission")
 
                     embed = create_embed("💀 GÖREV BAŞARISIZ!",
                                        mission["name"],
@@ -220,13 +220,13 @@ class SpecialEventsSystem:
                 outcome = random.randint(1, 100)
 
                 # Deduct ritual cost
-                self.db.update_alliance_resources(alliance_id, -1500, 0)
+                await self.db.aio.update_alliance_resources(alliance_id, -1500, 0, "magic_ritual")
 
                 if outcome <= 20:  # 20% - DIVINE BLESSING
                     gold_bonus = random.randint(8000, 20000)
                     soldier_bonus = random.randint(100, 300)
 
-                    self.db.update_alliance_resources(alliance_id, gold_bonus, soldier_bonus)
+                    await self.db.aio.update_alliance_resources(alliance_id, gold_bonus, soldier_bonus, "magic_ritual")
 
                     embed = create_embed("✨ İLAHİ BEREKET!",
                                        f"{ritual_name} başarılı!",
@@ -239,7 +239,7 @@ class SpecialEventsSystem:
                 elif outcome <= 50:  # 30% - MINOR BLESSING
                     gold_bonus = random.randint(2000, 6000)
 
-                    self.db.update_alliance_resources(alliance_id, gold_bonus, 0)
+                    await self.db.aio.update_alliance_resources(alliance_id, gold_bonus, 0, "magic_ritual")
 
                     embed = create_embed("🌟 Küçük Bereket",
                                        f"{ritual_name} kısmen başarılı!",
@@ -256,7 +256,7 @@ class SpecialEventsSystem:
                     gold_loss = random.randint(1000, 3000)
                     soldier_loss = random.randint(20, 100)
 
-                    self.db.update_alliance_resources(alliance_id, -gold_loss, -soldier_loss)
+                    await self.db.aio.update_alliance_resources(alliance_id, -gold_loss, -soldier_loss, "magic_ritual")
 
                     embed = create_embed("🌑 LANETLENDİN!",
                                        f"{ritual_name} ters gitti!",
@@ -294,7 +294,7 @@ class SpecialEventsSystem:
                  task_reward_gold = random.randint(100, 500)
                  task_reward_soldiers = random.randint(10, 50)
 
-                 self.db.update_alliance_resources(alliance_id, task_reward_gold, task_reward_soldiers)
+                 await self.db.aio.update_alliance_resources(alliance_id, task_reward_gold, task_reward_soldiers, "special_task_reward")
 
                  embed = create_embed("✅ Görev Tamamlandı!",
                                     "Başarıyla bir özel görevi tamamladın!",
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from army_management import ArmyManagement
+from database import Database
+
+class DailyUpkeepTest(unittest.IsolatedAsyncioTestCase):
+    """Shortage morale penalties scale with the missing share"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self._dir.name, "test.db"))
+        self.army = ArmyManagement(self.db)
+
+    def tearDown(self):
+        self.db.aio.close()
+        self.db.pool.close()
+        self._dir.cleanup()
+
+    def stock_house(self, house_id, food_short_percent):
+        """Give ``house_id`` its full iron/wood upkeep and ``food_short_percent`` too little food"""
+        with self.db.transaction(), self.db.write_cursor() as cur:
+            cur.execute("SELECT soldiers FROM alliances WHERE id = ?", (house_id,))
+            soldiers = cur.fetchone()[0]
+            cur.execute("DELETE FROM house_resources WHERE house_id = ?", (house_id,))
+            cur.execute("DELETE FROM army_resources WHERE house_id = ?", (house_id,))
+            cur.execute("INSERT INTO army_resources (house_id, food_supplies, morale) VALUES (?, 0, 100)", (house_id,))
+            for resource, rate in self.army.maintenance_costs.items():
+                need = int(soldiers * rate)
+                if resource == "food":
+                    need -= need * food_short_percent // 100
+                cur.execute("INSERT INTO house_resources (house_id, resource_type, quantity) VALUES (?, ?, ?)",
+                            (house_id, resource, need))
+
+    def morale(self, house_id):
+        with self.db.pool.reader() as cur:
+            cur.execute("SELECT morale FROM army_resources WHERE house_id = ?", (house_id,))
+            return cur.fetchone()[0]
+
+    async def test_small_food_shortage_costs_morale(self):
+        # 4% short: 20 * 0.04 = 0.8 rounds to 1 (integer division made it 0)
+        self.stock_house(1, 4)
+        await self.db.aio.run_write(self.army._apply_upkeep)
+        self.assertEqual(self.morale(1), 99)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from database import Database, TransactionRollback, WriterBusy
+
+class LegacyWriteIsolationTest(unittest.IsolatedAsyncioTestCase):
+    """Legacy ``db.c`` writes belong to their task, not to the event loop thread"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self._dir.name, "test.db"))
+
+    def tearDown(self):
+        self.db.aio.close()
+        self.db.pool.close()
+        self._dir.cleanup()
+
+    def committed_soldiers(self, alliance_id=1):
+        with self.db.pool.reader() as cur:
+            cur.execute("SELECT soldiers FROM alliances WHERE id = ?", (alliance_id,))
+            return cur.fetchone()[0]
+
+    async def test_other_task_rollback_keeps_pending_legacy_write(self):
+        before = self.committed_soldiers()
+        written = asyncio.Event()
+        seen = {}
+
+        async def legacy_writer():
+            self.db.c.execute("UPDATE alliances SET soldiers = 777 WHERE id = 1")
+            written.set()
+            await asyncio.sleep(0.05)
+            self.db.conn.commit()
+
+        async def other_task():
+            await written.wait()
+            with self.assertRaises(WriterBusy):
+                with self.db.transaction():
+                    raise TransactionRollback()
+            with self.assertRaises(WriterBusy):
+                self.db.c.execute("UPDATE alliances SET soldiers = 1 WHERE id = 2")
+            # Legacy error handling must not end the other task's transaction
+            self.db.conn.rollback()
+            with self.db.read_cursor() as cur:
+                cur.execute("SELECT soldiers FROM alliances WHERE id = 1")
+                seen["read_cursor"] = cur.fetchone()[0]
+            seen["legacy"] = self.db.c.execute("SELECT soldiers FROM alliances WHERE id = 1").fetchone()[0]
+
+        await asyncio.gather(legacy_writer(), other_task())
+
+        self.assertEqual(self.committed_soldiers(), 777)
+        self.assertEqual(seen, {"read_cursor": before, "legacy": before})
+
+    async def test_writer_thread_waits_for_pending_legacy_write(self):
+        written = asyncio.Event()
+
+        async def legacy_writer():
+            self.db.c.execute("UPDATE alliances SET soldiers = 777 WHERE id = 1")
+            written.set()
+            await asyncio.sleep(0.05)
+            self.db.conn.commit()
+
+        async def writer_thread_rollback():
+            await written.wait()
+
+            def fail(cur):
+                cur.execute("UPDATE alliances SET soldiers = 1 WHERE id = 1")
+                raise TransactionRollback()
+
+            with self.assertRaises(TransactionRollback):
+                await self.db.aio.run_write(fail)
+
+        await asyncio.gather(legacy_writer(), writer_thread_rollback())
+        self.assertEqual(self.committed_soldiers(), 777)
+
+    async def test_finished_task_writes_are_committed_by_next_writer(self):
+        async def forgets_commit():
+            self.db.c.execute("UPDATE alliances SET soldiers = 888 WHERE id = 1")
+
+        await asyncio.create_task(forgets_commit())
+        with self.db.transaction():
+            pass
+        self.assertEqual(self.committed_soldiers(), 888)
+        self.assertFalse(self.db.pool.write_lock.held_by_other())
+
+class AllianceCacheWriteThroughTest(unittest.IsolatedAsyncioTestCase):
+    """Write-through rows reach the cache only when their transaction commits"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self._dir.name, "test.db"))
+
+    def tearDown(self):
+        self.db.aio.close()
+        self.db.pool.close()
+        self._dir.cleanup()
+
+    async def read_during_write(self, fail):
+        """Soldiers seen by a read while ``update_alliance_resources`` is uncommitted"""
+        written, read_done = threading.Event(), threading.Event()
+
+        def write(cur):
+            self.db.update_alliance_resources(1, 0, 5, "test")
+            written.set()
+            read_done.wait(5)
+            if fail:
+                raise TransactionRollback()
+
+        pending = asyncio.ensure_future(self.db.aio.run_write(write))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, written.wait)
+        seen = await loop.run_in_executor(None, self.db.get_alliance_by_id, 1)
+        read_done.set()
+        try:
+            await pending
+        except TransactionRollback:
+            pass
+        return seen[4]
+
+    async def test_uncommitted_row_is_not_served(self):
+        soldiers = self.db.get_alliance_by_id(1)[4]
+        self.assertEqual(await self.read_during_write(fail=True), soldiers)
+        self.assertEqual(self.db.get_alliance_by_id(1)[4], soldiers)
+        self.assertEqual(await self.read_during_write(fail=False), soldiers)
+        self.assertEqual(self.db.get_alliance_by_id(1)[4], soldiers + 5)
+
+if __name__ == "__main__":
+    unittest.main()
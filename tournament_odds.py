@@ -0,0 +1,172 @@
+"""
+Monte Carlo tournament and duel odds.
+
+Runs thousands of brackets or duels at once as NumPy arrays using the same
+match and duel rules as ``TournamentSystem`` (skill + equipment +
+randint(1, MATCH_ROLL), duel score + randint(1, DUEL_ROLL)). Bracket odds are
+cached per tournament until its participant list changes. Run this module
+directly to benchmark it against the scalar bracket.
+"""
+import time
+import random
+import logging
+import numpy as np
+from config import TOURNAMENT_ODDS_SIMULATIONS, DUEL_ODDS_SIMULATIONS
+from tournament_system import MATCH_ROLL, DUEL_ROLL, DECISIVE_MARGIN, CLEAR_MARGIN
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CELLS = 1_000_000  # Max simulations x entrants held in memory at once
+
+def bracket_odds(strengths, simulations=TOURNAMENT_ODDS_SIMULATIONS, seed=None):
+    """Simulate a single-elimination bracket ``simulations`` times.
+
+    ``strengths`` are character_skill + equipment_bonus per entrant. Returns
+    per-entrant probabilities of winning, reaching the final and finishing in
+    the top three (the places ``TournamentSystem`` pays prizes for).
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    strengths = np.asarray(strengths, dtype=np.int64)
+    n = len(strengths)
+    wins = np.zeros(n, dtype=np.int64)
+    finals = np.zeros(n, dtype=np.int64)
+    podiums = np.zeros(n, dtype=np.int64)
+
+    done = 0
+    chunk = max(1, CHUNK_CELLS // max(n, 1))
+    while n > 1 and done < simulations:
+        sims = min(chunk, simulations - done)
+        current = np.tile(np.arange(n), (sims, 1))
+        while current.shape[1] > 1:
+            k = current.shape[1]
+            if k == 2:
+                finals += np.bincount(current.ravel(), minlength=n)
+            if k in (3, 4) or n == 2:  # Everyone in the round before the final places top three
+                podiums += np.bincount(current.ravel(), minlength=n)
+
+            # Reshuffle every round, pair neighbours, odd one out gets a bye
+            current = rng.permuted(current, axis=1)
+            pairs = k // 2
+            p1 = current[:, 0:2 * pairs:2]
+            p2 = current[:, 1:2 * pairs:2]
+            roll1 = strengths[p1] + rng.integers(1, MATCH_ROLL + 1, p1.shape)
+            roll2 = strengths[p2] + rng.integers(1, MATCH_ROLL + 1, p2.shape)
+            winners = np.where(roll1 > roll2, p1, p2)
+            if k % 2:
+                winners = np.concatenate([winners, current[:, -1:]], axis=1)
+            current = winners
+        wins += np.bincount(current[:, 0], minlength=n)
+        done += sims
+
+    if n == 1:  # A lone entrant wins by walkover
+        wins[:] = finals[:] = podiums[:] = 1
+        done = 1
+    total = max(done, 1)
+    return {
+        "simulations": done,
+        "win": (wins / total).tolist(),
+        "final": (finals / total).tolist(),
+        "podium": (podiums / total).tolist(),
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+def duel_odds(challenger_score, challenged_score, simulations=DUEL_ODDS_SIMULATIONS, seed=None):
+    """Simulate a duel ``simulations`` times from both sides' ``_calculate_duel_score``"""
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    rolls = rng.integers(1, DUEL_ROLL + 1, (2, simulations))
+    challenger_roll = challenger_score + rolls[0]
+    challenged_roll = challenged_score + rolls[1]
+    challenger_wins = challenger_roll > challenged_roll  # Ties go to the challenged side
+    margin = np.abs(challenger_roll - challenged_roll)
+    return {
+        "simulations": simulations,
+        "challenger_win": float(np.mean(challenger_wins)),
+        "challenged_win": float(np.mean(~challenger_wins)),
+        "decisive": float(np.mean(margin > DECISIVE_MARGIN)),
+        "clear": float(np.mean((margin > CLEAR_MARGIN) & (margin <= DECISIVE_MARGIN))),
+        "close": float(np.mean(margin <= CLEAR_MARGIN)),
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+class TournamentOdds:
+    """Bracket odds per tournament, recomputed only when the entrant list changes"""
+
+    MAX_CACHED = 64
+
+    def __init__(self, simulations=TOURNAMENT_ODDS_SIMULATIONS):
+        self.simulations = simulations
+        self._cache = {}  # tournament_id -> (entrants, odds)
+
+    def get(self, tournament_id, entrants):
+        """Odds for ``TournamentSystem._load_entrants`` rows, best chance first.
+
+        Returns (rows, simulations, elapsed_ms, cached) where rows are
+        (user_id, strength, win, final, podium).
+        """
+        entrants = tuple(tuple(entrant) for entrant in entrants)
+        cached = self._cache.get(tournament_id)
+        if cached is not None and cached[0] == entrants:
+            rows, simulations, elapsed_ms = cached[1]
+            return rows, simulations, elapsed_ms, True
+
+        odds = bracket_odds([entrant[2] for entrant in entrants], self.simulations)
+        rows = sorted(((entrant[1], entrant[2], odds["win"][i], odds["final"][i], odds["podium"][i])
+                       for i, entrant in enumerate(entrants)), key=lambda row: row[2], reverse=True)
+        result = (rows, odds["simulations"], odds["elapsed_ms"])
+
+        self._cache.pop(tournament_id, None)
+        if len(self._cache) >= self.MAX_CACHED:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[tournament_id] = (entrants, result)
+        return rows, result[1], result[2], False
+
+    def invalidate(self, tournament_id=None):
+        if tournament_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(tournament_id, None)
+
+def simulate_bracket_scalar(strengths, simulations=TOURNAMENT_ODDS_SIMULATIONS, seed=None):
+    """Reference implementation: ``TournamentSystem._play_bracket`` once per simulation"""
+    from tournament_system import TournamentSystem
+
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    tournament_system = TournamentSystem(None)
+    entrants = [(i, i, strength, None) for i, strength in enumerate(strengths)]
+    n = len(strengths)
+    wins, finals, podiums = [0] * n, [0] * n, [0] * n
+    for _ in range(simulations):
+        positions, _, _ = tournament_system._play_bracket(entrants, rng)
+        for i, position in positions.items():
+            wins[i] += position == 1
+            finals[i] += position <= 2
+            podiums[i] += position <= 3
+    return {
+        "simulations": simulations,
+        "win": [count / simulations for count in wins],
+        "final": [count / simulations for count in finals],
+        "podium": [count / simulations for count in podiums],
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+def benchmark(simulations=TOURNAMENT_ODDS_SIMULATIONS, entrants=16):
+    """Compare the vectorized bracket with the scalar path on a sample tournament"""
+    strengths = [45 + (i * 37) % 55 for i in range(entrants)]
+    vectorized = bracket_odds(strengths, simulations, seed=7)
+    scalar = simulate_bracket_scalar(strengths, simulations, seed=7)
+
+    best = max(range(entrants), key=lambda i: strengths[i])
+    for label, result in (("numpy", vectorized), ("scalar", scalar)):
+        print(f"{label:>6}: {result['elapsed_ms']:8.1f} ms  best entrant ({strengths[best]}): "
+              f"win {result['win'][best]:.3f}  final {result['final'][best]:.3f}  podium {result['podium'][best]:.3f}")
+    print(f"speedup: {scalar['elapsed_ms'] / max(vectorized['elapsed_ms'], 1e-9):.1f}x "
+          f"for {simulations} brackets of {entrants}")
+    duel = duel_odds(95, 80, DUEL_ODDS_SIMULATIONS, seed=7)
+    print(f"  duel: {duel['elapsed_ms']:8.1f} ms  95 vs 80 -> {duel['challenger_win']:.3f}")
+    return vectorized, scalar
+
+if __name__ == "__main__":
+    benchmark()
@@ -4,10 +4,17 @@ import discord
 import random
 import asyncio
 from datetime import datetime, timedelta
+from database import TransactionRollback
+from gold_ledger import ESCROW
 from utils import create_embed, format_number, get_house_emoji, get_character_class_info
 
 logger = logging.getLogger(__name__)
 
+MATCH_ROLL = 30  # Tournament matches add randint(1, MATCH_ROLL) to each side
+DUEL_ROLL = 50  # Duels add randint(1, DUEL_ROLL) to each side
+DECISIVE_MARGIN = 30  # Roll margin above this is a crushing victory
+CLEAR_MARGIN = 15  # ...and above this a clear one
+
 class TournamentSystem:
     def __init__(self, database):
         self.db = database
@@ -78,7 +85,7 @@ class TournamentSystem:
                 return False, f"Yetersiz altın! Turnuva ödülü için {format_number(prize_pool)} altın gerekli."
             
             # Deduct prize pool from host house
-            self.db.update_alliance_resources(host_house_id, -prize_pool, 0)
+            self.db.transfer_gold(host_house_id, ESCROW, prize_pool, "tournament_prize_pool")
             
             # Create tournament
             self.db.c.execute('''
@@ -118,12 +125,12 @@ class TournamentSystem:
             # Check participant limit
             self.db.c.execute('SELECT COUNT(*) FROM tournament_participants WHERE tournament_id = ?', (tournament_id,))
             current_participants = self.db.c.fetchone()[0]
-            if current_participants >= tournament[10]:  # max_participants
+            if current_participants >= tournament[9]:  # max_participants
                 return False, "Turnuva dolu!"
             
             # Check entry fee
             alliance = self.db.get_alliance_by_id(user_alliance[0])
-            entry_fee = tournament[5]
+            entry_fee = tournament[4]
             if alliance[3] < entry_fee:
                 return False, f"Yetersiz altın! Katılım ücreti: {format_number(entry_fee)} altın"
             
@@ -131,7 +138,7 @@ class TournamentSystem:
             character_skill = self._calculate_tournament_skill(user_id, tournament[3])  # tournament_type
             
             # Deduct entry fee and join tournament
-            self.db.update_alliance_resources(user_alliance[0], -entry_fee, 0)
+            self.db.update_alliance_resources(user_alliance[0], -entry_fee, 0, "tournament_entry_fee")
             
             self.db.c.execute('''
             INSERT INTO tournament_participants (tournament_id, user_id, character_skill)
@@ -149,40 +156,127 @@ class TournamentSystem:
     def start_tournament(self, tournament_id):
         """Start and simulate tournament"""
         try:
-            # Get tournament and participants
-            self.db.c.execute('SELECT * FROM tournaments WHERE id = ? AND status = "open"', (tournament_id,))
-            tournament = self.db.c.fetchone()
-            if not tournament:
-                return False, "Turnuva bulunamadı!"
-            
-            self.db.c.execute('SELECT * FROM tournament_participants WHERE tournament_id = ?', (tournament_id,))
-            participants = self.db.c.fetchall()
-            
-            if len(participants) < 2:
-                return False, "En az 2 katılımcı gerekli!"
-            
-            # Start tournament
-            self.db.c.execute('UPDATE tournaments SET status = "active", start_time = CURRENT_TIMESTAMP WHERE id = ?', 
-                            (tournament_id,))
-            
-            # Simulate tournament brackets
-            results = self._simulate_tournament_brackets(participants, tournament[3])  # tournament_type
-            
-            # Distribute prizes
-            prize_pool = tournament[6]  # prize_pool
-            self._distribute_tournament_prizes(tournament_id, results, prize_pool)
-            
-            # End tournament
-            self.db.c.execute('UPDATE tournaments SET status = "completed", end_time = CURRENT_TIMESTAMP WHERE id = ?', 
-                            (tournament_id,))
-            self.db.conn.commit()
-            
+            with self.db.transaction(), self.db.write_cursor() as cur:
+                results = self.run_tournament(cur, tournament_id)
+            if results is None:
+                return False, "Turnuva bulunamadı veya en az 2 katılımcı yok!"
             return True, results
             
         except Exception as e:
             logger.error(f"Error starting tournament: {e}")
             return False, f"Turnuva başlatma hatası: {str(e)}"
 
+    def run_tournament(self, cur, tournament_id, rng=random):
+        """Play a whole bracket and pay out prizes on ``cur`` (e.g. via ``db.aio.run_write``).
+
+        Entrants are loaded with one query, the bracket is simulated in memory and
+        eliminations, positions and prizes are written with executemany. Returns
+        None if the tournament isn't open or has fewer than 2 entrants.
+        """
+        cur.execute("SELECT * FROM tournaments WHERE id = ? AND status = 'open'", (tournament_id,))
+        tournament = cur.fetchone()
+        if not tournament:
+            return None
+        
+        entrants = self._load_entrants(cur, tournament_id)
+        if len(entrants) < 2:
+            return None
+        
+        positions, matches, rounds = self._play_bracket(entrants, rng)
+        prizes = self._prize_split(positions, tournament[5])  # prize_pool
+        
+        # Participant rows: eliminated flag, final position and prize in one pass
+        cur.executemany(
+            'UPDATE tournament_participants SET eliminated = ?, final_position = ?, prize_won = ? WHERE id = ?',
+            [(0 if positions[entrant[0]] == 1 else 1, positions[entrant[0]], prizes.get(entrant[0], 0), entrant[0])
+             for entrant in entrants]
+        )
+        
+        # Prize money per house (several members of one house may place)
+        gold_by_house = {}
+        for entrant in entrants:
+            if entrant[0] in prizes and entrant[3] is not None:
+                gold_by_house[entrant[3]] = gold_by_house.get(entrant[3], 0) + prizes[entrant[0]]
+        # Shares with no one to claim them (rounding, houseless winners) go back to the host
+        unpaid = tournament[5] - sum(gold_by_house.values())
+        if unpaid > 0:
+            gold_by_house[tournament[2]] = gold_by_house.get(tournament[2], 0) + unpaid
+        self.db.gold_ledger.post(cur, [(ESCROW, house_id, gold, "tournament_prize")
+                                       for house_id, gold in gold_by_house.items()])
+        
+        cur.execute('''
+        UPDATE tournaments SET status = 'finished', start_time = COALESCE(start_time, CURRENT_TIMESTAMP),
+                               end_time = CURRENT_TIMESTAMP
+        WHERE id = ?
+        ''', (tournament_id,))
+        
+        by_id = {entrant[0]: entrant for entrant in entrants}
+        podium = sorted((position, by_id[pid][1], prizes.get(pid, 0))
+                        for pid, position in positions.items() if position <= 3)
+        return {
+            "tournament_id": tournament_id,
+            "name": tournament[1],
+            "participants": len(entrants),
+            "rounds": rounds,
+            "matches": matches,
+            "podium": podium,  # (position, user_id, prize)
+            "prize_pool": tournament[5],
+            "refunded": max(0, unpaid)
+        }
+
+    def _load_entrants(self, cur, tournament_id):
+        """(participant_id, user_id, match strength, alliance_id) for every entrant"""
+        cur.execute('''
+        SELECT tp.id, tp.user_id, tp.character_skill + tp.equipment_bonus, m.alliance_id
+        FROM tournament_participants tp
+        LEFT JOIN members m ON m.user_id = tp.user_id
+        WHERE tp.tournament_id = ?
+        ''', (tournament_id,))
+        return cur.fetchall()
+
+    def _play_bracket(self, entrants, rng=random):
+        """Single elimination in memory: returns ({participant_id: position}, matches, rounds).
+
+        Losers of a round share the position after everyone still standing
+        (final loser 2nd, semi-final losers 3rd, quarter-final losers 5th...).
+        """
+        positions = {}
+        current_round = list(entrants)
+        matches = 0
+        rounds = 0
+        while len(current_round) > 1:
+            rng.shuffle(current_round)
+            next_round = []
+            losers = []
+            for i in range(0, len(current_round) - 1, 2):
+                p1, p2 = current_round[i], current_round[i + 1]
+                winner = self._simulate_tournament_match(p1, p2, rng)
+                next_round.append(winner)
+                losers.append(p2 if winner is p1 else p1)
+            if len(current_round) % 2:
+                next_round.append(current_round[-1])  # Bye to next round
+            for loser in losers:
+                positions[loser[0]] = len(next_round) + 1
+            matches += len(losers)
+            rounds += 1
+            current_round = next_round
+        positions[current_round[0][0]] = 1
+        return positions, matches, rounds
+
+    def _prize_split(self, positions, total_prize):
+        """50% champion, 30% runner-up, 20% shared by the semi-finalists"""
+        shares = {1: 0.5, 2: 0.3, 3: 0.2}
+        by_position = {}
+        for participant_id, position in positions.items():
+            if position in shares:
+                by_position.setdefault(position, []).append(participant_id)
+        prizes = {}
+        for position, participant_ids in by_position.items():
+            prize = int(total_prize * shares[position]) // len(participant_ids)
+            for participant_id in participant_ids:
+                prizes[participant_id] = prize
+        return prizes
+
     def challenge_to_duel(self, challenger_id, challenged_id, duel_type, wager=0):
         """Challenge someone to a duel"""
         try:
@@ -252,29 +346,34 @@ class TournamentSystem:
             result = self._simulate_duel(duel[1], duel[2], duel[3])  # challenger_id, challenged_id, duel_type
             winner_id = result['winner_id']
             
-            # Update duel
-            self.db.c.execute('''
-            UPDATE duels SET status = "completed", winner_id = ?, fight_details = ?, completed_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-            ''', (winner_id, result['details'], duel_id))
-            
-            # Handle wager
-            if wager > 0:
-                challenger_alliance = self.db.get_user_alliance(duel[1])
-                challenged_alliance = self.db.get_user_alliance(duel[2])
+            # Duel result and wagers are committed together
+            with self.db.transaction(), self.db.write_cursor() as cur:
+                cur.execute('''
+                UPDATE duels SET status = "completed", winner_id = ?, fight_details = ?, completed_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status = "challenged"
+                ''', (winner_id, result['details'], duel_id))
+                if cur.rowcount == 0:
+                    raise TransactionRollback("Bu düello zaten sonuçlandı!")
                 
-                # Deduct wager from both
-                self.db.update_alliance_resources(challenger_alliance[0], -wager, 0)
-                self.db.update_alliance_resources(challenged_alliance[0], -wager, 0)
-                
-                # Give double to winner
-                winner_alliance = self.db.get_user_alliance(winner_id)
-                self.db.update_alliance_resources(winner_alliance[0], wager * 2, 0)
-            
-            self.db.conn.commit()
+                # Handle wager
+                if wager > 0:
+                    challenger_alliance = self.db.get_user_alliance(duel[1])
+                    challenged_alliance = self.db.get_user_alliance(duel[2])
+                    
+                    # Both wagers go into escrow, then the escrowed sum goes to the winner
+                    escrowed = (self.db.transfer_gold(challenger_alliance[0], ESCROW, wager, "duel_wager") +
+                                self.db.transfer_gold(challenged_alliance[0], ESCROW, wager, "duel_wager"))
+                    if escrowed < wager * 2:
+                        # A side could no longer cover the wager
+                        raise TransactionRollback(f"Yetersiz altın! Bahis: {format_number(wager)} altın")
+                    
+                    winner_alliance = self.db.get_user_alliance(winner_id)
+                    self.db.transfer_gold(ESCROW, winner_alliance[0], escrowed, "duel_winnings")
             
             return True, result
             
+        except TransactionRollback as e:
+            return False, str(e)
         except Exception as e:
             logger.error(f"Error accepting duel: {e}")
             return False, f"Düello kabul etme hatası: {str(e)}"
@@ -303,76 +402,28 @@ class TournamentSystem:
         
         return min(100, max(20, base_skill + random.randint(-10, 10)))
 
-    def _simulate_tournament_brackets(self, participants, tournament_type):
-        """Simulate tournament elimination brackets"""
-        results = []
-        current_round = list(participants)
-        round_num = 1
-        
-        while len(current_round) > 1:
-            next_round = []
-            round_matches = []
-            
-            # Pair participants
-            random.shuffle(current_round)
-            for i in range(0, len(current_round), 2):
-                if i + 1 < len(current_round):
-                    p1, p2 = current_round[i], current_round[i + 1]
-                    
-                    # Simulate match
-                    winner = self._simulate_tournament_match(p1, p2, tournament_type)
-                    loser = p2 if winner == p1 else p1
-                    
-                    # Update eliminated status
-                    self.db.c.execute('UPDATE tournament_participants SET eliminated = 1 WHERE id = ?', 
-                                    (loser[0],))
-                    
-                    next_round.append(winner)
-                    round_matches.append({
-                        'winner': winner,
-                        'loser': loser,
-                        'round': round_num
-                    })
-                else:
-                    # Bye to next round
-                    next_round.append(current_round[i])
-            
-            results.extend(round_matches)
-            current_round = next_round
-            round_num += 1
-        
-        # Set final positions
-        if current_round:
-            champion = current_round[0]
-            self.db.c.execute('UPDATE tournament_participants SET final_position = 1 WHERE id = ?', 
-                            (champion[0],))
-        
-        return results
-
-    def _simulate_tournament_match(self, p1, p2, tournament_type):
-        """Simulate a single tournament match"""
-        skill1 = p1[3] + p1[4]  # character_skill + equipment_bonus
-        skill2 = p2[3] + p2[4]
-        
-        # Add randomness
-        roll1 = skill1 + random.randint(1, 30)
-        roll2 = skill2 + random.randint(1, 30)
+    def _simulate_tournament_match(self, p1, p2, rng=random):
+        """Simulate a single tournament match between two ``_load_entrants`` rows"""
+        # Strength is character_skill + equipment_bonus, plus randomness
+        roll1 = p1[2] + rng.randint(1, MATCH_ROLL)
+        roll2 = p2[2] + rng.randint(1, MATCH_ROLL)
         
         return p1 if roll1 > roll2 else p2
 
     def _simulate_duel(self, challenger_id, challenged_id, duel_type):
         """Simulate a duel between two characters"""
-        # Get character data
-        challenger_data = self.db.get_user_member_data(challenger_id)
-        challenged_data = self.db.get_user_member_data(challenged_id)
+        # Get character data (one query for both)
+        members = self.db.get_members_data([challenger_id, challenged_id])
+        challenger_data = members.get(challenger_id)
+        challenged_data = members.get(challenged_id)
         
         # Calculate combat scores
         challenger_score = self._calculate_duel_score(challenger_data, duel_type)
         challenged_score = self._calculate_duel_score(challenged_data, duel_type)
         
         # Add randomness for excitement
-        challenger_roll = challenger_score + random.randint(1, 50)
-        challenged_roll = challenged_score + random.randint(1, 50)
+        challenger_roll = challenger_score + random.randint(1, DUEL_ROLL)
+        challenged_roll = challenged_score + random.randint(1, DUEL_ROLL)
         
         winner_id = challenger_id if challenger_roll > challenged_roll else challenged_id
         
@@ -411,9 +462,9 @@ class TournamentSystem:
         """Generate descriptive fight details"""
         margin = abs(score1 - score2)
         
-        if margin > 30:
+        if margin > DECISIVE_MARGIN:
             outcome = "ezici zafer"
-        elif margin > 15:
+        elif margin > CLEAR_MARGIN:
             outcome = "net zafer"
         else:
             outcome = "çekişmeli dövüş"
@@ -422,30 +473,6 @@ class TournamentSystem:
         
         return f"{duel_desc} - {outcome} ({score1} vs {score2})"
 
-    def _distribute_tournament_prizes(self, tournament_id, results, total_prize):
-        """Distribute tournament prize money"""
-        try:
-            # Prize distribution: 50% champion, 30% runner-up, 20% semi-finalists
-            champion_prize = int(total_prize * 0.5)
-            runner_up_prize = int(total_prize * 0.3)
-            semi_finalist_prize = int(total_prize * 0.1)
-            
-            # Find champion (last winner)
-            if results:
-                final_match = results[-1]
-                champion = final_match['winner']
-                
-                # Award champion
-                self.db.c.execute('UPDATE tournament_participants SET prize_won = ? WHERE id = ?', 
-                                (champion_prize, champion[0]))
-                
-                champion_alliance = self.db.get_user_alliance(champion[1])  # user_id
-                if champion_alliance:
-                    self.db.update_alliance_resources(champion_alliance[0], champion_prize, 0)
-            
-        except Exception as e:
-            logger.error(f"Error distributing prizes: {e}")
-
     def create_tournament_embed(self, tournament_data, participants=None):
         """Create Discord embed for tournament display"""
         if not tournament_data:
@@ -459,15 +486,15 @@ class TournamentSystem:
             discord.Color.gold()
         )
         
-        embed.add_field(name="💰 Katılım Ücreti", value=f"{format_number(tournament_data[5])} altın", inline=True)
-        embed.add_field(name="🏆 Ödül Havuzu", value=f"{format_number(tournament_data[6])} altın", inline=True)
-        embed.add_field(name="👥 Maksimum Katılımcı", value=str(tournament_data[10]), inline=True)
+        embed.add_field(name="💰 Katılım Ücreti", value=f"{format_number(tournament_data[4])} altın", inline=True)
+        embed.add_field(name="🏆 Ödül Havuzu", value=f"{format_number(tournament_data[5])} altın", inline=True)
+        embed.add_field(name="👥 Maksimum Katılımcı", value=str(tournament_data[9]), inline=True)
         
         if participants:
             participant_count = len(participants)
             embed.add_field(name="📊 Durum", 
-                          value=f"{participant_count}/{tournament_data[10]} katılımcı\n"
-                                f"Durum: {tournament_data[7].title()}", 
+                          value=f"{participant_count}/{tournament_data[9]} katılımcı\n"
+                                f"Durum: {tournament_data[6].title()}", 
                           inline=False)
         
         embed.set_footer(text=f"Turnuva ID: {tournament_data[0]} | !turnuva_katıl {tournament_data[0]} ile katıl")
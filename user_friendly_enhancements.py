@@ -10,35 +10,6 @@ logger = logging.getLogger(__name__)
 class UserFriendlySystem:
     def __init__(self, db):
         self.db = db
-        self.setup_database()
-
-    def setup_database(self):
-        """Setup user progress tracking tables"""
-        try:
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS user_progress (
-                user_id INTEGER PRIMARY KEY,
-                tutorial_step INTEGER DEFAULT 0,
-                first_join_date TEXT,
-                last_help_time TEXT,
-                commands_used INTEGER DEFAULT 0,
-                difficulty_level TEXT DEFAULT 'beginner'
-            )
-            ''')
-
-            self.db.c.execute('''
-            CREATE TABLE IF NOT EXISTS quick_actions (
-                user_id INTEGER,
-                action_name TEXT,
-                last_used TEXT,
-                usage_count INTEGER DEFAULT 0
-            )
-            ''')
-
-            self.db.conn.commit()
-            logger.info("User friendly system tables created successfully")
-        except Exception as e:
-            logger.error(f"Error creating user friendly tables: {e}")
 
     def setup_user_friendly_commands(self, bot):
         """Setup all user friendly commands"""
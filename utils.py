@@ -149,6 +149,16 @@ def create_progress_bar(current, maximum, length=10):
     percentage = int((current / maximum) * 100)
     return f"{bar} {percentage}%"
 
+def create_sparkline(values):
+    """One block character per value, scaled between the min and max"""
+    blocks = "▁▂▃▄▅▆▇█"
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high == low:
+        return blocks[3] * len(values)
+    return "".join(blocks[int((value - low) / (high - low) * (len(blocks) - 1))] for value in values)
+
 def time_until_next_hour():
     """Get minutes until next hour for debt calculations"""
     now = datetime.now()
@@ -174,47 +184,48 @@ def format_time_duration(seconds):
 
     return " ".join(parts) if parts else "0s"
 
+# Battle flavor texts by battle result (battle_archive.py stores the index)
+BATTLE_FLAVOR_TEXTS = {
+    "attacker_major": [
+        "Düşman hatları çöktü!",
+        "Zafer yakındır!",
+        "Düşman ordusunda panik var!",
+        "Kahramanca ilerleme!",
+        "Saldırı başarılı!"
+    ],
+    "attacker_minor": [
+        "İlerleyiş devam ediyor.",
+        "Küçük bir avantaj elde edildi.",
+        "Düşman geri çekiliyor.",
+        "Pozisyon kazanıldı.",
+        "Yavaş ama kararlı ilerleme."
+    ],
+    "defender_major": [
+        "Kahramanca savunma!",
+        "Düşman püskürtüldü!",
+        "Kale sağlam duruyor!",
+        "Savunma hatları korunuyor!",
+        "Başarılı karşı saldırı!"
+    ],
+    "defender_minor": [
+        "Savunma hatları tutuyor.",
+        "Düşman saldırısı karşılandı.",
+        "Pozisyonlar korunuyor.",
+        "Direniş devam ediyor.",
+        "Savunma başarılı."
+    ],
+    "draw": [
+        "Çetin bir çarpışma!",
+        "Her iki taraf da direniyor.",
+        "Savaş dengelerde.",
+        "Kimse üstünlük sağlayamıyor.",
+        "Dengeli mücadele."
+    ]
+}
+
 def get_random_battle_flavor_text(result_type):
     """Get random flavor text for battle results"""
-    texts = {
-        "attacker_major": [
-            "Düşman hatları çöktü!",
-            "Zafer yakındır!",
-            "Düşman ordusunda panik var!",
-            "Kahramanca ilerleme!",
-            "Saldırı başarılı!"
-        ],
-        "attacker_minor": [
-            "İlerleyiş devam ediyor.",
-            "Küçük bir avantaj elde edildi.",
-            "Düşman geri çekiliyor.",
-            "Pozisyon kazanıldı.",
-            "Yavaş ama kararlı ilerleme."
-        ],
-        "defender_major": [
-            "Kahramanca savunma!",
-            "Düşman püskürtüldü!",
-            "Kale sağlam duruyor!",
-            "Savunma hatları korunuyor!",
-            "Başarılı karşı saldırı!"
-        ],
-        "defender_minor": [
-            "Savunma hatları tutuyor.",
-            "Düşman saldırısı karşılandı.",
-            "Pozisyonlar korunuyor.",
-            "Direniş devam ediyor.",
-            "Savunma başarılı."
-        ],
-        "draw": [
-            "Çetin bir çarpışma!",
-            "Her iki taraf da direniyor.",
-            "Savaş dengelerde.",
-            "Kimse üstünlük sağlayamıyor.",
-            "Dengeli mücadele."
-        ]
-    }
-
-    return random.choice(texts.get(result_type, ["Savaş devam ediyor."]))
+    return random.choice(BATTLE_FLAVOR_TEXTS.get(result_type, ["Savaş devam ediyor."]))
 
 def get_random_weather():
     """Get random weather condition"""
@@ -0,0 +1,176 @@
+"""
+Monte Carlo war forecaster.
+
+Simulates thousands of full wars at once as NumPy arrays using the same
+combat kernel (combat_kernel.py) as ``WarSystem.execute_battle_turn``. Run
+this module directly to benchmark it against the scalar path.
+"""
+import time
+import random
+import logging
+import numpy as np
+from config import MAX_WAR_TURNS, WAR_FORECAST_SIMULATIONS
+from combat_kernel import CASUALTY_BAND_EDGES, MAX_CASUALTY_DIVISOR
+
+logger = logging.getLogger(__name__)
+
+RANDOM_ACTION = "rastgele"  # Pick a uniformly random action every turn
+
+# Outcome codes
+ONGOING, ATTACKER_WINS, DEFENDER_WINS, DRAW = 0, 1, 2, 3
+
+def _side_multipliers(kernel, alliance, action, weather, terrain, is_attacker, battle_size):
+    """Per-action multiplier array for one side (all actions when random)"""
+    if action == RANDOM_ACTION:
+        return np.array(kernel.action_multipliers(alliance[1], weather, terrain, is_attacker, battle_size))
+    return np.array([kernel.multiplier(alliance[1], action, weather, terrain, is_attacker, battle_size)])
+
+def forecast_war(war_system, attacker, defender, attacker_losses=0, defender_losses=0,
+                 weather="normal", terrain="ova", turns_played=0,
+                 attacker_action="saldır", defender_action="savun", battle_size="orta",
+                 simulations=WAR_FORECAST_SIMULATIONS, seed=None):
+    """Simulate the rest of a war ``simulations`` times.
+
+    ``attacker``/``defender`` are alliance rows. Returns win/draw probabilities,
+    expected further casualties and expected remaining turns.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n = simulations
+
+    kernel = war_system.kernel
+    att_total, def_total = attacker[4], defender[4]
+    ratio = kernel.ratio(battle_size)
+    att_mults = _side_multipliers(kernel, attacker, attacker_action, weather, terrain, True, battle_size)
+    def_mults = _side_multipliers(kernel, defender, defender_action, weather, terrain, False, battle_size)
+
+    att = np.full(n, max(0, att_total - attacker_losses), dtype=np.int64)
+    dfd = np.full(n, max(0, def_total - defender_losses), dtype=np.int64)
+    att_start, def_start = att.copy(), dfd.copy()
+    outcome = np.full(n, ONGOING, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int64)
+
+    # Casualty rates per power-ratio band, straight from the kernel
+    att_rates = np.array(kernel.attacker_casualty_rates)
+    def_rates = np.array(kernel.defender_casualty_rates)
+    band_edges = np.array(CASUALTY_BAND_EDGES)
+
+    for turn_number in range(turns_played + 1, max(turns_played + 1, MAX_WAR_TURNS) + 1):
+        active = outcome == ONGOING
+        if not active.any():
+            break
+
+        # Start-of-turn check: a side with no soldiers has already lost
+        outcome[active & (att <= 0)] = DEFENDER_WINS
+        outcome[active & (att > 0) & (dfd <= 0)] = ATTACKER_WINS
+        active = outcome == ONGOING
+        if not active.any():
+            break
+        turns[active] = turn_number - turns_played
+
+        att_mult = att_mults[rng.integers(len(att_mults), size=n)] if len(att_mults) > 1 else att_mults[0]
+        def_mult = def_mults[rng.integers(len(def_mults), size=n)] if len(def_mults) > 1 else def_mults[0]
+        att_power = np.floor(np.floor(att * ratio) * att_mult) * rng.uniform(0.8, 1.2, n)
+        def_power = np.floor(np.floor(dfd * ratio) * def_mult) * rng.uniform(0.8, 1.2, n)
+
+        band = np.searchsorted(band_edges, att_power / np.maximum(def_power, 1), side="left")
+        att_cas = np.floor(att * att_rates[band] * rng.uniform(0.5, 1.5, n)).astype(np.int64)
+        def_cas = np.floor(dfd * def_rates[band] * rng.uniform(0.5, 1.5, n)).astype(np.int64)
+        att_cas = np.clip(att_cas, 0, att // MAX_CASUALTY_DIVISOR)
+        def_cas = np.clip(def_cas, 0, dfd // MAX_CASUALTY_DIVISOR)
+
+        att = np.where(active, att - att_cas, att)
+        dfd = np.where(active, dfd - def_cas, dfd)
+
+        defender_won = active & (att <= att_total * 0.1)
+        attacker_won = active & ~defender_won & (dfd <= def_total * 0.1)
+        outcome[defender_won] = DEFENDER_WINS
+        outcome[attacker_won] = ATTACKER_WINS
+        if turn_number >= MAX_WAR_TURNS:
+            outcome[outcome == ONGOING] = DRAW
+
+    return {
+        "simulations": n,
+        "attacker_win": float(np.mean(outcome == ATTACKER_WINS)),
+        "defender_win": float(np.mean(outcome == DEFENDER_WINS)),
+        "draw": float(np.mean(outcome == DRAW)),
+        "expected_attacker_casualties": float(np.mean(att_start - att)),
+        "expected_defender_casualties": float(np.mean(def_start - dfd)),
+        "expected_turns": float(np.mean(turns)),
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+def simulate_war_scalar(war_system, attacker, defender, attacker_losses=0, defender_losses=0,
+                        weather="normal", terrain="ova", turns_played=0,
+                        attacker_action="saldır", defender_action="savun", battle_size="orta",
+                        simulations=WAR_FORECAST_SIMULATIONS, seed=None):
+    """Reference implementation: one ``CombatKernel.resolve_turn`` call per turn per war"""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    kernel = war_system.kernel
+    actions = kernel.actions
+    counts = {ATTACKER_WINS: 0, DEFENDER_WINS: 0, DRAW: 0}
+    att_cas_total = def_cas_total = 0
+
+    for _ in range(simulations):
+        att = max(0, attacker[4] - attacker_losses)
+        dfd = max(0, defender[4] - defender_losses)
+        att_begin, def_begin = att, dfd
+        result = DRAW
+        for turn_number in range(turns_played + 1, max(turns_played + 1, MAX_WAR_TURNS) + 1):
+            if att <= 0:
+                result = DEFENDER_WINS
+                break
+            if dfd <= 0:
+                result = ATTACKER_WINS
+                break
+            att_name = rng.choice(actions) if attacker_action == RANDOM_ACTION else attacker_action
+            def_name = rng.choice(actions) if defender_action == RANDOM_ACTION else defender_action
+            att_power = kernel.power(attacker[1], att, att_name, weather, terrain, True, battle_size)
+            def_power = kernel.power(defender[1], dfd, def_name, weather, terrain, False, battle_size)
+            _, _, att_cas, def_cas = kernel.resolve_turn(att, dfd, att_power, def_power, rng)
+            att -= att_cas
+            dfd -= def_cas
+            if att <= attacker[4] * 0.1:
+                result = DEFENDER_WINS
+                break
+            if dfd <= defender[4] * 0.1:
+                result = ATTACKER_WINS
+                break
+        counts[result] += 1
+        att_cas_total += att_begin - att
+        def_cas_total += def_begin - dfd
+
+    return {
+        "simulations": simulations,
+        "attacker_win": counts[ATTACKER_WINS] / simulations,
+        "defender_win": counts[DEFENDER_WINS] / simulations,
+        "draw": counts[DRAW] / simulations,
+        "expected_attacker_casualties": att_cas_total / simulations,
+        "expected_defender_casualties": def_cas_total / simulations,
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+def benchmark(simulations=WAR_FORECAST_SIMULATIONS):
+    """Compare the vectorized forecaster with the scalar path on a sample war"""
+    from war_system import WarSystem
+
+    war_system = WarSystem(None)
+    # (id, name, leader_id, gold, soldiers) is all the combat model reads
+    attacker = (1, "Stark", None, 120000, 45000)
+    defender = (2, "Lannister", None, 2000000, 60000)
+    kwargs = dict(weather="kar", terrain="orman", attacker_action=RANDOM_ACTION,
+                  defender_action=RANDOM_ACTION, simulations=simulations, seed=7)
+
+    vectorized = forecast_war(war_system, attacker, defender, **kwargs)
+    scalar = simulate_war_scalar(war_system, attacker, defender, **kwargs)
+
+    for label, result in (("numpy", vectorized), ("scalar", scalar)):
+        print(f"{label:>6}: {result['elapsed_ms']:8.1f} ms  "
+              f"att {result['attacker_win']:.3f}  def {result['defender_win']:.3f}  draw {result['draw']:.3f}  "
+              f"cas {result['expected_attacker_casualties']:.0f}/{result['expected_defender_casualties']:.0f}")
+    print(f"speedup: {scalar['elapsed_ms'] / max(vectorized['elapsed_ms'], 1e-9):.1f}x for {simulations} wars")
+    return vectorized, scalar
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,117 @@
+import logging
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+WarEntry = Tuple[int, int, int]  # (war_id, attacker_id, defender_id)
+
+class WarRegistry:
+    """Active wars indexed by unordered house pair and by house id.
+
+    Loaded once from the database; ``Database.create_war``/``end_war`` keep it
+    in sync. A rolled back transaction calls ``invalidate`` and the next lookup
+    reloads through ``loader``.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[WarEntry]]):
+        self._loader = loader
+        self._wars: Dict[int, WarEntry] = {}
+        self._by_pair: Dict[FrozenSet[int], int] = {}
+        self._by_house: Dict[int, Set[int]] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # ===============================
+    # LOOKUPS
+    # ===============================
+
+    def war_between(self, house_a: int, house_b: int) -> Optional[int]:
+        """Id of the active war between two houses (either side attacking), or None"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_pair.get(frozenset((house_a, house_b)))
+
+    def wars_for(self, house_id: int) -> List[int]:
+        """Ids of the active wars a house is in, oldest first"""
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._by_house.get(house_id, ()))
+
+    def war_ids(self) -> List[int]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._wars)
+
+    def get(self, war_id: int) -> Optional[WarEntry]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._wars.get(war_id)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._wars)
+
+    # ===============================
+    # MAINTENANCE
+    # ===============================
+
+    def load(self, entries: Optional[Iterable[WarEntry]] = None):
+        """(Re)build the indexes, from ``entries`` or the loader"""
+        with self._lock:
+            if entries is None:
+                entries = self._loader()
+            self._wars.clear()
+            self._by_pair.clear()
+            self._by_house.clear()
+            self._loaded = True
+            for war_id, attacker_id, defender_id in entries:
+                self._index(war_id, attacker_id, defender_id)
+
+    def add(self, war_id: int, attacker_id: int, defender_id: int):
+        with self._lock:
+            if self._loaded:
+                self._index(war_id, attacker_id, defender_id)
+
+    def remove(self, war_id: int):
+        with self._lock:
+            entry = self._wars.pop(war_id, None)
+            if entry is None:
+                return
+            _, attacker_id, defender_id = entry
+            pair = frozenset((attacker_id, defender_id))
+            for house_id in (attacker_id, defender_id):
+                wars = self._by_house.get(house_id)
+                if wars is not None:
+                    wars.discard(war_id)
+                    if not wars:
+                        del self._by_house[house_id]
+            if self._by_pair.get(pair) == war_id:
+                del self._by_pair[pair]
+                # Legacy data may hold a second war for the same pair
+                for other_id in self._by_house.get(attacker_id, ()):
+                    if frozenset(self._wars[other_id][1:]) == pair:
+                        self._by_pair[pair] = other_id
+                        break
+
+    def invalidate(self):
+        """Drop everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._loaded = False
+            self._wars.clear()
+            self._by_pair.clear()
+            self._by_house.clear()
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _index(self, war_id, attacker_id, defender_id):
+        self._wars[war_id] = (war_id, attacker_id, defender_id)
+        pair = frozenset((attacker_id, defender_id))
+        if pair in self._by_pair and self._by_pair[pair] != war_id:
+            logger.warning(f"Houses {attacker_id} and {defender_id} have more than one active war")
+        self._by_pair.setdefault(pair, war_id)
+        self._by_house.setdefault(attacker_id, set()).add(war_id)
+        self._by_house.setdefault(defender_id, set()).add(war_id)
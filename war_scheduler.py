@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from config import (WAR_IDLE_MINUTES, WAR_AUTO_RESOLVE_BATCH, WAR_REPORT_CHANNEL_ID,
+                    WAR_REPORT_SEND_INTERVAL_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+class WarScheduler:
+    """Auto-resolves idle wars and posts their results through a rate-limited queue.
+
+    ``sweep`` is called from a background loop; it plays every war that has
+    had no turn for ``WAR_IDLE_MINUTES`` to the end with default actions, one
+    write transaction per war. Result embeds are queued and sent one at a time
+    to ``WAR_REPORT_CHANNEL_ID`` so a large sweep can't trip Discord rate limits.
+    """
+
+    MAX_QUEUED_REPORTS = 200
+
+    def __init__(self, bot, database, war_system, idle_minutes=WAR_IDLE_MINUTES,
+                 batch_size=WAR_AUTO_RESOLVE_BATCH, channel_id=WAR_REPORT_CHANNEL_ID,
+                 send_interval=WAR_REPORT_SEND_INTERVAL_SECONDS):
+        self.bot = bot
+        self.db = database
+        self.war_system = war_system
+        self.idle_minutes = idle_minutes
+        self.batch_size = batch_size
+        self.channel_id = channel_id
+        self.send_interval = send_interval
+        self.resolved_total = 0
+        self._reports = asyncio.Queue(maxsize=self.MAX_QUEUED_REPORTS)
+        self._sender_task = None
+
+    # ===============================
+    # SWEEP
+    # ===============================
+
+    async def sweep(self):
+        """Resolve one batch of idle wars, returning their final battle reports"""
+        war_ids = await self.db.aio.run_read(
+            self.war_system.find_idle_wars, self.idle_minutes, self.batch_size)
+        reports = []
+        for war_id in war_ids:
+            # One war per writer job so the sweep never holds the writer for long
+            report = await self.db.aio.run_write(
+                self.war_system.auto_resolve_idle_war, war_id, self.idle_minutes)
+            if report:
+                reports.append(report)
+        if not reports:
+            return reports
+
+        self.resolved_total += len(reports)
+        turns = sum(report["turns_resolved"] for report in reports)
+        logger.info(f"Auto-resolved {len(reports)} idle wars ({turns} turns)")
+
+        if self.channel_id:
+            for report in reports:
+                try:
+                    self._reports.put_nowait(report)
+                except asyncio.QueueFull:
+                    logger.warning(f"War report queue full, dropping report for war #{report['war_id']}")
+        return reports
+
+    # ===============================
+    # REPORT QUEUE
+    # ===============================
+
+    def start(self):
+        """Start the report sender (call from a running loop)"""
+        if self.channel_id and (self._sender_task is None or self._sender_task.done()):
+            self._sender_task = asyncio.create_task(self._send_reports())
+
+    def stop(self):
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+
+    @property
+    def pending_reports(self):
+        return self._reports.qsize()
+
+    async def _send_reports(self):
+        await self.bot.wait_until_ready()
+        while True:
+            report = await self._reports.get()
+            try:
+                channel = self.bot.get_channel(self.channel_id)
+                if channel is None:
+                    logger.warning(f"War report channel {self.channel_id} not found")
+                else:
+                    embed = self.war_system.create_battle_embed(report)
+                    embed.add_field(name="⏱️ Otomatik Sonuç",
+                                    value=f"{self.idle_minutes} dakika hareketsiz kalan savaş "
+                                          f"{report['turns_resolved']} turda sonuçlandırıldı.",
+                                    inline=False)
+                    await channel.send(embed=embed)
+            except Exception as e:
+                logger.error(f"War report send error: {e}")
+            await asyncio.sleep(self.send_interval)
@@ -3,10 +3,22 @@ import asyncio
 import discord
 import logging
 from datetime import datetime, timedelta
+from config import MAX_WAR_TURNS, WAR_IDLE_MINUTES, WAR_AUTO_RESOLVE_BATCH
+from combat_kernel import CombatKernel
+from database import TransactionRollback
 from utils import create_embed, format_number, get_house_emoji, get_weather_emoji, get_terrain_emoji, get_random_battle_flavor_text
 
 logger = logging.getLogger(__name__)
 
+# Headline of each battle result (first line of a battle log's result text)
+BATTLE_RESULT_TEXTS = {
+    "attacker_major": "Saldıran taraf büyük zafer kazandı!",
+    "attacker_minor": "Saldıran taraf zafer kazandı!",
+    "defender_major": "Savunan taraf büyük zafer kazandı!",
+    "defender_minor": "Savunan taraf zafer kazandı!",
+    "draw": "Berabere! Her iki taraf da kayıp verdi."
+}
+
 class WarSystem:
     def __init__(self, database):
         self.db = database
@@ -37,6 +49,9 @@ class WarSystem:
             "sahil": {"attack_mod": 1.0, "defense_mod": 1.0, "description": "Sahil arazi"},
             "çöl": {"attack_mod": 0.9, "defense_mod": 0.8, "description": "Çöl arazi"}
         }
+        
+        # Precomputed multiplier table shared by turns, auto-resolve and forecasts
+        self.kernel = CombatKernel(self.battle_actions, self.weather_effects, self.terrain_effects)
 
     def can_declare_war(self, attacker_id, defender_id, battle_size="orta"):
         """Check if war can be declared"""
@@ -46,11 +61,8 @@ class WarSystem:
                 return False, "Kendi hanene savaş ilan edemezsin!"
             
             # Check if already at war
-            existing_wars = self.db.get_active_wars()
-            for war in existing_wars:
-                if ((war[1] == attacker_id and war[2] == defender_id) or 
-                    (war[1] == defender_id and war[2] == attacker_id)):
-                    return False, "Bu hanelerle zaten aktif bir savaş var!"
+            if self.db.war_registry.war_between(attacker_id, defender_id) is not None:
+                return False, "Bu hanelerle zaten aktif bir savaş var!"
             
             # Check if attacker has enough soldiers
             attacker = self.db.get_alliance_by_id(attacker_id)
@@ -86,6 +98,31 @@ class WarSystem:
             logger.error(f"Error checking war declaration: {e}")
             return False, "Savaş kontrolü sırasında hata oluştu!"
 
+    def get_active_wars(self, alliance_id=None):
+        """Active war rows (optionally for one house), ids from the war registry"""
+        registry = self.db.war_registry
+        war_ids = registry.wars_for(alliance_id) if alliance_id else registry.war_ids()
+        if not war_ids:
+            return []
+        try:
+            with self.db.read_cursor() as cur:
+                placeholders = ",".join("?" * len(war_ids))
+                cur.execute(f"SELECT * FROM wars WHERE id IN ({placeholders}) ORDER BY id", war_ids)
+                return cur.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting active wars: {e}")
+            return []
+
+    def get_war_by_id(self, war_id):
+        """Get a war row by id"""
+        try:
+            with self.db.read_cursor() as cur:
+                cur.execute('SELECT * FROM wars WHERE id = ?', (war_id,))
+                return cur.fetchone()
+        except Exception as e:
+            logger.error(f"Error getting war: {e}")
+            return None
+
     async def execute_battle_turn(self, war_id, attacker_action, defender_action):
         """Execute a battle turn between two armies"""
         try:
@@ -103,194 +140,156 @@ class WarSystem:
             if not attacker or not defender:
                 return None, "Hane verileri alınamadı!"
             
-            # Get current turn number
-            self.db.c.execute('SELECT COUNT(*) FROM battle_logs WHERE war_id = ?', (war_id,))
-            turn_number = self.db.c.fetchone()[0] + 1
-            
-            # Calculate battle effects
-            weather_effect = self.weather_effects.get(war[8], self.weather_effects["normal"])
-            terrain_effect = self.terrain_effects.get(war[9], self.terrain_effects["ova"])
-            
-            # Get action effects
-            att_action_effect = self.battle_actions.get(attacker_action, self.battle_actions["saldır"])
-            def_action_effect = self.battle_actions.get(defender_action, self.battle_actions["savun"])
-            
-            # Calculate remaining soldiers
-            att_soldiers = max(0, attacker[4] - war[4])  # Total soldiers - losses
-            def_soldiers = max(0, defender[4] - war[5])
-            
-            # Check if war should end due to no soldiers
-            if att_soldiers <= 0:
-                await self._end_war_no_soldiers(war_id, defender[0], attacker, defender)
-                return self._create_war_end_report(war_id, turn_number, attacker, defender, defender[0], "Saldıran tarafın askeri kalmadı!"), None
-            
-            if def_soldiers <= 0:
-                await self._end_war_no_soldiers(war_id, attacker[0], attacker, defender)
-                return self._create_war_end_report(war_id, turn_number, attacker, defender, attacker[0], "Savunan tarafın askeri kalmadı!"), None
-            
-            # Apply house special abilities and calculate combat power
-            att_power = self._calculate_combat_power(attacker, att_soldiers, att_action_effect, weather_effect, terrain_effect, True)
-            def_power = self._calculate_combat_power(defender, def_soldiers, def_action_effect, weather_effect, terrain_effect, False)
-            
-            # Add randomness to combat
-            att_power *= random.uniform(0.8, 1.2)
-            def_power *= random.uniform(0.8, 1.2)
-            
-            # Determine casualties based on combat power difference
-            power_ratio = att_power / max(def_power, 1)
-            
-            # Calculate casualties
-            base_casualty_rate = 0.05  # 5% base casualty rate
-            if power_ratio > 1.5:
-                att_casualty_rate = base_casualty_rate * 0.5
-                def_casualty_rate = base_casualty_rate * 1.5
-            elif power_ratio > 1.2:
-                att_casualty_rate = base_casualty_rate * 0.7
-                def_casualty_rate = base_casualty_rate * 1.3
-            elif power_ratio > 0.8:
-                att_casualty_rate = base_casualty_rate
-                def_casualty_rate = base_casualty_rate
-            elif power_ratio > 0.5:
-                att_casualty_rate = base_casualty_rate * 1.3
-                def_casualty_rate = base_casualty_rate * 0.7
-            else:
-                att_casualty_rate = base_casualty_rate * 1.5
-                def_casualty_rate = base_casualty_rate * 0.5
-            
-            att_casualties = int(att_soldiers * att_casualty_rate * random.uniform(0.5, 1.5))
-            def_casualties = int(def_soldiers * def_casualty_rate * random.uniform(0.5, 1.5))
-            
-            # Ensure realistic casualty limits
-            att_casualties = max(0, min(att_casualties, att_soldiers // 5))  # Max 20% per turn
-            def_casualties = max(0, min(def_casualties, def_soldiers // 5))
-            
-            # Update war losses
-            new_att_losses = war[4] + att_casualties
-            new_def_losses = war[5] + def_casualties
-            
-            self.db.c.execute('''
-            UPDATE wars SET attacker_losses = ?, defender_losses = ?
-            WHERE id = ?
-            ''', (new_att_losses, new_def_losses, war_id))
-            
-            # Determine battle result
-            battle_result = self._determine_battle_result(att_power, def_power)
-            result_text = self._get_battle_result_text(battle_result)
-            
-            # Add flavor text
-            flavor_text = get_random_battle_flavor_text(battle_result)
-            result = f"{result_text}\n*{flavor_text}*"
-            
-            # Add battle log
-            self.db.add_battle_log(war_id, turn_number, attacker_action, defender_action, 
-                                  result, att_casualties, def_casualties)
-            
-            # Check for war end conditions
-            remaining_att = att_soldiers - att_casualties
-            remaining_def = def_soldiers - def_casualties
-            
-            winner = None
-            end_reason = ""
-            
-            # Check victory conditions
-            if remaining_att <= attacker[4] * 0.1:  # Less than 10% soldiers left
-                winner = defender[0]
-                end_reason = f"🏆 **{defender[1]}** hanesi savaşı kazandı! Düşman ordusunu yok etti!"
-            elif remaining_def <= defender[4] * 0.1:
-                winner = attacker[0]
-                end_reason = f"🏆 **{attacker[1]}** hanesi savaşı kazandı! Düşman ordusunu yok etti!"
-            elif turn_number >= 50:  # Max 50 turns
-                winner = -1  # Draw
-                end_reason = "⏱️ Savaş çok uzun sürdü ve berabere bitti!"
-            
-            if winner is not None:
-                self.db.end_war(war_id, winner if winner != -1 else None)
-                await self._apply_war_consequences(war_id, attacker, defender, winner)
-                result += f"\n\n{end_reason}"
-            
-            self.db.conn.commit()
-            
-            # Create battle report
-            battle_report = {
-                "war_id": war_id,
-                "turn": turn_number,
-                "attacker": attacker[1],
-                "defender": defender[1],
-                "attacker_action": attacker_action,
-                "defender_action": defender_action,
-                "attacker_casualties": att_casualties,
-                "defender_casualties": def_casualties,
-                "attacker_remaining": remaining_att,
-                "defender_remaining": remaining_def,
-                "result": result,
-                "battle_result": battle_result,
-                "war_ended": winner is not None,
-                "winner": winner,
-                "weather": war[8],
-                "terrain": war[9]
-            }
+            # Counters, battle log and war end are committed together on the writer thread
+            battle_report = await self.db.aio.run_transaction(
+                self._play_turn, war, attacker, defender, attacker_action, defender_action)
             
             return battle_report, None
             
+        except TransactionRollback:
+            return None, "Bu tur zaten işlendi, savaş durumunu kontrol et!"
         except Exception as e:
             logger.error(f"Error executing battle turn: {e}")
             return None, f"Savaş turu işlenirken hata oluştu: {str(e)}"
 
-    def _calculate_combat_power(self, alliance, soldiers, action_effect, weather_effect, terrain_effect, is_attacker, battle_size="orta"):
-        """Calculate combat power for an alliance"""
-        # Battle size modifiers
-        size_modifiers = {
-            "küçük": {"soldiers_ratio": 0.3, "intensity": 0.8},
-            "orta": {"soldiers_ratio": 0.6, "intensity": 1.0},
-            "büyük": {"soldiers_ratio": 0.8, "intensity": 1.2},
-            "topyekün": {"soldiers_ratio": 1.0, "intensity": 1.5}
-        }
+    def _play_turn(self, war, attacker, defender, attacker_action, defender_action):
+        """Resolve and record one turn of ``war``; call inside ``db.transaction()``.
+
+        Raises TransactionRollback if the turn was already played.
+        """
+        war_id = war[0]
+        turn_number = (war[12] or 0) + 1  # current_turn
         
-        size_info = size_modifiers.get(battle_size, size_modifiers["orta"])
-        effective_soldiers = int(soldiers * size_info["soldiers_ratio"])
-        base_power = effective_soldiers * 10 * size_info["intensity"]
+        # Calculate remaining soldiers
+        att_soldiers = max(0, attacker[4] - war[4])  # Total soldiers - losses
+        def_soldiers = max(0, defender[4] - war[5])
         
-        # Apply action modifiers
-        if is_attacker:
-            base_power *= action_effect["damage_multiplier"]
-        else:
-            base_power *= action_effect["defense_multiplier"]
+        # Check if war should end due to no soldiers
+        if att_soldiers <= 0:
+            self._end_war_no_soldiers(war_id, defender[0], attacker, defender)
+            return self._create_war_end_report(war_id, turn_number, attacker, defender, defender[0], "Saldıran tarafın askeri kalmadı!")
         
-        # Apply weather effects
-        if is_attacker:
-            base_power *= weather_effect["attack_mod"]
-        else:
-            base_power *= weather_effect["defense_mod"]
+        if def_soldiers <= 0:
+            self._end_war_no_soldiers(war_id, attacker[0], attacker, defender)
+            return self._create_war_end_report(war_id, turn_number, attacker, defender, attacker[0], "Savunan tarafın askeri kalmadı!")
         
-        # Apply terrain effects
-        if is_attacker:
-            base_power *= terrain_effect["attack_mod"]
-        else:
-            base_power *= terrain_effect["defense_mod"]
-        
-        # Apply house special abilities
-        house_name = alliance[1]
-        if house_name == "Stark":
-            if not is_attacker:  # Defensive bonus
-                base_power *= 1.25
-            # Winter/cold weather bonus
-            if weather_effect.get("description", "").find("kar") != -1:
-                base_power *= 1.15
-        elif house_name == "Lannister":  # Gold advantage
-            base_power *= 1.15
-        elif house_name == "Targaryen":  # Dragon heritage
-            base_power *= 1.2
-            # Fire advantage (bonus against certain houses)
-        elif house_name == "Baratheon" and is_attacker:  # Fury in attack
-            base_power *= 1.3
-        elif house_name == "Tyrell":  # Numbers advantage
-            base_power *= 1.2
-        elif house_name == "Martell":  # Desert/guerrilla tactics
-            base_power *= 1.1
-            if terrain_effect.get("description", "").find("çöl") != -1:
-                base_power *= 1.2
-        
-        return int(base_power)
+        # Apply house special abilities and calculate combat power
+        battle_size = war[11] or "orta"
+        att_power = self._calculate_combat_power(attacker, att_soldiers, attacker_action, war[8], war[9], True, battle_size)
+        def_power = self._calculate_combat_power(defender, def_soldiers, defender_action, war[8], war[9], False, battle_size)
+        
+        att_power, def_power, att_casualties, def_casualties = self.kernel.resolve_turn(
+            att_soldiers, def_soldiers, att_power, def_power)
+        
+        # Update war losses
+        new_att_losses = war[4] + att_casualties
+        new_def_losses = war[5] + def_casualties
+        
+        # Determine battle result
+        battle_result = self._determine_battle_result(att_power, def_power)
+        result_text = self._get_battle_result_text(battle_result)
+        
+        # Add flavor text
+        flavor_text = get_random_battle_flavor_text(battle_result)
+        result = f"{result_text}\n*{flavor_text}*"
+        
+        # Check for war end conditions
+        remaining_att = att_soldiers - att_casualties
+        remaining_def = def_soldiers - def_casualties
+        
+        winner = None
+        end_reason = ""
+        
+        # Check victory conditions
+        if remaining_att <= attacker[4] * 0.1:  # Less than 10% soldiers left
+            winner = defender[0]
+            end_reason = f"🏆 **{defender[1]}** hanesi savaşı kazandı! Düşman ordusunu yok etti!"
+        elif remaining_def <= defender[4] * 0.1:
+            winner = attacker[0]
+            end_reason = f"🏆 **{attacker[1]}** hanesi savaşı kazandı! Düşman ordusunu yok etti!"
+        elif turn_number >= MAX_WAR_TURNS:
+            winner = -1  # Draw
+            end_reason = "⏱️ Savaş çok uzun sürdü ve berabere bitti!"
+        
+        if not self.db.advance_war_turn(war_id, turn_number, new_att_losses, new_def_losses,
+                                        remaining_att, remaining_def):
+            raise TransactionRollback()
+        
+        # Add battle log
+        self.db.add_battle_log(war_id, turn_number, attacker_action, defender_action, 
+                              result, att_casualties, def_casualties)
+        
+        if winner is not None:
+            self.db.end_war(war_id, winner if winner != -1 else None)
+            self._apply_war_consequences(war_id, attacker, defender, winner)
+            result += f"\n\n{end_reason}"
+        
+        # Create battle report
+        return {
+            "war_id": war_id,
+            "turn": turn_number,
+            "attacker": attacker[1],
+            "defender": defender[1],
+            "attacker_action": attacker_action,
+            "defender_action": defender_action,
+            "attacker_casualties": att_casualties,
+            "defender_casualties": def_casualties,
+            "attacker_remaining": remaining_att,
+            "defender_remaining": remaining_def,
+            "result": result,
+            "battle_result": battle_result,
+            "war_ended": winner is not None,
+            "winner": winner,
+            "weather": war[8],
+            "terrain": war[9]
+        }
+
+    def find_idle_wars(self, cur, idle_minutes=WAR_IDLE_MINUTES, limit=WAR_AUTO_RESOLVE_BATCH):
+        """Ids of active wars with no turn for ``idle_minutes``, oldest first"""
+        cur.execute('''
+        SELECT id FROM wars
+        WHERE status = 'active' AND last_turn_at <= datetime('now', ?)
+        ORDER BY last_turn_at
+        LIMIT ?
+        ''', (f'-{idle_minutes} minutes', limit))
+        return [row[0] for row in cur.fetchall()]
+
+    def auto_resolve_idle_war(self, cur, war_id, idle_minutes=WAR_IDLE_MINUTES):
+        """Play one idle war to the end with default actions.
+
+        Meant for ``db.aio.run_write`` so each war is its own short transaction.
+        Returns the final battle report, or None if the war is no longer idle
+        or had no one left to fight.
+        """
+        cur.execute('''
+        SELECT * FROM wars
+        WHERE id = ? AND status = 'active' AND last_turn_at <= datetime('now', ?)
+        ''', (war_id, f'-{idle_minutes} minutes'))
+        war = cur.fetchone()
+        if not war:
+            return None
+        
+        attacker = self.db.get_alliance_by_id(war[1])
+        defender = self.db.get_alliance_by_id(war[2])
+        if not attacker or not defender:
+            # A side was deleted; nothing left to fight over
+            self.db.end_war(war[0], None)
+            return None
+        
+        first_turn = (war[12] or 0) + 1
+        report = self._play_turn(war, attacker, defender, "saldır", "savun")
+        while not report["war_ended"]:
+            cur.execute('SELECT * FROM wars WHERE id = ?', (war[0],))
+            war = cur.fetchone()
+            report = self._play_turn(war, attacker, defender, "saldır", "savun")
+        
+        report["auto_resolved"] = True
+        report["turns_resolved"] = report["turn"] - first_turn + 1
+        return report
+
+    def _calculate_combat_power(self, alliance, soldiers, action, weather, terrain, is_attacker, battle_size="orta"):
+        """Calculate combat power for an alliance"""
+        return self.kernel.power(alliance[1], soldiers, action, weather, terrain, is_attacker, battle_size)
 
     def _determine_battle_result(self, att_power, def_power):
         """Determine battle result based on power comparison"""
@@ -309,19 +308,13 @@ class WarSystem:
 
     def _get_battle_result_text(self, battle_result):
         """Get battle result description"""
-        result_texts = {
-            "attacker_major": "Saldıran taraf büyük zafer kazandı!",
-            "attacker_minor": "Saldıran taraf zafer kazandı!",
-            "defender_major": "Savunan taraf büyük zafer kazandı!",
-            "defender_minor": "Savunan taraf zafer kazandı!",
-            "draw": "Berabere! Her iki taraf da kayıp verdi."
-        }
-        return result_texts.get(battle_result, "Savaş devam ediyor.")
+        return BATTLE_RESULT_TEXTS.get(battle_result, "Savaş devam ediyor.")
 
-    async def _end_war_no_soldiers(self, war_id, winner_id, attacker, defender):
+    def _end_war_no_soldiers(self, war_id, winner_id, attacker, defender):
         """End war when one side has no soldiers left"""
-        self.db.end_war(war_id, winner_id)
-        await self._apply_war_consequences(war_id, attacker, defender, winner_id)
+        with self.db.transaction():
+            self.db.end_war(war_id, winner_id)
+            self._apply_war_consequences(war_id, attacker, defender, winner_id)
 
     def _create_war_end_report(self, war_id, turn_number, attacker, defender, winner_id, reason):
         """Create a war end report"""
@@ -344,38 +337,39 @@ class WarSystem:
             "terrain": "ova"
         }
 
-    async def _apply_war_consequences(self, war_id, attacker, defender, winner_id):
+    def _apply_war_consequences(self, war_id, attacker, defender, winner_id):
         """Apply consequences of war end"""
         try:
-            if winner_id == attacker[0]:  # Attacker wins
-                # Attacker gains resources
-                gold_gain = max(100, defender[3] // 4)  # 25% of defender's gold, minimum 100
-                soldiers_gain = min(1000, max(50, defender[4] // 10))  # 10% of defender's soldiers or max 1000
+            with self.db.transaction():
+                if winner_id == attacker[0]:  # Attacker wins
+                    # Attacker gains resources
+                    gold_gain = max(100, defender[3] // 4)  # 25% of defender's gold, minimum 100
+                    soldiers_gain = min(1000, max(50, defender[4] // 10))  # 10% of defender's soldiers or max 1000
                 
-                self.db.update_alliance_resources(attacker[0], gold_gain, soldiers_gain)
-                self.db.update_alliance_resources(defender[0], -min(gold_gain, defender[3] // 2), -soldiers_gain)
+                    self.db.update_alliance_resources(attacker[0], gold_gain, soldiers_gain, "war_plunder")
+                    self.db.update_alliance_resources(defender[0], -min(gold_gain, defender[3] // 2), -soldiers_gain, "war_defeat")
                 
-                # Seize income sources
-                defender_sources = self.db.get_income_sources(defender[0])
-                sources_to_seize = min(2, len([s for s in defender_sources if not s[9]]))  # Max 2 non-seized sources
+                    # Seize income sources
+                    defender_sources = self.db.get_income_sources(defender[0])
+                    sources_to_seize = min(2, len([s for s in defender_sources if not s[9]]))  # Max 2 non-seized sources
                 
-                unseized_sources = [s for s in defender_sources if not s[9]][:sources_to_seize]
-                for source in unseized_sources:
-                    self.db.c.execute('''
-                    UPDATE income_sources SET seized = 1, seized_by = ?
-                    WHERE id = ?
-                    ''', (attacker[0], source[0]))
+                    unseized_sources = [s for s in defender_sources if not s[9]][:sources_to_seize]
+                    for source in unseized_sources:
+                        self.db.c.execute('''
+                        UPDATE income_sources SET seized = 1, seized_by = ?
+                        WHERE id = ?
+                        ''', (attacker[0], source[0]))
                 
-            elif winner_id == defender[0]:  # Defender wins
-                # Defender gets smaller rewards for successful defense
-                gold_gain = max(50, attacker[3] // 8)  # 12.5% of attacker's gold, minimum 50
+                elif winner_id == defender[0]:  # Defender wins
+                    # Defender gets smaller rewards for successful defense
+                    gold_gain = max(50, attacker[3] // 8)  # 12.5% of attacker's gold, minimum 50
                 
-                self.db.update_alliance_resources(defender[0], gold_gain, 0)
-                self.db.update_alliance_resources(attacker[0], -min(gold_gain, attacker[3] // 3), 0)
-            
-            self.db.conn.commit()
+                    self.db.update_alliance_resources(defender[0], gold_gain, 0, "war_plunder")
+                    self.db.update_alliance_resources(attacker[0], -min(gold_gain, attacker[3] // 3), 0, "war_defeat")
             
         except Exception as e:
+            if self.db.in_transaction():
+                raise  # Don't let the battle turn commit half-applied plunder
             logger.error(f"Error applying war consequences: {e}")
 
     def create_battle_embed(self, battle_report):
@@ -456,7 +450,7 @@ class WarSystem:
             
             # Get battle logs
             self.db.c.execute('''
-            SELECT turn_number, attacker_action, defender_action, result, 
+            SELECT turn_number, attacker_action, defender_action,
                    attacker_damage, defender_damage, timestamp
             FROM battle_logs 
             WHERE war_id = ?
@@ -483,13 +477,13 @@ class WarSystem:
         war = war_status["war"]
         battles = war_status["recent_battles"]
         
-        att_emoji = get_house_emoji(war[11])  # attacker_name
-        def_emoji = get_house_emoji(war[12])  # defender_name
+        att_emoji = get_house_emoji(war[16])  # attacker_name
+        def_emoji = get_house_emoji(war[17])  # defender_name
         weather_emoji = get_weather_emoji(war[8])
         terrain_emoji = get_terrain_emoji(war[9])
         
         title = f"⚔️ Savaş #{war[0]} - {war[3].title()}"
-        description = f"{att_emoji} **{war[11]}** vs {def_emoji} **{war[12]}**"
+        description = f"{att_emoji} **{war[16]}** vs {def_emoji} **{war[17]}**"
         
         embed = create_embed(title, description, discord.Color.orange())
         
@@ -511,11 +505,20 @@ class WarSystem:
             inline=True
         )
         
+        # Remaining soldiers as of the last turn
+        if war[13] is not None and war[14] is not None:
+            embed.add_field(
+                name=f"🛡️ Kalan Asker (Tur {war[12]})",
+                value=f"{att_emoji} {format_number(war[13])} asker\n"
+                      f"{def_emoji} {format_number(war[14])} asker",
+                inline=True
+            )
+        
         # Recent battles
         if battles:
             battle_history = []
             for battle in battles[:5]:  # Show last 5 battles
-                turn_num, att_action, def_action, result, _, _, timestamp = battle
+                turn_num, att_action, def_action, _, _, timestamp = battle
                 battle_history.append(f"**Tur {turn_num}:** {att_action} vs {def_action}")
             
             embed.add_field(